@@ -1,6 +1,8 @@
 """The PowerCalc integration."""
 
 import asyncio
+from collections.abc import Callable, Coroutine
+from datetime import datetime
 from functools import partial
 import logging
 import random
@@ -16,11 +18,12 @@ from homeassistant.const import (
     CONF_DEVICE,
     CONF_DOMAIN,
     CONF_ENABLED,
+    EVENT_COMPONENT_LOADED,
     EVENT_HOMEASSISTANT_STARTED,
     Platform,
     __version__ as HA_VERSION,  # noqa: N812
 )
-from homeassistant.core import Event, HassJob, HomeAssistant, ServiceCall, callback
+from homeassistant.core import Event, HassJob, HomeAssistant, ServiceCall, SupportsResponse, callback
 from homeassistant.helpers import issue_registry as ir
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.discovery import async_load_platform
@@ -29,6 +32,7 @@ import homeassistant.helpers.entity_registry as er
 from homeassistant.helpers.event import async_call_later, async_track_time_interval
 from homeassistant.helpers.reload import async_integration_yaml_config
 from homeassistant.helpers.typing import ConfigType
+from homeassistant.setup import ATTR_COMPONENT, EventComponentLoaded
 import voluptuous as vol
 
 from .analytics.analytics import ANALYTICS_INTERVAL, Analytics
@@ -53,6 +57,7 @@ from .const import (
     CONF_DISCOVERY_EXCLUDE_SELF_USAGE_DEPRECATED,
     CONF_ENABLE_ANALYTICS,
     CONF_ENABLE_AUTODISCOVERY_DEPRECATED,
+    CONF_ENABLE_PERFORMANCE_STATS,
     CONF_ENERGY_INTEGRATION_METHOD,
     CONF_ENERGY_PRICE,
     CONF_ENERGY_PRICE_MULTIPLIER,
@@ -91,7 +96,11 @@ from .const import (
     DATA_ENTITIES,
     DATA_GROUP_ENTITIES,
     DATA_MEASURE_APP_COORDINATOR,
+    DATA_PERFORMANCE_STATS,
+    DATA_PRIMARY_SETUPS,
+    DATA_PROFILE_BUNDLES,
     DATA_STANDBY_POWER_SENSORS,
+    DATA_STARTUP_TIMINGS,
     DATA_USED_UNIQUE_IDS,
     DISCOVERY_TYPE,
     DOMAIN,
@@ -102,6 +111,8 @@ from .const import (
     ISSUE_COMPOSITE_DEVICE_ID,
     MIN_HA_VERSION,
     SERVICE_CHANGE_GUI_CONFIGURATION,
+    SERVICE_CORRECT_ENERGY_PRICE,
+    SERVICE_GET_PERFORMANCE_STATS,
     SERVICE_RELOAD,
     SERVICE_UPDATE_LIBRARY,
     PowercalcDiscoveryType,
@@ -110,15 +121,31 @@ from .const import (
 )
 from .device_binding import is_composite_device_id
 from .discovery import DiscoveryManager, DiscoveryStatus, get_discovery_manager
+from .group_include.filter import filter_depends_on_states
+from .helpers import PendingSetups
 from .measure import MeasureAppCoordinator
 from .migrate import async_fix_legacy_profile_config_entry, async_migrate_config_entry
+from .performance import create_performance_stats
+from .power_profile.bundle import get_profile_bundles
 from .power_profile.power_profile import DeviceType
 from .sensors.group.config_entry_utils import (
     get_entries_excluding_global_config,
     get_entries_having_subgroup,
     remove_power_sensor_from_associated_groups,
 )
+from .service.energy_price import SERVICE_SCHEMA as CORRECT_ENERGY_PRICE_SCHEMA, correct_energy_price
 from .service.gui_configuration import SERVICE_SCHEMA, change_gui_configuration
+from .service.performance_stats import (
+    SERVICE_SCHEMA as GET_PERFORMANCE_STATS_SCHEMA,
+    get_performance_stats_response,
+)
+from .startup_timing import (
+    STARTUP_REPORT_DELAY,
+    async_time_phase,
+    create_startup_timings,
+    get_sensor_label,
+    get_startup_timings,
+)
 
 PLATFORMS = [Platform.SENSOR, Platform.SELECT]
 
@@ -144,6 +171,7 @@ CONFIG_SCHEMA = vol.Schema(
             vol.Schema(
                 {
                     vol.Optional(CONF_ENABLE_ANALYTICS): cv.boolean,
+                    vol.Optional(CONF_ENABLE_PERFORMANCE_STATS): cv.boolean,
                     vol.Optional(
                         CONF_FORCE_UPDATE_FREQUENCY_DEPRECATED,
                     ): cv.time_period,
@@ -202,6 +230,10 @@ _LOGGER = logging.getLogger(__name__)
 
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    return await async_time_phase(hass, "async_setup", _async_setup(hass, config))
+
+
+async def _async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     if AwesomeVersion(HA_VERSION) < AwesomeVersion(MIN_HA_VERSION):  # pragma: no cover
         msg = (
             "This integration requires at least HomeAssistant version "
@@ -227,6 +259,9 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
         DATA_USED_UNIQUE_IDS: [],
         DATA_STANDBY_POWER_SENSORS: {},
         DATA_ANALYTICS: {},
+        DATA_PERFORMANCE_STATS: create_performance_stats(global_config),
+        DATA_STARTUP_TIMINGS: create_startup_timings(global_config),
+        DATA_PROFILE_BUNDLES: get_profile_bundles(hass),
     }
 
     discovery_manager.setup()
@@ -246,6 +281,7 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
         _LOGGER.exception("problem while cleaning up None entities")  # pragma: no cover
 
     await init_analytics(hass)
+    setup_startup_report(hass)
 
     return True
 
@@ -279,6 +315,27 @@ async def init_analytics(hass: HomeAssistant) -> None:
     hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STARTED, start_schedule)
 
 
+def setup_startup_report(hass: HomeAssistant) -> None:
+    """Log the slowest startup phases and sensors, once the deferred setup after startup has had time to finish."""
+    timings = get_startup_timings(hass)
+    if not timings:
+        return
+
+    @callback
+    def _log_report(_: datetime) -> None:
+        timings.log_report()
+
+    @callback
+    def _schedule_report(_event: Event) -> None:
+        async_call_later(
+            hass,
+            STARTUP_REPORT_DELAY,
+            HassJob(_log_report, name="powercalc startup report", cancel_on_shutdown=True),
+        )
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STARTED, _schedule_report)
+
+
 def create_discovery_manager_instance(
     hass: HomeAssistant,
     ha_config: ConfigType,
@@ -313,10 +370,28 @@ def register_services(hass: HomeAssistant) -> None:
         schema=SERVICE_SCHEMA,
     )
 
+    async def _handle_correct_energy_price_service(call: ServiceCall) -> None:
+        await correct_energy_price(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_CORRECT_ENERGY_PRICE,
+        _handle_correct_energy_price_service,
+        schema=CORRECT_ENERGY_PRICE_SCHEMA,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_PERFORMANCE_STATS,
+        partial(get_performance_stats_response, hass),
+        schema=GET_PERFORMANCE_STATS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
     async def _handle_update_library_service(_: ServiceCall) -> None:
         _LOGGER.info("Updating library and rediscovering devices")
         discovery_manager = get_discovery_manager(hass)
-        await discovery_manager.update_library_and_rediscover()
+        await discovery_manager.update_library_and_rediscover(force=True)
 
     hass.services.async_register(
         DOMAIN,
@@ -337,6 +412,7 @@ def register_services(hass: HomeAssistant) -> None:
         hass.data[DOMAIN][DATA_CONFIGURED_ENTITIES] = {}
         hass.data[DOMAIN][DATA_ANALYTICS] = {}
         hass.data[DOMAIN][DOMAIN_CONFIG] = get_global_configuration(hass, reload_config)
+        hass.data[DOMAIN][DATA_PERFORMANCE_STATS] = create_performance_stats(hass.data[DOMAIN][DOMAIN_CONFIG])
 
         # Reload YAML sensors if any
         if DOMAIN in reload_config:
@@ -411,34 +487,95 @@ async def setup_yaml_sensors(
     config: ConfigType,
     domain_config: ConfigType,
 ) -> None:
+    """Set up the YAML sensors, sensors including other entities after the entities they depend on.
+
+    Include filters only reading the registries run once powercalc and the sensors they may resolve are set up,
+    those are the YAML sensors without include and the sensors of the config entries. Filters reading states or
+    entities of other integrations, `group` and `template`, wait until Home Assistant started.
+    """
     sensors: list[ConfigType] = domain_config.get(CONF_SENSORS, [])
     primary_sensors = []
+    registry_include_sensors = []
     secondary_sensors = []
 
     for sensor_config in sensors:
         sensor_config.update({DISCOVERY_TYPE: PowercalcDiscoveryType.USER_YAML})
 
-        if CONF_INCLUDE in sensor_config:
+        if CONF_INCLUDE not in sensor_config:
+            primary_sensors.append(sensor_config)
+        elif filter_depends_on_states(sensor_config[CONF_INCLUDE]):
             secondary_sensors.append(sensor_config)
         else:
-            primary_sensors.append(sensor_config)
+            registry_include_sensors.append(sensor_config)
 
-    async def _load_secondary_sensors(_: None) -> None:
-        """Load secondary sensors after primary sensors."""
+    async def _load_sensors(sensor_configs: list[ConfigType]) -> None:
         await asyncio.gather(
             *(
                 hass.async_create_task(_async_load_yaml_sensor(hass, sensor_config, config))
-                for sensor_config in secondary_sensors
+                for sensor_config in sensor_configs
             ),
         )
 
-    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STARTED, _load_secondary_sensors)
+    async def _load_secondary_sensors(_: None) -> None:
+        """Load secondary sensors after primary sensors."""
+        await async_time_phase(hass, "setup_yaml_sensors.secondary", _load_sensors(secondary_sensors))
 
-    await asyncio.gather(
-        *(
-            hass.async_create_task(_async_load_yaml_sensor(hass, sensor_config, config))
-            for sensor_config in primary_sensors
-        ),
+    primary_setups = PendingSetups(
+        len(primary_sensors) + _count_sensor_config_entries(hass) if registry_include_sensors else 0,
+    )
+    hass.data[DOMAIN][DATA_PRIMARY_SETUPS] = primary_setups
+    if registry_include_sensors:
+        _schedule_registry_include_sensors(
+            hass,
+            primary_setups,
+            lambda: async_time_phase(hass, "setup_yaml_sensors.include", _load_sensors(registry_include_sensors)),
+        )
+    if secondary_sensors:
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STARTED, _load_secondary_sensors)
+
+    await async_time_phase(hass, "setup_yaml_sensors.primary", _load_sensors(primary_sensors))
+
+
+def _count_sensor_config_entries(hass: HomeAssistant) -> int:
+    """Number of config entries which will set up sensors once powercalc is loaded."""
+    return sum(
+        1
+        for entry in hass.config_entries.async_entries(DOMAIN, include_ignore=False, include_disabled=False)
+        if entry.unique_id != ENTRY_GLOBAL_CONFIG_UNIQUE_ID
+    )
+
+
+def _schedule_registry_include_sensors(
+    hass: HomeAssistant,
+    primary_setups: PendingSetups,
+    load_sensors: Callable[[], Coroutine[Any, Any, None]],
+) -> None:
+    """Load the sensors with registry include filters once powercalc and the primary sensors are set up.
+
+    The includes resolve powercalc sensors through the entities powercalc created, so the primary YAML sensors
+    and the config entry sensors report to primary_setups when their setup finished. async_load_platform and the
+    config entry setups don't wait for the platform setups. Home Assistant having started ends the wait anyway,
+    for instance when a config entry fails to set up.
+    """
+
+    async def _load_registry_include_sensors(_: Event) -> None:
+        remove_listener()
+        await primary_setups.wait()
+        await load_sensors()
+
+    @callback
+    def _is_powercalc_loaded(event_data: EventComponentLoaded) -> bool:
+        return event_data[ATTR_COMPONENT] == DOMAIN
+
+    @callback
+    def _stop_waiting_for_primary_sensors(_: Event) -> None:
+        primary_setups.finish_all()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STARTED, _stop_waiting_for_primary_sensors)
+    remove_listener = hass.bus.async_listen(
+        EVENT_COMPONENT_LOADED,
+        _load_registry_include_sensors,
+        event_filter=_is_powercalc_loaded,
     )
 
 
@@ -448,7 +585,15 @@ async def _async_load_yaml_sensor(hass: HomeAssistant, sensor_config: ConfigType
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Powercalc integration from a config entry."""
+    return await async_time_phase(
+        hass,
+        "async_setup_entry",
+        _async_setup_entry(hass, entry),
+        sensor=get_sensor_label(entry.data),
+    )
+
 
+async def _async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     await async_fix_legacy_profile_config_entry(hass, entry)
     _async_handle_composite_device_issue(hass, entry)
     await hass.config_entries.async_forward_entry_setups(entry, [Platform.SENSOR, Platform.SELECT])
@@ -31,8 +31,16 @@ DATA_DOMAIN_ENTITIES = "domain_entities"
 DATA_ENTITIES = "entities"
 DATA_GROUP_ENTITIES = "group_entities"
 DATA_MEASURE_APP_COORDINATOR = "measure_app_coordinator"
+DATA_PERFORMANCE_STATS = "performance_stats"
+DATA_PLAYBOOK_CACHE = "playbook_cache"
+DATA_PRICE_TIMELINES = "price_timelines"
+DATA_PROFILE_BUNDLES = "profile_bundles"
+DATA_SENSOR_SETUP_LIMITER = "sensor_setup_limiter"
+DATA_PRIMARY_SETUPS = "primary_setups"
 DATA_USED_UNIQUE_IDS = "used_unique_ids"
 DATA_STANDBY_POWER_SENSORS = "standby_power_sensors"
+DATA_STARTUP_TIMINGS = "startup_timings"
+DATA_STATE_DISPATCHER = "state_dispatcher"
 DATA_ANALYTICS = "analytics"
 DATA_ANALYTICS_SEEN_ENTRIES = "analytics_seen_entries"
 DATA_POWER_PROFILES: Literal["power_profiles"] = "power_profiles"
@@ -59,6 +67,7 @@ CONF_ALL = "all"
 CONF_AND = "and"
 CONF_APPLY_TO_ALL = "apply_to_all"
 CONF_ENABLE_ANALYTICS = "enable_analytics"
+CONF_ENABLE_PERFORMANCE_STATS = "enable_performance_stats"
 CONF_AREA = "area"
 CONF_AUTOSTART = "autostart"
 CONF_AVAILABILITY_ENTITY = "availability_entity"
@@ -111,6 +120,7 @@ CONF_ENERGY_SENSOR_UNIT_PREFIX = "energy_sensor_unit_prefix"
 CONF_ENERGY_UPDATE_INTERVAL = "energy_update_interval"
 CONF_ENERGY_FILTER_OUTLIER_ENABLED = "energy_filter_outlier_enabled"
 CONF_ENERGY_FILTER_OUTLIER_MAX = "energy_filter_outlier_max_step"
+CONF_ENTITY_POWER = "entity_power"
 CONF_EXCLUDE_ENTITIES = "exclude_entities"
 CONF_FILTER = "filter"
 CONF_FIXED = "fixed"
@@ -133,12 +143,14 @@ CONF_HIDE_MEMBERS = "hide_members"
 CONF_IGNORE_UNAVAILABLE_STATE = "ignore_unavailable_state"
 CONF_INCLUDE = "include"
 CONF_INCLUDE_NON_POWERCALC_SENSORS = "include_non_powercalc_sensors"
+CONF_INTERPOLATION = "interpolation"
 CONF_LABEL = "label"
 CONF_LINEAR = "linear"
 CONF_LUT = "lut"
 CONF_MAIN_POWER_SENSOR = "main_power_sensor"
 CONF_MANUFACTURER = "manufacturer"
 CONF_MAX_POWER = "max_power"
+CONF_MIN_OUTPUT_INTERVAL = "min_output_interval"
 CONF_MIN_POWER = "min_power"
 CONF_MODEL = "model"
 CONF_MODE = "mode"
@@ -178,6 +190,7 @@ CONF_SUB_GROUPS = "sub_groups"
 CONF_SUB_PROFILE = "sub_profile"
 CONF_SUBTRACT_ENTITIES = "subtract_entities"
 CONF_TEMPLATE = "template"
+CONF_TIME_WEIGHTED_AVERAGE = "time_weighted_average"
 CONF_UNAVAILABLE_POWER = "unavailable_power"
 CONF_UPDATE_FREQUENCY = "update_frequency"
 CONF_UTILITY_METER_NET_CONSUMPTION = "utility_meter_net_consumption"
@@ -266,9 +279,11 @@ SERVICE_CALIBRATE_COST = "calibrate_cost"
 SERVICE_CALIBRATE_UTILITY_METER = "calibrate_utility_meter"
 SERVICE_CALIBRATE_ENERGY = "calibrate_energy"
 SERVICE_CHANGE_GUI_CONFIGURATION = "change_gui_config"
+SERVICE_CORRECT_ENERGY_PRICE = "correct_energy_price"
 SERVICE_DEBUG_GROUP = "debug_group"
 SERVICE_GET_ACTIVE_PLAYBOOK = "get_active_playbook"
 SERVICE_GET_GROUP_ENTITIES = "get_group_entities"
+SERVICE_GET_PERFORMANCE_STATS = "get_performance_stats"
 SERVICE_INCREASE_DAILY_ENERGY = "increase_daily_energy"
 SERVICE_RESET_COST = "reset_cost"
 SERVICE_RESET_ENERGY = "reset_energy"
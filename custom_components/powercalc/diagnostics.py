@@ -4,12 +4,15 @@ from typing import Any
 from homeassistant.components.sensor import SensorDeviceClass
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.reload import async_integration_yaml_config
 from homeassistant.helpers.typing import ConfigType
 
-from custom_components.powercalc.const import CONF_SENSOR_TYPE, DOMAIN, SensorType
+from custom_components.powercalc.const import CONF_SENSOR_TYPE, DOMAIN, ENTRY_GLOBAL_CONFIG_UNIQUE_ID, SensorType
+from custom_components.powercalc.performance import get_performance_stats
 from custom_components.powercalc.sensors.group.config_entry_utils import get_entries_excluding_global_config
 from custom_components.powercalc.sensors.group.custom import resolve_entity_ids_recursively
+from custom_components.powercalc.startup_timing import STARTUP_REPORT_LIMIT, get_startup_timings
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -30,6 +33,18 @@ async def async_get_config_entry_diagnostics(
         data["power_entities"] = await resolve_entity_ids_recursively(hass, entry, SensorDeviceClass.POWER)
         data["energy_entities"] = await resolve_entity_ids_recursively(hass, entry, SensorDeviceClass.ENERGY)
 
+    performance_stats = get_performance_stats(hass)
+    if performance_stats:
+        entity_ids = {
+            entity.entity_id for entity in er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id)
+        }
+        data["performance_stats"] = performance_stats.as_dict(entity_ids)
+
+    # Startup timings cover the whole integration, include them once in the global configuration entry
+    startup_timings = get_startup_timings(hass)
+    if startup_timings and entry.unique_id == ENTRY_GLOBAL_CONFIG_UNIQUE_ID:
+        data["startup_timings"] = startup_timings.as_dict(STARTUP_REPORT_LIMIT)
+
     return data
 
 
@@ -10,11 +10,25 @@ from typing import Any
 
 from homeassistant.components.light import DOMAIN as LIGHT_DOMAIN
 from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
-from homeassistant.config_entries import SOURCE_INTEGRATION_DISCOVERY, SOURCE_USER, ConfigEntry
-from homeassistant.const import CONF_DEVICE, CONF_ENTITY_ID, CONF_PLATFORM, CONF_UNIQUE_ID
-from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant
+from homeassistant.config_entries import (
+    SIGNAL_CONFIG_ENTRY_CHANGED,
+    SOURCE_INTEGRATION_DISCOVERY,
+    SOURCE_USER,
+    ConfigEntry,
+    ConfigEntryChange,
+)
+from homeassistant.const import (
+    CONF_DEVICE,
+    CONF_ENTITY_ID,
+    CONF_PLATFORM,
+    CONF_UNIQUE_ID,
+    EVENT_HOMEASSISTANT_STOP,
+)
+from homeassistant.core import CALLBACK_TYPE, Event, HassJob, HomeAssistant, callback
 from homeassistant.helpers import discovery_flow
+from homeassistant.helpers.debounce import Debouncer
 import homeassistant.helpers.device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import EntityCategory
 import homeassistant.helpers.entity_registry as er
 from homeassistant.helpers.event import async_call_later, async_track_time_interval
@@ -40,11 +54,14 @@ from .device_binding import (
     get_config_entry_ids,
     get_non_composite_devices,
     get_related_device_ids,
+    is_composite_device_id,
 )
+from .discovery_cache import DiscoveryMatchCache, create_match_key
 from .group_include.filter import (
     CategoryFilter,
     CompositeFilter,
     DomainFilter,
+    EntityFilter,
     FilterOperator,
     LambdaFilter,
     NotFilter,
@@ -60,6 +77,7 @@ from .power_profile.power_profile import (
     PowerProfile,
     is_device_type_supported_for_entity,
 )
+from .startup_timing import async_time_phase
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -69,6 +87,12 @@ _LOGGER = logging.getLogger(__name__)
 DISCOVERY_DELAY = timedelta(seconds=10)
 REDISCOVERY_INTERVAL = timedelta(hours=2)
 DISCOVERY_KEY_PREFIX = "pc_"
+# Registry changes arrive in bursts, an integration adding a device registers all of its entities at once.
+# They are collected for this many seconds and discovered together.
+INCREMENTAL_DISCOVERY_COOLDOWN = 2
+# Registry changes which can change the discovery outcome of an entity or device
+ENTITY_DISCOVERY_CHANGES = frozenset({"device_id", "disabled_by", "entity_category", "entity_id"})
+DEVICE_DISCOVERY_CHANGES = frozenset({"config_entries", "manufacturer", "model", "model_id"})
 
 
 def device_discovery_key(device_id: str) -> str:
@@ -154,6 +178,8 @@ class DiscoveryStats:
     low_priority_integration: int = 0
     no_model_info: int = 0
     no_profile_match: int = 0
+    # Candidates counted in no_profile_match without searching the library, see DiscoveryMatchCache
+    cache_hits: int = 0
     already_configured: int = 0
     flows_initiated: int = 0
     errors: int = 0
@@ -175,6 +201,9 @@ class DiscoveryManager:
     """This class is responsible for scanning the HA instance for entities and their manufacturer / model info
     It checks if any of these devices is supported in the powercalc library
     When entities are found it will dispatch a discovery flow, so the user can add them to their HA instance.
+
+    The whole instance is only scanned initially and when the library changed. After the initial scan, entities,
+    devices and config entries added or changed in the registries are discovered incrementally.
     """
 
     def __init__(
@@ -195,6 +224,18 @@ class DiscoveryManager:
         self._exclude_self_usage_profiles = exclude_self_usage_profiles
         self._cancel_library_update_interval: CALLBACK_TYPE | None = None
         self._cancel_initial_discovery: CALLBACK_TYPE | None = None
+        self._match_cache = DiscoveryMatchCache(hass)
+        self._changed_entity_ids: set[str] = set()
+        self._changed_device_ids: set[str] = set()
+        self._changed_config_entry_ids: set[str] = set()
+        self._cancel_change_listeners: list[CALLBACK_TYPE] = []
+        self._incremental_discovery = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=INCREMENTAL_DISCOVERY_COOLDOWN,
+            immediate=False,
+            function=self._async_discover_changes,
+        )
         self._status = DiscoveryStatus.NOT_STARTED if enabled else DiscoveryStatus.DISABLED
 
     def setup(self) -> None:
@@ -258,14 +299,24 @@ class DiscoveryManager:
             HassJob(_start_discovery, "powercalc initial discovery", cancel_on_shutdown=True),
         )
 
-    async def update_library_and_rediscover(self) -> None:
-        """Update the library and rediscover entities."""
+    async def update_library_and_rediscover(self, force: bool = False) -> None:
+        """Update the library and rediscover all entities when it changed, or always when `force` is set.
+
+        Without a library change, new and changed entities are already discovered incrementally.
+        """
         library = await self._get_library()
+        library_hash = library.library_hash
         await library.initialize(prefer_cached=False)
+        if not force and library.library_hash == library_hash:
+            _LOGGER.debug("Library did not change, skipping rediscovery")
+            return
         await self.start_discovery()
 
     async def start_discovery(self) -> None:
         """Start the discovery procedure."""
+        await async_time_phase(self.hass, "discovery", self._async_start_discovery())
+
+    async def _async_start_discovery(self) -> None:
         if self._status == DiscoveryStatus.DISABLED:
             _LOGGER.debug("Discovery manager is disabled, skipping discovery run")
             return
@@ -275,6 +326,7 @@ class DiscoveryManager:
         self._status = DiscoveryStatus.IN_PROGRESS
         try:
             self.initialize_existing_entries()
+            await self._match_cache.async_start_run(await self._get_match_cache_fingerprint())
 
             devices = self.get_devices()
             devices_by_config_entry = self._index_devices_by_config_entry(devices)
@@ -307,9 +359,161 @@ class DiscoveryManager:
                 "Done auto discovery, initiated %d discovery flow(s)",
                 entity_stats.flows_initiated + device_stats.flows_initiated + config_entry_stats.flows_initiated,
             )
+            self._match_cache.async_finish_run()
+            self._listen_for_changes()
         finally:
             self._status = DiscoveryStatus.FINISHED
 
+    def _listen_for_changes(self) -> None:
+        """Listen for registry and config entry changes, to discover them incrementally."""
+        if self._cancel_change_listeners:
+            return
+        self._cancel_change_listeners = [
+            self.hass.bus.async_listen(EVENT_HOMEASSISTANT_STOP, self._handle_stop),
+            self.hass.bus.async_listen(er.EVENT_ENTITY_REGISTRY_UPDATED, self._handle_entity_registry_updated),
+            self.hass.bus.async_listen(dr.EVENT_DEVICE_REGISTRY_UPDATED, self._handle_device_registry_updated),
+            async_dispatcher_connect(self.hass, SIGNAL_CONFIG_ENTRY_CHANGED, self._handle_config_entry_changed),
+        ]
+
+    def _stop_listening_for_changes(self) -> None:
+        for cancel in self._cancel_change_listeners:
+            cancel()
+        self._cancel_change_listeners = []
+        self._incremental_discovery.async_cancel()
+        self._changed_entity_ids.clear()
+        self._changed_device_ids.clear()
+        self._changed_config_entry_ids.clear()
+
+    @callback
+    def _handle_stop(self, _: Event) -> None:
+        self._stop_listening_for_changes()
+
+    @callback
+    def _handle_entity_registry_updated(self, event: Event[er.EventEntityRegistryUpdatedData]) -> None:
+        data = event.data
+        if data["action"] == "create" or (
+            data["action"] == "update" and not ENTITY_DISCOVERY_CHANGES.isdisjoint(data["changes"])
+        ):
+            self._changed_entity_ids.add(data["entity_id"])
+            self._incremental_discovery.async_schedule_call()
+
+    @callback
+    def _handle_device_registry_updated(self, event: Event[dr.EventDeviceRegistryUpdatedData]) -> None:
+        data = event.data
+        if data["action"] == "create" or (
+            data["action"] == "update" and not DEVICE_DISCOVERY_CHANGES.isdisjoint(data["changes"])
+        ):
+            self._changed_device_ids.add(data["device_id"])
+            self._incremental_discovery.async_schedule_call()
+
+    @callback
+    def _handle_config_entry_changed(self, change: ConfigEntryChange, entry: ConfigEntry) -> None:
+        if entry.domain == DOMAIN:
+            self._handle_powercalc_entry_changed(change, entry)
+            return
+        if change == ConfigEntryChange.ADDED:
+            self._changed_config_entry_ids.add(entry.entry_id)
+            self._incremental_discovery.async_schedule_call()
+
+    @callback
+    def _handle_powercalc_entry_changed(self, change: ConfigEntryChange, entry: ConfigEntry) -> None:
+        """Keep the configured keys up to date without a full scan, so configured sources are not discovered again."""
+        if change == ConfigEntryChange.REMOVED:
+            # Rebuilt from the remaining entries, another entry or the YAML may still configure the same source
+            self._configured_discovery_keys = self._collect_configured_discovery_keys(entry.entry_id)
+            self._manually_configured_entities = None
+            return
+        if change != ConfigEntryChange.ADDED:
+            return
+        self._configured_discovery_keys.update(self._discovery_keys_for_entry(entry))
+        entity_id = entry.data.get(CONF_ENTITY_ID)
+        if (
+            self._manually_configured_entities is not None
+            and entry.source == SOURCE_USER
+            and isinstance(entity_id, str)
+        ):
+            self._manually_configured_entities.add(entity_id)
+
+    async def _async_discover_changes(self) -> None:
+        """Discover the entities, devices and config entries which were added or changed since the last run."""
+        if self._status == DiscoveryStatus.DISABLED:
+            return
+        if self._status == DiscoveryStatus.IN_PROGRESS:
+            # Keep the changes, they are discovered after the running full discovery finished
+            self._incremental_discovery.async_schedule_call()
+            return
+
+        entity_ids, self._changed_entity_ids = self._changed_entity_ids, set()
+        device_ids, self._changed_device_ids = self._changed_device_ids, set()
+        config_entry_ids, self._changed_config_entry_ids = self._changed_config_entry_ids, set()
+
+        devices = self._get_changed_devices(device_ids)
+        config_entry_ids.update(
+            config_entry_id for device in devices for config_entry_id in get_config_entry_ids(device)
+        )
+        # Entity discovery uses the model information of the device
+        entity_reg = er.async_get(self.hass)
+        entity_ids.update(
+            entity.entity_id for device in devices for entity in er.async_entries_for_device(entity_reg, device.id)
+        )
+
+        _LOGGER.debug(
+            "Start incremental discovery (entities=%d, devices=%d, config_entries=%d)",
+            len(entity_ids),
+            len(devices),
+            len(config_entry_ids),
+        )
+        stats = [
+            await self.perform_discovery(self._create_entity_candidates(self._get_changed_entities(entity_ids))),
+            await self.perform_discovery(self._create_device_candidates(devices)),
+            await self.perform_discovery(
+                self._create_config_entry_candidates(self._get_devices_by_changed_config_entry(config_entry_ids)),
+            ),
+        ]
+        _LOGGER.debug(
+            "Done incremental discovery, initiated %d discovery flow(s)",
+            sum(phase_stats.flows_initiated for phase_stats in stats),
+        )
+        self._match_cache.async_schedule_save()
+
+    def _get_changed_entities(self, entity_ids: Iterable[str]) -> list[er.RegistryEntry]:
+        """Get the changed entities which qualify for discovery."""
+        entity_reg = er.async_get(self.hass)
+        entity_filter = self._create_entity_filter()
+        return [
+            entity
+            for entity_id in entity_ids
+            if (entity := entity_reg.async_get(entity_id)) and not entity.disabled and entity_filter.is_valid(entity)
+        ]
+
+    def _get_changed_devices(self, device_ids: Iterable[str]) -> list[dr.DeviceEntry]:
+        device_reg = dr.async_get(self.hass)
+        return [
+            device
+            for device_id in device_ids
+            if (device := device_reg.async_get(device_id)) and not is_composite_device_id(self.hass, device_id)
+        ]
+
+    def _get_devices_by_changed_config_entry(self, config_entry_ids: Iterable[str]) -> dict[str, list[dr.DeviceEntry]]:
+        device_reg = dr.async_get(self.hass)
+        devices_by_config_entry: dict[str, list[dr.DeviceEntry]] = {}
+        for config_entry_id in config_entry_ids:
+            devices = [
+                device
+                for device in dr.async_entries_for_config_entry(device_reg, config_entry_id)
+                if not is_composite_device_id(self.hass, device.id)
+            ]
+            if devices:
+                devices_by_config_entry[config_entry_id] = devices
+        return devices_by_config_entry
+
+    async def _get_match_cache_fingerprint(self) -> str:
+        """Identify the library contents and discovery settings the cached discovery results are valid for."""
+        library = await self._get_library()
+        return (
+            f"{library.library_hash}/{','.join(sorted(self._exclude_device_types))}/{self._exclude_self_usage_profiles}"
+        )
+
     def initialize_existing_entries(self) -> None:
         """Build a list of config entries which are already setup, to prevent duplicate discovery flows"""
         self._configured_discovery_keys = self._collect_configured_discovery_keys()
@@ -374,6 +578,12 @@ class DiscoveryManager:
                 and bool(candidate.integration_domains & low_priority_domains)
             ),
         )
+        try:
+            await self._prefetch_profiles(ordered_candidates, low_priority_domains)
+        except Exception:
+            # Only an optimization, the candidates download their profiles one by one instead
+            _LOGGER.exception("Error prefetching the profiles of %d discovery candidates", len(ordered_candidates))
+        cache_hits = self._match_cache.hits
         for candidate in ordered_candidates:
             stats.candidates += 1
             try:
@@ -385,8 +595,57 @@ class DiscoveryManager:
                     candidate.log_identifier,
                     candidate.discovery_type,
                 )
+        stats.cache_hits = self._match_cache.hits - cache_hits
         return stats
 
+    async def _prefetch_profiles(self, candidates: list[DiscoveryCandidate], low_priority_domains: set[str]) -> None:
+        """Download the profiles of all candidates in one batch, instead of one by one while discovering them."""
+        models: set[ModelInfo] = set()
+        for candidate in candidates:
+            models.update(await self._find_prefetch_models(candidate, low_priority_domains))
+        if models:
+            library = await self._get_library()
+            await library.prefetch_models(models)
+
+    async def _find_prefetch_models(
+        self,
+        candidate: DiscoveryCandidate,
+        low_priority_domains: set[str],
+    ) -> set[ModelInfo]:
+        """Return the library models a candidate would load, skipping the candidates discovery skips anyway.
+
+        Mirrors the checks of `_discover_candidate` which don't need the profiles themselves. Missing one only
+        costs a profile downloaded on its own later, so this never changes the outcome of the discovery.
+        """
+        if candidate.discovery_type != DiscoveryBy.DEVICE and candidate.integration_domains & low_priority_domains:
+            return set()
+        source_entity = candidate.source_entity
+        device_entry = source_entity.device_entry
+        model_info = self.get_model_information_from_device(device_entry) if device_entry else None
+        if not model_info:
+            return set()
+        model_info = self._escape_model(model_info)
+        if source_entity.entity_entry and self.is_wled_light(model_info, source_entity.entity_entry):
+            return set()
+        if create_match_key(model_info, candidate.discovery_type, source_entity) in self._match_cache:
+            return set()
+        if self._is_already_discovered(candidate, self.create_unique_id(candidate, None)):
+            return set()
+
+        library = await self._get_library()
+        models = set()
+        for model in await library.find_models(model_info):
+            metadata = await library.get_model_metadata(model)
+            if metadata and self._check_discovery_constraints(
+                metadata.device_type,
+                metadata.discovery_by,
+                source_entity,
+                candidate.discovery_type,
+            ):
+                continue
+            models.add(model)
+        return models
+
     async def _discover_candidate(
         self,
         candidate: DiscoveryCandidate,
@@ -459,12 +718,23 @@ class DiscoveryManager:
             )
             return DiscoveryMatch(extra_data={CONF_MODE: CalculationStrategy.WLED}, unique_id=unique_id)
 
-        power_profiles = await self.find_power_profiles(model_info, source_entity, discovery_type)
-        return DiscoveryMatch(power_profiles=power_profiles) if power_profiles else None
+        match_key = create_match_key(model_info, discovery_type, source_entity)
+        if self._match_cache.has_no_match(match_key):
+            return None
 
-    def _create_entity_candidates(self) -> Iterator[DiscoveryCandidate]:
-        """Yield normalized entity discovery candidates."""
-        for entity_entry in self.get_entities():
+        power_profiles, conclusive = await self._find_power_profiles(model_info, source_entity, discovery_type)
+        if power_profiles:
+            return DiscoveryMatch(power_profiles=power_profiles)
+        if conclusive:
+            self._match_cache.add_no_match(match_key)
+        return None
+
+    def _create_entity_candidates(
+        self,
+        entities: Iterable[er.RegistryEntry] | None = None,
+    ) -> Iterator[DiscoveryCandidate]:
+        """Yield normalized entity discovery candidates, for all entities qualifying for discovery by default."""
+        for entity_entry in self.get_entities() if entities is None else entities:
             yield DiscoveryCandidate(
                 source_entity=create_source_entity(entity_entry.entity_id, self.hass),
                 discovery_type=DiscoveryBy.ENTITY,
@@ -547,6 +817,20 @@ class DiscoveryManager:
         discovery_type: DiscoveryBy,
     ) -> list[PowerProfile]:
         """Find power profiles for a given entity."""
+        power_profiles, _ = await self._find_power_profiles(model_info, source_entity, discovery_type)
+        return power_profiles
+
+    async def _find_power_profiles(
+        self,
+        model_info: ModelInfo,
+        source_entity: SourceEntity,
+        discovery_type: DiscoveryBy,
+    ) -> tuple[list[PowerProfile], bool]:
+        """Find power profiles for a given entity.
+
+        Also returns whether the result is conclusive, which it isn't when one of the found profiles couldn't be
+        loaded, for example because the download failed.
+        """
         library = await self._get_library()
         models = await library.find_models(model_info)
         log_identifier = source_entity.log_identifier
@@ -558,7 +842,7 @@ class DiscoveryManager:
                 model_info.model,
                 model_info.model_id,
             )
-            return []
+            return [], True
 
         _LOGGER.debug(
             "%s: Found %d matching library model(s): [%s]",
@@ -568,6 +852,7 @@ class DiscoveryManager:
         )
 
         power_profiles = []
+        conclusive = True
         for found_model in models:
             model_identifier = f"{found_model.manufacturer}/{found_model.model}"
             metadata = await library.get_model_metadata(found_model)
@@ -592,13 +877,14 @@ class DiscoveryManager:
             )
             if not profile:
                 _LOGGER.debug("%s: Could not load profile %s, skipping model", log_identifier, model_identifier)
+                conclusive = False
                 continue
             if reason := self._check_profile(profile, source_entity, discovery_type):
                 _LOGGER.debug("%s: Skipping profile %s, %s", log_identifier, describe_power_profile(profile), reason)
                 continue
             power_profiles.append(profile)
 
-        return power_profiles
+        return power_profiles, conclusive
 
     def _check_profile(
         self,
@@ -672,6 +958,10 @@ class DiscoveryManager:
 
     def get_entities(self) -> list[er.RegistryEntry]:
         """Get all entities from entity registry which qualifies for discovery."""
+        return get_filtered_entity_list(self.hass, self._create_entity_filter())
+
+    def _create_entity_filter(self) -> EntityFilter:
+        """Create the filter for the entities which qualify for discovery."""
 
         def _check_already_configured(entity: er.RegistryEntry) -> bool:
             has_user_config = self._is_user_configured(entity.entity_id)
@@ -698,7 +988,7 @@ class DiscoveryManager:
             ],
             FilterOperator.OR,
         )
-        return get_filtered_entity_list(self.hass, NotFilter(entity_filter))
+        return NotFilter(entity_filter)
 
     def get_devices(self) -> list[dr.DeviceEntry]:
         """Fetch device entries."""
@@ -742,6 +1032,7 @@ class DiscoveryManager:
             self._cancel_initial_discovery()
             self._cancel_initial_discovery = None
         self._status = DiscoveryStatus.DISABLED
+        self._stop_listening_for_changes()
         self._configured_discovery_keys.clear()
         self._pending_discovery_keys.clear()
         flows = self.hass.config_entries.flow.async_progress_by_handler(DOMAIN)
@@ -768,16 +1059,7 @@ class DiscoveryManager:
             )
             return None
 
-        # Make sure we don't have a literal / in model_id,
-        # so we don't get issues with sublut directory matching down the road
-        # See github #658
-        if "/" in model_info.model:
-            model_info = ModelInfo(
-                model_info.manufacturer,
-                model_info.model.replace("/", "#slash#"),
-                model_info.model_id,
-            )
-
+        model_info = self._escape_model(model_info)
         _LOGGER.debug(
             "%s: Found model information on device (manufacturer=%s, model=%s, model_id=%s, device_id=%s)",
             log_identifier,
@@ -788,6 +1070,16 @@ class DiscoveryManager:
         )
         return model_info
 
+    @staticmethod
+    def _escape_model(model_info: ModelInfo) -> ModelInfo:
+        """Make sure we don't have a literal / in model_id,
+        so we don't get issues with sublut directory matching down the road
+        See github #658
+        """
+        if "/" not in model_info.model:
+            return model_info
+        return ModelInfo(model_info.manufacturer, model_info.model.replace("/", "#slash#"), model_info.model_id)
+
     @staticmethod
     def get_model_information_from_device(device_entry: dr.DeviceEntry) -> ModelInfo | None:
         """See if we have enough information in device registry to automatically set up the power sensor."""
@@ -0,0 +1,100 @@
+"""Persisted cache of the discovery candidates which didn't match any library profile.
+
+Most entities, devices and config entries never match a profile, still every discovery run searches the library
+and checks the metadata of the found models for each of them. The outcome only depends on the model information,
+the discovery type, a few properties of the source entity and the library contents, so the candidates which didn't
+match are remembered by these properties. The cache is stored together with a fingerprint of the library contents
+and the discovery settings, and discarded as a whole as soon as the fingerprint changes.
+"""
+
+from typing import TypedDict
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .common import SourceEntity
+from .power_profile.library import ModelInfo
+from .power_profile.power_profile import DiscoveryBy
+
+STORAGE_KEY = "powercalc_discovery_cache"
+STORAGE_VERSION = 1
+# Seconds to wait before writing the cache after a discovery run, Home Assistant writes it on shutdown as well
+SAVE_DELAY = 30
+
+# manufacturer, model, model id, discovery type, entity domain, entity platform, entity unit of measurement
+type MatchKey = tuple[str, ...]
+
+
+class StoredMatchCache(TypedDict):
+    fingerprint: str
+    no_match: list[list[str]]
+
+
+def create_match_key(model_info: ModelInfo, discovery_type: DiscoveryBy, source_entity: SourceEntity) -> MatchKey:
+    """Build the cache key of a candidate, from everything the profile matching depends on."""
+    entity_entry = source_entity.entity_entry
+    return (
+        model_info.manufacturer,
+        model_info.model,
+        model_info.model_id or "",
+        str(discovery_type),
+        entity_entry.domain if entity_entry else "",
+        entity_entry.platform if entity_entry else "",
+        (entity_entry.unit_of_measurement or "") if entity_entry else "",
+    )
+
+
+class DiscoveryMatchCache:
+    """Remembers the candidates without a matching profile across discovery runs and restarts."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._store: Store[StoredMatchCache] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._loaded = False
+        self._fingerprint = ""
+        self._no_match: set[MatchKey] = set()
+        self._seen: set[MatchKey] = set()
+        self.hits = 0
+
+    async def async_start_run(self, fingerprint: str) -> None:
+        """Prepare for a discovery run, loading the stored cache on first use.
+
+        All entries are dropped when they were stored for another library or other discovery settings.
+        """
+        if not self._loaded:
+            self._loaded = True
+            stored = await self._store.async_load()
+            self._fingerprint = stored["fingerprint"] if stored else ""
+            self._no_match = {tuple(key) for key in stored["no_match"]} if stored else set()
+
+        if fingerprint != self._fingerprint:
+            self._fingerprint = fingerprint
+            self._no_match.clear()
+        self._seen.clear()
+
+    @callback
+    def async_finish_run(self) -> None:
+        """Forget the candidates which weren't seen during the run anymore, and schedule writing the cache."""
+        self._no_match &= self._seen
+        self.async_schedule_save()
+
+    @callback
+    def async_schedule_save(self) -> None:
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def __contains__(self, key: MatchKey) -> bool:
+        return key in self._no_match
+
+    def has_no_match(self, key: MatchKey) -> bool:
+        """Check whether the candidate is known not to match any profile."""
+        self._seen.add(key)
+        if key in self._no_match:
+            self.hits += 1
+            return True
+        return False
+
+    def add_no_match(self, key: MatchKey) -> None:
+        self._seen.add(key)
+        self._no_match.add(key)
+
+    def _data_to_save(self) -> StoredMatchCache:
+        return {"fingerprint": self._fingerprint, "no_match": [list(key) for key in sorted(self._no_match)]}
@@ -51,6 +51,8 @@ if TYPE_CHECKING:
     from custom_components.powercalc.config_flow import PowercalcCommonFlow, PowercalcConfigFlow, PowercalcOptionsFlow
 
 CONF_CONFIRM_AUTODISCOVERED_MODEL = "confirm_autodisovered_model"
+# Minimum fuzzy search score of the library model suggested for the device model in the model step
+MODEL_SUGGESTION_MIN_SCORE = 0.5
 
 SCHEMA_POWER_AUTODISCOVERED = vol.Schema(
     {vol.Optional(CONF_CONFIRM_AUTODISCOVERED_MODEL, default=True): bool},
@@ -159,6 +161,8 @@ class LibraryFlow:
                 if self.flow.selected_profile
                 else self.flow.sensor_config.get(CONF_MODEL)
             )
+            if not model:
+                model = await self._suggest_model(library, manufacturer)
             return vol.Schema(
                 {
                     vol.Required(
@@ -185,6 +189,19 @@ class LibraryFlow:
             user_input,
         )
 
+    async def _suggest_model(self, library: ProfileLibrary, manufacturer: str) -> str | None:
+        """Suggest the library model most similar to the model reported by the source device."""
+        device_entry = self.flow.source_entity.device_entry if self.flow.source_entity else None
+        if not device_entry or not (device_entry.model or device_entry.model_id):
+            return None
+        candidates = await library.search_models(
+            ModelInfo(manufacturer, device_entry.model or "", device_entry.model_id),
+            limit=1,
+        )
+        if not candidates or candidates[0][1] < MODEL_SUGGESTION_MIN_SCORE:
+            return None
+        return candidates[0][0].model
+
     async def async_step_post_library(self, _: dict[str, Any] | None = None) -> ConfigFlowResult:
         """
         Handles the logic after the user either selected manufacturer/model himself or confirmed autodiscovered.
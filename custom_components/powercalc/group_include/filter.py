@@ -103,6 +103,21 @@ def create_filter(
     return filter_mapping.get(filter_type, lambda: NullFilter())()
 
 
+def filter_depends_on_states(filter_configs: ConfigType | list[ConfigType]) -> bool:
+    """Whether the filter reads states or entities of other integrations, instead of only the registries.
+
+    These are only complete once Home Assistant started.
+    """
+    if isinstance(filter_configs, list):
+        return any(filter_depends_on_states(filter_config) for filter_config in filter_configs)
+    for key, value in filter_configs.items():
+        if key in (CONF_GROUP, CONF_TEMPLATE):
+            return True
+        if key in (CONF_FILTER, CONF_AND, CONF_OR, CONF_NOT) and filter_depends_on_states(value):
+            return True
+    return False
+
+
 def get_filtered_entity_list(
     hass: HomeAssistant,
     entity_filter: EntityFilter,
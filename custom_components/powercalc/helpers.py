@@ -1,9 +1,14 @@
-from collections.abc import Callable, Coroutine, Iterable, Iterator
+import asyncio
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable, Coroutine, Hashable, Iterable, Iterator
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from functools import wraps
 import logging
 import os.path
 import re
-from typing import Any, NamedTuple, TypeVar, cast
+import time
+from typing import Any, NamedTuple, TypeVar, cast, overload
 import uuid
 
 from homeassistant.components.binary_sensor import BinarySensorDeviceClass
@@ -86,33 +91,167 @@ def make_hashable(arg: Any) -> Any:  # noqa: ANN401
     return arg
 
 
-def async_cache[R](func: Callable[..., Coroutine[Any, Any, R]]) -> Callable[..., Coroutine[Any, Any, R]]:
-    """
-    A decorator to cache results of an async function based on its arguments.
+class AsyncCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    # Calls which awaited the result of an identical call already in progress
+    shared: int
+    size: int
+    max_size: int | None
 
-    Args:
-        func: The asynchronous function to decorate.
 
-    Returns:
-        A decorated asynchronous function with caching.
+class _AsyncCache[R]:
+    """Results of an async function by arguments, with optional LRU size limit and time to live.
+
+    Concurrent calls with the same arguments share a single execution of the function.
     """
-    cache: dict[tuple[tuple[Any, ...], frozenset[Any]], R] = {}
 
-    @wraps(func)
-    async def wrapper(*args: Any, **kwargs: Any) -> R:  # noqa: ANN401
-        # Make arguments hashable
-        hashable_args = tuple(make_hashable(arg) for arg in args)
-        hashable_kwargs = frozenset((key, make_hashable(value)) for key, value in kwargs.items())
-        cache_key = (hashable_args, hashable_kwargs)
+    def __init__(self, max_size: int | None, ttl: float | None) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        # cache key -> (expiry time, result)
+        self.entries: OrderedDict[Hashable, tuple[float, R]] = OrderedDict()
+        self.in_flight: dict[Hashable, asyncio.Future[R]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        # Incremented on clear, results of calls started before are not stored
+        self.generation = 0
+
+    def get(self, key: Hashable) -> tuple[float, R] | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if self.ttl is not None and entry[0] < time.monotonic():
+            del self.entries[key]
+            return None
+        if self.max_size is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def set(self, key: Hashable, result: R) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else 0.0
+        self.entries[key] = (expires_at, result)
+        if self.max_size is not None:
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    async def wait_in_flight(self, key: Hashable) -> tuple[R] | None:
+        """Await the running call with the same arguments, and return its result as a 1-tuple.
+
+        Returns None when no call is running. Also when the running call was cancelled and this caller
+        wasn't, the caller then runs the function itself instead of failing along.
+        """
+        while (in_flight := self.in_flight.get(key)) is not None:
+            self.shared += 1
+            try:
+                return (await asyncio.shield(in_flight),)
+            except asyncio.CancelledError:
+                if not in_flight.cancelled() or _is_cancelling():
+                    raise
+        return None
 
-        if cache_key in cache:
-            return cache[cache_key]
-        result = await func(*args, **kwargs)
-        cache[cache_key] = result
-        return result
+    def clear(self) -> None:
+        self.entries.clear()
+        self.generation += 1
 
-    cast(Any, wrapper).cache_clear = cache.clear
-    return wrapper
+    def info(self) -> AsyncCacheInfo:
+        return AsyncCacheInfo(self.hits, self.misses, self.shared, len(self.entries), self.max_size)
+
+
+def _make_cache_key(args: tuple[Any, ...], kwargs: dict[str, Any]) -> Hashable:
+    """Build the cache key, only converting the arguments when they are not hashable as is."""
+    key = (args, tuple(sorted(kwargs.items()))) if kwargs else args
+    try:
+        hash(key)
+    except TypeError:
+        return (
+            tuple(make_hashable(arg) for arg in args),
+            frozenset((name, make_hashable(value)) for name, value in kwargs.items()),
+        )
+    return key
+
+
+@overload
+def async_cache[R](func: Callable[..., Coroutine[Any, Any, R]]) -> Callable[..., Coroutine[Any, Any, R]]: ...
+
+
+@overload
+def async_cache[R](
+    *,
+    max_size: int | None = None,
+    ttl: float | None = None,
+) -> Callable[[Callable[..., Coroutine[Any, Any, R]]], Callable[..., Coroutine[Any, Any, R]]]: ...
+
+
+def async_cache[R](
+    func: Callable[..., Coroutine[Any, Any, R]] | None = None,
+    *,
+    max_size: int | None = None,
+    ttl: float | None = None,
+) -> (
+    Callable[..., Coroutine[Any, Any, R]]
+    | Callable[[Callable[..., Coroutine[Any, Any, R]]], Callable[..., Coroutine[Any, Any, R]]]
+):
+    """
+    A decorator to cache results of an async function based on its arguments.
+
+    Can be used bare, or with `max_size` to keep only the most recently used results and `ttl` to expire
+    results after the given number of seconds. Concurrent calls with the same arguments await the same
+    execution. Hit and miss counts are available through `cache_info()` of the decorated function.
+    """
+
+    def decorator(func: Callable[..., Coroutine[Any, Any, R]]) -> Callable[..., Coroutine[Any, Any, R]]:
+        cache: _AsyncCache[R] = _AsyncCache(max_size, ttl)
+
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> R:  # noqa: ANN401
+            cache_key = _make_cache_key(args, kwargs)
+            entry = cache.get(cache_key)
+            if entry is not None:
+                cache.hits += 1
+                return entry[1]
+
+            shared = await cache.wait_in_flight(cache_key)
+            if shared is not None:
+                return shared[0]
+
+            cache.misses += 1
+            generation = cache.generation
+            future: asyncio.Future[R] = asyncio.get_running_loop().create_future()
+            # Retrieve the exception, so it is not reported as never retrieved when nobody else was waiting
+            future.add_done_callback(lambda done: done.cancelled() or done.exception())
+            cache.in_flight[cache_key] = future
+            try:
+                result = await func(*args, **kwargs)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except BaseException as err:
+                future.set_exception(err)
+                raise
+            finally:
+                del cache.in_flight[cache_key]
+
+            if cache.generation == generation:
+                cache.set(cache_key, result)
+            future.set_result(result)
+            return result
+
+        cast(Any, wrapper).cache_clear = cache.clear
+        cast(Any, wrapper).cache_info = cache.info
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def _is_cancelling() -> bool:
+    """Whether cancellation of the current task was requested."""
+    task = asyncio.current_task()
+    return task is not None and task.cancelling() > 0
 
 
 def clear_async_cache(func: Callable[..., Coroutine[Any, Any, Any]]) -> None:
@@ -123,6 +262,104 @@ def clear_async_cache(func: Callable[..., Coroutine[Any, Any, Any]]) -> None:
         cache_clear()
 
 
+class PendingSetups:
+    """Count the setups still running, `wait` returns once all of them finished."""
+
+    def __init__(self, count: int) -> None:
+        self._count = count
+        self._done = asyncio.Event()
+        if count <= 0:
+            self._done.set()
+
+    def finish(self) -> None:
+        """Mark a setup finished, whether it succeeded or not."""
+        self._count -= 1
+        if self._count <= 0:
+            self._done.set()
+
+    def finish_all(self) -> None:
+        """Stop waiting for the setups which didn't finish yet."""
+        self._done.set()
+
+    async def wait(self) -> None:
+        await self._done.wait()
+
+
+class _LimiterSlot:
+    """Slot of a KeyedLimiter held by a task."""
+
+    def __init__(self, semaphore: asyncio.Semaphore) -> None:
+        self.semaphore = semaphore
+        self.task = asyncio.current_task()
+        self.held = True
+
+
+_limiter_slot: ContextVar[_LimiterSlot | None] = ContextVar("powercalc_limiter_slot", default=None)
+
+
+class KeyedLimiter:
+    """Bound the number of concurrently running jobs, jobs sharing a key run one after the other."""
+
+    def __init__(self, limit: int) -> None:
+        self._semaphore = asyncio.Semaphore(limit)
+        # Lock per key, together with the number of jobs holding or waiting for it
+        self._locks: dict[Hashable, tuple[asyncio.Lock, int]] = {}
+
+    @asynccontextmanager
+    async def acquire(self, key: Hashable | None = None) -> AsyncIterator[None]:
+        """Wait for a free slot, and for earlier jobs with the same key when a key is given."""
+        if key is None:
+            async with self._hold_slot():
+                yield
+            return
+
+        lock, users = self._locks.get(key, (asyncio.Lock(), 0))
+        self._locks[key] = (lock, users + 1)
+        try:
+            # Take the key lock first, a job waiting for its key must not occupy a slot
+            async with lock, self._hold_slot():
+                yield
+        finally:
+            lock, users = self._locks[key]
+            if users == 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, users - 1)
+
+    @asynccontextmanager
+    async def _hold_slot(self) -> AsyncIterator[None]:
+        await self._semaphore.acquire()
+        slot = _LimiterSlot(self._semaphore)
+        token = _limiter_slot.set(slot)
+        try:
+            yield
+        finally:
+            _limiter_slot.reset(token)
+            if slot.held:
+                self._semaphore.release()
+
+
+@asynccontextmanager
+async def release_limiter_slot() -> AsyncIterator[None]:
+    """Give up the KeyedLimiter slot of the current task while waiting for network I/O, and take it again after.
+
+    Does nothing when the task holds no slot.
+    """
+    slot = _limiter_slot.get()
+    # Tasks started by the job inherit the context, only the job itself owns the slot
+    if slot is None or not slot.held or slot.task is not asyncio.current_task():
+        yield
+        return
+
+    slot.held = False
+    slot.semaphore.release()
+    try:
+        yield
+    finally:
+        await slot.semaphore.acquire()
+        slot.held = True
+
+
 def collect_placeholders(data: list[Any] | str | dict[str, Any]) -> set[str]:
     found: set[str] = set()
     if isinstance(data, dict):
@@ -157,6 +394,46 @@ def replace_placeholders(
     return data
 
 
+def substitute_placeholders(
+    data: list[Any] | str | dict[str, Any],
+    replacements: dict[str, str],
+) -> list[Any] | str | dict[str, Any]:
+    """Replace placeholders without modifying `data`.
+
+    Only the dicts and lists on the path to a replaced string are copied, everything else is shared
+    with `data`. When nothing is replaced `data` itself is returned.
+    """
+    if isinstance(data, dict):
+        changed: dict[str, Any] | None = None
+        for key, value in data.items():
+            new_value = substitute_placeholders(value, replacements)
+            if new_value is not value:
+                if changed is None:
+                    changed = dict(data)
+                changed[key] = new_value
+        return data if changed is None else changed
+    if isinstance(data, list):
+        changed_list: list[Any] | None = None
+        for i, value in enumerate(data):
+            new_value = substitute_placeholders(value, replacements)
+            if new_value is not value:
+                if changed_list is None:
+                    changed_list = list(data)
+                changed_list[i] = new_value
+        return data if changed_list is None else changed_list
+    if isinstance(data, str) and "[[" in data:
+        return _substitute_string_placeholders(data, replacements)
+    return data
+
+
+def _substitute_string_placeholders(data: str, replacements: dict[str, str]) -> str:
+    new_data = PLACEHOLDER_REGEX.sub(
+        lambda match: str(replacements[match.group(1)]) if match.group(1) in replacements else match.group(0),
+        data,
+    )
+    return data if new_data == data else new_data
+
+
 def iter_related_entity_placeholders(placeholders: Iterable[str]) -> Iterator[str]:
     """Yield placeholders that need lookup against entities on the same device."""
     for placeholder in placeholders:
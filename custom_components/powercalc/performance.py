@@ -0,0 +1,169 @@
+"""Opt-in latency instrumentation of the code paths which run for every state change.
+
+When `enable_performance_stats` is set in the global configuration, the duration of the instrumented methods
+is recorded per sensor, and the duration of the strategy calculations per strategy type. Durations are kept in
+fixed-size histograms, so recording a sample is cheap and memory doesn't grow over time.
+"""
+
+from bisect import bisect_left
+from collections.abc import Callable, Coroutine
+from functools import wraps
+import inspect
+import time
+from typing import Any, cast
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.typing import ConfigType
+
+from custom_components.powercalc.const import CONF_ENABLE_PERFORMANCE_STATS, DATA_PERFORMANCE_STATS, DOMAIN
+
+# Upper bounds of the histogram buckets in seconds, 1-2-5 series from 10µs up to 10s
+BUCKET_BOUNDS: tuple[float, ...] = (
+    *(base * 10**exponent for exponent in range(-5, 1) for base in (1, 2, 5)),
+    10.0,
+)
+
+
+class LatencyHistogram:
+    """Latency histogram with fixed buckets. Percentiles are estimated by the upper bound of the bucket."""
+
+    __slots__ = ("buckets", "count", "max", "total")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # The last bucket collects everything above the highest bound
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+
+    def add(self, duration: float) -> None:
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+        self.buckets[bisect_left(BUCKET_BOUNDS, duration)] += 1
+
+    def percentile(self, percentile: float) -> float:
+        """Return the estimated duration below which the given percentage of the samples fall."""
+        if not self.count:
+            return 0.0
+        threshold = self.count * percentile / 100
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKET_BOUNDS, self.buckets, strict=False):
+            cumulative += bucket_count
+            if cumulative >= threshold:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics, durations are in milliseconds."""
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p95_ms": round(self.percentile(95) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class PerformanceStats:
+    """Latency histograms per sensor and operation, and per strategy type."""
+
+    def __init__(self) -> None:
+        self.sensors: dict[str, dict[str, LatencyHistogram]] = {}
+        self.strategies: dict[str, LatencyHistogram] = {}
+
+    def record(self, entity_id: str, operation: str, duration: float) -> None:
+        operations = self.sensors.get(entity_id)
+        if operations is None:
+            operations = self.sensors[entity_id] = {}
+        histogram = operations.get(operation)
+        if histogram is None:
+            histogram = operations[operation] = LatencyHistogram()
+        histogram.add(duration)
+
+    def record_strategy(self, strategy: str, duration: float) -> None:
+        histogram = self.strategies.get(strategy)
+        if histogram is None:
+            histogram = self.strategies[strategy] = LatencyHistogram()
+        histogram.add(duration)
+
+    def reset(self) -> None:
+        self.sensors.clear()
+        self.strategies.clear()
+
+    def as_dict(self, entity_ids: set[str] | None = None, limit: int | None = None) -> dict[str, Any]:
+        """Return the statistics, sensors ordered by the total time spent, most expensive first.
+
+        Pass `entity_ids` to only include these sensors, and `limit` to only include the top N sensors.
+        """
+        sensors = [
+            (entity_id, operations)
+            for entity_id, operations in self.sensors.items()
+            if entity_ids is None or entity_id in entity_ids
+        ]
+        sensors.sort(key=lambda item: sum(histogram.total for histogram in item[1].values()), reverse=True)
+        if limit is not None:
+            sensors = sensors[:limit]
+
+        return {
+            "strategies": {strategy: histogram.as_dict() for strategy, histogram in sorted(self.strategies.items())},
+            "sensors": {
+                entity_id: {operation: histogram.as_dict() for operation, histogram in operations.items()}
+                for entity_id, operations in sensors
+            },
+        }
+
+
+def create_performance_stats(global_config: ConfigType) -> PerformanceStats | None:
+    """Create the statistics collector, when enabled in the global configuration."""
+    if not global_config.get(CONF_ENABLE_PERFORMANCE_STATS, False):
+        return None
+    return PerformanceStats()
+
+
+def get_performance_stats(hass: HomeAssistant) -> PerformanceStats | None:
+    """Get the statistics collector, None when instrumentation is disabled."""
+    domain_data = hass.data.get(DOMAIN)
+    if not domain_data:
+        return None
+    return cast(PerformanceStats | None, domain_data.get(DATA_PERFORMANCE_STATS))
+
+
+def instrumented[F: Callable[..., Any]](operation: str) -> Callable[[F], F]:
+    """Record the duration of an entity method under the entity id of the entity, when enabled.
+
+    Supports both regular and coroutine methods.
+    """
+
+    def decorator(func: F) -> F:
+        if inspect.iscoroutinefunction(func):
+            async_func = cast(Callable[..., Coroutine[Any, Any, Any]], func)
+
+            @wraps(func)
+            async def async_wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+                stats = get_performance_stats(self.hass)
+                if stats is None:
+                    return await async_func(self, *args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await async_func(self, *args, **kwargs)
+                finally:
+                    stats.record(self.entity_id, operation, time.perf_counter() - start)
+
+            return cast(F, async_wrapper)
+
+        @wraps(func)
+        def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+            stats = get_performance_stats(self.hass)
+            if stats is None:
+                return func(self, *args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                stats.record(self.entity_id, operation, time.perf_counter() - start)
+
+        return cast(F, wrapper)
+
+    return decorator
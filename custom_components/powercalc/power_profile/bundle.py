@@ -0,0 +1,283 @@
+"""Packed profile library, read through mmap instead of thousands of separate files.
+
+A profile directory can ship a single `profiles.bundle` file instead of the manufacturer/model directory tree.
+The bundle starts with an index mapping every relative file path (manufacturer/model[/sub_profile]/file) to its
+offset and length, followed by the file contents. Profile directories keep their usual paths, file access for a
+path below a directory with a bundle is resolved from the bundle, with a single open file handle. The remote
+loader bundles the profiles it downloads once per library update, see `update_profile_bundle`.
+
+Layout: MAGIC, index length (uint32 little endian), index as JSON, file contents. The index holds the offset and
+length of each file and the metadata the bundle was written with.
+"""
+
+from collections.abc import Iterable
+import contextlib
+import json
+import logging
+import mmap
+import os
+import struct
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.powercalc.const import DATA_PROFILE_BUNDLES, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+BUNDLE_FILE_NAME = "profiles.bundle"
+BUNDLED_EXTENSIONS = (".json", ".csv", ".csv.gz")
+
+MAGIC = b"PCBUNDL1"
+METADATA_MODEL_HASHES = "model_hashes"
+_INDEX_LENGTH = struct.Struct("<I")
+
+
+class ProfileBundle:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header_size = len(MAGIC) + _INDEX_LENGTH.size
+        if self._mmap[: len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"Not a profile bundle: {path}")
+        (index_length,) = _INDEX_LENGTH.unpack_from(self._mmap, len(MAGIC))
+        data_offset = header_size + index_length
+        index: dict[str, Any] = json.loads(self._mmap[header_size:data_offset])
+        self.metadata: dict[str, Any] = index["metadata"]
+        # Profiles downloaded again after the bundle was written
+        self._stale_model_dirs: frozenset[str] = frozenset()
+
+        self._files: dict[str, tuple[int, int]] = {}
+        self._directories: dict[str, dict[str, bool]] = {"": {}}
+        for relative_path, (offset, length) in index["files"].items():
+            self._files[relative_path] = (data_offset + offset, length)
+            self._add_to_directories(relative_path)
+
+    def _add_to_directories(self, relative_path: str) -> None:
+        """Register the file and all of its parent directories, entries map to whether they are a directory."""
+        parts = relative_path.split("/")
+        for depth, name in enumerate(parts):
+            directory = "/".join(parts[:depth])
+            is_directory = depth < len(parts) - 1
+            self._directories.setdefault(directory, {})[name] = is_directory
+            if is_directory:
+                self._directories.setdefault(f"{directory}/{name}" if directory else name, {})
+
+    def read(self, relative_path: str) -> bytes:
+        """Read the contents of a bundled file, raises FileNotFoundError when it isn't in the bundle."""
+        try:
+            offset, length = self._files[relative_path]
+        except KeyError as err:
+            raise FileNotFoundError(f"{relative_path} not found in {self.path}") from err
+        return self._mmap[offset : offset + length]
+
+    def is_file(self, relative_path: str) -> bool:
+        return relative_path in self._files
+
+    def contains(self, relative_path: str) -> bool:
+        """Whether the path belongs to a bundled profile, profiles are bundled as a whole manufacturer/model tree."""
+        model_dir = _get_model_dir(relative_path)
+        return model_dir in self._directories and model_dir not in self._stale_model_dirs
+
+    def mark_stale(self, relative_path: str) -> None:
+        """Stop serving the profile of the path, its files are read from disk until the bundle is rewritten."""
+        # Replaced instead of changed in place, executor threads may be reading it
+        self._stale_model_dirs = self._stale_model_dirs | {_get_model_dir(relative_path)}
+
+    def list_files(self, relative_dir: str) -> list[str]:
+        """List the names of the files directly in the directory."""
+        return sorted(
+            name for name, is_directory in self._directories.get(relative_dir, {}).items() if not is_directory
+        )
+
+    def list_directories(self, relative_dir: str) -> list[str]:
+        """List the names of the subdirectories of the directory."""
+        return sorted(name for name, is_dir in self._directories.get(relative_dir, {}).items() if is_dir)
+
+    def close(self) -> None:
+        self._mmap.close()
+
+
+class ProfileBundles:
+    """The opened profile bundles of a Home Assistant instance, by the absolute directory they replace."""
+
+    def __init__(self) -> None:
+        # Bundles together with the mtime and size of the file they were opened from
+        self._bundles: dict[str, tuple[float, int, ProfileBundle]] = {}
+
+    def open(self, directory: str) -> ProfileBundle | None:
+        """Open the bundle in the profile directory, None when the directory has no bundle.
+
+        The bundle is opened once and reused, unless the file was replaced since.
+        """
+        directory = os.path.abspath(directory)
+        bundle_path = os.path.join(directory, BUNDLE_FILE_NAME)
+        try:
+            stat = os.stat(bundle_path)
+        except FileNotFoundError:
+            self.close(directory)
+            return None
+
+        cached = self._bundles.get(directory)
+        if cached and cached[:2] == (stat.st_mtime, stat.st_size):
+            return cached[2]
+        if cached:
+            cached[2].close()
+
+        try:
+            bundle = ProfileBundle(bundle_path)
+        except (OSError, ValueError) as err:
+            _LOGGER.error("Could not open profile bundle %s: %s", bundle_path, err)
+            self._bundles.pop(directory, None)
+            return None
+        self._bundles[directory] = (stat.st_mtime, stat.st_size, bundle)
+        return bundle
+
+    def close(self, directory: str) -> None:
+        """Forget the opened bundle of the directory, paths below it are read from disk again."""
+        if cached := self._bundles.pop(os.path.abspath(directory), None):
+            cached[2].close()
+
+    def find(self, path: str) -> tuple[ProfileBundle, str] | None:
+        """Find the opened bundle containing the path, with the path relative to the bundle root."""
+        found_bundle = self._find_bundle_directory(path)
+        if found_bundle and found_bundle[0].contains(found_bundle[1]):
+            return found_bundle
+        return None
+
+    def mark_stale(self, path: str) -> None:
+        """Read the profile of the path from disk from now on, as it changed since it was bundled."""
+        if found_bundle := self._find_bundle_directory(path):
+            bundle, relative_path = found_bundle
+            bundle.mark_stale(relative_path)
+
+    def _find_bundle_directory(self, path: str) -> tuple[ProfileBundle, str] | None:
+        """Find the opened bundle of the directory the path is in, whether the bundle contains it or not."""
+        path = os.path.abspath(path)
+        for directory, (_, _, bundle) in list(self._bundles.items()):
+            if path == directory:
+                return bundle, ""
+            if path.startswith(directory + os.sep):
+                return bundle, os.path.relpath(path, directory).replace(os.sep, "/")
+        return None
+
+    def is_file(self, path: str) -> bool:
+        """Whether the profile file exists, in its bundle or on disk."""
+        if found_bundle := self.find(path):
+            bundle, relative_path = found_bundle
+            if bundle.is_file(relative_path):
+                return True
+        return os.path.isfile(path)
+
+    def read(self, path: str) -> bytes:
+        """Read a profile file from its bundle, or from disk when it isn't bundled."""
+        if found_bundle := self.find(path):
+            bundle, relative_path = found_bundle
+            if bundle.is_file(relative_path):
+                return bundle.read(relative_path)
+        with open(path, "rb") as f:
+            return f.read()
+
+
+def get_profile_bundles(hass: HomeAssistant) -> ProfileBundles:
+    """Get the opened profile bundles, creating the registry on first use."""
+    domain_data: dict[str, Any] = hass.data.setdefault(DOMAIN, {})
+    bundles: ProfileBundles | None = domain_data.get(DATA_PROFILE_BUNDLES)
+    if bundles is None:
+        bundles = domain_data[DATA_PROFILE_BUNDLES] = ProfileBundles()
+    return bundles
+
+
+def update_profile_bundle(
+    bundles: ProfileBundles,
+    directory: str,
+    model_hashes: dict[str, str],
+) -> ProfileBundle | None:
+    """Pack the profiles of the directory into its bundle, unless the bundle holds these profiles already.
+
+    Used for the downloaded profiles, `model_hashes` maps their manufacturer/model directories to the hash of the
+    downloaded profile. The bundle remembers the hashes it was built from, so checking whether it is up to date
+    doesn't touch the profile files. A directory without profiles gets no bundle.
+    """
+    bundle_path = os.path.join(directory, BUNDLE_FILE_NAME)
+    bundle = bundles.open(directory)
+    if bundle is not None and bundle.metadata.get(METADATA_MODEL_HASHES) == model_hashes:
+        return bundle
+
+    try:
+        if not model_hashes:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(bundle_path)
+        else:
+            write_profile_bundle(
+                directory,
+                bundle_path,
+                model_dirs=sorted(model_hashes),
+                metadata={METADATA_MODEL_HASHES: model_hashes},
+            )
+    except OSError:
+        # Never keep serving a bundle which might be outdated
+        bundles.close(directory)
+        raise
+    return bundles.open(directory)
+
+
+def write_profile_bundle(
+    source_directory: str,
+    bundle_path: str,
+    model_dirs: Iterable[str] | None = None,
+    metadata: dict[str, Any] | None = None,
+) -> int:
+    """Pack the profile files of a library directory into a bundle, returns the number of bundled files.
+
+    Only the files below `model_dirs` are packed when given, directories which don't exist are skipped.
+    """
+    if model_dirs is None:
+        relative_paths = sorted(_iter_profile_files(source_directory))
+    else:
+        relative_paths = sorted(
+            relative_path
+            for model_dir in model_dirs
+            for relative_path in _iter_profile_files(source_directory, model_dir)
+        )
+
+    files: dict[str, list[int]] = {}
+    offset = 0
+    for relative_path in relative_paths:
+        length = os.path.getsize(os.path.join(source_directory, relative_path))
+        files[relative_path] = [offset, length]
+        offset += length
+
+    encoded_index = json.dumps({"files": files, "metadata": metadata or {}}, separators=(",", ":")).encode()
+    # Write to a new file and move it in place, an opened bundle might still map the old file
+    tmp_path = f"{bundle_path}.tmp"
+    with open(tmp_path, "wb") as bundle:
+        bundle.write(MAGIC)
+        bundle.write(_INDEX_LENGTH.pack(len(encoded_index)))
+        bundle.write(encoded_index)
+        for relative_path in relative_paths:
+            with open(os.path.join(source_directory, relative_path), "rb") as f:
+                bundle.write(f.read())
+    os.replace(tmp_path, bundle_path)
+    return len(relative_paths)
+
+
+def _iter_profile_files(source_directory: str, relative_dir: str = "") -> Iterable[str]:
+    """Yield the relative paths, with forward slashes, of all files to bundle below the relative directory."""
+    for root, dirs, files in os.walk(os.path.join(source_directory, relative_dir)):
+        dirs[:] = [directory for directory in dirs if not directory.startswith(".")]
+        relative_root = os.path.relpath(root, source_directory)
+        # Files in the library root, like library.json, are not part of any profile
+        if relative_root == ".":
+            continue
+        for file_name in files:
+            if file_name.endswith(BUNDLED_EXTENSIONS):
+                yield os.path.join(relative_root, file_name).replace(os.sep, "/")
+
+
+def _get_model_dir(relative_path: str) -> str:
+    """The manufacturer/model directory of a path relative to the bundle root."""
+    return "/".join(relative_path.split("/")[:2])
@@ -1,4 +1,4 @@
-from copy import deepcopy
+from collections.abc import Iterable
 import json
 import os
 import re
@@ -13,23 +13,34 @@ from custom_components.powercalc.helpers import (
     build_related_entity_placeholder_not_found_message,
     collect_placeholders,
     iter_related_entity_placeholders,
-    replace_placeholders,
     resolve_related_entity_placeholder,
+    substitute_placeholders,
 )
+from custom_components.powercalc.startup_timing import async_time_phase
 
+from .bundle import ProfileBundles, get_profile_bundles
 from .error import LibraryError
 from .loader.composite import CompositeLoader
 from .loader.local import LocalLoader
 from .loader.protocol import Loader, ModelMetadata
 from .loader.remote import RemoteLoader
-from .power_profile import DeviceType, DiscoveryBy, PowerProfile
+from .power_profile import DeviceType, DiscoveryBy, LutMetadata, PowerProfile
 
 LEGACY_CUSTOM_DATA_DIRECTORY = "powercalc-custom-models"
 CUSTOM_DATA_DIRECTORY = "powercalc/profiles"
 
 
-def load_sub_profile_data(base_dir: str) -> list[tuple[str, dict[str, Any]]]:
-    """Load sub-profile JSON blobs from disk."""
+def load_sub_profile_data(bundles: ProfileBundles, base_dir: str) -> list[tuple[str, dict[str, Any]]]:
+    """Load sub-profile JSON blobs from disk, or from the profile bundle containing the directory."""
+    if found_bundle := bundles.find(base_dir):
+        bundle, relative_dir = found_bundle
+        bundled_result = []
+        for sub_dir in bundle.list_directories(relative_dir):
+            json_path = f"{relative_dir}/{sub_dir}/model.json"
+            json_data = cast(dict[str, Any], json.loads(bundle.read(json_path))) if bundle.is_file(json_path) else {}
+            bundled_result.append((sub_dir, json_data))
+        return bundled_result
+
     sub_dirs = next(os.walk(base_dir))[1]
     result = []
     for sub_dir in sub_dirs:
@@ -50,11 +61,13 @@ class ProfileLibrary:
         self._profiles: dict[str, list[PowerProfile]] = {}
         self._manufacturer_models: dict[str, set[tuple[str, str]]] = {}
         self._sub_profile_data: dict[str, list[tuple[str, dict[str, Any]]]] = {}
+        self._placeholders: dict[tuple[str, str | None], set[str]] = {}
         self._found_models: dict[ModelInfo, list[ModelInfo]] = {}
 
     async def initialize(self, prefer_cached: bool = False) -> None:
         """Initialize the underlying loaders, see `Loader.initialize` for `prefer_cached`."""
         self._sub_profile_data.clear()
+        self._placeholders.clear()
         self._found_models.clear()
         await self._loader.initialize(prefer_cached)
 
@@ -67,6 +80,11 @@ class ProfileLibrary:
         """
         return self._loader.get_discovery_low_priority_domains()
 
+    @property
+    def library_hash(self) -> str:
+        """Get a hash of the contents of all loaded libraries, which changes whenever the library is updated."""
+        return self._loader.get_library_hash()
+
     @staticmethod
     @singleton("powercalc_library")
     async def factory(hass: HomeAssistant) -> ProfileLibrary:
@@ -76,7 +94,7 @@ class ProfileLibrary:
         """
         library = ProfileLibrary(hass, ProfileLibrary.create_loader(hass))
         # Startup must not block on the download API. The periodic library update refreshes it.
-        await library.initialize(prefer_cached=True)
+        await async_time_phase(hass, "library_initialize", library.initialize(prefer_cached=True))
         return library
 
     @staticmethod
@@ -183,7 +201,13 @@ class ProfileLibrary:
         """Create a power profile object from the model JSON data."""
 
         json_data, directory = await self._load_model_data(model_info.manufacturer, model_info.model, custom_directory)
-        json_data = self._process_profile_json(json_data, variables or {}, source_entity, process_variables)
+        json_data = self._process_profile_json(
+            (directory, None),
+            json_data,
+            variables or {},
+            source_entity,
+            process_variables,
+        )
 
         if linked_profile := json_data.get("linked_profile", json_data.get("linked_lut")):
             linked_manufacturer, linked_model = linked_profile.split("/")
@@ -192,17 +216,30 @@ class ProfileLibrary:
                 linked_model,
                 custom_directory,
             )
-            json_data.update(linked_json_data)
+            json_data = {**json_data, **linked_json_data}
+
+        # The LUT files are listed in the library index, so the LUT strategy doesn't need to look for them
+        lut_metadata = await self._loader.get_lut_metadata(directory)
 
         raw_sub_profiles = self._sub_profile_data.get(directory)
         if raw_sub_profiles is None:
-            raw_sub_profiles = await self._hass.async_add_executor_job(load_sub_profile_data, directory)
+            raw_sub_profiles = await self._hass.async_add_executor_job(
+                load_sub_profile_data,
+                get_profile_bundles(self._hass),
+                directory,
+            )
             self._sub_profile_data[directory] = raw_sub_profiles
 
         sub_profiles = [
             (
                 sub_dir,
-                self._process_profile_json(sub_profile_json, variables or {}, source_entity, process_variables),
+                self._process_profile_json(
+                    (directory, sub_dir),
+                    sub_profile_json,
+                    variables or {},
+                    source_entity,
+                    process_variables,
+                ),
             )
             for sub_dir, sub_profile_json in raw_sub_profiles
         ]
@@ -213,30 +250,37 @@ class ProfileLibrary:
             directory,
             json_data,
             sub_profiles,
+            lut_metadata,
         )
 
     def _process_profile_json(
         self,
+        cache_key: tuple[str, str | None],
         json_data: dict[str, Any],
         variables: dict[str, str],
         source_entity: SourceEntity | None,
         process_variables: bool,
     ) -> dict[str, Any]:
-        if not process_variables:
-            # json_data is retrieved from cache, so we need to copy it to avoid modifying the cache
-            return json_data.copy()
+        """Substitute the placeholders in the profile JSON.
 
-        # replace_placeholders rewrites nested dicts and lists in place, so a shallow copy is not
-        # enough here. Without a deep copy the substituted values leak into the cached profile data
-        # and the next profile built from the same model would reuse them.
-        json_data = deepcopy(json_data)
+        The JSON data is shared with the loader cache and all profiles of the same model, so it must be
+        treated as read only. Placeholder substitution copies only the parts containing placeholders,
+        for models without placeholders the shared data is returned as is.
+        """
+        if not process_variables:
+            return json_data
 
         if json_data.get("fields"):  # When custom fields in profile are defined, make sure all variables are passed
             self.validate_variables(json_data, variables)
 
-        placeholders = collect_placeholders(json_data)
+        placeholders = self._placeholders.get(cache_key)
+        if placeholders is None:
+            placeholders = self._placeholders[cache_key] = collect_placeholders(json_data)
+        if not placeholders:
+            return json_data
+
         replacements = self.compute_replacement_variables(placeholders, variables.copy(), source_entity)
-        return cast(dict[str, Any], replace_placeholders(json_data, replacements))
+        return cast(dict[str, Any], substitute_placeholders(json_data, replacements))
 
     def compute_replacement_variables(
         self,
@@ -286,6 +330,13 @@ class ProfileLibrary:
         """Return discovery metadata for an already resolved model, without building the profile."""
         return await self._loader.get_model_metadata(model_info.manufacturer, model_info.model)
 
+    async def prefetch_models(self, model_infos: Iterable[ModelInfo]) -> None:
+        """Make the profiles of the given resolved models available locally in one batch.
+
+        Loading them one by one would download them serially, prefetching downloads them concurrently.
+        """
+        await self._loader.prefetch_models({(model_info.manufacturer, model_info.model) for model_info in model_infos})
+
     async def find_models(self, model_info: ModelInfo) -> list[ModelInfo]:
         """Resolve the model identifier, searching for it if no custom directory is provided.
 
@@ -300,7 +351,11 @@ class ProfileLibrary:
         return found
 
     async def _find_models(self, model_info: ModelInfo) -> list[ModelInfo]:
-        """Search the loaders for all models matching the given model info."""
+        """Search the loaders for all models matching the given model info by id or alias.
+
+        Only exact matches are returned, a typo or removed model must not resolve to another profile.
+        Use `search_models` to suggest similar models.
+        """
         search: set[str] = set()
         for model_identifier in (model_info.model_id, model_info.model):
             if model_identifier:
@@ -327,6 +382,32 @@ class ProfileLibrary:
 
         return list(dict.fromkeys(found_models))
 
+    async def search_models(self, model_info: ModelInfo, limit: int | None = 10) -> list[tuple[ModelInfo, float]]:
+        """Rank the library models by similarity to the model (and model id) of the model info, best first.
+
+        Used to suggest models in the config flow for a model string which doesn't exactly match any model id or
+        alias. Never use the results to resolve a profile without the user confirming it.
+        """
+        manufacturers = await self._loader.find_manufacturers(model_info.manufacturer)
+        return await self._search_models(manufacturers, model_info, limit)
+
+    async def _search_models(
+        self,
+        manufacturers: set[str],
+        model_info: ModelInfo,
+        limit: int | None,
+    ) -> list[tuple[ModelInfo, float]]:
+        scores: dict[ModelInfo, float] = {}
+        queries = {
+            identifier.replace("#slash#", "/") for identifier in (model_info.model_id, model_info.model) if identifier
+        }
+        for manufacturer in manufacturers:
+            for query in queries:
+                for model, score in await self._loader.search_models(manufacturer, query, limit):
+                    candidate = ModelInfo(manufacturer, model)
+                    scores[candidate] = max(score, scores.get(candidate, 0.0))
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0].manufacturer, item[0].model))[:limit]
+
     async def find_model_migration(self, model_info: ModelInfo) -> ModelInfo | None:
         """Resolve a legacy canonical model id to its replacement using library metadata."""
         manufacturers = await self._loader.find_manufacturers(model_info.manufacturer)
@@ -367,6 +448,7 @@ class ProfileLibrary:
         directory: str,
         json_data: dict[str, Any],
         sub_profiles: list[tuple[str, dict[str, Any]]] | None = None,
+        lut_metadata: LutMetadata | None = None,
     ) -> PowerProfile:
         """Create and initialize the PowerProfile object."""
         profile = PowerProfile(
@@ -376,6 +458,7 @@ class ProfileLibrary:
             directory=directory,
             json_data=json_data,
             sub_profiles=sub_profiles,
+            lut_metadata=lut_metadata,
         )
 
         if not profile.sub_profile and profile.sub_profile_select:
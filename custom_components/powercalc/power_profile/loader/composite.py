@@ -1,8 +1,10 @@
+from collections.abc import Iterable
+import hashlib
 import logging
 from typing import Any
 
 from custom_components.powercalc.power_profile.loader.protocol import Loader, ModelMetadata
-from custom_components.powercalc.power_profile.power_profile import DeviceType, DiscoveryBy
+from custom_components.powercalc.power_profile.power_profile import DeviceType, DiscoveryBy, LutMetadata
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -19,6 +21,11 @@ class CompositeLoader(Loader):
         """Get all low priority integration domains of the combined libraries."""
         return {domain for loader in self.loaders for domain in loader.get_discovery_low_priority_domains()}
 
+    def get_library_hash(self) -> str:
+        """Get a hash of the combined libraries."""
+        combined = "\n".join(loader.get_library_hash() for loader in self.loaders)
+        return hashlib.sha256(combined.encode()).hexdigest()
+
     async def get_manufacturer_listing(
         self,
         device_types: set[DeviceType] | None,
@@ -66,6 +73,16 @@ class CompositeLoader(Loader):
 
         return None
 
+    async def prefetch_models(self, models: Iterable[tuple[str, str]]) -> None:
+        """Prefetch every model with the first loader knowing it, matching load_model precedence."""
+        remaining = set(models)
+        for loader in self.loaders:
+            if not remaining:
+                return
+            known = {model for model in remaining if await loader.get_model_metadata(*model)}
+            await loader.prefetch_models(known)
+            remaining -= known
+
     async def find_model(self, manufacturer: str, search: set[str]) -> list[str]:
         """Find the model in the library."""
 
@@ -75,6 +92,14 @@ class CompositeLoader(Loader):
 
         return models
 
+    async def search_models(self, manufacturer: str, query: str, limit: int | None) -> list[tuple[str, float]]:
+        """Rank the models of all loaders, keeping the best score of a model known to several loaders."""
+        scores: dict[str, float] = {}
+        for loader in self.loaders:
+            for model, score in await loader.search_models(manufacturer, query, limit):
+                scores[model] = max(score, scores.get(model, 0.0))
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
     async def get_model_metadata(self, manufacturer: str, model: str) -> ModelMetadata | None:
         """Return the metadata of the first loader knowing the model, matching load_model precedence."""
         for loader in self.loaders:
@@ -84,6 +109,15 @@ class CompositeLoader(Loader):
 
         return None
 
+    async def get_lut_metadata(self, directory: str) -> LutMetadata | None:
+        """Return the LUT metadata of the loader indexing the profile directory."""
+        for loader in self.loaders:
+            lut_metadata = await loader.get_lut_metadata(directory)
+            if lut_metadata is not None:
+                return lut_metadata
+
+        return None
+
     async def find_model_migration(self, manufacturer: str, model: str) -> str | None:
         """Find the canonical model id for a legacy profile id."""
         matches: set[str] = set()
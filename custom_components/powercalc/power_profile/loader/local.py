@@ -1,24 +1,52 @@
+from collections.abc import Iterable, Iterator
 from functools import partial
+import hashlib
 import json
 import logging
 import os
-from typing import Any, cast
+import pickle
+from typing import Any, NamedTuple, cast
 
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import STORAGE_DIR
 
+from custom_components.powercalc.const import BUILT_IN_LIBRARY_DIR
+from custom_components.powercalc.power_profile.bundle import ProfileBundle, get_profile_bundles
 from custom_components.powercalc.power_profile.error import LibraryLoadingError
 from custom_components.powercalc.power_profile.loader.protocol import Loader, ModelMetadata
-from custom_components.powercalc.power_profile.power_profile import DeviceType, DiscoveryBy, PowerProfile
+from custom_components.powercalc.power_profile.model_search import ModelSearchIndex
+from custom_components.powercalc.power_profile.power_profile import (
+    DeviceType,
+    DiscoveryBy,
+    LutMetadata,
+    PowerProfile,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+# model.json path -> ((mtime_ns, size), parsed model.json)
+type ScanCache = dict[str, tuple[tuple[int, int], dict[str, Any]]]
+
+
+class LocalModel(NamedTuple):
+    """A model (or alias) found in the library directory, the profile is only created when needed."""
+
+    manufacturer: str
+    model: str
+    directory: str
+    json_data: dict[str, Any]
+
 
 class LocalLoader(Loader):
     def __init__(self, hass: HomeAssistant, directory: str, is_custom_directory: bool = False) -> None:
         self._is_custom_directory = is_custom_directory
         self._data_directory = directory
         self._hass = hass
-        self._manufacturer_model_listing: dict[str, dict[str, PowerProfile]] = {}
+        self._manufacturer_model_listing: dict[str, dict[str, LocalModel]] = {}
+        self._profiles: dict[tuple[str, str], PowerProfile] = {}
+        self._model_search: dict[str, ModelSearchIndex] = {}
+        self._scan_cache: ScanCache | None = None
+        self._library_hash = ""
 
     async def initialize(self, prefer_cached: bool = False) -> None:
         """Initialize the loader. Local profiles are read from disk, so nothing is ever cached remotely."""
@@ -29,6 +57,10 @@ class LocalLoader(Loader):
         """Local profile directories do not provide global library metadata."""
         return set()
 
+    def get_library_hash(self) -> str:
+        """Get a hash of all model.json files found in the library directory."""
+        return self._library_hash
+
     async def get_manufacturer_listing(
         self,
         device_types: set[DeviceType] | None,
@@ -40,8 +72,8 @@ class LocalLoader(Loader):
                 return {(manufacturer, manufacturer) for manufacturer in self._manufacturer_model_listing}
             return {
                 (manufacturer, manufacturer)
-                for manufacturer, profiles in self._manufacturer_model_listing.items()
-                if any(profile.discovery_by == discovery_by for profile in profiles.values())
+                for manufacturer, models in self._manufacturer_model_listing.items()
+                if any(self._get_profile(model).discovery_by == discovery_by for model in models.values())
             }
 
         manufacturers: set[tuple[str, str]] = set()
@@ -83,7 +115,8 @@ class LocalLoader(Loader):
         if not models:
             return found_models
 
-        for profile in models.values():
+        for model in models.values():
+            profile = self._get_profile(model)
             if device_types and profile.device_type not in device_types:
                 continue
             if discovery_by and profile.discovery_by != discovery_by:
@@ -118,9 +151,10 @@ class LocalLoader(Loader):
         if lib_model is None:
             return None
 
-        model_path = lib_model.get_model_directory()
-        model_json = lib_model.json_data
-        return model_json, model_path
+        return lib_model.json_data, lib_model.directory
+
+    async def prefetch_models(self, models: Iterable[tuple[str, str]]) -> None:
+        """Local profiles are already on disk, there is nothing to prefetch."""
 
     async def find_model(self, manufacturer: str, search: set[str]) -> list[str]:
         """Find a model for a given manufacturer. Also must check aliases."""
@@ -132,8 +166,28 @@ class LocalLoader(Loader):
 
         search_lower = {phrase.lower() for phrase in search}
 
-        profile = next((models[model] for model in models if model.lower() in search_lower), None)
-        return [profile.model] if profile else []
+        found_model = next((models[model] for model in models if model.lower() in search_lower), None)
+        return [self._get_profile(found_model).model] if found_model else []
+
+    async def search_models(self, manufacturer: str, query: str, limit: int | None) -> list[tuple[str, float]]:
+        """Rank the models of the manufacturer by similarity to the query."""
+        _manufacturer = manufacturer.lower()
+        search_index = self._model_search.get(_manufacturer)
+        if search_index is None:
+            models = self._manufacturer_model_listing.get(_manufacturer)
+            if not models:
+                return []
+            # Aliases are listed as separate entries, only index the model directories with their aliases
+            search_index = self._model_search[_manufacturer] = ModelSearchIndex(
+                (
+                    local_model.model,
+                    local_model.json_data.get("aliases") or [],
+                    [local_model.json_data["name"]] if local_model.json_data.get("name") else [],
+                )
+                for local_model in models.values()
+                if local_model.model == os.path.basename(local_model.directory)
+            )
+        return search_index.search(query, limit)
 
     async def find_model_migration(self, manufacturer: str, model: str) -> str | None:
         """Local custom libraries do not support metadata-driven legacy profile migrations."""
@@ -142,12 +196,20 @@ class LocalLoader(Loader):
     async def get_model_metadata(self, manufacturer: str, model: str) -> ModelMetadata | None:
         """Return discovery metadata from the already parsed local profile."""
         models = self._manufacturer_model_listing.get(manufacturer.lower())
-        profile = models.get(model.lower()) if models else None
-        if profile is None or profile.device_type is None:
+        local_model = models.get(model.lower()) if models else None
+        if local_model is None:
+            return None
+
+        profile = self._get_profile(local_model)
+        if profile.device_type is None:
             return None
 
         return ModelMetadata(device_type=profile.device_type, discovery_by=profile.discovery_by)
 
+    async def get_lut_metadata(self, directory: str) -> LutMetadata | None:
+        """Local libraries have no index of their LUT files, these are looked up on disk."""
+        return None
+
     def _load_custom_library(self) -> None:
         """Loading custom models and aliases from file system.
         Manufacturer directories without model directories and model.json files within
@@ -161,58 +223,139 @@ class LocalLoader(Loader):
             return
 
         self._manufacturer_model_listing.clear()
+        self._profiles.clear()
+        self._model_search.clear()
+        bundle = get_profile_bundles(self._hass).open(base_path)
+        model_jsons = self._iter_bundled_models(bundle) if bundle else self._iter_directory_models(base_path)
+        for manufacturer_dir, model_dir, model_json in model_jsons:
+            manufacturer = manufacturer_dir.lower()
+            model_path = os.path.join(base_path, manufacturer_dir, model_dir)
+            self._add_model_to_library(LocalModel(manufacturer, model_dir, model_path, model_json))
+            for alias in model_json.get("aliases") or []:
+                self._add_model_to_library(LocalModel(manufacturer, alias, model_path, model_json))
+        self._library_hash = self._get_file_signatures_hash(bundle)
+
+    def _get_file_signatures_hash(self, bundle: ProfileBundle | None) -> str:
+        """Hash the (path, mtime_ns, size) signatures of the scanned model.json files, or of the bundle."""
+        if bundle:
+            stat = os.stat(bundle.path)
+            signatures = [(bundle.path, (stat.st_mtime_ns, stat.st_size))]
+        else:
+            signatures = sorted((path, entry[0]) for path, entry in (self._scan_cache or {}).items())
+
+        library_hash = hashlib.sha256()
+        for path, (mtime_ns, size) in signatures:
+            library_hash.update(f"{path}:{mtime_ns}:{size}\n".encode())
+        return library_hash.hexdigest()
+
+    def _get_profile(self, local_model: LocalModel) -> PowerProfile:
+        """Get the profile of a model in the library, creating it on first use."""
+        key = (local_model.manufacturer, local_model.model)
+        profile = self._profiles.get(key)
+        if profile is None:
+            profile = self._profiles[key] = PowerProfile(
+                self._hass,
+                manufacturer=local_model.manufacturer,
+                model=local_model.model,
+                directory=local_model.directory,
+                json_data=local_model.json_data,
+            )
+        return profile
+
+    def _iter_directory_models(self, base_path: str) -> Iterator[tuple[str, str, dict[str, Any]]]:
+        """Yield manufacturer directory, model directory and model.json of every model in the directory tree.
+
+        Parsed model.json files are cached by modification time and size, and persisted in the storage
+        directory, so only added or changed files are parsed again.
+        """
+        if self._scan_cache is None:
+            self._scan_cache = self._read_scan_cache()
+        previous_cache = self._scan_cache
+        scan_cache: ScanCache = {}
+
         for manufacturer_dir in next(os.walk(base_path))[1]:
             manufacturer_path = os.path.join(base_path, manufacturer_dir)
-
-            manufacturer = manufacturer_dir.lower()
             for model_dir in next(os.walk(manufacturer_path))[1]:
                 if model_dir.startswith("."):
                     continue
 
                 model_path = os.path.join(manufacturer_path, model_dir)
-
                 model_json_path = os.path.join(model_path, "model.json")
-                if not os.path.exists(model_json_path):
+                try:
+                    stat = os.stat(model_json_path)
+                except FileNotFoundError:
                     _LOGGER.warning("model.json should exist in %s!", model_path)
                     continue
 
-                model_json = self._load_json(model_json_path)
-                profile = PowerProfile(
-                    self._hass,
-                    manufacturer=manufacturer,
-                    model=model_dir,
-                    directory=model_path,
-                    json_data=model_json,
-                )
-
-                self._add_profile_to_library(profile)
-                for alias in profile.aliases:
-                    self._add_profile_to_library(
-                        PowerProfile(
-                            self._hass,
-                            manufacturer=manufacturer,
-                            model=alias,
-                            directory=model_path,
-                            json_data=model_json,
-                        ),
-                    )
-
-    def _add_profile_to_library(self, profile: PowerProfile) -> None:
-        """Add profile to the library lookup dictionary."""
-        manufacturer = profile.manufacturer
+                signature = (stat.st_mtime_ns, stat.st_size)
+                cached = previous_cache.get(model_json_path)
+                model_json = cached[1] if cached and cached[0] == signature else self._load_json(model_json_path)
+                scan_cache[model_json_path] = (signature, model_json)
+                yield manufacturer_dir, model_dir, model_json
+
+        self._scan_cache = scan_cache
+        if {path: entry[0] for path, entry in scan_cache.items()} != {
+            path: entry[0] for path, entry in previous_cache.items()
+        }:
+            self._write_scan_cache(scan_cache)
+
+    def _get_scan_cache_path(self) -> str:
+        """Retrieve the storage path of the scan cache, one per library directory."""
+        directory_hash = hashlib.sha1(os.path.abspath(self._data_directory).encode(), usedforsecurity=False)
+        return str(
+            self._hass.config.path(STORAGE_DIR, BUILT_IN_LIBRARY_DIR, f".local_scan_{directory_hash.hexdigest()}"),
+        )
+
+    def _read_scan_cache(self) -> ScanCache:
+        """Read the persisted scan cache, empty when missing or unreadable."""
+        try:
+            with open(self._get_scan_cache_path(), "rb") as f:
+                # The file is only ever written by the loader itself, in the Home Assistant storage directory.
+                scan_cache = pickle.load(f)  # noqa: S301
+        except FileNotFoundError:
+            return {}
+        except (OSError, EOFError, pickle.UnpicklingError) as err:
+            _LOGGER.debug("Could not read the profile scan cache, rescanning: %s", err)
+            return {}
+        return scan_cache if isinstance(scan_cache, dict) else {}
+
+    def _write_scan_cache(self, scan_cache: ScanCache) -> None:
+        """Persist the scan cache, replacing the previous one atomically."""
+        path = self._get_scan_cache_path()
+        tmp_path = f"{path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                pickle.dump(scan_cache, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as err:
+            _LOGGER.debug("Could not write the profile scan cache: %s", err)
+
+    @staticmethod
+    def _iter_bundled_models(bundle: ProfileBundle) -> Iterator[tuple[str, str, dict[str, Any]]]:
+        """Yield manufacturer directory, model directory and model.json of every model in the bundle."""
+        for manufacturer_dir in bundle.list_directories(""):
+            for model_dir in bundle.list_directories(manufacturer_dir):
+                model_json_path = f"{manufacturer_dir}/{model_dir}/model.json"
+                if bundle.is_file(model_json_path):
+                    yield manufacturer_dir, model_dir, cast(dict[str, Any], json.loads(bundle.read(model_json_path)))
+
+    def _add_model_to_library(self, local_model: LocalModel) -> None:
+        """Add model to the library lookup dictionary."""
+        manufacturer = local_model.manufacturer
         if self._manufacturer_model_listing.get(manufacturer) is None:
             self._manufacturer_model_listing[manufacturer] = {}
 
-        search_key = profile.model.lower()
+        search_key = local_model.model.replace("#slash#", "/").lower()
         if self._manufacturer_model_listing[manufacturer].get(search_key):
             _LOGGER.error(
                 "Double entry manufacturer/model in custom library: %s/%s",
-                profile.manufacturer,
-                profile.model,
+                manufacturer,
+                local_model.model,
             )
             return
 
-        self._manufacturer_model_listing[manufacturer].update({search_key: profile})
+        self._manufacturer_model_listing[manufacturer].update({search_key: local_model})
 
     def _load_custom_model(self, manufacturer: str, model: str) -> tuple[str, dict[str, Any]]:
         """Load model.json from a directly configured custom model directory."""
@@ -1,6 +1,7 @@
+from collections.abc import Iterable
 from typing import Any, NamedTuple, Protocol
 
-from custom_components.powercalc.power_profile.power_profile import DeviceType, DiscoveryBy
+from custom_components.powercalc.power_profile.power_profile import DeviceType, DiscoveryBy, LutMetadata
 
 
 class ModelMetadata(NamedTuple):
@@ -21,6 +22,9 @@ class Loader(Protocol):
     def get_discovery_low_priority_domains(self) -> set[str]:
         """Get integration domains that are the least preferred source for discovery."""
 
+    def get_library_hash(self) -> str:
+        """Get a hash of the library contents, which changes whenever a model is added, removed or changed."""
+
     async def get_manufacturer_listing(
         self,
         device_types: set[DeviceType] | None,
@@ -42,11 +46,20 @@ class Loader(Protocol):
     async def load_model(self, manufacturer: str, model: str) -> tuple[dict[str, Any], str] | None:
         """Load and optionally download a model profile."""
 
+    async def prefetch_models(self, models: Iterable[tuple[str, str]]) -> None:
+        """Make the given (manufacturer, model) profiles available locally ahead of loading them."""
+
     async def find_model(self, manufacturer: str, search: set[str]) -> list[str]:
         """Check if a model is available. Also must check aliases."""
 
+    async def search_models(self, manufacturer: str, query: str, limit: int | None) -> list[tuple[str, float]]:
+        """Rank the models of the manufacturer by similarity to the query, as (model id, score), best first."""
+
     async def find_model_migration(self, manufacturer: str, model: str) -> str | None:
         """Return the canonical model id for a legacy profile id using library metadata."""
 
     async def get_model_metadata(self, manufacturer: str, model: str) -> ModelMetadata | None:
         """Return discovery metadata for a model, or None when this loader does not know the model."""
+
+    async def get_lut_metadata(self, directory: str) -> LutMetadata | None:
+        """Return the LUT files of a profile directory loaded by this loader, None when they are not indexed."""
@@ -1,10 +1,13 @@
 import asyncio
-from collections.abc import Callable, Coroutine
+from collections.abc import Callable, Coroutine, Iterable
+from dataclasses import dataclass, field
 from functools import partial
+import hashlib
 import json
 from json import JSONDecodeError
 import logging
 import os
+import pickle
 import shutil
 from typing import Any, NotRequired, TypedDict, cast
 
@@ -22,10 +25,12 @@ from custom_components.powercalc.const import (
     DOMAIN,
     LIBRARY_DISCOVERY_LOW_PRIORITY_DOMAINS,
 )
-from custom_components.powercalc.helpers import async_cache, clear_async_cache
+from custom_components.powercalc.helpers import async_cache, clear_async_cache, release_limiter_slot
+from custom_components.powercalc.power_profile.bundle import get_profile_bundles, update_profile_bundle
 from custom_components.powercalc.power_profile.error import LibraryLoadingError, ProfileDownloadError
 from custom_components.powercalc.power_profile.loader.protocol import Loader, ModelMetadata
-from custom_components.powercalc.power_profile.power_profile import DeviceType, DiscoveryBy
+from custom_components.powercalc.power_profile.model_search import ModelSearchIndex
+from custom_components.powercalc.power_profile.power_profile import DeviceType, DiscoveryBy, LutMetadata
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -33,6 +38,16 @@ ENDPOINT_LIBRARY = f"{API_URL}/library"
 ENDPOINT_DOWNLOAD = f"{API_URL}/download"
 
 TIMEOUT_SECONDS = 30
+PREFETCH_CONCURRENCY = 8
+
+# Maximum number of cached results per lookup method, the least recently used results are dropped first
+LISTING_CACHE_SIZE = 64
+LOOKUP_CACHE_SIZE = 1024
+MODEL_CACHE_SIZE = 256
+
+LIBRARY_INDEX_FILE = ".library_index"
+# Bump when the structure of LibraryIndex changes, so indexes stored by a previous build are rebuilt
+LIBRARY_INDEX_FORMAT = 3
 
 
 class LibraryModel(TypedDict):
@@ -44,6 +59,7 @@ class LibraryModel(TypedDict):
     device_type: NotRequired[DeviceType]
     discovery_by: NotRequired[DiscoveryBy]
     min_version: NotRequired[str]
+    luts: NotRequired[LutMetadata]
 
 
 class LibraryManufacturer(TypedDict):
@@ -53,6 +69,19 @@ class LibraryManufacturer(TypedDict):
     models: list[LibraryModel]
 
 
+@dataclass
+class LibraryIndex:
+    """library.json together with the lookup tables built from it."""
+
+    library_contents: dict[str, Any]
+    model_infos: dict[str, LibraryModel] = field(default_factory=dict)
+    manufacturer_models: dict[str, list[LibraryModel]] = field(default_factory=dict)
+    model_lookup: dict[str, dict[str, list[LibraryModel]]] = field(default_factory=dict)
+    manufacturer_lookup: dict[str, set[str]] = field(default_factory=dict)
+    model_search: dict[str, ModelSearchIndex] = field(default_factory=dict)
+    library_hash: str = ""
+
+
 class RemoteLoader(Loader):
     retry_timeout = 3
 
@@ -63,6 +92,8 @@ class RemoteLoader(Loader):
         self.manufacturer_models: dict[str, list[LibraryModel]] = {}
         self.model_lookup: dict[str, dict[str, list[LibraryModel]]] = {}
         self.manufacturer_lookup: dict[str, set[str]] = {}
+        self.model_search: dict[str, ModelSearchIndex] = {}
+        self.library_hash = ""
         self.profile_hashes: dict[str, str] = {}
 
     async def initialize(self, prefer_cached: bool = False) -> None:
@@ -73,35 +104,106 @@ class RemoteLoader(Loader):
         """
 
         integration = await async_get_integration(self.hass, DOMAIN)
-        powercalc_version = AwesomeVersion(str(integration.version))
+        powercalc_version = str(integration.version)
 
         self._clear_caches()
-        self.library_contents = await self.load_library_json(prefer_cached)
+        library_data = await self.load_library_data(prefer_cached)
         self.profile_hashes = await self.hass.async_add_executor_job(self._load_profile_hashes)
 
-        self.model_infos.clear()
-        self.model_lookup.clear()
-        self.manufacturer_models.clear()
-        self.manufacturer_lookup.clear()
-
-        manufacturers: list[LibraryManufacturer] = self.library_contents.get("manufacturers", [])
-
-        for manufacturer in manufacturers:
-            self._index_manufacturer(manufacturer, powercalc_version)
+        index = await self.hass.async_add_executor_job(self._get_library_index, library_data, powercalc_version)
+        self.library_contents = index.library_contents
+        self.model_infos = index.model_infos
+        self.manufacturer_models = index.manufacturer_models
+        self.model_lookup = index.model_lookup
+        self.manufacturer_lookup = index.manufacturer_lookup
+        self.model_search = index.model_search
+        self.library_hash = index.library_hash
+        await self._update_profile_bundle()
 
     def get_discovery_low_priority_domains(self) -> set[str]:
         """Get the low priority discovery integration domains declared by library metadata."""
         return set(self.library_contents.get(LIBRARY_DISCOVERY_LOW_PRIORITY_DOMAINS, []))
 
-    def _index_manufacturer(self, manufacturer: LibraryManufacturer, powercalc_version: AwesomeVersion) -> None:
+    def get_library_hash(self) -> str:
+        """Get the hash of library.json, together with the Powercalc version the models are filtered for."""
+        return self.library_hash
+
+    def _get_library_index(self, library_data: bytes, powercalc_version: str) -> LibraryIndex:
+        """Get the lookup tables for library.json.
+
+        Building them means parsing the whole library and comparing the minimum version of every model, so
+        the result is stored next to library.json. The stored index is keyed by the library content hash,
+        the Powercalc version and the index format, and only rebuilt when one of these changes.
+        """
+        index_key = (hashlib.sha256(library_data).hexdigest(), powercalc_version, LIBRARY_INDEX_FORMAT)
+        index = self._read_library_index(index_key)
+        if index is not None:
+            _LOGGER.debug("Loaded library index from local storage")
+            return index
+
+        index = self._build_library_index(
+            cast(dict[str, Any], json.loads(library_data)),
+            AwesomeVersion(powercalc_version),
+        )
+        index.library_hash = f"{index_key[0]}/{powercalc_version}"
+        self._write_library_index(index_key, index)
+        return index
+
+    def _build_library_index(self, library_contents: dict[str, Any], powercalc_version: AwesomeVersion) -> LibraryIndex:
+        """Build the lookup tables for all manufacturers in library.json."""
+        index = LibraryIndex(library_contents)
+        manufacturers: list[LibraryManufacturer] = library_contents.get("manufacturers", [])
+        for manufacturer in manufacturers:
+            self._index_manufacturer(index, manufacturer, powercalc_version)
+        return index
+
+    def _get_library_index_path(self) -> str:
+        """Retrieve the local storage path for the library index file."""
+        return str(self.hass.config.path(STORAGE_DIR, BUILT_IN_LIBRARY_DIR, LIBRARY_INDEX_FILE))
+
+    def _read_library_index(self, index_key: tuple[str, str, int]) -> LibraryIndex | None:
+        """Read the stored library index, None when it is missing, unreadable or built for another key."""
+        try:
+            with open(self._get_library_index_path(), "rb") as f:
+                # The key is pickled separately in front of the index, so a stale index is never unpickled.
+                # The file is only ever written by the loader itself, in the Home Assistant storage directory.
+                if pickle.load(f) != index_key:  # noqa: S301
+                    return None
+                index = pickle.load(f)  # noqa: S301
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError) as err:
+            _LOGGER.debug("Could not read library index, rebuilding it: %s", err)
+            return None
+        return index if isinstance(index, LibraryIndex) else None
+
+    def _write_library_index(self, index_key: tuple[str, str, int], index: LibraryIndex) -> None:
+        """Store the library index, replacing the previous one atomically."""
+        path = self._get_library_index_path()
+        tmp_path = f"{path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                pickle.dump(index_key, f, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(index, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as err:
+            _LOGGER.debug("Could not write library index: %s", err)
+
+    def _index_manufacturer(
+        self,
+        index: LibraryIndex,
+        manufacturer: LibraryManufacturer,
+        powercalc_version: AwesomeVersion,
+    ) -> None:
         """Register a manufacturer, its aliases and all of its supported models in the lookup tables."""
         manufacturer_name = str(manufacturer.get("dir_name"))
         models: list[LibraryModel] = manufacturer.get("models", []) or []
 
         # manufacturer alias map (alias -> {canonical manufacturer_name})
-        self.manufacturer_lookup.setdefault(manufacturer_name.lower(), set()).add(manufacturer_name)
+        index.manufacturer_lookup.setdefault(manufacturer_name.lower(), set()).add(manufacturer_name)
         for alias in manufacturer.get("aliases", []) or []:
-            self.manufacturer_lookup.setdefault(str(alias).lower(), set()).add(manufacturer_name)
+            index.manufacturer_lookup.setdefault(str(alias).lower(), set()).add(manufacturer_name)
 
         # per-manufacturer model lookup
         kept_models: list[LibraryModel] = []
@@ -109,7 +211,7 @@ class RemoteLoader(Loader):
 
         for model in models:
             model_id = str(model.get("id"))
-            self.model_infos[f"{manufacturer_name}/{model_id}"] = model
+            index.model_infos[f"{manufacturer_name}/{model_id}"] = model
 
             if self._is_unsupported_version(manufacturer_name, model_id, model, powercalc_version):
                 continue
@@ -117,8 +219,12 @@ class RemoteLoader(Loader):
             kept_models.append(model)
             self._add_model_to_lookup(lookup, model, model_id.lower())
 
-        self.manufacturer_models[manufacturer_name] = kept_models
-        self.model_lookup[manufacturer_name] = lookup
+        index.manufacturer_models[manufacturer_name] = kept_models
+        index.model_lookup[manufacturer_name] = lookup
+        index.model_search[manufacturer_name] = ModelSearchIndex(
+            (model["id"], model.get("aliases", []) or [], [model["name"]] if model.get("name") else [])
+            for model in kept_models
+        )
 
     @staticmethod
     def _is_unsupported_version(
@@ -164,45 +270,45 @@ class RemoteLoader(Loader):
         clear_async_cache(self.find_model_migration)
         clear_async_cache(self.load_model)
 
-    async def load_library_json(self, prefer_cached: bool = False) -> dict[str, Any]:
-        """Load library.json, from local storage or from the download API.
+    async def load_library_data(self, prefer_cached: bool = False) -> bytes:
+        """Load the raw library.json, from local storage or from the download API.
 
         With `prefer_cached` the locally stored copy wins when it exists, so the caller never
         waits on the network. The periodic library update refreshes it later.
         """
         if prefer_cached:
-            cached_library = await self.hass.async_add_executor_job(self._read_local_library_json)
+            cached_library = await self.hass.async_add_executor_job(self._read_local_library_data)
             if cached_library is not None:
                 _LOGGER.debug("Loaded library.json from local storage")
                 return cached_library
             _LOGGER.debug("No library.json in local storage yet, downloading it")
 
         try:
-            return cast(dict[str, Any], await self.download_with_retry(self._download_remote_library_json))
+            return cast(bytes, await self.download_with_retry(self._download_remote_library_data))
         except ProfileDownloadError:
             _LOGGER.debug("Failed to download library.json, falling back to local copy")
-            return await self.hass.async_add_executor_job(self._load_local_library_json)
+            return await self.hass.async_add_executor_job(self._load_local_library_data)
 
     def _get_library_json_path(self) -> str:
         """Retrieve the local storage path for the library.json file."""
         return str(self.hass.config.path(STORAGE_DIR, BUILT_IN_LIBRARY_DIR, "library.json"))
 
-    def _read_local_library_json(self) -> dict[str, Any] | None:
+    def _read_local_library_data(self) -> bytes | None:
         """Read library.json from local storage, None when it has not been downloaded yet."""
         local_path = self._get_library_json_path()
         if not os.path.exists(local_path):
             return None
-        with open(local_path) as f:
-            return cast(dict[str, Any], json.load(f))
+        with open(local_path, "rb") as f:
+            return f.read()
 
-    def _load_local_library_json(self) -> dict[str, Any]:
+    def _load_local_library_data(self) -> bytes:
         """Load library.json from local storage, raising when it is not there."""
-        library_json = self._read_local_library_json()
-        if library_json is None:
+        library_data = self._read_local_library_data()
+        if library_data is None:
             raise ProfileDownloadError("Local library.json file not found")
-        return library_json
+        return library_data
 
-    async def _download_remote_library_json(self) -> dict[str, Any] | None:
+    async def _download_remote_library_data(self) -> bytes:
         """
         Download library.json from Github.
         On success, save it to local storage as a fallback for internet connection issues.
@@ -231,9 +337,9 @@ class RemoteLoader(Loader):
 
         await self.hass.async_add_executor_job(_save_to_local_storage, data)
 
-        return cast(dict[str, Any], json.loads(data))
+        return data
 
-    @async_cache
+    @async_cache(max_size=LISTING_CACHE_SIZE)
     async def get_manufacturer_listing(
         self,
         device_types: set[DeviceType] | None,
@@ -251,12 +357,12 @@ class RemoteLoader(Loader):
             )
         }
 
-    @async_cache
+    @async_cache(max_size=LOOKUP_CACHE_SIZE)
     async def find_manufacturers(self, search: str) -> set[str]:
         """Find the manufacturer in the library."""
         return self.manufacturer_lookup.get(search.lower(), set())
 
-    @async_cache
+    @async_cache(max_size=LISTING_CACHE_SIZE)
     async def get_model_listing(
         self,
         manufacturer: str,
@@ -296,7 +402,7 @@ class RemoteLoader(Loader):
 
         return not discovery_by or model_discovery_by == discovery_by
 
-    @async_cache
+    @async_cache(max_size=LOOKUP_CACHE_SIZE)
     async def find_model(self, manufacturer: str, search: set[str]) -> list[str]:
         """Find matching model IDs in the library."""
         models = self.model_lookup.get(manufacturer, {})
@@ -307,7 +413,12 @@ class RemoteLoader(Loader):
             for model in models[phrase_lower]
         ]
 
-    @async_cache
+    async def search_models(self, manufacturer: str, query: str, limit: int | None) -> list[tuple[str, float]]:
+        """Rank the models of the manufacturer by similarity to the query."""
+        search_index = self.model_search.get(manufacturer)
+        return search_index.search(query, limit) if search_index else []
+
+    @async_cache(max_size=LOOKUP_CACHE_SIZE)
     async def find_model_migration(self, manufacturer: str, model: str) -> str | None:
         """Find the canonical model id for a legacy profile id."""
         model_lower = model.lower()
@@ -338,7 +449,25 @@ class RemoteLoader(Loader):
 
         return ModelMetadata(device_type=device_type, discovery_by=discovery_by)
 
-    @async_cache
+    async def get_lut_metadata(self, directory: str) -> LutMetadata | None:
+        """Return the LUT files of a downloaded profile as listed in library.json.
+
+        Only when the downloaded profile is the version library.json describes, a profile kept after a failed
+        download may have other files.
+        """
+        library_directory = os.path.join(self.hass.config.path(STORAGE_DIR, BUILT_IN_LIBRARY_DIR), "")
+        if not directory.startswith(library_directory):
+            return None
+
+        # Downloaded profiles are stored at manufacturer/model below the library directory
+        model_key = directory.removeprefix(library_directory).replace(os.sep, "/")
+        model_info = self.model_infos.get(model_key)
+        if not model_info or self.profile_hashes.get(model_key) != model_info.get("hash"):
+            return None
+
+        return model_info.get("luts")
+
+    @async_cache(max_size=MODEL_CACHE_SIZE)
     async def load_model(
         self,
         manufacturer: str,
@@ -361,6 +490,65 @@ class RemoteLoader(Loader):
 
         return json_data, storage_path
 
+    async def prefetch_models(self, models: Iterable[tuple[str, str]]) -> None:
+        """Download all missing or outdated profiles of the given models in one batch.
+
+        At most PREFETCH_CONCURRENCY profiles are downloaded at the same time, and the profile hashes are
+        written once for the whole batch. Failures are only logged, `load_model` tries again for these.
+        """
+        semaphore = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+
+        async def _prefetch(manufacturer: str, model: str) -> bool:
+            async with semaphore:
+                model_info = self._get_library_model(manufacturer, model)
+                storage_path = self.get_storage_path(manufacturer, model)
+                model_path = os.path.join(storage_path, "model.json")
+                if not await self._needs_update(model_info, manufacturer, model, model_path, False):
+                    return False
+                try:
+                    await self._download_profile_with_retry(
+                        manufacturer,
+                        model,
+                        storage_path,
+                        model_path,
+                        save_hashes=False,
+                    )
+                except ProfileDownloadError as err:
+                    _LOGGER.debug("Failed to prefetch profile %s/%s: %s", manufacturer, model, err)
+                    return False
+                return True
+
+        results = await asyncio.gather(
+            *(
+                _prefetch(manufacturer, model)
+                for manufacturer, model in set(models)
+                if f"{manufacturer}/{model}" in self.model_infos
+            ),
+        )
+        if not any(results):
+            return
+
+        _LOGGER.debug("Prefetched %d profiles", sum(results))
+        await self.hass.async_add_executor_job(self._write_profile_hashes, dict(self.profile_hashes))
+        await self._update_profile_bundle()
+
+    async def _update_profile_bundle(self) -> None:
+        """Pack the downloaded profiles into a bundle, so their files are read from a single mmap.
+
+        Done on initialize and after prefetching, profiles downloaded in between are read from disk until then.
+        """
+        library_directory = self.hass.config.path(STORAGE_DIR, BUILT_IN_LIBRARY_DIR)
+        try:
+            await self.hass.async_add_executor_job(
+                update_profile_bundle,
+                get_profile_bundles(self.hass),
+                library_directory,
+                dict(self.profile_hashes),
+            )
+        except OSError as err:
+            # The profile files are read from disk instead
+            _LOGGER.warning("Could not update the profile bundle in %s: %s", library_directory, err)
+
     def _get_library_model(self, manufacturer: str, model: str) -> LibraryModel:
         """Retrieve model info, or raise an error if not found."""
         model_info = self.model_infos.get(f"{manufacturer}/{model}")
@@ -380,7 +568,7 @@ class RemoteLoader(Loader):
         if force_update:
             return True
 
-        path_exists = await self.hass.async_add_executor_job(os.path.exists, model_path)
+        path_exists = await self.hass.async_add_executor_job(get_profile_bundles(self.hass).is_file, model_path)
         if not path_exists:
             return True
 
@@ -394,15 +582,25 @@ class RemoteLoader(Loader):
         model: str,
         storage_path: str,
         model_path: str,
+        save_hashes: bool = True,
     ) -> None:
-        """Attempt to download the profile, with retry logic and error handling."""
+        """Attempt to download the profile, with retry logic and error handling.
+
+        Pass `save_hashes=False` when downloading a batch, the caller writes the profile hashes once afterwards.
+        """
         try:
             model_info = self._get_library_model(manufacturer, model)
             model_hash = str(model_info.get("hash"))
             callback = partial(self.download_profile, manufacturer, model, storage_path, model_hash)
-            await self.download_with_retry(callback)
+            # Sensor setups waiting for a slot can read their files in the meantime
+            async with release_limiter_slot():
+                await self.download_with_retry(callback)
+            # The bundle may hold the previous version of the profile
+            get_profile_bundles(self.hass).mark_stale(storage_path)
             self.profile_hashes[f"{manufacturer}/{model}"] = model_hash
-            await self.hass.async_add_executor_job(self._write_profile_hashes, self.profile_hashes)
+            if save_hashes:
+                # Write a copy, other downloads may update the hashes while the executor is writing
+                await self.hass.async_add_executor_job(self._write_profile_hashes, dict(self.profile_hashes))
         except ProfileDownloadError as e:
             path_exists, storage_path_exists = await self.hass.async_add_executor_job(
                 self._profile_paths_exist,
@@ -424,8 +622,7 @@ class RemoteLoader(Loader):
         """Load the JSON data from the model file."""
 
         def _load_json() -> dict[str, Any]:
-            with open(model_path) as f:
-                return cast(dict[str, Any], json.load(f))
+            return cast(dict[str, Any], json.loads(get_profile_bundles(self.hass).read(model_path)))
 
         return await self.hass.async_add_executor_job(_load_json)
 
@@ -447,10 +644,10 @@ class RemoteLoader(Loader):
         """Retrieve the storage path for a given manufacturer and model."""
         return str(self.hass.config.path(STORAGE_DIR, BUILT_IN_LIBRARY_DIR, manufacturer, model))
 
-    async def download_with_retry(
+    async def download_with_retry[T](
         self,
-        callback: Callable[[], Coroutine[Any, Any, dict[str, Any] | None]],
-    ) -> dict[str, Any] | None:
+        callback: Callable[[], Coroutine[Any, Any, T]],
+    ) -> T | None:
         """Download a file from a remote endpoint with retries"""
         max_retries = 3
         retry_count = 0
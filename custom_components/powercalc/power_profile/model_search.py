@@ -0,0 +1,91 @@
+"""Fuzzy search over the model ids, aliases and names of a manufacturer.
+
+Integrations often report a model string which doesn't exactly match any model id or alias in the library, for
+example "LCT015 (Hue White and Color)", "LCT-015" or a firmware suffixed "LCT015_v2". The index normalizes model
+strings to lowercase alphanumeric tokens, and ranks the models by:
+
+- the normalized query equals an id, alias or name (EXACT_SCORE)
+- all tokens of an id or alias are found in the query (CONTAINED_SCORE)
+- otherwise the Dice coefficient of the trigrams of both strings, without separators
+
+Only keys sharing at least one trigram with the query are scored, found through an inverted trigram index.
+"""
+
+from collections import Counter
+from collections.abc import Iterable
+import re
+
+EXACT_SCORE = 1.0
+CONTAINED_SCORE = 0.9
+# Ids and aliases shorter than this, like "E27", are too generic to be matched by containment
+MIN_CONTAINED_LENGTH = 4
+
+_TOKEN_REGEX = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(value: str) -> tuple[str, ...]:
+    """Split a model string into lowercase alphanumeric tokens."""
+    return tuple(_TOKEN_REGEX.findall(value.lower()))
+
+
+def trigrams(compact: str) -> set[str]:
+    padded = f"${compact}$"
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class ModelSearchIndex:
+    """Search index for the models of a single manufacturer, built once together with the library index."""
+
+    __slots__ = ("_keys", "_postings")
+
+    def __init__(self, models: Iterable[tuple[str, Iterable[str], Iterable[str]]]) -> None:
+        """Build the index from (model id, aliases, names) tuples."""
+        # model id, compact key, key tokens, number of key trigrams, whether the key can match by containment
+        self._keys: list[tuple[str, str, tuple[str, ...], int, bool]] = []
+        self._postings: dict[str, list[int]] = {}
+        for model_id, aliases, names in models:
+            for key in dict.fromkeys((model_id, *aliases)):
+                self._add_key(model_id, key, identifier=True)
+            for name in names:
+                self._add_key(model_id, name, identifier=False)
+
+    def _add_key(self, model_id: str, key: str, identifier: bool) -> None:
+        tokens = tokenize(key)
+        compact = "".join(tokens)
+        if not compact:
+            return
+        key_trigrams = trigrams(compact)
+        key_index = len(self._keys)
+        self._keys.append(
+            (model_id, compact, tokens, len(key_trigrams), identifier and len(compact) >= MIN_CONTAINED_LENGTH),
+        )
+        for trigram in key_trigrams:
+            self._postings.setdefault(trigram, []).append(key_index)
+
+    def search(self, query: str, limit: int | None = 10, min_score: float = 0.0) -> list[tuple[str, float]]:
+        """Rank the models by similarity to the query, best match first."""
+        query_tokens = tokenize(query)
+        query_compact = "".join(query_tokens)
+        if not query_compact:
+            return []
+
+        query_trigrams = trigrams(query_compact)
+        shared: Counter[int] = Counter()
+        for trigram in query_trigrams:
+            shared.update(self._postings.get(trigram, ()))
+
+        query_token_set = set(query_tokens)
+        scores: dict[str, float] = {}
+        for key_index, shared_count in shared.items():
+            model_id, compact, tokens, trigram_count, containable = self._keys[key_index]
+            if compact == query_compact:
+                score = EXACT_SCORE
+            elif containable and query_token_set.issuperset(tokens):
+                score = CONTAINED_SCORE
+            else:
+                # Stays below CONTAINED_SCORE for anything but near identical strings, which are exact anyway
+                score = min(2 * shared_count / (len(query_trigrams) + trigram_count), CONTAINED_SCORE - 0.01)
+            if score >= min_score and score > scores.get(model_id, 0.0):
+                scores[model_id] = score
+
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
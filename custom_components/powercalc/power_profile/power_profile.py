@@ -1,11 +1,10 @@
 from collections import defaultdict
 from collections.abc import Mapping
-from copy import deepcopy
 from dataclasses import dataclass
 from enum import StrEnum
 import logging
 import os
-from typing import Any, cast
+from typing import Any, TypedDict, cast
 
 from homeassistant.components.binary_sensor import DOMAIN as BINARY_SENSOR_DOMAIN
 from homeassistant.components.camera import DOMAIN as CAMERA_DOMAIN
@@ -80,6 +79,21 @@ class CustomField:
     default: Any = None
 
 
+class LutFileMetadata(TypedDict):
+    """A LUT file of a library profile, as described in library.json."""
+
+    file: str
+    rows: int
+    # sha256 of the file contents
+    hash: str
+    # Lowest and highest value per key column, like bri or mired
+    ranges: dict[str, list[float]]
+
+
+# LUT files by lookup mode, per sub profile directory, "" being the profile directory itself
+type LutMetadata = dict[str, dict[str, LutFileMetadata]]
+
+
 DEVICE_TYPE_DOMAIN: dict[DeviceType, str | set[str]] = {
     DeviceType.CAMERA: CAMERA_DOMAIN,
     DeviceType.COVER: COVER_DOMAIN,
@@ -142,16 +156,19 @@ class PowerProfile:
         directory: str,
         json_data: ConfigType,
         sub_profiles: list[tuple[str, dict[str, Any]]] | None = None,
+        lut_metadata: LutMetadata | None = None,
     ) -> None:
         self._manufacturer = manufacturer
         self._model = model.replace("#slash#", "/")
         self._hass = hass
         self._directory = directory
-        self._base_json_data = deepcopy(json_data)
-        self._json_data = deepcopy(json_data)
+        # The JSON data is shared between all profiles of the same model and must never be modified
+        self._base_json_data = json_data
+        self._json_data = json_data
         self.sub_profile: str | None = None
         self._sub_profile_dir: str | None = None
         self._sub_profiles = sub_profiles or []
+        self._lut_metadata = lut_metadata
 
     def get_model_directory(self, root_only: bool = False) -> str:
         """Get the model directory containing the data files."""
@@ -160,6 +177,13 @@ class PowerProfile:
 
         return self._sub_profile_dir or self._directory
 
+    @property
+    def lut_files(self) -> dict[str, LutFileMetadata] | None:
+        """LUT files of the selected (sub) profile by lookup mode, None when the library index doesn't list them."""
+        if self._lut_metadata is None:
+            return None
+        return self._lut_metadata.get(self.sub_profile or "", {})
+
     @property
     def manufacturer(self) -> str:
         """Get the manufacturer of this profile."""
@@ -428,8 +452,7 @@ class PowerProfile:
         self._sub_profile_dir = os.path.join(self._directory, sub_profile)
         _LOGGER.debug("Loading sub profile: %s", sub_profile)
 
-        self._json_data = deepcopy(self._base_json_data)
-        self._json_data.update(deepcopy(found_profile))
+        self._json_data = {**self._base_json_data, **found_profile}
 
         self.sub_profile = sub_profile
 
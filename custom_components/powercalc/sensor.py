@@ -1,7 +1,9 @@
 """Platform for sensor integration."""
 
-from collections.abc import Mapping
+import asyncio
+from collections.abc import Awaitable, Callable, Mapping
 from dataclasses import dataclass, field
+from functools import partial
 import logging
 from typing import Any, cast
 import uuid
@@ -60,12 +62,15 @@ from .const import (
     DATA_GROUP_ENTITIES,
     DATA_HAS_GROUP_INCLUDE,
     DATA_MEASURE_APP_COORDINATOR,
+    DATA_PRIMARY_SETUPS,
+    DATA_SENSOR_SETUP_LIMITER,
     DATA_SENSOR_TYPES,
     DATA_SOURCE_DOMAINS,
     DATA_USED_UNIQUE_IDS,
     DISCOVERY_TYPE,
     DOMAIN,
     DOMAIN_CONFIG,
+    DUMMY_ENTITY_ID,
     ENTRY_DATA_ENERGY_ENTITY,
     ENTRY_DATA_POWER_ENTITY,
     ENTRY_GLOBAL_CONFIG_UNIQUE_ID,
@@ -97,6 +102,7 @@ from .errors import (
 )
 from .group_include.filter import FilterOperator, create_composite_filter
 from .group_include.include import find_entities
+from .helpers import KeyedLimiter, PendingSetups
 from .measure import MeasureAppCoordinator
 from .sensors.cost import CostSensor, create_cost_sensor_for_energy_entity
 from .sensors.daily_energy import (
@@ -111,9 +117,13 @@ from .sensors.group.factory import create_group_sensors
 from .sensors.group.standby import StandbyPowerSensor
 from .sensors.measure import MeasureSessionStatusSensor
 from .sensors.power import PowerSensor, VirtualPowerSensor, create_power_sensor
+from .startup_timing import async_time_phase, get_sensor_label
 
 _LOGGER = logging.getLogger(__name__)
 
+# Number of sensors set up at the same time, overlapping their profile, LUT and other file loads
+SENSOR_SETUP_CONCURRENCY = 16
+
 ENTITY_ID_FORMAT = SENSOR_DOMAIN + ".{}"
 
 # Powercalc sensors are calculated from state changes and never poll, so updates
@@ -157,13 +167,13 @@ async def async_setup_platform(
     if CONF_CREATE_GROUP in config:
         config[CONF_NAME] = config[CONF_CREATE_GROUP]
 
-    await _async_setup_entities(
-        hass,
-        config,
-        async_add_entities,
-        is_yaml=True,
-        discovery_type=discovery_info.get(DISCOVERY_TYPE) if discovery_info else None,
-    )
+    discovery_type = discovery_info.get(DISCOVERY_TYPE) if discovery_info else None
+    try:
+        await _async_setup_entities(hass, config, async_add_entities, is_yaml=True, discovery_type=discovery_type)
+    finally:
+        if discovery_type == PowercalcDiscoveryType.USER_YAML and CONF_INCLUDE not in config:
+            # Sensors with registry include filters wait for these, see setup_yaml_sensors
+            _finish_primary_setup(hass)
 
 
 async def async_setup_entry(
@@ -188,17 +198,26 @@ async def async_setup_entry(
             str(sensor_config.get(CONF_ENTITY_ID)),
         )
 
-    await _async_setup_entities(
-        hass,
-        sensor_config,
-        async_add_entities,
-        config_entry=entry,
-    )
+    try:
+        await _async_setup_entities(
+            hass,
+            sensor_config,
+            async_add_entities,
+            config_entry=entry,
+        )
+    finally:
+        # Sensors with registry include filters wait for these, see setup_yaml_sensors
+        _finish_primary_setup(hass)
 
     # Add entry to an existing group
     await add_to_associated_groups(hass, entry)
 
 
+def _finish_primary_setup(hass: HomeAssistant) -> None:
+    primary_setups: PendingSetups = hass.data[DOMAIN][DATA_PRIMARY_SETUPS]
+    primary_setups.finish()
+
+
 async def _async_setup_entities(
     hass: HomeAssistant,
     config: dict[str, Any],
@@ -518,23 +537,35 @@ async def setup_nested_or_group_sensors(
     sensor_configs: ConfigType,
 ) -> None:
     """Set up sensors for nested or grouped entities."""
+    nested_configs: list[ConfigType] = []
     for entity_config in config.get(CONF_ENTITIES, []):
         if CONF_ENTITIES in entity_config or context.group:
-            await handle_nested_entity(hass, entity_config, context, entities_to_add)
+            nested_configs.append(entity_config)
         else:
             entity_id = entity_config.get(CONF_ENTITY_ID) or str(uuid.uuid4())
             sensor_configs[entity_id] = entity_config
 
+    # Set up concurrently, extending the bucket in configuration order afterwards.
+    # Only individual sensors take a setup slot, nested groups waiting for a slot could use up all slots.
+    for child_entities in await asyncio.gather(
+        *(
+            _async_limit_setup(hass, entity_config, partial(handle_nested_entity, hass, entity_config, context))
+            if is_individual_sensor_setup(entity_config)
+            else handle_nested_entity(hass, entity_config, context)
+            for entity_config in nested_configs
+        ),
+    ):
+        entities_to_add.extend_items(child_entities)
+
 
 async def handle_nested_entity(
     hass: HomeAssistant,
     entity_config: ConfigType,
     context: CreationContext,
-    entities_to_add: EntitiesBucket,
-) -> None:
+) -> EntitiesBucket:
     """Handle nested entities recursively."""
     try:
-        child_entities = await create_sensors(
+        return await create_sensors(
             hass,
             entity_config,
             context=CreationContext(
@@ -544,9 +575,9 @@ async def handle_nested_entity(
                 discovery_type=context.discovery_type,
             ),
         )
-        entities_to_add.extend_items(child_entities)
     except SensorConfigurationError:
         _LOGGER.exception("Group state might be misbehaving because there was an error with an entity")
+        return EntitiesBucket()
 
 
 async def add_discovered_entities(
@@ -577,30 +608,38 @@ async def create_entities_sensors(
     sensor_configs: ConfigType,
     entities_to_add: EntitiesBucket,
 ) -> None:
-    """Create sensors for each entity."""
-    for sensor_config in sensor_configs.values():
+    """Create sensors for each entity, concurrently."""
+
+    async def _create_entity_sensors(sensor_config: ConfigType) -> EntitiesBucket:
         try:
             merged_sensor_config = get_merged_sensor_configuration(
                 global_config,
                 config,
                 sensor_config,
             )
-            entities_to_add.extend_items(
-                await create_individual_sensors(
-                    hass,
-                    merged_sensor_config,
-                    config_entry=config_entry,
-                    sensor_type=merged_sensor_config.get(CONF_SENSOR_TYPE, SensorType.VIRTUAL_POWER),
-                    context=CreationContext(
-                        group=context.group,
-                        entity_config=sensor_config,
-                        is_yaml=context.is_yaml,
-                        discovery_type=context.discovery_type,
-                    ),
+            return await create_individual_sensors(
+                hass,
+                merged_sensor_config,
+                config_entry=config_entry,
+                sensor_type=merged_sensor_config.get(CONF_SENSOR_TYPE, SensorType.VIRTUAL_POWER),
+                context=CreationContext(
+                    group=context.group,
+                    entity_config=sensor_config,
+                    is_yaml=context.is_yaml,
+                    discovery_type=context.discovery_type,
                 ),
             )
         except SensorConfigurationError as error:
             _LOGGER.error(error)
+            return EntitiesBucket()
+
+    for bucket in await asyncio.gather(
+        *(
+            _async_limit_setup(hass, sensor_config, partial(_create_entity_sensors, sensor_config))
+            for sensor_config in sensor_configs.values()
+        )
+    ):
+        entities_to_add.extend_items(bucket)
 
 
 def log_missing_entities_warning(config: ConfigType) -> None:
@@ -665,7 +704,44 @@ async def create_individual_sensors(
     config_entry: ConfigEntry | None = None,
 ) -> EntitiesBucket:
     """Create entities (power, energy, utility meters) which track the appliance."""
+    return await async_time_phase(
+        hass,
+        "create_individual_sensors",
+        _create_individual_sensors(hass, sensor_config, context, sensor_type, config_entry),
+        sensor=get_sensor_label(sensor_config),
+    )
+
 
+async def _async_limit_setup(
+    hass: HomeAssistant,
+    entity_config: ConfigType,
+    setup: Callable[[], Awaitable[EntitiesBucket]],
+) -> EntitiesBucket:
+    """Set up one of the entities of a group or nested configuration, up to SENSOR_SETUP_CONCURRENCY at a time.
+
+    Sensors for the same source entity are set up one after the other, so the already configured checks see the
+    sensors set up before. Profile downloads give up the slot, see release_limiter_slot.
+    """
+    entity_id = entity_config.get(CONF_ENTITY_ID)
+    async with get_sensor_setup_limiter(hass).acquire(None if entity_id in (None, DUMMY_ENTITY_ID) else entity_id):
+        return await setup()
+
+
+def get_sensor_setup_limiter(hass: HomeAssistant) -> KeyedLimiter:
+    domain_data = hass.data[DOMAIN]
+    limiter: KeyedLimiter | None = domain_data.get(DATA_SENSOR_SETUP_LIMITER)
+    if limiter is None:
+        limiter = domain_data[DATA_SENSOR_SETUP_LIMITER] = KeyedLimiter(SENSOR_SETUP_CONCURRENCY)
+    return limiter
+
+
+async def _create_individual_sensors(
+    hass: HomeAssistant,
+    sensor_config: ConfigType,
+    context: CreationContext,
+    sensor_type: SensorType,
+    config_entry: ConfigEntry | None,
+) -> EntitiesBucket:
     source_entity = create_source_entity(sensor_config[CONF_ENTITY_ID], hass)
 
     # For device-based profiles, attach the device entry to the source entity
@@ -1,8 +1,10 @@
-from collections.abc import Callable
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Iterator
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from decimal import Decimal
 import logging
+from typing import NamedTuple
 
 from homeassistant.components.sensor import ATTR_LAST_RESET, SensorDeviceClass, SensorEntity, SensorStateClass
 from homeassistant.const import (
@@ -11,7 +13,7 @@ from homeassistant.const import (
     CONF_UNIQUE_ID,
     UnitOfEnergy,
 )
-from homeassistant.core import Event, EventStateChangedData, HomeAssistant, State, callback
+from homeassistant.core import CALLBACK_TYPE, Event, EventStateChangedData, HomeAssistant, State, callback
 from homeassistant.helpers.event import async_track_state_change_event
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.typing import ConfigType
@@ -26,6 +28,7 @@ from custom_components.powercalc.const import (
     CONF_ENERGY_PRICE_SENSOR,
     CONF_ENERGY_PRICE_SURCHARGE,
     CONF_ENERGY_SENSOR_ID,
+    DATA_PRICE_TIMELINES,
     DEFAULT_COST_SENSOR_PRECISION,
     DOMAIN,
     DOMAIN_CONFIG,
@@ -43,6 +46,11 @@ from .utility_meter import VirtualUtilityMeter
 COST_ICON = "mdi:cash"
 ATTR_LAST_ENERGY = "last_energy"
 
+# How long price changes are remembered, which bounds how far back prices can be corrected
+PRICE_TIMELINE_RETENTION = timedelta(days=7)
+# Settled energy is remembered per slot of this length, corrections re-price whole slots
+SETTLED_ENERGY_RESOLUTION = timedelta(minutes=5)
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -154,6 +162,122 @@ def resolve_price_config(hass: HomeAssistant, sensor_config: ConfigType) -> Pric
     )
 
 
+class PricePoint(NamedTuple):
+    """A raw price per kWh, in effect from `timestamp` until the next price point."""
+
+    timestamp: float
+    price: Decimal | None
+
+
+class PriceTimeline:
+    """Records the changes of an energy price sensor once, shared by all cost sensors using that sensor.
+
+    Cost sensors don't settle anything when the price changes. On their next energy update they look up
+    which prices were in effect since their previous reading, so a price change is a single append,
+    however many cost sensors use the price sensor. The recorded prices also allow re-pricing energy
+    which was already settled, when a tariff turns out to be wrong.
+    """
+
+    def __init__(self, hass: HomeAssistant, entity_id: str) -> None:
+        self._hass = hass
+        self.entity_id = entity_id
+        state = hass.states.get(entity_id)
+        self.unit: str | None = state.attributes.get(ATTR_UNIT_OF_MEASUREMENT) if state else None
+        self._points = [PricePoint(state.last_updated_timestamp if state else 0.0, _parse_price(state))]
+        self._cost_sensors: set[CostSensor] = set()
+        self._remove_listener: CALLBACK_TYPE | None = None
+
+    @property
+    def current(self) -> PricePoint:
+        """Return the price point currently in effect."""
+        return self._points[-1]
+
+    def replaced_points(self, start: float, end: float) -> Iterator[PricePoint]:
+        """Yield the price points which were replaced by a price change in the period (start, end]."""
+        index = max(bisect_right(self._points, start, key=lambda point: point.timestamp), 1)
+        for previous, point in zip(self._points[index - 1 :], self._points[index:], strict=False):
+            if point.timestamp > end:
+                return
+            yield previous
+
+    @callback
+    def async_register(self, cost_sensor: CostSensor) -> CALLBACK_TYPE:
+        """Register a cost sensor, tracking the price sensor while any cost sensor is registered."""
+        if self._remove_listener is None:
+            self._remove_listener = async_track_state_change_event(
+                self._hass,
+                [self.entity_id],
+                self._handle_price_state_change,
+            )
+        self._cost_sensors.add(cost_sensor)
+
+        @callback
+        def unregister() -> None:
+            self._cost_sensors.discard(cost_sensor)
+            if self._cost_sensors:
+                return
+            if self._remove_listener is not None:
+                self._remove_listener()
+                self._remove_listener = None
+            self._hass.data[DOMAIN].get(DATA_PRICE_TIMELINES, {}).pop(self.entity_id, None)
+
+        return unregister
+
+    @callback
+    def _handle_price_state_change(self, event: Event[EventStateChangedData]) -> None:
+        """Record the new price, the cost sensors settle against it on their next energy update."""
+        new_state = event.data["new_state"]
+        if new_state is not None:
+            self.unit = new_state.attributes.get(ATTR_UNIT_OF_MEASUREMENT)
+        price = _parse_price(new_state)
+        if price == self.current.price:
+            return
+
+        timestamp = new_state.last_updated_timestamp if new_state else dt_util.utcnow().timestamp()
+        self._points.append(PricePoint(timestamp, price))
+
+        # Forget old prices, but keep the one which was still in effect at the cutoff
+        cutoff = timestamp - PRICE_TIMELINE_RETENTION.total_seconds()
+        index = bisect_right(self._points, cutoff, key=lambda point: point.timestamp)
+        if index > 1:
+            del self._points[: index - 1]
+
+    @callback
+    def async_correct_prices(self, start: datetime, end: datetime, price: Decimal) -> None:
+        """Replace the price in effect in the period [start, end) and re-price the energy settled in it.
+
+        The price points are split at the start and end of the period, after the period the price which was
+        in effect at its end applies again. A period ending in the future is corrected until now.
+        """
+        start_timestamp = start.timestamp()
+        end_timestamp = min(end.timestamp(), dt_util.utcnow().timestamp())
+        if start_timestamp >= end_timestamp:
+            return
+
+        start_index = bisect_left(self._points, start_timestamp, key=lambda point: point.timestamp)
+        end_index = bisect_left(self._points, end_timestamp, key=lambda point: point.timestamp)
+        points = [*self._points[:start_index], PricePoint(start_timestamp, price)]
+        if end_index == len(self._points) or self._points[end_index].timestamp > end_timestamp:
+            points.append(PricePoint(end_timestamp, self._points[end_index - 1].price if end_index else None))
+        self._points = points + self._points[end_index:]
+
+        for cost_sensor in self._cost_sensors:
+            cost_sensor.async_reprice(start_timestamp, end_timestamp, price)
+
+
+def async_get_price_timeline(hass: HomeAssistant, entity_id: str) -> PriceTimeline:
+    """Get the shared price timeline of a price sensor, creating it on first use."""
+    timelines: dict[str, PriceTimeline] = hass.data[DOMAIN].setdefault(DATA_PRICE_TIMELINES, {})
+    if entity_id not in timelines:
+        timelines[entity_id] = PriceTimeline(hass, entity_id)
+    return timelines[entity_id]
+
+
+def _parse_price(state: State | None) -> Decimal | None:
+    """Parse a price sensor state into a raw price per kWh."""
+    return _parse_scaled(state, _price_per_kwh_factor)
+
+
 def create_cost_sensor(
     hass: HomeAssistant,
     sensor_config: ConfigType,
@@ -264,6 +388,9 @@ class CostSensor(BaseEntity, RestoreEntity, SensorEntity):
         self._state: Decimal = Decimal(0)
         self._last_energy: Decimal | None = None
         self._current_price: Decimal | None = self._price_config.effective_price(self._price_config.fixed_price)
+        self._price_timeline: PriceTimeline | None = None
+        # Energy (kWh) settled per slot start and raw price, so it can be re-priced when a price gets corrected
+        self._settled_energy: dict[tuple[float, Decimal], Decimal] = {}
         # Only a resetting (per utility meter cycle) sensor uses last_reset; a lifetime cost
         # sensor accumulates monotonically and leaves it None.
         self._attr_last_reset: datetime | None = None
@@ -286,24 +413,14 @@ class CostSensor(BaseEntity, RestoreEntity, SensorEntity):
 
         _LOGGER.debug("%s: Restoring cost sensor state: %s", self.entity_id, self._state)
 
-        # Seed the current price and, for a price sensor, track its changes so consumption
+        # For a price sensor, use the price timeline shared with the other cost sensors, so consumption
         # is always settled at the price that was in effect when it was consumed.
         if self._price_entity_id is not None:
-            price_state = self.hass.states.get(self._price_entity_id)
+            self._price_timeline = async_get_price_timeline(self.hass, self._price_entity_id)
             # Prefer the currency of the price sensor (e.g. `€/kWh` -> `€`) over the HA currency.
-            price_unit = price_state.attributes.get(ATTR_UNIT_OF_MEASUREMENT) if price_state else None
-            if (currency := _currency_from_price_unit(price_unit)) is not None:
+            if (currency := _currency_from_price_unit(self._price_timeline.unit)) is not None:
                 self._attr_native_unit_of_measurement = currency
-            self._current_price = self._price_config.effective_price(
-                _parse_scaled(price_state, _price_per_kwh_factor),
-            )
-            self.async_on_remove(
-                async_track_state_change_event(
-                    self.hass,
-                    [self._price_entity_id],
-                    self._handle_price_state_change,
-                ),
-            )
+            self.async_on_remove(self._price_timeline.async_register(self))
 
         self.async_on_remove(
             async_track_state_change_event(
@@ -316,7 +433,8 @@ class CostSensor(BaseEntity, RestoreEntity, SensorEntity):
     @callback
     def _handle_energy_state_change(self, event: Event[EventStateChangedData]) -> None:
         """Accumulate cost based on the delta of the energy sensor and the current price."""
-        new_energy = _parse_scaled(event.data["new_state"], _to_kwh_factor)
+        new_state = event.data["new_state"]
+        new_energy = _parse_scaled(new_state, _to_kwh_factor)
         if new_energy is None:
             return
 
@@ -325,27 +443,58 @@ class CostSensor(BaseEntity, RestoreEntity, SensorEntity):
             self._last_energy = new_energy
             return
 
-        self._accumulate(new_energy, self._current_price)
-
-    @callback
-    def _handle_price_state_change(self, event: Event[EventStateChangedData]) -> None:
-        """Settle the energy consumed so far at the previous price, then adopt the new price."""
-        # Recalculate the outstanding energy delta with the previously known price before switching.
-        if self._last_energy is not None and self._current_price is not None:
-            current_energy = _parse_scaled(self.hass.states.get(self._source_energy_entity), _to_kwh_factor)
-            if current_energy is not None:
-                self._accumulate(current_energy, self._current_price)
-
-        self._current_price = self._price_config.effective_price(
-            _parse_scaled(event.data["new_state"], _price_per_kwh_factor),
-        )
+        if self._price_timeline is None:
+            changed = self._accumulate(new_energy, self._current_price)
+        else:
+            assert new_state is not None
+            settled_at = new_state.last_updated_timestamp
+            changed = self._settle_pending_energy(event.data["old_state"], settled_at)
+            price = self._price_timeline.current.price
+            changed = (
+                self._accumulate(new_energy, self._price_config.effective_price(price), (settled_at, price)) or changed
+            )
 
-    def _accumulate(self, new_energy: Decimal, price: Decimal | None) -> None:
-        """Add the cost of the consumed energy at the given price and advance the baseline."""
+        # Settling pending energy and the new delta results in a single state write
+        if changed:
+            self.async_write_ha_state()
+
+    def _settle_pending_energy(self, old_state: State | None, until: float) -> bool:
+        """Settle the energy which was already reported before a price change at the price it replaced.
+
+        Energy normally is settled on every update, energy can only be pending when no price was known
+        or when the energy sensor changed while the cost sensor was not running.
+        """
+        assert self._price_timeline is not None
+        old_energy = _parse_scaled(old_state, _to_kwh_factor)
+        if old_energy is None or old_energy == self._last_energy:
+            return False
+
+        assert old_state is not None
+        settled_at = old_state.last_updated_timestamp
+        for point in self._price_timeline.replaced_points(settled_at, until):
+            if point.price is not None:
+                return self._accumulate(
+                    old_energy,
+                    self._price_config.effective_price(point.price),
+                    (settled_at, point.price),
+                )
+        return False
+
+    def _accumulate(
+        self,
+        new_energy: Decimal,
+        price: Decimal | None,
+        settled: tuple[float, Decimal | None] | None = None,
+    ) -> bool:
+        """Add the cost of the consumed energy at the given price and advance the baseline.
+
+        `settled` is the time the energy was reported at and the raw price of the price timeline, the energy
+        is remembered so it can be re-priced. Returns whether the state changed and needs to be written.
+        """
         # Leave _last_energy untouched when no price is known, so the consumption is
         # priced once a price becomes available again.
         if price is None or self._last_energy is None:
-            return
+            return False
 
         delta = new_energy - self._last_energy
         if delta < 0:
@@ -354,16 +503,51 @@ class CostSensor(BaseEntity, RestoreEntity, SensorEntity):
                 self._state = Decimal(0)
                 self._last_energy = new_energy
                 self._attr_last_reset = dt_util.utcnow()
-                self.async_write_ha_state()
-                return
+                self._settled_energy.clear()
+                return True
             # The energy sensor got reset (e.g. restart or calibrate), treat the new value as the delta.
             delta = new_energy
         if delta == 0:
-            return
+            return False
 
         self._state += delta * price
         self._last_energy = new_energy
-        self.async_write_ha_state()
+        if settled is not None and settled[1] is not None:
+            self._record_settled_energy(settled[0], settled[1], delta)
+        return True
+
+    def _record_settled_energy(self, timestamp: float, price: Decimal, energy: Decimal) -> None:
+        """Remember the energy settled at a raw price, forgetting energy older than the price timeline keeps."""
+        resolution = SETTLED_ENERGY_RESOLUTION.total_seconds()
+        key = (timestamp - timestamp % resolution, price)
+        if key in self._settled_energy:
+            self._settled_energy[key] += energy
+            return
+
+        # Pending energy can be settled late, so compare all keys instead of relying on insertion order
+        cutoff = timestamp - PRICE_TIMELINE_RETENTION.total_seconds()
+        for old_key in [old_key for old_key in self._settled_energy if old_key[0] < cutoff]:
+            del self._settled_energy[old_key]
+        self._settled_energy[key] = energy
+
+    @callback
+    def async_reprice(self, start: float, end: float, price: Decimal) -> None:
+        """Re-price the energy settled in the slots starting in the period [start, end) at the corrected price."""
+        new_effective_price = self._price_config.effective_price(price)
+        assert new_effective_price is not None
+        difference = Decimal(0)
+        for key in [key for key in self._settled_energy if start <= key[0] < end and key[1] != price]:
+            slot, old_price = key
+            energy = self._settled_energy.pop(key)
+            old_effective_price = self._price_config.effective_price(old_price)
+            assert old_effective_price is not None
+            difference += energy * (new_effective_price - old_effective_price)
+            self._settled_energy[(slot, price)] = self._settled_energy.get((slot, price), Decimal(0)) + energy
+
+        if difference:
+            _LOGGER.debug("%s: Re-priced settled energy, cost changed by %s", self.entity_id, difference)
+            self._state += difference
+            self.async_write_ha_state()
 
     @callback
     def async_reset(self) -> None:
@@ -371,6 +555,7 @@ class CostSensor(BaseEntity, RestoreEntity, SensorEntity):
         _LOGGER.debug("%s: Reset cost sensor", self.entity_id)
         self._state = Decimal(0)
         self._attr_last_reset = dt_util.utcnow()
+        self._settled_energy.clear()
         self._set_current_energy_baseline()
         self.async_write_ha_state()
 
@@ -378,6 +563,7 @@ class CostSensor(BaseEntity, RestoreEntity, SensorEntity):
         """Set the cost sensor to the given value from the current source energy reading."""
         _LOGGER.debug("%s: Calibrate cost sensor to: %s", self.entity_id, value)
         self._state = Decimal(value)
+        self._settled_energy.clear()
         self._set_current_energy_baseline()
         self.async_write_ha_state()
 
@@ -42,6 +42,7 @@ from custom_components.powercalc.const import (
     DEFAULT_ENERGY_SENSOR_PRECISION,
     UnitPrefix,
 )
+from custom_components.powercalc.template_cache import cache_template
 from custom_components.powercalc.unit import ENERGY_UNIT_PREFIX_MAPPING, evaluate_to_decimal, parse_decimal
 
 from .abstract import generate_energy_sensor_entity_id, generate_energy_sensor_name
@@ -182,7 +183,7 @@ class DailyEnergySensor(EnergySensor, RestoreEntity, SensorEntity):
         self._attr_name = name
         self._state: Decimal = Decimal(0)
         self._attr_entity_category = sensor_config.get(CONF_ENERGY_SENSOR_CATEGORY)
-        self._value = value
+        self._value = cache_template(value)
         self._user_unit_of_measurement = user_unit_of_measurement
         self._update_frequency = update_frequency
         self._sensor_config = sensor_config
@@ -41,6 +41,7 @@ from custom_components.powercalc.const import (
 )
 from custom_components.powercalc.errors import SensorConfigurationError
 from custom_components.powercalc.filter.outlier import OutlierFilter
+from custom_components.powercalc.performance import instrumented
 
 from .abstract import (
     BaseEntity,
@@ -342,6 +343,7 @@ class VirtualEnergySensor(IntegrationSensor, EnergySensor):
         self._last_accepted_value: float | None = None
         self._last_rejected_value: float | None = None
 
+    @instrumented("integrate_on_state_change")
     def _integrate_on_state_change(self, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401
         """Override to add outlier filtering.
 
@@ -104,6 +104,7 @@ from custom_components.powercalc.group_include.filter import (
 )
 from custom_components.powercalc.group_include.include import find_entities
 from custom_components.powercalc.helpers import async_cache
+from custom_components.powercalc.performance import instrumented
 from custom_components.powercalc.sensors.abstract import (
     BaseEntity,
     generate_energy_sensor_entity_id,
@@ -114,6 +115,7 @@ from custom_components.powercalc.sensors.abstract import (
 from custom_components.powercalc.sensors.energy import EnergySensor, VirtualEnergySensor, VirtualStandbyEnergySensor
 from custom_components.powercalc.sensors.energy_related import create_energy_related_sensors
 from custom_components.powercalc.sensors.power import PowerSensor
+from custom_components.powercalc.startup_timing import async_time_phase, get_sensor_label
 from custom_components.powercalc.unit import (
     ENERGY_UNIT_PREFIX_MAPPING,
     convert_to_decimal,
@@ -523,6 +525,7 @@ class GroupedSensor(BaseEntity, SensorEntity):
             registry.async_update_entity(entity_id, hidden_by=hidden_by)
 
     @callback
+    @instrumented("on_state_change")
     def on_state_change(self, event: Event[EventStateChangedData]) -> None:
         """Triggered when one of the group entities changes state."""
         new_state = event.data.get("new_state")
@@ -554,6 +557,14 @@ class GroupedSensor(BaseEntity, SensorEntity):
 
     async def on_start(self, _: HomeAssistant) -> None:
         """Initialize group sensor when HA is starting."""
+        await async_time_phase(
+            self.hass,
+            "group_on_start",
+            self._async_start(),
+            sensor=get_sensor_label(self._sensor_config),
+        )
+
+    async def _async_start(self) -> None:
         await self.init_domain_group()
 
         if not self._entities:
@@ -584,6 +595,7 @@ class GroupedSensor(BaseEntity, SensorEntity):
         self.set_new_state(new_state)
 
     @callback
+    @instrumented("set_new_state")
     def set_new_state(self, state: Decimal | str) -> None:
         """Set the new state and update the entity."""
         if state == STATE_UNAVAILABLE or not isinstance(state, Decimal):
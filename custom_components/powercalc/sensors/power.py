@@ -1,9 +1,10 @@
 import asyncio
-from collections.abc import Awaitable, Callable, Coroutine
+from collections.abc import Callable, Coroutine
 from copy import copy
 from datetime import datetime, timedelta
 from decimal import Decimal
 import logging
+import time
 from typing import Any, cast
 
 from homeassistant.components.sensor import (
@@ -39,7 +40,6 @@ from homeassistant.helpers.event import (
     TrackTemplate,
     TrackTemplateResult,
     async_call_later,
-    async_track_state_change_event,
     async_track_template_result,
     async_track_time_interval,
 )
@@ -94,15 +94,18 @@ from custom_components.powercalc.errors import (
     StrategyConfigurationError,
     UnsupportedStrategyError,
 )
+from custom_components.powercalc.performance import get_performance_stats, instrumented
 from custom_components.powercalc.power_profile.factory import get_power_profile
 from custom_components.powercalc.power_profile.power_profile import PowerProfile
 from custom_components.powercalc.power_profile.sub_profile_selector import SubProfileSelectConfig, SubProfileSelector
+from custom_components.powercalc.state_dispatcher import async_track_source_state_change
 from custom_components.powercalc.strategy.factory import PowerCalculatorStrategyFactory
 from custom_components.powercalc.strategy.playbook import PlaybookStrategy
 from custom_components.powercalc.strategy.selector import detect_calculation_strategy
 from custom_components.powercalc.strategy.strategy_interface import (
     PowerCalculationStrategyInterface,
 )
+from custom_components.powercalc.template_cache import CachedTemplate, cache_template
 from custom_components.powercalc.unit import evaluate_to_decimal
 
 from .abstract import (
@@ -396,12 +399,12 @@ class VirtualPowerSensor(PowerSensor, SensorEntity):
     ) -> None:
         """Initialize the sensor."""
         self._calculation_strategy = calculation_strategy
-        self._calculation_enabled_condition: Template | None = None
+        self._calculation_enabled_condition: CachedTemplate | None = None
         self._source_entity = source_entity
         self._off_states: set[str] = OFF_STATES_BY_DOMAIN.get(source_entity.domain, set()) | OFF_STATES
         self._attr_name = name
         self._power: Decimal | None = None
-        self._standby_power = standby_power
+        self._standby_power = cache_template(standby_power)
         self._standby_power_on = standby_power_on
         self._attr_force_update = True
         self._attr_unique_id = unique_id
@@ -507,7 +510,7 @@ class VirtualPowerSensor(PowerSensor, SensorEntity):
     def _register_tracking_listeners(
         self,
         entities_to_track: list[str | TrackTemplate],
-        appliance_state_listener: Callable[[Event[EventStateChangedData]], Awaitable[None]],
+        appliance_state_listener: Callable[[Event[EventStateChangedData]], Coroutine[Any, Any, None]],
         template_change_listener: Callable[
             [Event[EventStateChangedData] | None, list[TrackTemplateResult]],
             Coroutine[Any, Any, None] | None,
@@ -515,7 +518,7 @@ class VirtualPowerSensor(PowerSensor, SensorEntity):
     ) -> None:
         self._track_entities = {e for e in entities_to_track if isinstance(e, str)}
         self.async_on_remove(
-            async_track_state_change_event(self.hass, self._track_entities, appliance_state_listener),
+            async_track_source_state_change(self.hass, self._track_entities, appliance_state_listener),
         )
         track_templates: list[TrackTemplate] = [e for e in entities_to_track if isinstance(e, TrackTemplate)]
         if track_templates:
@@ -564,12 +567,12 @@ class VirtualPowerSensor(PowerSensor, SensorEntity):
         if self._availability_entity and self._availability_entity not in entities_to_track:
             entities_to_track.append(self._availability_entity)
 
-        if isinstance(self._standby_power, Template):
-            self._standby_power.hass = self.hass
-            entities_to_track.append(TrackTemplate(self._standby_power, None, None))
+        if isinstance(self._standby_power, CachedTemplate):
+            self._standby_power.template.hass = self.hass
+            entities_to_track.append(TrackTemplate(self._standby_power.template, None, None))
 
         if self._calculation_enabled_condition:
-            entities_to_track.append(TrackTemplate(self._calculation_enabled_condition, None, None))
+            entities_to_track.append(TrackTemplate(self._calculation_enabled_condition.template, None, None))
 
         return entities_to_track
 
@@ -582,7 +585,7 @@ class VirtualPowerSensor(PowerSensor, SensorEntity):
         if isinstance(template, str):
             template = Template(template, self.hass)
 
-        self._calculation_enabled_condition = template
+        self._calculation_enabled_condition = CachedTemplate(template)
 
     async def _handle_source_entity_state_change(
         self,
@@ -651,6 +654,7 @@ class VirtualPowerSensor(PowerSensor, SensorEntity):
 
         return self._ignore_unavailable_state or state.state not in UNAVAILABLE_STATES
 
+    @instrumented("calculate_power")
     async def calculate_power(self, state: State) -> Decimal | None:
         """Calculate power consumption using configured strategy."""
         assert self._strategy_instance is not None
@@ -674,12 +678,27 @@ class VirtualPowerSensor(PowerSensor, SensorEntity):
             return standby_power
 
         # Calculate actual power using configured strategy
-        power = await self._strategy_instance.calculate(entity_state)
+        power = await self._calculate_strategy_power(entity_state)
         if power is None:
             return None
 
         return self._apply_power_adjustments(power, standby_power)
 
+    async def _calculate_strategy_power(self, state: State) -> Decimal | None:
+        """Let the strategy calculate the power, recording the duration when performance stats are enabled."""
+        assert self._strategy_instance is not None
+        stats = get_performance_stats(self.hass)
+        if stats is None:
+            return await self._strategy_instance.calculate(state)
+
+        start = time.perf_counter()
+        try:
+            return await self._strategy_instance.calculate(state)
+        finally:
+            duration = time.perf_counter() - start
+            stats.record(self.entity_id, "strategy_calculate", duration)
+            stats.record_strategy(str(self._calculation_strategy), duration)
+
     def _resolve_calculation_state(self, state: State) -> State | None:
         if self._source_entity.is_dummy and self._calculation_strategy != CalculationStrategy.MULTI_SWITCH:
             if self._availability_entity and state.entity_id == self._availability_entity:
@@ -744,7 +763,8 @@ class VirtualPowerSensor(PowerSensor, SensorEntity):
             return
 
         await self._power_profile.select_sub_profile(profile)
-        self._standby_power, self._standby_power_on = _get_standby_power_from_profile(self.hass, self._power_profile)
+        standby_power, self._standby_power_on = _get_standby_power_from_profile(self.hass, self._power_profile)
+        self._standby_power = cache_template(standby_power)
         await self.ensure_strategy_instance(True)
 
     async def calculate_standby_power(self, state: State) -> Decimal:
@@ -754,7 +774,7 @@ class VirtualPowerSensor(PowerSensor, SensorEntity):
 
         standby_power = self._standby_power
         if self._strategy_instance.can_calculate_standby():
-            standby_power = await self._strategy_instance.calculate(state) or self._standby_power
+            standby_power = await self._calculate_strategy_power(state) or self._standby_power
 
         return self._apply_standby_multiply_factor(evaluate_to_decimal(standby_power) or Decimal(0))
 
@@ -791,11 +811,11 @@ class VirtualPowerSensor(PowerSensor, SensorEntity):
 
     async def is_calculation_enabled(self, entity_state: State) -> bool:
         """Check if calculation is enabled based on the condition template."""
-        template = self._calculation_enabled_condition
-        if not template:
+        condition = self._calculation_enabled_condition
+        if not condition:
             return self._strategy_instance.is_enabled(entity_state)  # type: ignore
 
-        return bool(template.async_render())
+        return bool(condition.async_render())
 
     @property
     def source_entity(self) -> str:
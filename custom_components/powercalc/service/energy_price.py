@@ -0,0 +1,41 @@
+from decimal import Decimal
+
+from homeassistant.const import CONF_ENTITY_ID
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+import voluptuous as vol
+
+from custom_components.powercalc.const import DATA_PRICE_TIMELINES, DOMAIN
+
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_PRICE = "price"
+
+SERVICE_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_ENTITY_ID): cv.entity_id,
+        vol.Required(ATTR_START): cv.datetime,
+        vol.Required(ATTR_END): cv.datetime,
+        vol.Required(ATTR_PRICE): vol.All(vol.Coerce(str), vol.Coerce(Decimal)),
+    },
+)
+
+
+async def correct_energy_price(hass: HomeAssistant, call: ServiceCall) -> None:
+    """Correct the price recorded for a price sensor in a period and re-price the cost settled at it."""
+    entity_id = call.data[CONF_ENTITY_ID]
+    timeline = hass.data[DOMAIN].get(DATA_PRICE_TIMELINES, {}).get(entity_id)
+    if timeline is None:
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="no_price_timeline",
+            translation_placeholders={"entity_id": entity_id},
+        )
+
+    timeline.async_correct_prices(
+        dt_util.as_utc(call.data[ATTR_START]),
+        dt_util.as_utc(call.data[ATTR_END]),
+        call.data[ATTR_PRICE],
+    )
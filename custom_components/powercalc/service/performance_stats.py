@@ -0,0 +1,29 @@
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+import voluptuous as vol
+
+from custom_components.powercalc.const import DOMAIN
+from custom_components.powercalc.performance import get_performance_stats
+
+SERVICE_SCHEMA = vol.Schema(
+    {
+        vol.Optional("limit"): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional("reset", default=False): cv.boolean,
+    },
+)
+
+
+async def get_performance_stats_response(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Return the recorded latencies, optionally resetting them afterwards."""
+    stats = get_performance_stats(hass)
+    if stats is None:
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="performance_stats_disabled",
+        )
+
+    response = stats.as_dict(limit=call.data.get("limit"))
+    if call.data["reset"]:
+        stats.reset()
+    return response
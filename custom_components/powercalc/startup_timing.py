@@ -0,0 +1,132 @@
+"""Opt-in duration of the startup phases, to find out which configuration or profile makes a restart slow.
+
+When `enable_performance_stats` is set in the global configuration, the wall time of every startup phase is
+recorded. Wall time includes waiting on I/O, executor jobs and other tasks. Phases running for a single sensor are
+additionally recorded per sensor, labelled by the name of the sensor or the entity id of its source entity.
+"""
+
+from collections.abc import Awaitable, Mapping
+from datetime import timedelta
+import logging
+from typing import Any, cast
+
+from homeassistant.const import CONF_ENTITY_ID, CONF_NAME
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.typing import ConfigType
+
+from custom_components.powercalc.const import CONF_ENABLE_PERFORMANCE_STATS, DATA_STARTUP_TIMINGS, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+# Number of phases and sensors listed in the startup report
+STARTUP_REPORT_LIMIT = 10
+# Time after Home Assistant started to log the startup report, so the deferred phases are included
+STARTUP_REPORT_DELAY = timedelta(seconds=60)
+
+
+class PhaseTiming:
+    __slots__ = ("count", "max_wall", "wall")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.wall = 0.0
+        self.max_wall = 0.0
+
+    def add(self, wall: float) -> None:
+        self.count += 1
+        self.wall += wall
+        if wall > self.max_wall:
+            self.max_wall = wall
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the timing, durations are in milliseconds."""
+        return {
+            "count": self.count,
+            "wall_ms": round(self.wall * 1000, 3),
+            "max_wall_ms": round(self.max_wall * 1000, 3),
+        }
+
+
+class StartupTimings:
+    """Timings per phase, and per sensor and phase."""
+
+    def __init__(self) -> None:
+        self.phases: dict[str, PhaseTiming] = {}
+        self.sensors: dict[str, dict[str, PhaseTiming]] = {}
+
+    def record(self, phase: str, wall: float, sensor: str | None = None) -> None:
+        self.phases.setdefault(phase, PhaseTiming()).add(wall)
+        if sensor is not None:
+            self.sensors.setdefault(sensor, {}).setdefault(phase, PhaseTiming()).add(wall)
+
+    def slowest_phases(self, limit: int | None = None) -> list[tuple[str, PhaseTiming]]:
+        """Return the phases with the highest total wall time first."""
+        return sorted(self.phases.items(), key=lambda item: item[1].wall, reverse=True)[:limit]
+
+    def slowest_sensors(self, limit: int | None = None) -> list[tuple[str, dict[str, PhaseTiming]]]:
+        """Return the sensors with the highest wall time summed over all of their phases first."""
+        return sorted(
+            self.sensors.items(),
+            key=lambda item: sum(timing.wall for timing in item[1].values()),
+            reverse=True,
+        )[:limit]
+
+    def as_dict(self, limit: int | None = None) -> dict[str, Any]:
+        """Return the timings, `limit` restricts the sensors to the slowest N."""
+        return {
+            "phases": {phase: timing.as_dict() for phase, timing in self.slowest_phases()},
+            "sensors": {
+                sensor: {phase: timing.as_dict() for phase, timing in phases.items()}
+                for sensor, phases in self.slowest_sensors(limit)
+            },
+        }
+
+    def log_report(self, limit: int = STARTUP_REPORT_LIMIT) -> None:
+        """Log the slowest phases and sensors."""
+        _LOGGER.info(
+            "Startup timings, slowest phases: [%s], slowest sensors: [%s]",
+            ", ".join(
+                f"{phase}={timing.wall * 1000:.1f}ms (count={timing.count})"
+                for phase, timing in self.slowest_phases(limit)
+            ),
+            ", ".join(
+                f"{sensor}={sum(timing.wall for timing in phases.values()) * 1000:.1f}ms ({', '.join(sorted(phases))})"
+                for sensor, phases in self.slowest_sensors(limit)
+            ),
+        )
+
+
+def create_startup_timings(global_config: ConfigType) -> StartupTimings | None:
+    """Create the startup timings, when enabled in the global configuration."""
+    if not global_config.get(CONF_ENABLE_PERFORMANCE_STATS, False):
+        return None
+    return StartupTimings()
+
+
+def get_startup_timings(hass: HomeAssistant) -> StartupTimings | None:
+    """Get the startup timings, None when they are disabled."""
+    domain_data = hass.data.get(DOMAIN)
+    if not domain_data:
+        return None
+    return cast(StartupTimings | None, domain_data.get(DATA_STARTUP_TIMINGS))
+
+
+def get_sensor_label(sensor_config: Mapping[str, Any]) -> str | None:
+    """Label the timings of a sensor by its name, or the entity id of the source entity when it has no name."""
+    return sensor_config.get(CONF_NAME) or sensor_config.get(CONF_ENTITY_ID)
+
+
+async def async_time_phase[R](
+    hass: HomeAssistant,
+    phase: str,
+    awaitable: Awaitable[R],
+    sensor: str | None = None,
+) -> R:
+    """Await the coroutine or future, recording its wall time under the phase when startup timings are enabled."""
+    start = hass.loop.time()
+    try:
+        return await awaitable
+    finally:
+        # Looked up afterwards, the timings are created during async_setup which is timed as well
+        if timings := get_startup_timings(hass):
+            timings.record(phase, hass.loop.time() - start, sensor)
@@ -0,0 +1,106 @@
+"""Fan out state changes of source entities to all powercalc sensors depending on them.
+
+A light with a power sensor, standby sensor and sub profile selector, or a set of sensors sharing one
+availability entity, all track the same entities. Instead of every sensor subscribing and each event being
+scheduled as a separate job per sensor, the dispatcher subscribes once per entity and starts all listeners
+of the entity from a single task. Listeners run concurrently, so a slow listener doesn't hold up the others.
+"""
+
+import asyncio
+from collections.abc import Callable, Coroutine, Iterable
+import logging
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, Event, EventStateChangedData, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.util.async_ import create_eager_task
+
+from custom_components.powercalc.const import DATA_STATE_DISPATCHER, DOMAIN
+from custom_components.powercalc.strategy.light_state import start_light_state_scope
+
+_LOGGER = logging.getLogger(__name__)
+
+type StateChangeListener = Callable[[Event[EventStateChangedData]], Coroutine[Any, Any, None]]
+
+
+class StateChangeDispatcher:
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        self._listeners: dict[str, list[StateChangeListener]] = {}
+        self._unsubscribe: dict[str, CALLBACK_TYPE] = {}
+
+    @property
+    def tracked_entities(self) -> set[str]:
+        """Entities the dispatcher is currently subscribed to."""
+        return set(self._listeners)
+
+    @callback
+    def async_track(self, entity_ids: Iterable[str], action: StateChangeListener) -> CALLBACK_TYPE:
+        """Call `action` for state changes of the given entities, returns a callback to stop tracking."""
+        entity_ids = {entity_id.lower() for entity_id in entity_ids}
+        for entity_id in entity_ids:
+            listeners = self._listeners.get(entity_id)
+            if listeners is None:
+                listeners = self._listeners[entity_id] = []
+                self._unsubscribe[entity_id] = async_track_state_change_event(
+                    self._hass,
+                    entity_id,
+                    self._async_dispatch,
+                )
+            listeners.append(action)
+
+        @callback
+        def remove_listener() -> None:
+            for entity_id in entity_ids:
+                listeners = self._listeners[entity_id]
+                listeners.remove(action)
+                if not listeners:
+                    del self._listeners[entity_id]
+                    self._unsubscribe.pop(entity_id)()
+
+        return remove_listener
+
+    @callback
+    def _async_dispatch(self, event: Event[EventStateChangedData]) -> None:
+        listeners = self._listeners.get(event.data["entity_id"])
+        if not listeners:
+            return  # pragma: no cover
+        # Copy the listeners, a listener may stop tracking while the others are still being called
+        self._hass.async_create_task(self._async_call_listeners(list(listeners), event), eager_start=True)
+
+    async def _async_call_listeners(
+        self,
+        listeners: list[StateChangeListener],
+        event: Event[EventStateChangedData],
+    ) -> None:
+        # Listeners of this event share the parsed light state, see `get_light_state`
+        start_light_state_scope()
+        # Eager tasks finish listeners which don't suspend right away, without an extra loop iteration
+        await asyncio.gather(*(create_eager_task(self._async_call_listener(listener, event)) for listener in listeners))
+
+    @staticmethod
+    async def _async_call_listener(listener: StateChangeListener, event: Event[EventStateChangedData]) -> None:
+        try:
+            await listener(event)
+        except Exception:
+            # Don't let one failing sensor prevent the other sensors from updating
+            _LOGGER.exception("Error handling state change of %s", event.data["entity_id"])
+
+
+def async_get_state_dispatcher(hass: HomeAssistant) -> StateChangeDispatcher:
+    """Get the shared dispatcher, creating it on first use."""
+    domain_data: dict[str, Any] = hass.data.setdefault(DOMAIN, {})
+    dispatcher: StateChangeDispatcher | None = domain_data.get(DATA_STATE_DISPATCHER)
+    if dispatcher is None:
+        dispatcher = domain_data[DATA_STATE_DISPATCHER] = StateChangeDispatcher(hass)
+    return dispatcher
+
+
+@callback
+def async_track_source_state_change(
+    hass: HomeAssistant,
+    entity_ids: Iterable[str],
+    action: StateChangeListener,
+) -> CALLBACK_TYPE:
+    """Track state changes of source entities through the shared dispatcher."""
+    return async_get_state_dispatcher(hass).async_track(entity_ids, action)
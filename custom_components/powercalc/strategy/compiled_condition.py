@@ -0,0 +1,299 @@
+"""Native evaluation of the simple conditions of the composite strategy.
+
+Home Assistant's condition checkers are generic, they look up every entity again, support templates and tracing,
+and are evaluated for every sub strategy on every state change. Most composite profiles only use state and
+numeric_state conditions with literal values, combined with and/or/not. These are compiled into a tree of plain
+nodes, which read their values from a shared tuple. Each entity and attribute read by any of the conditions is looked
+up once per state change, and the result of a condition is reused as long as the values it reads don't change.
+
+Nodes evaluate to True, False or None, None meaning Home Assistant's checker would raise a ConditionError. Compound
+conditions combine these exactly like Home Assistant does, so the outcome is always the same as the checker's.
+Conditions using anything else, like templates, devices, durations or the state of an input entity, are not
+compiled and still evaluated by Home Assistant.
+"""
+
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+import re
+from typing import Any
+
+from homeassistant.const import (
+    CONF_ABOVE,
+    CONF_ATTRIBUTE,
+    CONF_BELOW,
+    CONF_CONDITION,
+    CONF_CONDITIONS,
+    CONF_ENTITY_ID,
+    CONF_MATCH,
+    CONF_STATE,
+    ENTITY_MATCH_ANY,
+    STATE_UNAVAILABLE,
+    STATE_UNKNOWN,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.typing import ConfigType
+
+# Condition options which can be compiled, besides the options of the condition type itself
+_BASE_OPTIONS = {CONF_CONDITION, "alias", "enabled"}
+_STATE_OPTIONS = _BASE_OPTIONS | {CONF_ENTITY_ID, CONF_STATE, CONF_ATTRIBUTE, CONF_MATCH}
+_NUMERIC_STATE_OPTIONS = _BASE_OPTIONS | {CONF_ENTITY_ID, CONF_ABOVE, CONF_BELOW, CONF_ATTRIBUTE}
+_COMPOUND_OPTIONS = _BASE_OPTIONS | {CONF_CONDITIONS}
+
+# State values referring to the state of another entity, like Home Assistant's INPUT_ENTITY_ID
+_INPUT_ENTITY_ID = re.compile(r"^input_(?:select|text|number|boolean|datetime)\.(?!.+__)(?:[a-z0-9]+_)*[a-z0-9]+$")
+
+# Value of an entity which doesn't exist, conditions reading it raise a ConditionError in Home Assistant
+MISSING_ENTITY = object()
+# Value of an attribute the entity doesn't have, conditions reading it are False
+MISSING_ATTRIBUTE = object()
+
+type Input = tuple[str, str | None]
+
+
+class ConditionInputs:
+    """The entity states and attributes read by the compiled conditions, each looked up once."""
+
+    __slots__ = ("_index", "inputs")
+
+    def __init__(self) -> None:
+        self.inputs: list[Input] = []
+        self._index: dict[Input, int] = {}
+
+    def add(self, entity_id: str, attribute: str | None) -> int:
+        """Register an input, returns the position of its value in the values read."""
+        key = (entity_id, attribute)
+        if key not in self._index:
+            self._index[key] = len(self.inputs)
+            self.inputs.append(key)
+        return self._index[key]
+
+    def read(self, hass: HomeAssistant) -> tuple[Any, ...]:
+        """Read the current values of all inputs."""
+        states: dict[str, Any] = {}
+        values = []
+        for entity_id, attribute in self.inputs:
+            if entity_id not in states:
+                states[entity_id] = hass.states.get(entity_id)
+            state = states[entity_id]
+            if state is None:
+                values.append(MISSING_ENTITY)
+            elif attribute is None:
+                values.append(state.state)
+            else:
+                values.append(state.attributes.get(attribute, MISSING_ATTRIBUTE))
+        return tuple(values)
+
+    def __len__(self) -> int:
+        return len(self.inputs)
+
+
+class Node(ABC):
+    """Compiled condition, evaluates to None when Home Assistant would raise a ConditionError."""
+
+    __slots__ = ()
+
+    @abstractmethod
+    def evaluate(self, values: Sequence[Any]) -> bool | None:
+        """Evaluate the condition against the values read by ConditionInputs."""
+
+    @abstractmethod
+    def positions(self) -> set[int]:
+        """Positions of the values the condition reads."""
+
+
+class StateNode(Node):
+    __slots__ = ("_match_any", "_positions", "_states")
+
+    def __init__(self, positions: tuple[int, ...], states: tuple[Any, ...], match_any: bool) -> None:
+        self._positions = positions
+        # A set when possible, attribute values can be unhashable and are compared one by one
+        self._states: frozenset[Any] | tuple[Any, ...] = states
+        if all(isinstance(state, str) for state in states):
+            self._states = frozenset(states)
+        self._match_any = match_any
+
+    def evaluate(self, values: Sequence[Any]) -> bool | None:
+        # Like Home Assistant, a missing entity is an error unless another entity doesn't match with match all
+        error = False
+        result = not self._match_any
+        for position in self._positions:
+            value = values[position]
+            if value is MISSING_ENTITY:
+                error = True
+            elif value is not MISSING_ATTRIBUTE and _contains(self._states, value):
+                result = True
+            elif not self._match_any:
+                return False
+        return None if error else result
+
+    def positions(self) -> set[int]:
+        return set(self._positions)
+
+
+class NumericStateNode(Node):
+    __slots__ = ("_above", "_below", "_positions")
+
+    def __init__(self, positions: tuple[int, ...], above: float | None, below: float | None) -> None:
+        self._positions = positions
+        self._above = above
+        self._below = below
+
+    def evaluate(self, values: Sequence[Any]) -> bool | None:
+        error = False
+        for position in self._positions:
+            result = self._evaluate_value(values[position])
+            if result is False:
+                return False
+            error |= result is None
+        return None if error else True
+
+    def _evaluate_value(self, value: Any) -> bool | None:  # noqa: ANN401
+        if value is MISSING_ENTITY:
+            return None
+        if value is MISSING_ATTRIBUTE or value in (None, STATE_UNAVAILABLE, STATE_UNKNOWN):
+            return False
+        try:
+            number = float(value)
+        except TypeError, ValueError:
+            return None
+        if self._below is not None and number >= self._below:
+            return False
+        return not (self._above is not None and number <= self._above)
+
+    def positions(self) -> set[int]:
+        return set(self._positions)
+
+
+class AndNode(Node):
+    __slots__ = ("_nodes",)
+
+    def __init__(self, nodes: list[Node]) -> None:
+        self._nodes = nodes
+
+    def evaluate(self, values: Sequence[Any]) -> bool | None:
+        error = False
+        for node in self._nodes:
+            result = node.evaluate(values)
+            if result is False:
+                return False
+            error |= result is None
+        return None if error else True
+
+    def positions(self) -> set[int]:
+        return set().union(*(node.positions() for node in self._nodes))
+
+
+class OrNode(AndNode):
+    __slots__ = ()
+
+    def evaluate(self, values: Sequence[Any]) -> bool | None:
+        error = False
+        for node in self._nodes:
+            result = node.evaluate(values)
+            if result is True:
+                return True
+            error |= result is None
+        return None if error else False
+
+
+class NotNode(AndNode):
+    __slots__ = ()
+
+    def evaluate(self, values: Sequence[Any]) -> bool | None:
+        error = False
+        for node in self._nodes:
+            result = node.evaluate(values)
+            if result is True:
+                return False
+            error |= result is None
+        return None if error else True
+
+
+class CompiledCondition:
+    """Compiled condition of a sub strategy, which remembers its result for the last values it read."""
+
+    __slots__ = ("_last_key", "_last_result", "_node", "_positions")
+
+    def __init__(self, node: Node) -> None:
+        self._node = node
+        self._positions = tuple(sorted(node.positions()))
+        self._last_key: tuple[Any, ...] | None = None
+        self._last_result = False
+
+    def matches(self, values: Sequence[Any]) -> bool:
+        """Check the condition against the values read by ConditionInputs, errors don't match."""
+        key = tuple(values[position] for position in self._positions)
+        if key != self._last_key:
+            self._last_result = self._node.evaluate(values) is True
+            self._last_key = key
+        return self._last_result
+
+
+def compile_condition(config: ConfigType, inputs: ConditionInputs) -> CompiledCondition | None:
+    """Compile a validated condition config, None when the condition can't be compiled."""
+    node = _compile_node(config, inputs)
+    return CompiledCondition(node) if node else None
+
+
+def _compile_node(config: ConfigType, inputs: ConditionInputs) -> Node | None:
+    condition_type = config.get(CONF_CONDITION)
+    if config.get("enabled", True) is not True:
+        return None
+
+    if condition_type in ("and", "or", "not"):
+        if not _COMPOUND_OPTIONS.issuperset(config):
+            return None
+        nodes = [_compile_node(condition, inputs) for condition in config[CONF_CONDITIONS]]
+        if not all(nodes):
+            return None
+        compiled = [node for node in nodes if node is not None]
+        if condition_type == "and":
+            return AndNode(compiled)
+        return OrNode(compiled) if condition_type == "or" else NotNode(compiled)
+
+    if condition_type == "state":
+        return _compile_state(config, inputs)
+    if condition_type == "numeric_state":
+        return _compile_numeric_state(config, inputs)
+    return None
+
+
+def _compile_state(config: ConfigType, inputs: ConditionInputs) -> Node | None:
+    if not _STATE_OPTIONS.issuperset(config):
+        return None
+    states = config[CONF_STATE]
+    states = tuple(states) if isinstance(states, list) else (states,)
+    if any(isinstance(state, str) and _INPUT_ENTITY_ID.match(state) for state in states):
+        return None
+    attribute: str | None = config.get(CONF_ATTRIBUTE)
+    return StateNode(
+        tuple(inputs.add(entity_id, attribute) for entity_id in config[CONF_ENTITY_ID]),
+        states,
+        config.get(CONF_MATCH) == ENTITY_MATCH_ANY,
+    )
+
+
+def _compile_numeric_state(config: ConfigType, inputs: ConditionInputs) -> Node | None:
+    if not _NUMERIC_STATE_OPTIONS.issuperset(config):
+        return None
+    above = config.get(CONF_ABOVE)
+    below = config.get(CONF_BELOW)
+    # Limits can refer to the state of another entity
+    if not all(limit is None or isinstance(limit, int | float) for limit in (above, below)):
+        return None
+    attribute: str | None = config.get(CONF_ATTRIBUTE)
+    return NumericStateNode(
+        tuple(inputs.add(entity_id, attribute) for entity_id in config[CONF_ENTITY_ID]),
+        above,
+        below,
+    )
+
+
+def _contains(states: frozenset[Any] | tuple[Any, ...], value: Any) -> bool:  # noqa: ANN401
+    if isinstance(states, tuple):
+        return value in states
+    try:
+        return value in states
+    except TypeError:
+        # Unhashable attribute value, which can't equal a string
+        return False
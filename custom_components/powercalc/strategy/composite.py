@@ -25,6 +25,11 @@ from custom_components.powercalc.const import (
     CONF_STRATEGIES,
     CONF_WLED,
 )
+from custom_components.powercalc.strategy.compiled_condition import (
+    CompiledCondition,
+    ConditionInputs,
+    compile_condition,
+)
 from custom_components.powercalc.strategy.fixed import CONFIG_SCHEMA as FIXED_SCHEMA
 from custom_components.powercalc.strategy.linear import CONFIG_SCHEMA as LINEAR_SCHEMA
 from custom_components.powercalc.strategy.multi_switch import CONFIG_SCHEMA as MULTI_SWITCH_SCHEMA
@@ -181,14 +186,38 @@ class CompositeStrategy(PowerCalculationStrategyInterface):
         self.playbook_strategies: list[PlaybookStrategy] = [
             strategy.strategy for strategy in self.strategies if isinstance(strategy.strategy, PlaybookStrategy)
         ]
+        # Playbook sub strategies selected by the last calculation
+        self._selected_playbooks: set[PlaybookStrategy] = set()
+        self._condition_inputs = ConditionInputs()
+        for sub_strategy in self.strategies:
+            if sub_strategy.condition_config:
+                sub_strategy.compiled_condition = compile_condition(
+                    sub_strategy.condition_config,
+                    self._condition_inputs,
+                )
 
     async def calculate(self, entity_state: State) -> Decimal | None:
         """Calculate power consumption based on entity state."""
-        await self.stop_active_playbooks()
-
+        values = self._condition_inputs.read(self.hass) if self._condition_inputs else ()
+        selected_playbooks: set[PlaybookStrategy] = set()
+        try:
+            return await self._calculate_sub_strategies(entity_state, values, selected_playbooks)
+        finally:
+            # Playbooks keep running as long as their sub strategy stays selected
+            for playbook in self.playbook_strategies:
+                if playbook not in selected_playbooks:
+                    await playbook.stop_playbook()
+            self._selected_playbooks = selected_playbooks
+
+    async def _calculate_sub_strategies(
+        self,
+        entity_state: State,
+        values: tuple[Any, ...],
+        selected_playbooks: set[PlaybookStrategy],
+    ) -> Decimal | None:
         total = Decimal(0)
         for sub_strategy in self.strategies:
-            value = await self._calculate_sub_strategy(sub_strategy, entity_state)
+            value = await self._calculate_sub_strategy(sub_strategy, entity_state, values, selected_playbooks)
             if value is None:
                 continue
             if self.mode == CompositeMode.STOP_AT_FIRST:
@@ -197,24 +226,36 @@ class CompositeStrategy(PowerCalculationStrategyInterface):
 
         return total if self.mode == CompositeMode.SUM_ALL else None
 
-    async def _calculate_sub_strategy(self, sub_strategy: SubStrategy, entity_state: State) -> Decimal | None:
+    async def _calculate_sub_strategy(
+        self,
+        sub_strategy: SubStrategy,
+        entity_state: State,
+        values: tuple[Any, ...],
+        selected_playbooks: set[PlaybookStrategy],
+    ) -> Decimal | None:
         """Calculate the power for a single sub strategy. Returns None when the sub strategy must be skipped."""
         strategy = sub_strategy.strategy
 
-        if sub_strategy.condition and not self._condition_matches(sub_strategy.condition, entity_state):
+        if sub_strategy.condition and not self._condition_matches(sub_strategy, entity_state, values):
             return None
 
         if isinstance(strategy, PlaybookStrategy):
-            await self.activate_playbook(strategy)
+            selected_playbooks.add(strategy)
+            if strategy not in self._selected_playbooks:
+                await self.activate_playbook(strategy)
 
         if entity_state.state == STATE_OFF and not strategy.can_calculate_standby():
             return None
 
         return await strategy.calculate(entity_state)
 
-    def _condition_matches(self, condition: ConditionCheckerType, entity_state: State) -> bool:
+    def _condition_matches(self, sub_strategy: SubStrategy, entity_state: State, values: tuple[Any, ...]) -> bool:
+        if sub_strategy.compiled_condition:
+            return sub_strategy.compiled_condition.matches(values)
+        if sub_strategy.condition is None:  # pragma: no cover
+            return True
         try:
-            return condition(self.hass, {"state": entity_state})
+            return sub_strategy.condition(self.hass, {"state": entity_state})
         except ConditionError:
             _LOGGER.debug("Skipping composite sub-strategy because condition evaluation failed", exc_info=True)
             return False
@@ -223,6 +264,7 @@ class CompositeStrategy(PowerCalculationStrategyInterface):
         """Stop any active playbooks from sub strategies."""
         for playbook in self.playbook_strategies:
             await playbook.stop_playbook()
+        self._selected_playbooks = set()
 
     @staticmethod
     async def activate_playbook(strategy: PlaybookStrategy) -> None:
@@ -291,3 +333,4 @@ class SubStrategy:
     condition_config: ConfigType | None
     condition: ConditionCheckerType | None
     strategy: PowerCalculationStrategyInterface
+    compiled_condition: CompiledCondition | None = None
@@ -13,6 +13,7 @@ import voluptuous as vol
 from custom_components.powercalc.common import SourceEntity
 from custom_components.powercalc.const import (
     CONF_COMPOSITE,
+    CONF_ENTITY_POWER,
     CONF_MODE,
     CONF_MULTI_SWITCH,
     CONF_POWER,
@@ -41,7 +42,7 @@ from .composite import (
 from .fixed import FixedStrategy
 from .linear import LinearStrategy
 from .lut import LutRegistry, LutStrategy
-from .multi_switch import MultiSwitchStrategy
+from .multi_switch import MultiSwitchStrategy, SwitchPower
 from .playbook import PlaybookStrategy
 from .selector import detect_calculation_strategy
 from .strategy_interface import PowerCalculationStrategyInterface
@@ -259,11 +260,20 @@ class PowerCalculatorStrategyFactory:
         if on_power is None:
             raise StrategyConfigurationError("No power configuration supplied")
 
+        entity_power = {
+            entity_id: SwitchPower(
+                on_power=Decimal(str(power.get(CONF_POWER, on_power))),
+                off_power=Decimal(str(power.get(CONF_POWER_OFF, off_power or 0))),
+            )
+            for entity_id, power in multi_switch_config.get(CONF_ENTITY_POWER, {}).items()
+        }
+
         return MultiSwitchStrategy(
             self._hass,
             entities,
             on_power=Decimal(on_power),
             off_power=Decimal(off_power) if off_power else None,
+            entity_power=entity_power,
         )
 
     def _resolve_template(self, value: Any) -> Any:  # noqa: ANN401
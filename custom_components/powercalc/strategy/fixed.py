@@ -9,6 +9,7 @@ import voluptuous as vol
 from custom_components.powercalc.common import SourceEntity
 from custom_components.powercalc.const import CONF_POWER, CONF_STATES_POWER
 from custom_components.powercalc.errors import StrategyConfigurationError
+from custom_components.powercalc.template_cache import CachedTemplate, cache_template
 from custom_components.powercalc.unit import evaluate_to_decimal
 
 from .strategy_interface import PowerCalculationStrategyInterface
@@ -31,8 +32,12 @@ class FixedStrategy(PowerCalculationStrategyInterface):
         per_state_power: dict[str, float | Template] | None,
     ) -> None:
         self._source_entity = source_entity
-        self._power = power
-        self._per_state_power = per_state_power
+        self._power = cache_template(power)
+        self._per_state_power = (
+            {state: cache_template(state_power) for state, state_power in per_state_power.items()}
+            if per_state_power is not None
+            else None
+        )
 
     async def calculate(self, entity_state: State) -> Decimal | None:
         if self._per_state_power is not None:
@@ -66,14 +71,14 @@ class FixedStrategy(PowerCalculationStrategyInterface):
         """Return entities that should be tracked."""
         track_templates: list[str | TrackTemplate] = []
 
-        if isinstance(self._power, Template):
-            track_templates.append(TrackTemplate(self._power, None, None))
+        if isinstance(self._power, CachedTemplate):
+            track_templates.append(TrackTemplate(self._power.template, None, None))
 
         if self._per_state_power:
             track_templates.extend(
-                TrackTemplate(power, None, None)
+                TrackTemplate(power.template, None, None)
                 for power in self._per_state_power.values()
-                if isinstance(power, Template)
+                if isinstance(power, CachedTemplate)
             )
 
         return track_templates
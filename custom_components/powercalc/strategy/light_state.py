@@ -0,0 +1,93 @@
+"""Light attributes parsed once per state, shared by all strategies calculating for the same state.
+
+A light often has several powercalc sensors (power, standby, composite parts, groups recalculating) which all
+receive the same `State`. Parsing is done lazily per attribute, and the result is shared by everything handling
+the same state change event dispatched by the `StateChangeDispatcher`. Outside of a dispatch every call parses anew.
+"""
+
+from contextvars import ContextVar
+from functools import cached_property
+
+from homeassistant.components.light import (
+    ATTR_BRIGHTNESS,
+    ATTR_COLOR_MODE,
+    ATTR_COLOR_TEMP_KELVIN,
+    ATTR_EFFECT,
+    ATTR_HS_COLOR,
+    ColorMode,
+)
+from homeassistant.core import State
+from homeassistant.util.color import color_temperature_kelvin_to_mired, color_temperature_to_hs
+
+# Effects which mean no effect is active
+INACTIVE_EFFECTS = ("off", "none", "white")
+
+
+class LightState:
+    def __init__(self, state: State) -> None:
+        self.state = state
+        self._attrs = state.attributes
+
+    @cached_property
+    def brightness(self) -> int | None:
+        """Brightness capped to 255, None when the light doesn't report brightness."""
+        brightness: int | None = self._attrs.get(ATTR_BRIGHTNESS)
+        if brightness is None:
+            return None
+        return min(brightness, 255)
+
+    @cached_property
+    def color_mode(self) -> ColorMode:
+        """Color mode as reported by the light, UNKNOWN when missing or invalid."""
+        try:
+            return ColorMode(str(self._attrs.get(ATTR_COLOR_MODE, ColorMode.UNKNOWN)))
+        except ValueError:
+            return ColorMode.UNKNOWN
+
+    @cached_property
+    def effect(self) -> str | None:
+        """The active effect, None when no effect is active."""
+        effect = self._attrs.get(ATTR_EFFECT)
+        if not effect or str(effect).lower() in INACTIVE_EFFECTS:
+            return None
+        return str(effect)
+
+    @cached_property
+    def color_temp_mired(self) -> int | None:
+        color_temp = self._attrs.get(ATTR_COLOR_TEMP_KELVIN)
+        if color_temp is None:
+            return None
+        return color_temperature_kelvin_to_mired(color_temp)
+
+    @cached_property
+    def hue_saturation(self) -> tuple[int, int] | None:
+        """Hue (0-65535) and saturation (0-255), converted from the color temperature in color temp mode."""
+        try:
+            hs = (
+                color_temperature_to_hs(self._attrs[ATTR_COLOR_TEMP_KELVIN])
+                if self._attrs.get(ATTR_COLOR_MODE) == ColorMode.COLOR_TEMP
+                else self._attrs[ATTR_HS_COLOR]
+            )
+            return int(hs[0] / 360 * 65535), int(hs[1] / 100 * 255)
+        except KeyError, TypeError, ValueError:
+            return None
+
+
+# Set per dispatched event and inherited by the tasks handling it, so it's dropped once the event is handled
+_light_states: ContextVar[dict[str, LightState] | None] = ContextVar("powercalc_light_states", default=None)
+
+
+def start_light_state_scope() -> None:
+    """Share parsed light states within the current task and the tasks it creates from now on."""
+    _light_states.set({})
+
+
+def get_light_state(state: State) -> LightState:
+    """Get the parsed attributes of a light state, reusing the parse result of the same state object."""
+    light_states = _light_states.get()
+    if light_states is None:
+        return LightState(state)
+    light_state = light_states.get(state.entity_id)
+    if light_state is None or light_state.state is not state:
+        light_state = light_states[state.entity_id] = LightState(state)
+    return light_state
@@ -1,4 +1,8 @@
+from array import array
+from bisect import bisect_right
+from collections.abc import Iterable, Sequence
 from decimal import Decimal
+from enum import StrEnum
 import logging
 from typing import Any
 
@@ -21,6 +25,7 @@ from custom_components.powercalc.common import SourceEntity, create_source_entit
 from custom_components.powercalc.const import (
     CONF_CALIBRATE,
     CONF_GAMMA_CURVE,
+    CONF_INTERPOLATION,
     CONF_MAX_POWER,
     CONF_MIN_POWER,
     CONF_POWER,
@@ -32,6 +37,13 @@ from custom_components.powercalc.helpers import get_related_entity_by_device_cla
 from .strategy_interface import PowerCalculationStrategyInterface
 
 ALLOWED_DOMAINS = [fan.DOMAIN, light.DOMAIN, media_player.DOMAIN, vacuum.DOMAIN, lawn_mower.DOMAIN]
+
+
+class Interpolation(StrEnum):
+    LINEAR = "linear"
+    MONOTONE_CUBIC = "monotone_cubic"
+
+
 CONFIG_SCHEMA = vol.Schema(
     {
         vol.Optional(CONF_CALIBRATE): vol.All(
@@ -41,6 +53,7 @@ CONFIG_SCHEMA = vol.Schema(
         vol.Optional(CONF_MIN_POWER): vol.Coerce(float),
         vol.Optional(CONF_MAX_POWER): vol.Coerce(float),
         vol.Optional(CONF_GAMMA_CURVE): vol.Coerce(float),
+        vol.Optional(CONF_INTERPOLATION): vol.In([cls.value for cls in Interpolation]),
         vol.Optional(CONF_ATTRIBUTE): cv.string,
     },
 )
@@ -69,12 +82,16 @@ class LinearStrategy(PowerCalculationStrategyInterface):
         self._attribute: str | None = None
         self._standby_power = standby_power
         self._initialized: bool = False
-        self._calibration: list[tuple[int, float]] | None = None
+        self._calibration: CalibrationCurve | None = None
 
     async def initialize(self) -> None:
         """Initialize the strategy, called once on creation."""
         self._value_entity = await self.get_value_entity()
-        self._calibration = self.create_calibrate_list()
+        self._calibration = CalibrationCurve(
+            self.create_calibrate_list(),
+            gamma_curve=self._config.get(CONF_GAMMA_CURVE) or 1,
+            interpolation=Interpolation(self._config.get(CONF_INTERPOLATION) or Interpolation.LINEAR),
+        )
 
     async def calculate(self, entity_state: State) -> Decimal | None:
         """Calculate the current power consumption."""
@@ -88,32 +105,22 @@ class LinearStrategy(PowerCalculationStrategyInterface):
         if value is None:
             return None
 
-        min_calibrate = self.get_min_calibrate(value)
-        max_calibrate = self.get_max_calibrate(value)
-        min_value = min_calibrate[0]
-        max_value = max_calibrate[0]
-
-        _LOGGER.debug(
-            "%s: Linear mode state value: %d range(%d-%d)",
-            value_entity.entity_id,
-            value,
-            min_value,
-            max_value,
-        )
-
-        min_power = min_calibrate[1]
-        max_power = max_calibrate[1]
-
-        value_range = max_value - min_value
-        power_range = max_power - min_power
-
-        gamma_curve = self._config.get(CONF_GAMMA_CURVE) or 1
-
-        relative_value = (value - min_value) / value_range
+        calibration = self.get_calibration()
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            lower, upper = calibration.segment(value)
+            _LOGGER.debug(
+                "%s: Linear mode state value: %d range(%d-%d)",
+                value_entity.entity_id,
+                value,
+                calibration.values[lower],
+                calibration.values[upper],
+            )
 
-        power = power_range * relative_value**gamma_curve + min_power
+        return Decimal(calibration.interpolate(value))
 
-        return Decimal(power)
+    def calculate_many(self, values: Sequence[float]) -> list[float]:
+        """Calculate the power for many state values at once, for example to preview or simulate the curve."""
+        return self.get_calibration().interpolate_many(values)
 
     def is_enabled(self, entity_state: State) -> bool:
         """Return if this strategy is enabled based on entity state."""
@@ -121,11 +128,21 @@ class LinearStrategy(PowerCalculationStrategyInterface):
 
     def get_min_calibrate(self, value: int) -> tuple[int, float]:
         """Get closest lower value from calibration table."""
-        return min(self._calibration or (), key=lambda v: (v[0] > value, value - v[0]))
+        calibration = self.get_calibration()
+        lower = calibration.segment(value)[0]
+        return int(calibration.values[lower]), calibration.powers[lower]
 
     def get_max_calibrate(self, value: int) -> tuple[int, float]:
         """Get closest higher value from calibration table."""
-        return max(self._calibration or (), key=lambda v: (v[0] > value, value - v[0]))
+        calibration = self.get_calibration()
+        upper = calibration.segment(value)[1]
+        return int(calibration.values[upper]), calibration.powers[upper]
+
+    def get_calibration(self) -> CalibrationCurve:
+        """Return the calibration curve, built on initialization."""
+        if self._calibration is None:  # pragma: no cover
+            raise StrategyConfigurationError("Linear strategy has not been initialized")
+        return self._calibration
 
     def create_calibrate_list(self) -> list[tuple[int, float]]:
         """Build a table of calibration values."""
@@ -275,3 +292,121 @@ class LinearStrategy(PowerCalculationStrategyInterface):
             return [self._value_entity.entity_id]
 
         return []
+
+
+class CalibrationCurve:
+    """Calibration table of the linear strategy, stored as sorted arrays with the ranges of each segment.
+
+    Values between two calibration points are interpolated on the segment between them. Values outside the table
+    are extrapolated on the line through the highest and the lowest calibration point.
+    With monotone cubic interpolation a Fritsch-Carlson spline is used between the calibration points instead, which
+    follows measured curves more closely without overshooting between the points. The gamma curve only applies to
+    linear interpolation.
+    """
+
+    __slots__ = ("_gamma_curve", "_power_ranges", "_tangents", "_value_ranges", "powers", "values")
+
+    def __init__(
+        self,
+        points: Iterable[tuple[int, float]],
+        gamma_curve: float = 1,
+        interpolation: Interpolation = Interpolation.LINEAR,
+    ) -> None:
+        self.values: array[float] = array("d")
+        self.powers: array[float] = array("d")
+        # Duplicate values keep the first calibration point, like the lookup always did
+        for value, power in sorted(points, key=lambda point: point[0]):
+            if not self.values or value != self.values[-1]:
+                self.values.append(value)
+                self.powers.append(power)
+        if not self.values:
+            raise StrategyConfigurationError("Calibration table of linear strategy is empty")
+
+        self._gamma_curve = gamma_curve
+        # Segment i is between point i and i + 1, the last one is the extrapolation from the highest to the lowest point
+        count = len(self.values)
+        segments = [(i, i + 1) for i in range(count - 1)] + [(count - 1, 0)]
+        self._value_ranges = array("d", (self.values[upper] - self.values[lower] for lower, upper in segments))
+        self._power_ranges = array("d", (self.powers[upper] - self.powers[lower] for lower, upper in segments))
+        self._tangents = self._monotone_tangents() if interpolation == Interpolation.MONOTONE_CUBIC else array("d")
+
+    def segment(self, value: float) -> tuple[int, int]:
+        """Return the indexes of the calibration points to interpolate between."""
+        index = bisect_right(self.values, value)
+        if 0 < index < len(self.values):
+            return index - 1, index
+        return len(self.values) - 1, 0
+
+    def interpolate(self, value: float) -> float:
+        """Calculate the power for a state value."""
+        lower, upper = self.segment(value)
+        if lower == upper:
+            return self.powers[lower]
+        if self._tangents and upper == lower + 1:
+            return self._hermite(value, lower)
+
+        relative_value = (value - self.values[lower]) / self._value_ranges[lower]
+        return self._power_ranges[lower] * relative_value**self._gamma_curve + self.powers[lower]
+
+    def interpolate_many(self, values: Sequence[float]) -> list[float]:
+        """Calculate the power for many state values at once, vectorized with numpy."""
+        # Imported here, numpy is only needed for batch calculations and is slow to import
+        import numpy as np
+
+        state_values = np.asarray(values, dtype=float)
+        points = np.frombuffer(self.values, dtype=float)
+        powers = np.frombuffer(self.powers, dtype=float)
+        count = len(points)
+        if count == 1:
+            return [self.powers[0]] * len(state_values)
+
+        index = np.searchsorted(points, state_values, side="right")
+        inside = (index > 0) & (index < count)
+        # The segment starting at the lower point, or the extrapolation segment which starts at the last point
+        lower = np.where(inside, index - 1, count - 1)
+        relative_value = (state_values - points[lower]) / np.frombuffer(self._value_ranges, dtype=float)[lower]
+        result = (
+            np.frombuffer(self._power_ranges, dtype=float)[lower] * relative_value**self._gamma_curve + powers[lower]
+        )
+
+        if self._tangents:
+            tangents = np.frombuffer(self._tangents, dtype=float)
+            inner = lower[inside]
+            width = points[inner + 1] - points[inner]
+            t = (state_values[inside] - points[inner]) / width
+            result[inside] = (
+                (2 * t**3 - 3 * t**2 + 1) * powers[inner]
+                + (t**3 - 2 * t**2 + t) * width * tangents[inner]
+                + (-2 * t**3 + 3 * t**2) * powers[inner + 1]
+                + (t**3 - t**2) * width * tangents[inner + 1]
+            )
+        return [float(power) for power in result]
+
+    def _hermite(self, value: float, lower: int) -> float:
+        """Interpolate on the cubic Hermite spline of the segment starting at the lower point."""
+        width = self._value_ranges[lower]
+        t = (value - self.values[lower]) / width
+        return (
+            (2 * t**3 - 3 * t**2 + 1) * self.powers[lower]
+            + (t**3 - 2 * t**2 + t) * width * self._tangents[lower]
+            + (-2 * t**3 + 3 * t**2) * self.powers[lower + 1]
+            + (t**3 - t**2) * width * self._tangents[lower + 1]
+        )
+
+    def _monotone_tangents(self) -> array[float]:
+        """Tangents at each calibration point keeping the spline monotone between the points (Fritsch-Carlson)."""
+        count = len(self.values)
+        if count < 2:
+            return array("d")
+        slopes = [self._power_ranges[i] / self._value_ranges[i] for i in range(count - 1)]
+        tangents = array("d", [slopes[0], *([0.0] * (count - 2)), slopes[-1]])
+        for i in range(1, count - 1):
+            previous, current = slopes[i - 1], slopes[i]
+            if previous * current <= 0:
+                continue
+            previous_width, current_width = self._value_ranges[i - 1], self._value_ranges[i]
+            # Weighted harmonic mean of the slopes of both neighbouring segments
+            tangents[i] = (3 * (previous_width + current_width)) / (
+                (2 * current_width + previous_width) / previous + (current_width + 2 * previous_width) / current
+            )
+        return tangents
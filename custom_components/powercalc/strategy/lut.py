@@ -1,35 +1,32 @@
 from bisect import bisect_left
-from collections.abc import Mapping
 from csv import reader
 from dataclasses import dataclass
 from decimal import Decimal
 from enum import StrEnum
 from functools import partial
 import gzip
+import io
 import logging
 import os
 from typing import Any, TextIO, cast
 
 from homeassistant.components import light
 from homeassistant.components.light import (
-    ATTR_BRIGHTNESS,
-    ATTR_COLOR_MODE,
-    ATTR_COLOR_TEMP_KELVIN,
-    ATTR_EFFECT,
-    ATTR_HS_COLOR,
     COLOR_MODES_COLOR,
     ColorMode,
 )
 from homeassistant.core import HomeAssistant, State
-from homeassistant.util.color import color_temperature_kelvin_to_mired, color_temperature_to_hs
 
 from custom_components.powercalc.common import SourceEntity
 from custom_components.powercalc.errors import (
     LutFileNotFoundError,
     StrategyConfigurationError,
 )
+from custom_components.powercalc.power_profile.bundle import ProfileBundles, get_profile_bundles
 from custom_components.powercalc.power_profile.power_profile import PowerProfile
+from custom_components.powercalc.startup_timing import async_time_phase
 
+from .light_state import LightState, get_light_state
 from .strategy_interface import PowerCalculationStrategyInterface
 
 _LOGGER = logging.getLogger(__name__)
@@ -69,8 +66,8 @@ class _EffectEntry:
     table: EffectTableType
 
 
-# manufacturer, model, lookup mode, sub profile
-_CacheKey = tuple[str, str, LookupMode, str | None]
+# manufacturer, model, lookup mode, sub profile, or lookup mode and content hash of a LUT file in the library index
+_CacheKey = tuple[str, str, LookupMode, str | None] | tuple[LookupMode, str]
 
 
 class LutRegistry:
@@ -89,7 +86,11 @@ class LutRegistry:
         cache_key = self._cache_key(power_profile, lookup_mode)
         entry = self._lut_entries.get(cache_key)
         if entry is None:
-            entry = await self._hass.async_add_executor_job(partial(self._load_lut_entry, power_profile, lookup_mode))
+            entry = await async_time_phase(
+                self._hass,
+                "lut_load",
+                self._hass.async_add_executor_job(partial(self._load_lut_entry, power_profile, lookup_mode)),
+            )
             self._lut_entries[cache_key] = entry
         return entry
 
@@ -101,19 +102,27 @@ class LutRegistry:
         cache_key = self._cache_key(power_profile, LookupMode.EFFECT)
         entry = self._effect_entries.get(cache_key)
         if entry is None:
-            entry = await self._hass.async_add_executor_job(partial(self._load_effect_entry, power_profile))
+            entry = await async_time_phase(
+                self._hass,
+                "lut_load",
+                self._hass.async_add_executor_job(partial(self._load_effect_entry, power_profile)),
+            )
             self._effect_entries[cache_key] = entry
         return entry
 
     async def get_supported_modes(self, power_profile: PowerProfile) -> set[LookupMode]:
         """Return the LUT modes supported by the profile."""
+        lut_files = power_profile.lut_files
+        if lut_files is not None:
+            return {lookup_mode for lookup_mode in LookupMode if lookup_mode in lut_files}
+
         cache_key = (power_profile.manufacturer, power_profile.model, "supported_modes")
         supported_modes = self._supported_modes.get(cache_key)
         if supported_modes is None:
             supported_modes = set()
             filenames = cast(
                 list[str],
-                await self._hass.async_add_executor_job(os.listdir, power_profile.get_model_directory()),
+                await self._hass.async_add_executor_job(self._list_model_files, power_profile.get_model_directory()),
             )
             for filename in filenames:
                 if filename.endswith((".csv.gz", ".csv")):
@@ -122,16 +131,26 @@ class LutRegistry:
             self._supported_modes[cache_key] = supported_modes
         return supported_modes
 
+    def _list_model_files(self, model_directory: str) -> list[str]:
+        """List the files of the model directory, from the profile bundle when the model is bundled."""
+        if found_bundle := get_profile_bundles(self._hass).find(model_directory):
+            bundle, relative_dir = found_bundle
+            return bundle.list_files(relative_dir)
+        return os.listdir(model_directory)
+
     @staticmethod
     def _cache_key(power_profile: PowerProfile, lookup_mode: LookupMode) -> _CacheKey:
+        """Profiles sharing an indexed LUT file, like linked profiles, share its loaded table as well."""
+        lut_file = (power_profile.lut_files or {}).get(lookup_mode)
+        if lut_file:
+            return lookup_mode, lut_file["hash"]
         return power_profile.manufacturer, power_profile.model, lookup_mode, power_profile.sub_profile
 
-    @classmethod
-    def _load_lut_entry(cls, power_profile: PowerProfile, lookup_mode: LookupMode) -> _LutEntry:
+    def _load_lut_entry(self, power_profile: PowerProfile, lookup_mode: LookupMode) -> _LutEntry:
         """Load a non-effect CSV into a typed _LutEntry."""
         raw: dict[int, Any] = {}
 
-        csv_file = cls.get_lut_file(power_profile, lookup_mode)
+        csv_file = self.get_lut_file(power_profile, lookup_mode)
         line_count = 0
         with csv_file:
             csv_reader = reader(csv_file)
@@ -154,12 +173,11 @@ class LutRegistry:
         table = cast(LookupDictType, raw)
         return _LutEntry(table=table, sorted_keys=sorted(table.keys()))
 
-    @classmethod
-    def _load_effect_entry(cls, power_profile: PowerProfile) -> _EffectEntry:
+    def _load_effect_entry(self, power_profile: PowerProfile) -> _EffectEntry:
         """Load an effect CSV into a typed _EffectEntry."""
         raw: dict[str, dict[int, float]] = {}
 
-        csv_file = cls.get_lut_file(power_profile, LookupMode.EFFECT)
+        csv_file = self.get_lut_file(power_profile, LookupMode.EFFECT)
         line_count = 0
         with csv_file:
             csv_reader = reader(csv_file)
@@ -173,24 +191,39 @@ class LutRegistry:
         _LOGGER.debug("Effect LUT file loaded: %d lines", line_count)
         return _EffectEntry(table=raw)
 
-    @staticmethod
-    def get_lut_file(power_profile: PowerProfile, lookup_mode: LookupMode) -> TextIO:
+    def get_lut_file(self, power_profile: PowerProfile, lookup_mode: LookupMode) -> TextIO:
         """
         Open the LUT file for the given power profile and color mode.
-        When the file is gzipped it will be decompressed transparently.
+        The file listed in the library index is tried first, then the gzipped and plain file.
+        Bundled profiles are read from their bundle, gzipped files are decompressed transparently.
         """
-        path = os.path.join(power_profile.get_model_directory(), f"{lookup_mode}.csv")
+        model_directory = power_profile.get_model_directory()
+        file_names = [f"{lookup_mode}.csv.gz", f"{lookup_mode}.csv"]
+        if lut_file := (power_profile.lut_files or {}).get(lookup_mode):
+            file_names.insert(0, lut_file["file"])
+
+        bundles = get_profile_bundles(self._hass)
+        for file_name in dict.fromkeys(file_names):
+            try:
+                return LutRegistry._open_lut_file(bundles, os.path.join(model_directory, file_name))
+            except FileNotFoundError:
+                continue
 
-        gzip_path = f"{path}.gz"
-        if os.path.exists(gzip_path):
-            _LOGGER.debug("Loading LUT data file: %s", gzip_path)
-            return gzip.open(gzip_path, "rt")
+        raise LutFileNotFoundError(f"Data file not found: {os.path.join(model_directory, f'{lookup_mode}.csv')}")
 
-        if os.path.exists(path):
-            _LOGGER.debug("Loading LUT data file: %s", path)
-            return open(path)
+    @staticmethod
+    def _open_lut_file(bundles: ProfileBundles, path: str) -> TextIO:
+        """Open the LUT file from its bundle or from disk, raises FileNotFoundError when it doesn't exist."""
+        gzipped = path.endswith(".gz")
+        if found_bundle := bundles.find(path):
+            bundle, relative_path = found_bundle
+            if bundle.is_file(relative_path):
+                _LOGGER.debug("Loading LUT data file: %s from %s", relative_path, bundle.path)
+                data = bundle.read(relative_path)
+                return cast(TextIO, gzip.open(io.BytesIO(data), "rt")) if gzipped else io.StringIO(data.decode())
 
-        raise LutFileNotFoundError(f"Data file not found: {path}")
+        _LOGGER.debug("Loading LUT data file: %s", path)
+        return gzip.open(path, "rt") if gzipped else open(path)
 
 
 class LutStrategy(PowerCalculationStrategyInterface):
@@ -211,19 +244,17 @@ class LutStrategy(PowerCalculationStrategyInterface):
 
     async def calculate(self, entity_state: State) -> Decimal | None:
         """Calculate the power consumption based on brightness, mired, hsl or effect."""
-        attrs = entity_state.attributes
+        light_state = get_light_state(entity_state)
 
-        brightness = attrs.get(ATTR_BRIGHTNESS)
+        brightness = light_state.brightness
         if brightness is None:
             _LOGGER.warning(
                 "%s: Could not calculate power. no brightness set",
                 entity_state.entity_id,
             )
             return None
-        if brightness > 255:
-            brightness = 255
 
-        color_mode = await self.get_selected_color_mode(attrs)
+        color_mode = await self.get_selected_color_mode(light_state)
         if color_mode == ColorMode.UNKNOWN:
             _LOGGER.warning(
                 "%s: Could not calculate power. color mode unknown",
@@ -231,9 +262,8 @@ class LutStrategy(PowerCalculationStrategyInterface):
             )
             return None
 
-        effect = attrs.get(ATTR_EFFECT)
-        if effect and str(effect).lower() not in ("off", "none", "white"):
-            return await self._calculate_effect_power(entity_state, str(effect), brightness)
+        if light_state.effect:
+            return await self._calculate_effect_power(entity_state, light_state.effect, brightness)
 
         lut_mode = LookupMode.from_color_mode(color_mode)
 
@@ -248,7 +278,7 @@ class LutStrategy(PowerCalculationStrategyInterface):
             )
             return None
 
-        light_setting = self.create_light_setting(entity_state, color_mode, brightness)
+        light_setting = self.create_light_setting(light_state, color_mode, brightness)
         if light_setting is None:
             return None
 
@@ -284,52 +314,41 @@ class LutStrategy(PowerCalculationStrategyInterface):
 
     def create_light_setting(
         self,
-        entity_state: State,
+        light_state: LightState,
         color_mode: ColorMode,
         brightness: int,
     ) -> LightSetting | None:
         """Create a LightSetting object based on the entity state."""
         light_setting = LightSetting(color_mode=color_mode, brightness=brightness)
 
-        attrs = entity_state.attributes
         if color_mode == ColorMode.COLOR_TEMP:
-            color_temp = attrs.get(ATTR_COLOR_TEMP_KELVIN)
+            color_temp = light_state.color_temp_mired
             if color_temp is None:
                 _LOGGER.error(
                     "%s: Could not calculate power. no color temp set. "
                     "Please check the attributes of your light in the developer tools.",
-                    entity_state.entity_id,
+                    light_state.state.entity_id,
                 )
                 return None
-            light_setting.color_temp = color_temperature_kelvin_to_mired(color_temp)
+            light_setting.color_temp = color_temp
             return light_setting
 
         if color_mode == ColorMode.HS:
-            try:
-                original_color_mode = attrs.get(ATTR_COLOR_MODE)
-                hs = (
-                    color_temperature_to_hs(attrs[ATTR_COLOR_TEMP_KELVIN])
-                    if original_color_mode == ColorMode.COLOR_TEMP
-                    else attrs[ATTR_HS_COLOR]
-                )
-                light_setting.hue = int(hs[0] / 360 * 65535)
-                light_setting.saturation = int(hs[1] / 100 * 255)
-            except KeyError, TypeError, ValueError:
+            hue_saturation = light_state.hue_saturation
+            if hue_saturation is None:
                 _LOGGER.error(
                     "%s: Could not calculate power. no hue/sat set. "
                     "Please check the attributes of your light in the developer tools.",
-                    entity_state.entity_id,
+                    light_state.state.entity_id,
                 )
                 return None
+            light_setting.hue, light_setting.saturation = hue_saturation
 
         return light_setting
 
-    async def get_selected_color_mode(self, attrs: Mapping[str, Any]) -> ColorMode:
+    async def get_selected_color_mode(self, light_state: LightState) -> ColorMode:
         """Get the selected color mode for the entity."""
-        try:
-            color_mode = ColorMode(str(attrs.get(ATTR_COLOR_MODE, ColorMode.UNKNOWN)))
-        except ValueError:
-            color_mode = ColorMode.UNKNOWN
+        color_mode = light_state.color_mode
         if color_mode == ColorMode.WHITE:
             return ColorMode.BRIGHTNESS
         if color_mode == ColorMode.UNKNOWN:
@@ -1,5 +1,7 @@
 from decimal import Decimal
+from enum import IntEnum
 import logging
+from typing import NamedTuple
 
 from homeassistant.components.switch import DOMAIN as SWITCH_DOMAIN
 from homeassistant.const import CONF_ENTITIES, STATE_CLOSING, STATE_ON, STATE_OPENING, STATE_UNAVAILABLE
@@ -8,7 +10,7 @@ import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.event import TrackTemplate
 import voluptuous as vol
 
-from custom_components.powercalc.const import CONF_POWER, CONF_POWER_OFF, DUMMY_ENTITY_ID
+from custom_components.powercalc.const import CONF_ENTITY_POWER, CONF_POWER, CONF_POWER_OFF, DUMMY_ENTITY_ID
 
 from .strategy_interface import PowerCalculationStrategyInterface
 
@@ -17,6 +19,16 @@ CONFIG_SCHEMA = vol.Schema(
         vol.Optional(CONF_POWER): vol.Coerce(float),
         vol.Optional(CONF_POWER_OFF): vol.Coerce(float),
         vol.Required(CONF_ENTITIES): cv.entities_domain(SWITCH_DOMAIN),
+        vol.Optional(CONF_ENTITY_POWER): vol.Schema(
+            {
+                cv.entity_id: vol.Schema(
+                    {
+                        vol.Optional(CONF_POWER): vol.Coerce(float),
+                        vol.Optional(CONF_POWER_OFF): vol.Coerce(float),
+                    },
+                ),
+            },
+        ),
     },
 )
 
@@ -25,41 +37,94 @@ _LOGGER = logging.getLogger(__name__)
 ON_STATES = [STATE_ON, STATE_OPENING, STATE_CLOSING]
 
 
+class SwitchState(IntEnum):
+    OFF = 0
+    ON = 1
+    UNAVAILABLE = 2
+
+
+class SwitchPower(NamedTuple):
+    """Power of a single switch with an override of the default on and off power."""
+
+    on_power: Decimal
+    off_power: Decimal
+
+
 class MultiSwitchStrategy(PowerCalculationStrategyInterface):
+    """Sums the power of the switches, keeping running counts which are updated by the switch which changed."""
+
     def __init__(
         self,
         hass: HomeAssistant,
         switch_entities: list[str],
         on_power: Decimal,
         off_power: Decimal | None = None,
+        entity_power: dict[str, SwitchPower] | None = None,
     ) -> None:
         self.hass = hass
         self.switch_entities = switch_entities
-        self.known_states: dict[str, str] | None = None
         self.on_power = on_power
         self.off_power = off_power
+        self.entity_power = entity_power or {}
+        self._known_states: dict[str, SwitchState] | None = None
+        # Number of switches without a power override per state
+        self._counts = [0, 0, 0]
+        # Summed power of the switches with a power override
+        self._override_power = Decimal(0)
 
     async def calculate(self, entity_state: State) -> Decimal | None:
-        if self.known_states is None:
-            self.known_states = {
-                entity_id: (state.state if (state := self.hass.states.get(entity_id)) else STATE_UNAVAILABLE)
-                for entity_id in self.switch_entities
-            }
+        if self._known_states is None:
+            self._known_states = {}
+            for entity_id in self.switch_entities:
+                state = self.hass.states.get(entity_id)
+                self._set_switch_state(entity_id, state.state if state else STATE_UNAVAILABLE)
 
-        if entity_state.entity_id != DUMMY_ENTITY_ID and entity_state.entity_id in self.switch_entities:
-            self.known_states[entity_state.entity_id] = entity_state.state
+        if entity_state.entity_id != DUMMY_ENTITY_ID and entity_state.entity_id in self._known_states:
+            self._set_switch_state(entity_state.entity_id, entity_state.state)
 
-        def _get_power(state: str) -> Decimal:
-            if state == STATE_UNAVAILABLE:
-                return Decimal(0)
-            if state in ON_STATES:
-                return self.on_power
-            return self.off_power or Decimal(0)
+        power = self._counts[SwitchState.ON] * self.on_power + self._override_power
+        if self.off_power:
+            power += self._counts[SwitchState.OFF] * self.off_power
+        return power
 
-        return Decimal(sum(_get_power(state) for state in self.known_states.values()))
+    def _set_switch_state(self, entity_id: str, state: str) -> None:
+        """Update the counts with the new state of a single switch."""
+        if self._known_states is None:  # pragma: no cover
+            return
+        switch_state = _to_switch_state(state)
+        previous = self._known_states.get(entity_id)
+        if previous == switch_state:
+            return
+        self._known_states[entity_id] = switch_state
+
+        if override := self.entity_power.get(entity_id):
+            if previous is not None:
+                self._override_power -= _get_switch_power(override, previous)
+            self._override_power += _get_switch_power(override, switch_state)
+            return
+
+        if previous is not None:
+            self._counts[previous] -= 1
+        self._counts[switch_state] += 1
 
     def get_entities_to_track(self) -> list[str | TrackTemplate]:
         return [*self.switch_entities]
 
     def can_calculate_standby(self) -> bool:
-        return self.off_power is not None
+        return self.off_power is not None or any(power.off_power for power in self.entity_power.values())
+
+
+def _to_switch_state(state: str) -> SwitchState:
+    if state == STATE_UNAVAILABLE:
+        return SwitchState.UNAVAILABLE
+    if state in ON_STATES:
+        return SwitchState.ON
+    return SwitchState.OFF
+
+
+def _get_switch_power(power: SwitchPower, state: SwitchState) -> Decimal:
+    if state == SwitchState.ON:
+        return power.on_power
+    if state == SwitchState.OFF:
+        return power.off_power
+    return Decimal(0)
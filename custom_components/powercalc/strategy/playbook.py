@@ -1,15 +1,19 @@
-from collections import deque
+from array import array
+import asyncio
+from collections import OrderedDict
 from collections.abc import Callable
 import csv
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from decimal import Decimal
 import gzip
+from itertools import islice
 import logging
 import os
+from typing import Any, NamedTuple, TextIO
 
 from homeassistant.const import EVENT_HOMEASSISTANT_STOP, STATE_OFF
-from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, State, callback
+from homeassistant.core import CALLBACK_TYPE, Event, HassJob, HomeAssistant, State, callback
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.event import async_track_point_in_time
 from homeassistant.helpers.typing import ConfigType
@@ -18,10 +22,14 @@ import voluptuous as vol
 
 from custom_components.powercalc.const import (
     CONF_AUTOSTART,
+    CONF_MIN_OUTPUT_INTERVAL,
     CONF_PLAYBOOKS,
     CONF_REPEAT,
     CONF_STATE_TRIGGER,
     CONF_STATES_TRIGGER,
+    CONF_TIME_WEIGHTED_AVERAGE,
+    DATA_PLAYBOOK_CACHE,
+    DOMAIN,
 )
 from custom_components.powercalc.errors import StrategyConfigurationError
 
@@ -36,6 +44,8 @@ CONFIG_SCHEMA = vol.All(
             ),
             vol.Optional(CONF_AUTOSTART): cv.string,
             vol.Optional(CONF_REPEAT, default=False): cv.boolean,
+            vol.Optional(CONF_MIN_OUTPUT_INTERVAL, default=0): cv.positive_float,
+            vol.Optional(CONF_TIME_WEIGHTED_AVERAGE, default=False): cv.boolean,
             vol.Optional(CONF_STATE_TRIGGER): vol.Schema(
                 {cv.string: cv.string},
             ),
@@ -48,6 +58,15 @@ CONFIG_SCHEMA = vol.All(
 
 _LOGGER = logging.getLogger(__name__)
 
+# Playbook files larger than this (in bytes, on disk) are streamed in chunks, instead of loaded completely
+PLAYBOOK_STREAMING_SIZE = 4 * 1024 * 1024
+# Number of entries read at once when streaming a playbook
+PLAYBOOK_CHUNK_SIZE = 10000
+# Number of parsed playbook files kept for reuse, the least recently used are dropped
+PLAYBOOK_CACHE_SIZE = 16
+# Minimum time between the starts of a repeated playbook
+MIN_REPEAT_INTERVAL = timedelta(seconds=1)
+
 
 class PlaybookStrategy(PowerCalculationStrategyInterface):
     def __init__(
@@ -61,12 +80,20 @@ class PlaybookStrategy(PowerCalculationStrategyInterface):
         self._loaded_playbooks: dict[str, Playbook] = {}
         self._update_callback: Callable[[Decimal], None] = lambda power: None
         self._start_time: datetime = dt.utcnow()
+        self._next_entry: PlaybookEntry | None = None
+        self._last_entry_time: datetime = self._start_time
+        self._pending_load: asyncio.Task[None] | None = None
+        self._timer_job = HassJob(self._process_playbook, name="powercalc playbook", cancel_on_shutdown=True)
         self._cancel_timer: CALLBACK_TYPE | None = None
         self._cancel_stop_listener: CALLBACK_TYPE | None = None
         self._config = config
         self._repeat: bool = bool(config.get(CONF_REPEAT))
         self._autostart: str | None = config.get(CONF_AUTOSTART)
         self._power = Decimal(0)
+        self._output = _PowerOutput(
+            timedelta(seconds=config.get(CONF_MIN_OUTPUT_INTERVAL, 0)),
+            bool(config.get(CONF_TIME_WEIGHTED_AVERAGE)),
+        )
         self._states_trigger: dict[str, str] | None = config.get(CONF_STATE_TRIGGER, config.get(CONF_STATES_TRIGGER))
         self._playbook_directory = playbook_directory or os.path.join(hass.config.config_dir, "powercalc/playbooks")
 
@@ -100,9 +127,16 @@ class PlaybookStrategy(PowerCalculationStrategyInterface):
         playbook = await self._load_playbook(playbook_id=playbook_id)
         playbook.queue.reset()
         self._active_playbook = playbook
-        self._start_time = dt.utcnow()
+        self._start_time = self._last_entry_time = dt.utcnow()
+        self._output.start(self._power)
 
-        self._execute_playbook_entry()
+        if self._cancel_stop_listener is None:
+            self._cancel_stop_listener = self._hass.bus.async_listen_once(
+                EVENT_HOMEASSISTANT_STOP,
+                self._cancel_pending_updates_on_stop,
+            )
+
+        self._process_playbook()
 
     async def stop_playbook(self) -> None:
         """Activate and execute a given playbook"""
@@ -110,11 +144,8 @@ class PlaybookStrategy(PowerCalculationStrategyInterface):
             return
 
         _LOGGER.debug("Stopping playbook")
-        self._active_playbook = None
+        self._deactivate_playbook()
         self._power = Decimal(0)
-        if self._cancel_timer is not None:
-            self._cancel_timer()
-            self._cancel_timer = None
         if self._cancel_stop_listener is not None:
             self._cancel_stop_listener()
             self._cancel_stop_listener = None
@@ -124,83 +155,114 @@ class PlaybookStrategy(PowerCalculationStrategyInterface):
         return self._active_playbook
 
     @callback
-    def _execute_playbook_entry(self) -> None:
-        """Execute one step of the playbook"""
+    def _deactivate_playbook(self) -> None:
         self._cancel_pending_timer()
+        if self._active_playbook:
+            self._active_playbook.queue.close()
+        self._active_playbook = None
+        self._next_entry = None
+        self._pending_load = None
 
-        if not self._active_playbook:  # pragma: no cover
-            _LOGGER.error("Could not execute next playbook entry. No active playbook")
-            return
+    @callback
+    def _cancel_pending_updates_on_stop(self, _: Event) -> None:
+        self._cancel_stop_listener = None
+        self._deactivate_playbook()
 
+    @callback
+    def _process_playbook(self, now: datetime | None = None) -> None:
+        """Apply all playbook entries which are due, and schedule the timer for the next entry.
+
+        All entries which are due at once are collapsed into a single power update. With a minimum output interval
+        entries are held back until the interval passed, the timer then also fires to output the held power.
+        """
+        self._cancel_pending_timer()
         playbook = self._active_playbook
-        if self._complete_or_repeat_playbook(playbook):
+        if playbook is None:
             return
 
-        entry = playbook.queue.dequeue()
-        self._schedule_playbook_entry_update(playbook, entry)
+        now = max(now, dt.utcnow()) if now else dt.utcnow()
+        power: Decimal | None = None
+        entry_time: datetime | None = None
+        while self._active_playbook is playbook:
+            entry = self._peek_playbook_entry(playbook)
+            entry_time = self._start_time + timedelta(seconds=entry.time) if entry else None
+            flush_time = self._output.next_flush
+            if flush_time and flush_time <= now and (entry_time is None or flush_time < entry_time):
+                power = self._output.flush(flush_time)
+                continue
+            if entry is None or entry_time is None or entry_time > now:
+                break
+            self._next_entry = None
+            self._last_entry_time = entry_time
+            _LOGGER.debug("playbook %s: Entry at %.3fs, power %.2f", playbook.key, entry.time, entry.power)
+            if (output := self._output.update(entry_time, entry.power)) is not None:
+                power = output
+
+        if self._active_playbook is not playbook and (final_power := self._output.finish()) is not None:
+            # Completed, output the power of the last entry when it was held back
+            power = final_power
+        if power is not None:
+            self._power = power
+            _LOGGER.debug("playbook %s: Update power %.2f", playbook.key, self._power)
+            self._update_callback(self._power)
 
-    @callback
-    def _cancel_pending_timer(self) -> None:
-        if self._cancel_timer is not None:
-            self._cancel_timer()
-            self._cancel_timer = None
+        if self._active_playbook is playbook:
+            next_time = min(filter(None, (entry_time, self._output.next_flush)), default=None)
+            if next_time:
+                self._cancel_timer = async_track_point_in_time(self._hass, self._timer_job, next_time)
 
     @callback
-    def _complete_or_repeat_playbook(self, playbook: Playbook) -> bool:
+    def _peek_playbook_entry(self, playbook: Playbook) -> PlaybookEntry | None:
+        """Get the next entry, None while the next chunk is loading or when the playbook completed."""
+        if self._next_entry is not None:
+            return self._next_entry
+
         queue = playbook.queue
-        if len(queue) != 0:
-            return False
+        if queue.exhausted:
+            if not self._repeat:
+                _LOGGER.debug("Playbook %s completed", playbook.key)
+                self._deactivate_playbook()
+                return None
 
-        if self._repeat:
             _LOGGER.debug("Playbook %s repeating", playbook.key)
-            self._start_time = dt.utcnow()
+            # Repeat from the last entry, so no time is lost between the runs, but never restart within the same
+            # second, a playbook with all entries at the same time would otherwise repeat endlessly at once
+            self._start_time = max(self._last_entry_time, self._start_time + MIN_REPEAT_INTERVAL)
             queue.reset()
-            self._execute_playbook_entry()
-            return True
-
-        _LOGGER.debug("Playbook %s completed", playbook.key)
-        self._active_playbook = None
-        return True
+            if queue.exhausted:
+                _LOGGER.warning("Playbook %s has no entries, stopping", playbook.key)
+                self._deactivate_playbook()
+                return None
+
+        if len(queue) == 0:
+            if self._pending_load is None or self._pending_load.done():
+                self._pending_load = self._hass.async_create_task(
+                    self._async_load_and_execute(playbook),
+                    f"powercalc playbook {playbook.key} load",
+                )
+            return None
+
+        self._next_entry = queue.dequeue()
+        return self._next_entry
+
+    async def _async_load_and_execute(self, playbook: Playbook) -> None:
+        """Load the next chunk of a streamed playbook, and continue executing it."""
+        try:
+            loaded = await playbook.queue.async_load_more(self._hass)
+        except OSError, ValueError, StrategyConfigurationError:
+            if self._active_playbook is playbook:
+                _LOGGER.exception("playbook %s: Could not read the next entries, stopping playbook", playbook.key)
+                await self.stop_playbook()
+            return
+        if loaded and self._active_playbook is playbook:
+            self._pending_load = None
+            self._process_playbook()
 
     @callback
-    def _schedule_playbook_entry_update(self, playbook: Playbook, entry: PlaybookEntry) -> None:
-        """Schedule the next playbook power update."""
-
-        @callback
-        def _update_power(date_time: datetime) -> None:
-            active_playbook = self._active_playbook
-            if active_playbook is None:  # pragma: no cover
-                return
-            self._power = entry.power
-            _LOGGER.debug("playbook %s: Update power %.2f", active_playbook.key, self._power)
-            self._update_callback(self._power)
-            self._execute_playbook_entry()
-
-        @callback
-        def _cancel_pending_updates_on_stop(_: datetime) -> None:
-            self._cancel_pending_timer()
-            if self._cancel_stop_listener is not None:
-                self._cancel_stop_listener()
-                self._cancel_stop_listener = None
-            self._active_playbook = None
-
-        if self._cancel_stop_listener is not None:
-            self._cancel_stop_listener()
-        self._cancel_stop_listener = self._hass.bus.async_listen_once(
-            EVENT_HOMEASSISTANT_STOP,
-            _cancel_pending_updates_on_stop,
-        )
-
-        # Schedule update in the future
-        self._cancel_timer = async_track_point_in_time(
-            self._hass,
-            HassJob(
-                _update_power,
-                name=f"powercalc playbook {playbook.key}",
-                cancel_on_shutdown=True,
-            ),
-            self._start_time + timedelta(seconds=entry.time),
-        )
+    def _cancel_pending_timer(self) -> None:
+        if self._cancel_timer is not None:
+            self._cancel_timer()
+            self._cancel_timer = None
 
     async def _load_playbook(self, playbook_id: str) -> Playbook:
         """Lazy load a playbook from a CSV file"""
@@ -215,31 +277,18 @@ class PlaybookStrategy(PowerCalculationStrategyInterface):
 
         file_path = os.path.join(self._playbook_directory, playbooks[playbook_id])
 
-        def _load_playbook_entries() -> list[PlaybookEntry]:
-            """Load playbook entries from a CSV file, with support for gzipped files"""
-            if not (os.path.exists(file_path) or os.path.exists(f"{file_path}.gz")):
-                raise StrategyConfigurationError(
-                    f"Playbook file '{file_path}' does not exist",
-                )
-            actual_path = file_path if os.path.exists(file_path) else f"{file_path}.gz"
-            open_func = gzip.open if actual_path.endswith(".gz") else open
-            with open_func(actual_path, mode="rt") as csv_file:
-                csv_reader = csv.reader(csv_file)
-                entries = []
-                for row in csv_reader:
-                    if len(row) != 2:
-                        raise StrategyConfigurationError(
-                            f"Playbook file '{actual_path}' has invalid structure, please see the documentation.",
-                        )
-                    entries.append(PlaybookEntry(time=float(row[0]), power=Decimal(row[1])))
-                return entries
-
-        playbook_entries = await self._hass.async_add_executor_job(_load_playbook_entries)
-
-        self._loaded_playbooks[playbook_id] = Playbook(
-            key=playbook_id,
-            queue=PlaybookQueue(playbook_entries),
+        def _stat_playbook() -> tuple[str, os.stat_result]:
+            path = resolve_playbook_path(file_path)
+            return path, os.stat(path)
+
+        path, stat = await self._hass.async_add_executor_job(_stat_playbook)
+        # Huge playbooks are streamed instead of loaded completely
+        queue = (
+            StreamingPlaybookQueue(self._hass, path)
+            if stat.st_size > PLAYBOOK_STREAMING_SIZE
+            else PlaybookQueue(await get_playbook_cache(self._hass).async_load(path, stat))
         )
+        self._loaded_playbooks[playbook_id] = Playbook(key=playbook_id, queue=queue)
         return self._loaded_playbooks[playbook_id]
 
     def can_calculate_standby(self) -> bool:
@@ -251,19 +300,265 @@ class PlaybookStrategy(PowerCalculationStrategyInterface):
         return list(playbooks.keys())
 
 
+class PlaybookData(NamedTuple):
+    """Time offsets and power of the playbook entries, in compact arrays."""
+
+    times: array[float]
+    powers: array[float]
+
+
+def resolve_playbook_path(file_path: str) -> str:
+    """Find the playbook file, falling back to the gzipped file."""
+    for path in (file_path, f"{file_path}.gz"):
+        if os.path.exists(path):
+            return path
+    raise StrategyConfigurationError(f"Playbook file '{file_path}' does not exist")
+
+
+def load_playbook_data(path: str) -> PlaybookData:
+    """Load all entries of a playbook file."""
+    reader = _PlaybookReader(path)
+    try:
+        return reader.read()
+    finally:
+        reader.close()
+
+
+class PlaybookCache:
+    """Parsed playbooks shared by all sensors, reused as long as the mtime and size of the file don't change."""
+
+    def __init__(self, hass: HomeAssistant, max_size: int = PLAYBOOK_CACHE_SIZE) -> None:
+        self._hass = hass
+        self._max_size = max_size
+        self._entries: OrderedDict[str, tuple[int, int, PlaybookData]] = OrderedDict()
+
+    async def async_load(self, path: str, stat: os.stat_result) -> PlaybookData:
+        """Get the entries of the playbook file, parsing it in the executor when it isn't cached."""
+        cached = self._entries.get(path)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            self._entries.move_to_end(path)
+            return cached[2]
+
+        data = await self._hass.async_add_executor_job(load_playbook_data, path)
+        self._entries[path] = (stat.st_mtime_ns, stat.st_size, data)
+        self._entries.move_to_end(path)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+        return data
+
+
+def get_playbook_cache(hass: HomeAssistant) -> PlaybookCache:
+    """Get the playbook cache, creating it on first use."""
+    domain_data: dict[str, Any] = hass.data.setdefault(DOMAIN, {})
+    cache: PlaybookCache | None = domain_data.get(DATA_PLAYBOOK_CACHE)
+    if cache is None:
+        cache = domain_data[DATA_PLAYBOOK_CACHE] = PlaybookCache(hass)
+    return cache
+
+
+class _PlaybookReader:
+    """Parse the rows of a playbook CSV file, with support for gzipped files."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.eof = False
+        self._file: TextIO = gzip.open(path, mode="rt") if path.endswith(".gz") else open(path)  # noqa: SIM115
+        self._rows = csv.reader(self._file)
+
+    def read(self, limit: int | None = None) -> PlaybookData:
+        """Read the next `limit` entries, or all remaining entries."""
+        data = PlaybookData(array("d"), array("d"))
+        try:
+            for row in islice(self._rows, limit):
+                if len(row) != 2:
+                    raise ValueError(f"expected 2 columns, got {len(row)}")
+                data.times.append(float(row[0]))
+                data.powers.append(float(row[1]))
+        except ValueError as err:
+            raise StrategyConfigurationError(
+                f"Playbook file '{self.path}' has invalid structure, please see the documentation. {err}",
+            ) from err
+        if limit is None or len(data.times) < limit:
+            self.eof = True
+        return data
+
+    def close(self) -> None:
+        self._file.close()
+
+
 class PlaybookQueue:
-    def __init__(self, items: list[PlaybookEntry]) -> None:
-        self._items = items
-        self._queue: deque[PlaybookEntry] = deque(items)
+    """Cursor over the playbook entries, the entries are shared and never copied."""
+
+    def __init__(self, data: PlaybookData) -> None:
+        self._data = data
+        self._position = 0
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether all entries have been dequeued."""
+        return self._position >= len(self._data.times)
 
     def dequeue(self) -> PlaybookEntry:
-        return self._queue.popleft()
+        position = self._position
+        self._position += 1
+        # Through str, to get the decimal written in the file instead of the closest binary float
+        return PlaybookEntry(time=self._data.times[position], power=Decimal(str(self._data.powers[position])))
 
     def reset(self) -> None:
-        self._queue = deque(self._items)
+        self._position = 0
+
+    async def async_load_more(self, hass: HomeAssistant) -> bool:
+        """Load more entries when the queue is empty but not exhausted, returns whether entries were loaded.
+
+        All entries are loaded at once, so there is never more to load.
+        """
+        return False
+
+    def close(self) -> None:
+        """Release the resources held while the playbook is running."""
 
     def __len__(self) -> int:
-        return len(self._queue)
+        """Number of entries which can be dequeued without loading more."""
+        return len(self._data.times) - self._position
+
+
+class StreamingPlaybookQueue(PlaybookQueue):
+    """Reads a huge playbook chunk by chunk, only the current chunk is kept in memory."""
+
+    def __init__(self, hass: HomeAssistant, path: str) -> None:
+        super().__init__(PlaybookData(array("d"), array("d")))
+        self._hass = hass
+        self._path = path
+        self._chunk_size = PLAYBOOK_CHUNK_SIZE
+        self._reader: _PlaybookReader | None = None
+        # Read running in the executor, the reader is only closed once it returned
+        self._pending_read: asyncio.Future[PlaybookData] | None = None
+        self._eof = False
+        # Incremented on reset and close, so a chunk which was still loading is discarded
+        self._generation = 0
+
+    @property
+    def exhausted(self) -> bool:
+        return self._eof and super().exhausted
+
+    def reset(self) -> None:
+        self.close()
+        self._data = PlaybookData(array("d"), array("d"))
+        self._position = 0
+        self._eof = False
+
+    async def async_load_more(self, hass: HomeAssistant) -> bool:
+        """Load the next chunk, discarding it when the queue was reset or closed in the meantime."""
+        generation = self._generation
+        if self._reader is None:
+            reader = await hass.async_add_executor_job(_PlaybookReader, self._path)
+            if generation != self._generation:
+                hass.async_add_executor_job(reader.close)
+                return False
+            self._reader = reader
+
+        reader = self._reader
+        read = self._pending_read = hass.async_add_executor_job(reader.read, self._chunk_size)
+        try:
+            data = await read
+        finally:
+            if self._pending_read is read:
+                self._pending_read = None
+        if generation != self._generation:
+            return False
+        self._data = data
+        self._position = 0
+        if reader.eof:
+            self._eof = True
+            self.close()
+        return True
+
+    def close(self) -> None:
+        """Stop reading, the file is closed in the executor once a read still running returned."""
+        self._generation += 1
+        reader, self._reader = self._reader, None
+        if reader is None:
+            return
+        read = self._pending_read
+        if read is not None and not read.done():
+            read.add_done_callback(lambda _: self._hass.async_add_executor_job(reader.close))
+        else:
+            self._hass.async_add_executor_job(reader.close)
+
+
+class _PowerOutput:
+    """Collapses the playbook entries into at most one power update per minimum output interval.
+
+    By default the power of the last entry is output. With the time-weighted average, the average power since the
+    previous update is output instead, so the energy integrated from the power sensor stays the same, the power is
+    just reported up to one interval later.
+    """
+
+    def __init__(self, interval: timedelta, time_weighted_average: bool) -> None:
+        self._interval = interval
+        self._average = time_weighted_average and interval > timedelta(0)
+        self._last_output: datetime | None = None
+        self._output = Decimal(0)
+        self._level = Decimal(0)
+        self._level_since: datetime | None = None
+        # Power multiplied by seconds, since the last output
+        self._energy = Decimal(0)
+        self._pending = False
+
+    def start(self, power: Decimal) -> None:
+        """Start collapsing the entries of a new playbook run, from the current power."""
+        self._last_output = None
+        self._output = self._level = power
+        self._level_since = None
+        self._energy = Decimal(0)
+        self._pending = False
+
+    @property
+    def next_flush(self) -> datetime | None:
+        """When the held back power must be output."""
+        if not self._pending or self._last_output is None:
+            return None
+        return self._last_output + self._interval
+
+    def update(self, at: datetime, power: Decimal) -> Decimal | None:
+        """Change the power, returns the power to output now or None when it is held back."""
+        self._accumulate(at)
+        self._level = power
+        if self._last_output is None or not self._interval or at - self._last_output >= self._interval:
+            return self._emit(at)
+        self._pending = True
+        return None
+
+    def flush(self, at: datetime) -> Decimal | None:
+        """Output the held back power, at the end of the interval."""
+        if not self._pending:
+            return None
+        self._accumulate(at)
+        return self._emit(at)
+
+    def finish(self) -> Decimal | None:
+        """Output the power of the last entry, when it was held back."""
+        if self._level == self._output:
+            return None
+        self._pending = False
+        self._output = self._level
+        return self._output
+
+    def _accumulate(self, at: datetime) -> None:
+        if self._average and self._level_since is not None and at > self._level_since:
+            self._energy += self._level * Decimal(str((at - self._level_since).total_seconds()))
+        self._level_since = at
+
+    def _emit(self, at: datetime) -> Decimal:
+        if self._average and self._last_output is not None and at > self._last_output:
+            self._output = self._energy / Decimal(str((at - self._last_output).total_seconds()))
+        else:
+            self._output = self._level
+        self._last_output = at
+        self._energy = Decimal(0)
+        # The average only reaches the current power after a full interval, which must be output as well
+        self._pending = self._output != self._level
+        return self._output
 
 
 @dataclass
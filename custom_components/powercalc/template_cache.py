@@ -0,0 +1,313 @@
+"""Cached template rendering for templates which are evaluated on the power calculation hot path.
+
+Rendering a Jinja template is by far the most expensive part of a power calculation. Most templates
+used by powercalc however only read a handful of entities, are constant, or are a single comparison.
+``CachedTemplate`` exploits that:
+
+- Templates which don't read any state nor registry, and aren't random, are rendered once and turned into a constant.
+- Simple ``is_state``, ``is_state_attr`` and ``states(...)`` comparisons are compiled into native predicates.
+- Templates only using functions, filters and tests whose result RenderInfo tracks are rendered once per combination
+  of the states of the entities they reference.
+- All other templates, reading registries or random values for instance, are rendered every time.
+"""
+
+import ast
+from collections.abc import Callable
+import operator
+import re
+from typing import Any
+
+from homeassistant.const import STATE_UNKNOWN
+from homeassistant.core import HomeAssistant, State
+from homeassistant.helpers.template import RenderInfo, Template
+from jinja2 import Environment, TemplateSyntaxError, nodes
+from jinja2.filters import FILTERS
+from jinja2.tests import TESTS
+
+_IS_STATE_REGEX = re.compile(r"^\{\{\s*(not\s+)?is_state\((?P<args>[^()]*)\)\s*\}\}$")
+_IS_STATE_ATTR_REGEX = re.compile(r"^\{\{\s*(not\s+)?is_state_attr\((?P<args>[^()]*)\)\s*\}\}$")
+_STATES_COMPARISON_REGEX = re.compile(
+    r"^\{\{\s*states\((?P<entity_id>'[^']*'|\"[^\"]*\")\)\s*"
+    r"(?P<filter>\|\s*float(?:\((?P<default>[^()]*)\))?\s*)?"
+    r"(?P<operator>==|!=|>=|<=|>|<)\s*(?P<value>[^{}]+?)\s*\}\}$",
+)
+
+# Functions, filters and tests whose result only depends on their arguments, the states RenderInfo tracks, or the time.
+# Templates using anything else are rendered every time.
+_TRACKED_GLOBALS = frozenset(
+    {
+        "states",
+        "is_state",
+        "is_state_attr",
+        "state_attr",
+        "has_value",
+        "now",
+        "utcnow",
+        "today_at",
+        "as_timestamp",
+        "as_datetime",
+        "as_local",
+        "strptime",
+        "float",
+        "int",
+        "bool",
+        "is_number",
+        "min",
+        "max",
+        "average",
+        "median",
+        "iif",
+        "log",
+        "sqrt",
+        "pi",
+        "e",
+        "tau",
+        "range",
+        "dict",
+        "namespace",
+        "loop",
+    },
+)
+_TRACKED_FILTERS = (FILTERS.keys() - {"random"}) | {
+    "states",
+    "is_state",
+    "is_state_attr",
+    "state_attr",
+    "has_value",
+    "as_timestamp",
+    "as_datetime",
+    "as_local",
+    "timestamp_local",
+    "timestamp_utc",
+    "timestamp_custom",
+    "float",
+    "int",
+    "bool",
+    "is_number",
+    "multiply",
+    "average",
+    "median",
+    "iif",
+    "log",
+    "sqrt",
+    "regex_match",
+    "regex_search",
+    "regex_replace",
+    "regex_findall",
+    "regex_findall_index",
+    "from_json",
+    "to_json",
+}
+_TRACKED_TESTS = TESTS.keys() | {"is_number", "match", "search", "contains", "is_state", "is_state_attr", "has_value"}
+# Filters applying another filter (map) or test (select, reject) given by name, and the position of that name
+_NAMED_FILTER_OR_TEST_ARGUMENT = {"map": 0, "select": 0, "reject": 0, "selectattr": 1, "rejectattr": 1}
+# Only used to parse templates, never to render them
+_PARSE_ENVIRONMENT = Environment(extensions=["jinja2.ext.loopcontrols", "jinja2.ext.do"])  # noqa: S701
+
+_OPERATORS: dict[str, Callable[[Any, Any], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+
+# Returned by a compiled predicate when it cannot answer, the template is rendered by Jinja instead.
+FALLBACK = object()
+
+type Predicate = Callable[[HomeAssistant], Any]
+
+
+class CachedTemplate:
+    """Wraps a Template and avoids rendering it when the result cannot have changed since the last render."""
+
+    def __init__(self, template: Template) -> None:
+        self.template = template
+        self._predicate = compile_predicate(template.template)
+        self._is_tracked = is_tracked_by_render_info(template.template)
+        self._is_constant = False
+        self._entity_ids: tuple[str, ...] | None = None
+        self._states: tuple[State | None, ...] = ()
+        self._has_result = False
+        self._result: Any = None
+
+    def async_render(self) -> Any:  # noqa: ANN401
+        """Render the template, or return the cached result when possible.
+
+        Raises TemplateError like Template.async_render does.
+        """
+        hass = self.template.hass
+        assert hass is not None
+        if self._predicate is not None:
+            result = self._predicate(hass)
+            if result is not FALLBACK:
+                return result
+
+        if self._has_result:
+            if self._is_constant:
+                return self._result
+            if self._entity_ids is not None and self._current_states(hass) == self._states:
+                return self._result
+
+        return self._render(hass)
+
+    def _render(self, hass: HomeAssistant) -> Any:  # noqa: ANN401
+        if not self._is_tracked:
+            return self.template.async_render()
+
+        render_info = self.template.async_render_to_info()
+        result = render_info.result()
+
+        self._entity_ids = _referenced_entities(render_info)
+        self._is_constant = self.template.is_static or self._entity_ids == ()
+        self._states = self._current_states(hass)
+        self._result = result
+        self._has_result = True
+        return result
+
+    def _current_states(self, hass: HomeAssistant) -> tuple[State | None, ...]:
+        if not self._entity_ids:
+            return ()
+        get_state = hass.states.get
+        # A new State object is created whenever state or attributes change, so comparing states is cheap
+        return tuple(get_state(entity_id) for entity_id in self._entity_ids)
+
+    def __repr__(self) -> str:
+        return f"CachedTemplate<{self.template.template}>"
+
+
+def cache_template[T](value: T | Template) -> T | CachedTemplate:
+    """Wrap a template in a CachedTemplate, other values are returned as is."""
+    return CachedTemplate(value) if isinstance(value, Template) else value
+
+
+def is_tracked_by_render_info(template_str: str) -> bool:
+    """Whether all functions, filters and tests the template uses are tracked by RenderInfo, see _TRACKED_GLOBALS."""
+    try:
+        tree = _PARSE_ENVIRONMENT.parse(template_str)
+    except TemplateSyntaxError:
+        return False
+
+    # Variables assigned in the template itself, by set, for loops or macros, are fine
+    assigned = {name.name for name in tree.find_all(nodes.Name) if name.ctx in ("store", "param")}
+    names = {name.name for name in tree.find_all(nodes.Name) if name.ctx == "load"} - assigned
+    filters, tests = _used_filters_and_tests(tree)
+    return names <= _TRACKED_GLOBALS and filters <= _TRACKED_FILTERS and tests <= _TRACKED_TESTS
+
+
+def _used_filters_and_tests(tree: nodes.Template) -> tuple[set[str], set[str]]:
+    filters: set[str] = set()
+    tests = {test.name for test in tree.find_all(nodes.Test)}
+    for node in tree.find_all(nodes.Filter):
+        filters.add(node.name)
+        index = _NAMED_FILTER_OR_TEST_ARGUMENT.get(node.name)
+        if index is None or len(node.args) <= index:
+            continue
+        argument = node.args[index]
+        # A name only known when rendering can't be checked, the empty name is never tracked
+        name = str(argument.value) if isinstance(argument, nodes.Const) else ""
+        (filters if node.name == "map" else tests).add(name)
+    return filters, tests
+
+
+def _referenced_entities(render_info: RenderInfo) -> tuple[str, ...] | None:
+    """Return the entities a render depends on, or None when the result depends on more than entity states."""
+    if (
+        render_info.all_states
+        or render_info.all_states_lifecycle
+        or render_info.domains
+        or render_info.domains_lifecycle
+        or render_info.has_time
+    ):
+        return None
+    return tuple(sorted(render_info.entities))
+
+
+def compile_predicate(template_str: str) -> Predicate | None:
+    """Compile simple state comparison templates into a native function, None when not supported."""
+    template_str = template_str.strip()
+    try:
+        if match := _IS_STATE_REGEX.match(template_str):
+            return _compile_is_state(_parse_arguments(match.group("args")), bool(match.group(1)))
+        if match := _IS_STATE_ATTR_REGEX.match(template_str):
+            return _compile_is_state_attr(_parse_arguments(match.group("args")), bool(match.group(1)))
+        if match := _STATES_COMPARISON_REGEX.match(template_str):
+            return _compile_states_comparison(match)
+    except ValueError, SyntaxError, TypeError:
+        pass
+    return None
+
+
+def _parse_arguments(arguments: str) -> tuple[Any, ...]:
+    """Parse a list of Jinja literal arguments, raises ValueError for anything not a plain literal."""
+    return tuple(ast.literal_eval(f"({arguments},)"))
+
+
+def _compile_is_state(arguments: tuple[Any, ...], negate: bool) -> Predicate | None:
+    if len(arguments) != 2 or not isinstance(arguments[0], str):
+        return None
+    entity_id, expected = arguments
+    if not isinstance(expected, str | list):
+        return None
+
+    def is_state(hass: HomeAssistant) -> bool:
+        state = hass.states.get(entity_id)
+        result = state is not None and (
+            state.state == expected or (isinstance(expected, list) and state.state in expected)
+        )
+        return result != negate
+
+    return is_state
+
+
+def _compile_is_state_attr(arguments: tuple[Any, ...], negate: bool) -> Predicate | None:
+    if len(arguments) != 3 or not isinstance(arguments[0], str) or not isinstance(arguments[1], str):
+        return None
+    entity_id, attribute, expected = arguments
+
+    def is_state_attr(hass: HomeAssistant) -> bool:
+        state = hass.states.get(entity_id)
+        value = state.attributes.get(attribute) if state is not None else None
+        result = value is not None and value == expected
+        return result != negate
+
+    return is_state_attr
+
+
+def _compile_states_comparison(match: re.Match[str]) -> Predicate | None:
+    entity_id = ast.literal_eval(match.group("entity_id"))
+    compare = _OPERATORS[match.group("operator")]
+    expected = ast.literal_eval(match.group("value"))
+
+    if not match.group("filter"):
+        # Without the float filter only string (in)equality is well-defined, ordering raises in Jinja
+        if not isinstance(expected, str) or match.group("operator") not in ("==", "!="):
+            return None
+
+        def states_equals(hass: HomeAssistant) -> bool:
+            state = hass.states.get(entity_id)
+            return compare(state.state if state is not None else STATE_UNKNOWN, expected)
+
+        return states_equals
+
+    if isinstance(expected, bool) or not isinstance(expected, int | float):
+        return None
+    default: Any = FALLBACK
+    if match.group("default"):
+        default = ast.literal_eval(match.group("default"))
+        if isinstance(default, bool) or not isinstance(default, int | float):
+            return None
+
+    def states_numeric_comparison(hass: HomeAssistant) -> Any:  # noqa: ANN401
+        state = hass.states.get(entity_id)
+        try:
+            value: Any = float(state.state if state is not None else STATE_UNKNOWN)
+        except ValueError:
+            # Let Jinja deal with the invalid input, so errors are raised exactly as before
+            if default is FALLBACK:
+                return FALLBACK
+            value = default
+        return compare(value, expected)
+
+    return states_numeric_comparison
@@ -14,6 +14,7 @@ from homeassistant.util.unit_conversion import (
 )
 
 from custom_components.powercalc.const import UNAVAILABLE_STATES, UnitPrefix
+from custom_components.powercalc.template_cache import CachedTemplate
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -54,11 +55,12 @@ def parse_decimal(value: object) -> Decimal | None:
 def evaluate_to_decimal(value: object) -> Decimal | None:
     """Evaluate a value into a Decimal, rendering it first when it is a template.
 
+    Cached templates only render when an entity they reference changed.
     Non-template values (strings, numbers) are parsed directly. Returns None when a template
     fails to render, or when the (rendered) value is not a usable number. Unknown/unavailable
     renders yield None silently; any other failure is logged.
     """
-    if isinstance(value, Template):
+    if isinstance(value, Template | CachedTemplate):
         try:
             value = value.async_render()
         except TemplateError as ex:
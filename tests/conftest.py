@@ -3,7 +3,6 @@ from collections.abc import Generator
 import contextlib
 from functools import lru_cache
 import inspect
-import json
 import logging
 import os
 import shutil
@@ -31,6 +30,7 @@ from custom_components.powercalc.const import (
     SensorType,
 )
 from custom_components.powercalc.helpers import get_library_json_path, get_library_path
+from custom_components.powercalc.power_profile.loader.remote import LIBRARY_INDEX_FILE
 from tests.common import get_test_config_dir
 
 # Remove this once aioresponses supports aiohttp 3.14+.
@@ -52,9 +52,9 @@ if "stream_writer" in inspect.signature(_client_response_init).parameters:
 
 
 @lru_cache(maxsize=1)
-def _load_test_library_json() -> dict[str, Any]:
-    with open(get_library_json_path()) as f:
-        return cast(dict[str, Any], json.load(f))
+def _load_test_library_data() -> bytes:
+    with open(get_library_json_path(), "rb") as f:
+        return f.read()
 
 
 @pytest.fixture(autouse=True)
@@ -80,10 +80,12 @@ def configure_hass_config_dir(request: SubRequest) -> None:
     hass.config.config_dir = get_test_config_dir()
 
     # The test .storage directory is scratch that survives between runs. The loader prefers a
-    # cached library.json when there is one, so drop it to keep every test starting from the
-    # same state a clean checkout has. Downloaded profiles are kept, they are only a cache.
-    with contextlib.suppress(FileNotFoundError):
-        os.remove(hass.config.path(STORAGE_DIR, BUILT_IN_LIBRARY_DIR, "library.json"))
+    # cached library.json when there is one, so drop it and the index built from it to keep every
+    # test starting from the same state a clean checkout has. Downloaded profiles are kept, they are
+    # only a cache.
+    for file_name in ("library.json", LIBRARY_INDEX_FILE):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(hass.config.path(STORAGE_DIR, BUILT_IN_LIBRARY_DIR, file_name))
 
 
 @pytest.fixture(autouse=True)
@@ -146,10 +148,10 @@ def mock_remote_loader(request: SubRequest) -> Generator:
     remote_loader_class = "custom_components.powercalc.power_profile.loader.remote.RemoteLoader"
     with (
         patch(f"{remote_loader_class}.download_profile") as mock_download,
-        patch(f"{remote_loader_class}.load_library_json") as mock_load_lib,
+        patch(f"{remote_loader_class}.load_library_data") as mock_load_lib,
     ):
         mock_download.side_effect = side_effect
 
         # Swallow the prefer_cached argument, the test library is always served from disk.
-        mock_load_lib.side_effect = lambda *_args, **_kwargs: _load_test_library_json()
+        mock_load_lib.side_effect = lambda *_args, **_kwargs: _load_test_library_data()
         yield
@@ -9,7 +9,16 @@ from homeassistant.helpers.label_registry import LabelRegistry
 import pytest
 from pytest_homeassistant_custom_component.common import RegistryEntryWithDefaults
 
-from custom_components.powercalc.const import CONF_AND, CONF_AREA, CONF_FILTER, CONF_OR, CONF_WILDCARD
+from custom_components.powercalc.const import (
+    CONF_AND,
+    CONF_AREA,
+    CONF_FILTER,
+    CONF_GROUP,
+    CONF_NOT,
+    CONF_OR,
+    CONF_TEMPLATE,
+    CONF_WILDCARD,
+)
 from custom_components.powercalc.errors import SensorConfigurationError
 from custom_components.powercalc.group_include.filter import (
     AreaFilter,
@@ -27,6 +36,7 @@ from custom_components.powercalc.group_include.filter import (
     WildcardFilter,
     create_composite_filter,
     create_filter,
+    filter_depends_on_states,
 )
 from tests.common import mock_device, mock_entities_in_registry, set_states
 
@@ -398,3 +408,18 @@ async def test_group_filter(
 
 def _create_registry_entry(entity_id: str = "switch.test") -> RegistryEntry:
     return RegistryEntryWithDefaults(entity_id=entity_id, unique_id="abc", platform="test", device_id="my-device")
+
+
+@pytest.mark.parametrize(
+    "filter_config,expected_result",
+    [
+        ({CONF_DOMAIN: "light"}, False),
+        ({CONF_AREA: "kitchen", CONF_FILTER: {CONF_WILDCARD: "light.*"}}, False),
+        ({CONF_GROUP: "group.lights"}, True),
+        ({CONF_TEMPLATE: "{{ ['light.test'] }}"}, True),
+        ({CONF_OR: [{CONF_DOMAIN: "light"}, {CONF_NOT: {CONF_GROUP: "group.lights"}}]}, True),
+        ([{CONF_DOMAIN: "light"}, {CONF_AND: [{CONF_TEMPLATE: "{{ [] }}"}]}], True),
+    ],
+)
+def test_filter_depends_on_states(filter_config: dict | list, expected_result: bool) -> None:
+    assert filter_depends_on_states(filter_config) is expected_result
@@ -1,4 +1,7 @@
+import asyncio
 import logging
+from typing import Any
+from unittest.mock import patch
 
 from homeassistant.components import light
 from homeassistant.components.group import DOMAIN as GROUP_DOMAIN
@@ -11,6 +14,7 @@ from homeassistant.const import (
     CONF_ENTITY_ID,
     CONF_NAME,
     CONF_UNIQUE_ID,
+    EVENT_HOMEASSISTANT_STARTED,
     STATE_OFF,
     STATE_ON,
 )
@@ -18,13 +22,14 @@ from homeassistant.core import HomeAssistant, split_entity_id
 from homeassistant.helpers.area_registry import AreaRegistry
 from homeassistant.helpers.entity_registry import RegistryEntryDisabler
 from homeassistant.helpers.label_registry import LabelRegistry
+from homeassistant.helpers.typing import ConfigType
 from homeassistant.setup import async_setup_component
 import pytest
 from pytest_homeassistant_custom_component.common import (
     MockConfigEntry,
 )
 
-from custom_components.powercalc import CONF_CREATE_UTILITY_METERS
+from custom_components.powercalc import CONF_CREATE_UTILITY_METERS, sensor as sensor_platform
 from custom_components.powercalc.common import create_source_entity
 from custom_components.powercalc.const import (
     ATTR_ENTITIES,
@@ -39,17 +44,20 @@ from custom_components.powercalc.const import (
     CONF_INCLUDE_NON_POWERCALC_SENSORS,
     CONF_LABEL,
     CONF_MANUFACTURER,
+    CONF_MODE,
     CONF_MODEL,
     CONF_NOT,
     CONF_OR,
     CONF_POWER,
     CONF_SENSOR_TYPE,
+    CONF_SENSORS,
     CONF_SUB_GROUPS,
     CONF_TEMPLATE,
     CONF_WILDCARD,
     DOMAIN,
     ENTRY_DATA_ENERGY_ENTITY,
     ENTRY_DATA_POWER_ENTITY,
+    CalculationStrategy,
     SensorType,
 )
 from custom_components.powercalc.group_include.include import find_entities
@@ -306,6 +314,94 @@ async def test_include_domain_list(hass: HomeAssistant) -> None:
     )
 
 
+async def test_registry_include_is_set_up_before_started(hass: HomeAssistant) -> None:
+    """Include filters only reading the registries don't have to wait for Home Assistant to start."""
+    mock_entities_in_registry(hass, {"light.test": {}})
+
+    await async_setup_component(
+        hass,
+        DOMAIN,
+        {
+            DOMAIN: {
+                CONF_SENSORS: [
+                    get_simple_fixed_config("light.test"),
+                    {CONF_CREATE_GROUP: "Lights", CONF_INCLUDE: {CONF_DOMAIN: "light"}},
+                    {CONF_CREATE_GROUP: "Template", CONF_INCLUDE: {CONF_TEMPLATE: "{{ ['light.test'] }}"}},
+                ],
+            },
+        },
+    )
+    await hass.async_block_till_done()
+
+    assert_entity_state(hass, "sensor.lights_power", attributes={ATTR_ENTITIES: {"sensor.test_power"}})
+    assert not hass.states.get("sensor.template_power")
+
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done()
+
+    assert_entity_state(hass, "sensor.template_power", attributes={ATTR_ENTITIES: {"sensor.test_power"}})
+
+
+async def test_registry_include_waits_for_slow_primary_sensors(hass: HomeAssistant) -> None:
+    """Registry include filters see the sensors without include, even when these are set up after powercalc loaded."""
+    mock_entities_in_registry(hass, {"light.test": {}})
+    setup_entities = sensor_platform._async_setup_entities  # noqa: SLF001
+
+    async def _slow_setup_entities(hass: HomeAssistant, config: ConfigType, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401
+        if CONF_INCLUDE not in config:
+            await asyncio.sleep(0.1)
+        await setup_entities(hass, config, *args, **kwargs)
+
+    with patch("custom_components.powercalc.sensor._async_setup_entities", _slow_setup_entities):
+        await async_setup_component(
+            hass,
+            DOMAIN,
+            {
+                DOMAIN: {
+                    CONF_SENSORS: [
+                        get_simple_fixed_config("light.test"),
+                        {CONF_CREATE_GROUP: "Lights", CONF_INCLUDE: {CONF_DOMAIN: "light"}},
+                    ],
+                },
+            },
+        )
+        await hass.async_block_till_done()
+
+    assert_entity_state(hass, "sensor.lights_power", attributes={ATTR_ENTITIES: {"sensor.test_power"}})
+
+
+async def test_registry_include_waits_for_config_entry_sensors(hass: HomeAssistant) -> None:
+    """Registry include filters see the sensors of config entries, which are set up after powercalc loaded."""
+    mock_entities_in_registry(hass, {"light.test": {}})
+    await create_mock_config_entry(
+        hass,
+        {
+            CONF_SENSOR_TYPE: SensorType.VIRTUAL_POWER,
+            CONF_ENTITY_ID: "light.test",
+            CONF_NAME: "Test",
+            CONF_MODE: CalculationStrategy.FIXED,
+            CONF_FIXED: {CONF_POWER: 50},
+        },
+        setup=False,
+    )
+    setup_entities = sensor_platform._async_setup_entities  # noqa: SLF001
+
+    async def _slow_setup_entities(hass: HomeAssistant, config: ConfigType, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401
+        if kwargs.get("config_entry"):
+            await asyncio.sleep(0.1)
+        await setup_entities(hass, config, *args, **kwargs)
+
+    with patch("custom_components.powercalc.sensor._async_setup_entities", _slow_setup_entities):
+        await async_setup_component(
+            hass,
+            DOMAIN,
+            {DOMAIN: {CONF_SENSORS: [{CONF_CREATE_GROUP: "Lights", CONF_INCLUDE: {CONF_DOMAIN: "light"}}]}},
+        )
+        await hass.async_block_till_done()
+
+    assert_entity_state(hass, "sensor.lights_power", attributes={ATTR_ENTITIES: {"sensor.test_power"}})
+
+
 async def test_include_template(hass: HomeAssistant) -> None:
     mock_devices(
         hass,
@@ -1,4 +1,9 @@
+import json
 import logging
+import os
+from pathlib import Path
+import shutil
+from unittest.mock import patch
 
 from homeassistant.const import CONF_ENTITY_ID, STATE_ON
 from homeassistant.core import HomeAssistant
@@ -56,6 +61,25 @@ async def test_find_model(hass: HomeAssistant, manufacturer: str, search: set[st
 
 
 # Tests for load_model
+@pytest.mark.parametrize(
+    "manufacturer,query,expected",
+    [
+        ("tp-link", "HS-300", [("HS300", 1.0)]),
+        ("tp-link", "HS400 (Kasa)", [("HS300", 0.9)]),  # alias
+        ("tp-link", "bla", []),
+        ("foo", "HS300", []),
+    ],
+)
+async def test_search_models(
+    hass: HomeAssistant,
+    manufacturer: str,
+    query: str,
+    expected: list[tuple[str, float]],
+) -> None:
+    loader = await _create_loader(hass)
+    assert await loader.search_models(manufacturer, query, limit=1) == expected
+
+
 async def test_load_model_raise_no_modeljson_exception(hass: HomeAssistant) -> None:
     loader = LocalLoader(hass, get_test_config_dir("powercalc/profiles/test/nojson"), is_custom_directory=True)
     with pytest.raises(LibraryLoadingError) as excinfo:
@@ -150,6 +174,35 @@ async def test_custom_model_directory(hass: HomeAssistant) -> None:
     assert_entity_state(hass, "sensor.test_power", "50.00")
 
 
+async def test_scan_only_parses_changed_model_json(hass: HomeAssistant, tmp_path: Path) -> None:
+    profiles_dir = tmp_path / "profiles"
+    shutil.copytree(get_test_config_dir("powercalc/profiles/tp-link"), profiles_dir / "tp-link")
+    model_json_count = sum(1 for _ in profiles_dir.glob("tp-link/*/model.json"))
+
+    with patch("json.load", wraps=json.load) as mock_parse:
+        loader = LocalLoader(hass, str(profiles_dir))
+        await loader.initialize()
+        assert mock_parse.call_count == model_json_count
+
+        # A new loader, as after a restart, uses the persisted scan cache
+        loader = LocalLoader(hass, str(profiles_dir))
+        library_hash = loader.get_library_hash()
+        await loader.initialize()
+        assert mock_parse.call_count == model_json_count
+        assert loader.get_library_hash() == library_hash
+
+        model_json_path = profiles_dir / "tp-link" / "HS300" / "model.json"
+        model_json = json.loads(model_json_path.read_text())
+        model_json["name"] = "Changed name"
+        model_json_path.write_text(json.dumps(model_json))
+        os.utime(model_json_path, ns=(0, 0))
+
+        await loader.initialize()
+        assert mock_parse.call_count == model_json_count + 1
+        assert loader.get_library_hash() != library_hash
+        assert ("HS300", "Changed name") in await loader.get_model_listing("tp-link", None)
+
+
 async def _create_loader(hass: HomeAssistant) -> LocalLoader:
     loader = LocalLoader(hass, get_test_config_dir("powercalc/profiles"))
     await loader.initialize()
@@ -1,3 +1,4 @@
+import asyncio
 import contextlib
 from functools import partial
 import json
@@ -17,11 +18,13 @@ import pytest
 
 from custom_components.powercalc.const import LIBRARY_DISCOVERY_LOW_PRIORITY_DOMAINS
 from custom_components.powercalc.helpers import get_library_json_path, get_library_path
+from custom_components.powercalc.power_profile.bundle import get_profile_bundles
 from custom_components.powercalc.power_profile.error import LibraryLoadingError, ProfileDownloadError
 from custom_components.powercalc.power_profile.library import ModelInfo, ProfileLibrary
 from custom_components.powercalc.power_profile.loader.remote import (
     ENDPOINT_DOWNLOAD,
     ENDPOINT_LIBRARY,
+    LIBRARY_INDEX_FILE,
     LibraryModel,
     RemoteLoader,
 )
@@ -145,6 +148,108 @@ async def test_download_with_parenthesis(remote_loader: RemoteLoader, mock_aiore
         )
 
 
+async def test_prefetch_models(hass: HomeAssistant, mock_aioresponse: aioresponses) -> None:
+    models = [("signify", "LCA001"), ("signify", "LCT010"), ("signify", "LWB010")]
+    mock_aioresponse.get(
+        ENDPOINT_LIBRARY,
+        status=200,
+        payload={
+            "manufacturers": [
+                {
+                    "name": "signify",
+                    "dir_name": "signify",
+                    "models": [{"id": model, "device_type": "light", "hash": "prefetch"} for _, model in models],
+                },
+            ],
+        },
+    )
+    loader = RemoteLoader(hass)
+    await loader.initialize()
+    for _, model in models:
+        clear_storage_dir(hass, loader.get_storage_path("signify", model))
+
+    concurrent_downloads = 0
+    max_concurrent_downloads = 0
+
+    async def download_profile(manufacturer: str, model: str, storage_path: str, _: str) -> None:
+        nonlocal concurrent_downloads, max_concurrent_downloads
+        concurrent_downloads += 1
+        max_concurrent_downloads = max(max_concurrent_downloads, concurrent_downloads)
+        await asyncio.sleep(0)
+        await hass.async_add_executor_job(shutil.copytree, get_library_path(f"{manufacturer}/{model}"), storage_path)
+        concurrent_downloads -= 1
+
+    with (
+        patch.object(loader, "download_profile", side_effect=download_profile) as mock_download,
+        patch.object(loader, "_write_profile_hashes") as mock_write_hashes,
+        patch("custom_components.powercalc.power_profile.loader.remote.PREFETCH_CONCURRENCY", 2),
+    ):
+        await loader.prefetch_models([*models, ("signify", "unknown")])
+
+        assert mock_download.call_count == 3
+        assert max_concurrent_downloads == 2
+        mock_write_hashes.assert_called_once()
+        written_hashes = mock_write_hashes.call_args.args[0]
+        assert all(written_hashes[f"signify/{model}"] == "prefetch" for _, model in models)
+
+        # Everything is up to date now, so loading the models and prefetching again doesn't download anything
+        for _, model in models:
+            assert await loader.load_model("signify", model)
+        await loader.prefetch_models(models)
+        assert mock_download.call_count == 3
+        assert mock_write_hashes.call_count == 1
+
+
+async def test_downloaded_profiles_are_bundled(hass: HomeAssistant, mock_aioresponse: aioresponses) -> None:
+    mock_aioresponse.get(
+        ENDPOINT_LIBRARY,
+        status=200,
+        payload={
+            "manufacturers": [
+                {
+                    "name": "signify",
+                    "dir_name": "signify",
+                    "models": [{"id": "LCT010", "device_type": "light", "hash": "bundled"}],
+                },
+            ],
+        },
+        repeat=True,
+    )
+    loader = RemoteLoader(hass)
+    await loader.initialize()
+    storage_path = loader.get_storage_path("signify", "LCT010")
+    clear_storage_dir(hass, storage_path)
+
+    async def download_profile(manufacturer: str, model: str, storage_path: str, _: str) -> None:
+        await hass.async_add_executor_job(shutil.copytree, get_library_path(f"{manufacturer}/{model}"), storage_path)
+
+    with patch.object(loader, "download_profile", side_effect=download_profile) as mock_download:
+        assert await loader.load_model("signify", "LCT010")
+
+        # Bundled on the next library update, until then the profile is read from disk
+        bundles = get_profile_bundles(hass)
+        assert not bundles.find(storage_path)
+        await loader.initialize()
+        found_bundle = bundles.find(storage_path)
+        assert found_bundle
+        bundle, relative_dir = found_bundle
+        assert relative_dir == "signify/LCT010"
+        assert "hs.csv.gz" in bundle.list_files(relative_dir)
+
+        # model.json is served from the bundle, without reading the profile files
+        with patch(
+            "custom_components.powercalc.power_profile.bundle.open",
+            side_effect=AssertionError("read from disk"),
+            create=True,
+        ):
+            assert await loader.load_model("signify", "LCT010")
+        assert mock_download.call_count == 1
+
+        # A profile downloaded again is read from disk, not from the outdated bundle
+        await loader.load_model("signify", "LCT010", force_update=True)
+        assert not bundles.find(storage_path)
+
+
 async def test_get_manufacturer_listing(remote_loader: RemoteLoader) -> None:
     manufacturers = await remote_loader.get_manufacturer_listing({DeviceType.LIGHT})
     assert ("signify", "Signify") in manufacturers
@@ -330,7 +435,7 @@ async def test_exception_is_raised_on_github_resource_unavailable(
     manufacturer = "signify"
     model = "LCA001"
     storage_path = remote_loader.get_storage_path(manufacturer, model)
-    clear_storage_dir(storage_path)
+    clear_storage_dir(remote_loader.hass, storage_path)
 
     remote_file = {
         "path": "color_temp.csv.gz",
@@ -362,7 +467,7 @@ async def test_eventual_success_after_download_retry(
     manufacturer = "signify"
     model = "LCA001"
     storage_path = remote_loader.get_storage_path(manufacturer, model)
-    clear_storage_dir(storage_path)
+    clear_storage_dir(remote_loader.hass, storage_path)
 
     remote_file = {
         "path": "color_temp.csv.gz",
@@ -438,7 +543,7 @@ async def test_profile_redownloaded_when_newer_version_available(
     # Clean local directory first so we have consistent test results
     # When scenario exists_locally=True, we download the profile first, to fake the local existence
     local_storage_path = loader.get_storage_path("signify", "LCA001")
-    clear_storage_dir(local_storage_path)
+    clear_storage_dir(hass, local_storage_path)
     hash_file = hass.config.path(STORAGE_DIR, "powercalc_profiles", ".profile_hashes")
     if await hass.async_add_executor_job(os.path.exists, hash_file):
         await hass.async_add_executor_job(os.remove, hash_file)
@@ -584,7 +689,7 @@ async def test_fallback_to_local_profile(
     manufacturer = "signify"
     model = "LCA001"
     local_storage_path = remote_loader.get_storage_path(manufacturer, model)
-    clear_storage_dir(local_storage_path)
+    clear_storage_dir(remote_loader.hass, local_storage_path)
     shutil.copytree(get_library_path(f"{manufacturer}/{model}"), local_storage_path)
 
     mock_aioresponse.get(
@@ -604,7 +709,7 @@ async def test_fallback_to_local_profile_on_timeout(
     manufacturer = "signify"
     model = "LCA001"
     local_storage_path = remote_loader.get_storage_path(manufacturer, model)
-    clear_storage_dir(local_storage_path)
+    clear_storage_dir(hass, local_storage_path)
     shutil.copytree(get_library_path(f"{manufacturer}/{model}"), local_storage_path)
 
     mock_aioresponse.get(
@@ -624,7 +729,7 @@ async def test_profile_redownloaded_when_model_json_missing(
 ) -> None:
     """Test profile is redownloaded when model.json is missing."""
     local_storage_path = remote_loader.get_storage_path("signify", "LCA001")
-    shutil.rmtree(local_storage_path, ignore_errors=True)
+    clear_storage_dir(remote_loader.hass, local_storage_path)
     os.makedirs(local_storage_path)
 
     (__, storage_path) = await remote_loader.load_model("signify", "LCA001")
@@ -638,7 +743,7 @@ async def test_profile_redownloaded_when_model_json_corrupt(
 ) -> None:
     """Corrupt the model.json file and check if it is redownloaded."""
     local_storage_path = remote_loader.get_storage_path("apple", "HomePod Mini")
-    shutil.rmtree(local_storage_path, ignore_errors=True)
+    clear_storage_dir(remote_loader.hass, local_storage_path)
     os.makedirs(local_storage_path)
 
     remote_files = [
@@ -683,7 +788,7 @@ async def test_profile_redownloaded_when_model_json_corrupt_retry_limit(
     After 3 times it should raise a LibraryLoadingError.
     """
     local_storage_path = remote_loader.get_storage_path("apple", "HomePod Mini")
-    shutil.rmtree(local_storage_path, ignore_errors=True)
+    clear_storage_dir(remote_loader.hass, local_storage_path)
     os.makedirs(local_storage_path)
 
     remote_files = [
@@ -732,19 +837,19 @@ async def test_find_model(
     library_dir: str,
 ) -> None:
     with patch(
-        "custom_components.powercalc.power_profile.loader.remote.RemoteLoader.load_library_json",
+        "custom_components.powercalc.power_profile.loader.remote.RemoteLoader.load_library_data",
     ) as mock_load_lib:
 
-        def load_library_json(*_args: object) -> dict:
+        def load_library_data(*_args: object) -> bytes:
             library_path = (
                 get_test_config_dir(f"library_mock/{library_dir}/library.json")
                 if library_dir
                 else get_library_json_path()
             )
-            with open(library_path) as f:
-                return json.load(f)
+            with open(library_path, "rb") as f:
+                return f.read()
 
-        mock_load_lib.side_effect = load_library_json
+        mock_load_lib.side_effect = load_library_data
 
         loader = RemoteLoader(hass)
         loader.retry_timeout = 0
@@ -786,9 +891,9 @@ async def test_initialize_clears_cached_library_lookups(hass: HomeAssistant) ->
     }
 
     with patch(
-        "custom_components.powercalc.power_profile.loader.remote.RemoteLoader.load_library_json",
+        "custom_components.powercalc.power_profile.loader.remote.RemoteLoader.load_library_data",
         new_callable=AsyncMock,
-        side_effect=[first_library, second_library],
+        side_effect=[json.dumps(first_library).encode(), json.dumps(second_library).encode()],
     ):
         loader = RemoteLoader(hass)
 
@@ -802,7 +907,99 @@ async def test_initialize_clears_cached_library_lookups(hass: HomeAssistant) ->
         assert await loader.get_model_listing("test", {DeviceType.LIGHT}) == {("new_model", "New Model")}
 
 
-def clear_storage_dir(storage_path: str) -> None:
+async def test_library_index_is_reused_until_library_changes(hass: HomeAssistant) -> None:
+    def create_library(model_id: str) -> bytes:
+        return json.dumps(
+            {
+                "manufacturers": [
+                    {"name": "Test", "dir_name": "test", "models": [{"id": model_id, "device_type": "light"}]},
+                ],
+            },
+        ).encode()
+
+    with patch(
+        "custom_components.powercalc.power_profile.loader.remote.RemoteLoader.load_library_data",
+        new_callable=AsyncMock,
+        side_effect=[create_library("model1"), create_library("model1"), create_library("model2")],
+    ):
+        loader = RemoteLoader(hass)
+        await loader.initialize()
+
+        # The stored index is used as is, library.json is not even parsed
+        with patch(
+            "custom_components.powercalc.power_profile.loader.remote.json.loads", wraps=json.loads
+        ) as mock_parse:
+            await loader.initialize()
+            assert not mock_parse.called
+            assert await loader.find_model("test", {"model1"}) == ["model1"]
+
+            await loader.initialize()
+            assert mock_parse.called
+            assert await loader.find_model("test", {"model1"}) == []
+            assert await loader.find_model("test", {"model2"}) == ["model2"]
+
+
+async def test_library_index_is_rebuilt_for_other_powercalc_version(hass: HomeAssistant) -> None:
+    with patch(
+        "custom_components.powercalc.power_profile.loader.remote.RemoteLoader.load_library_data",
+    ) as mock_load_lib:
+
+        def load_library_data(*_args: object) -> bytes:
+            with open(get_test_config_dir("library_mock/min_version/library.json"), "rb") as f:
+                return f.read()
+
+        mock_load_lib.side_effect = load_library_data
+
+        for version, expect_model in (("1.50.0", True), ("0.40.0", False)):
+            with patch(
+                "custom_components.powercalc.power_profile.loader.remote.async_get_integration",
+                new=AsyncMock(return_value=Mock(version=AwesomeVersion(version))),
+            ):
+                loader = RemoteLoader(hass)
+                await loader.initialize()
+                models = await loader.get_model_listing("test_manu", None)
+                assert (("min_version", "Test profile") in models) == expect_model
+
+
+async def test_corrupt_library_index_is_rebuilt(hass: HomeAssistant) -> None:
+    index_path = hass.config.path(STORAGE_DIR, "powercalc_profiles", LIBRARY_INDEX_FILE)
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    with open(index_path, "wb") as f:
+        f.write(b"not a pickle")
+
+    loader = RemoteLoader(hass)
+    await loader.initialize()
+
+    assert "signify" in loader.model_lookup
+
+
+async def test_lut_metadata_of_downloaded_profile(hass: HomeAssistant) -> None:
+    luts = {"": {"brightness": {"file": "brightness.csv.gz", "rows": 2, "hash": "abc", "ranges": {"bri": [1, 255]}}}}
+    library = {
+        "manufacturers": [
+            {"name": "Test", "dir_name": "test", "models": [{"id": "model1", "hash": "1", "luts": luts}]},
+        ],
+    }
+    with patch(
+        "custom_components.powercalc.power_profile.loader.remote.RemoteLoader.load_library_data",
+        new_callable=AsyncMock,
+        return_value=json.dumps(library).encode(),
+    ):
+        loader = RemoteLoader(hass)
+        await loader.initialize()
+
+    storage_path = loader.get_storage_path("test", "model1")
+    # The profile on disk can be another version than the one in library.json until it is downloaded
+    assert await loader.get_lut_metadata(storage_path) is None
+
+    loader.profile_hashes["test/model1"] = "1"
+    assert await loader.get_lut_metadata(storage_path) == luts
+    assert await loader.get_lut_metadata(get_test_profile_dir("lut_truncated")) is None
+
+
+def clear_storage_dir(hass: HomeAssistant, storage_path: str) -> None:
+    """Remove a downloaded profile, the profile bundle no longer serves it either."""
+    get_profile_bundles(hass).mark_stale(storage_path)
     if not os.path.exists(storage_path):
         return
     shutil.rmtree(storage_path, ignore_errors=True)
@@ -867,14 +1064,14 @@ async def test_multiple_manufacturer_aliases(hass: HomeAssistant, mock_aiorespon
 )
 async def test_min_version(hass: HomeAssistant, version: str, expect_model: bool) -> None:
     with patch(
-        "custom_components.powercalc.power_profile.loader.remote.RemoteLoader.load_library_json",
+        "custom_components.powercalc.power_profile.loader.remote.RemoteLoader.load_library_data",
     ) as mock_load_lib:
 
-        def load_library_json(*_args: object) -> dict:
-            with open(get_test_config_dir("library_mock/min_version/library.json")) as f:
-                return json.load(f)
+        def load_library_data(*_args: object) -> bytes:
+            with open(get_test_config_dir("library_mock/min_version/library.json"), "rb") as f:
+                return f.read()
 
-        mock_load_lib.side_effect = load_library_json
+        mock_load_lib.side_effect = load_library_data
 
         with patch(
             "custom_components.powercalc.power_profile.loader.remote.async_get_integration",
@@ -0,0 +1,180 @@
+import os
+from pathlib import Path
+import shutil
+from unittest.mock import PropertyMock, patch
+
+from homeassistant.core import HomeAssistant
+import pytest
+
+from custom_components.powercalc.errors import LutFileNotFoundError
+from custom_components.powercalc.helpers import get_library_path
+from custom_components.powercalc.power_profile.bundle import (
+    BUNDLE_FILE_NAME,
+    ProfileBundles,
+    get_profile_bundles,
+    update_profile_bundle,
+    write_profile_bundle,
+)
+from custom_components.powercalc.power_profile.library import ModelInfo, ProfileLibrary
+from custom_components.powercalc.power_profile.loader.local import LocalLoader
+from custom_components.powercalc.strategy.lut import LookupMode, LutRegistry
+
+
+@pytest.fixture
+def bundle_dir(tmp_path: Path) -> str:
+    """Bundle two library profiles, the resulting directory contains nothing but the bundle."""
+    source_dir = tmp_path / "source"
+    for profile in ("signify/LCT010", "lifx/LIFX A19 Night Vision"):
+        shutil.copytree(get_library_path(profile), source_dir / profile)
+
+    bundle_dir = tmp_path / "bundle"
+    bundle_dir.mkdir()
+    write_profile_bundle(str(source_dir), str(bundle_dir / BUNDLE_FILE_NAME))
+    return str(bundle_dir)
+
+
+async def test_load_profiles_from_bundle(hass: HomeAssistant, bundle_dir: str) -> None:
+    loader = LocalLoader(hass, bundle_dir)
+    await loader.initialize()
+    assert await loader.find_manufacturers("signify") == {"signify"}
+
+    library = ProfileLibrary(hass, loader)
+    profile = await library.create_power_profile(ModelInfo("signify", "LCT010"))
+    assert profile.name == "Hue White and Color Ambiance A19 E26 (Gen 3)"
+
+    lut_registry = LutRegistry(hass)
+    assert await lut_registry.get_supported_modes(profile) == {
+        LookupMode.COLOR_TEMP,
+        LookupMode.EFFECT,
+        LookupMode.HS,
+    }
+    lut_entry = await lut_registry.get_lookup_entry(profile, LookupMode.HS)
+    assert lut_entry.sorted_keys[0] == 1
+    with pytest.raises(LutFileNotFoundError):
+        lut_registry.get_lut_file(profile, LookupMode.BRIGHTNESS)
+
+
+@pytest.mark.parametrize(
+    "indexed_file,expected_header",
+    [
+        ("hs.csv", "indexed"),
+        ("hs.csv.gz", "bri,hue,sat,watt"),
+        ("missing.csv", "bri,hue,sat,watt"),
+    ],
+)
+async def test_bundled_lut_file_from_library_index(
+    hass: HomeAssistant,
+    tmp_path: Path,
+    indexed_file: str,
+    expected_header: str,
+) -> None:
+    """The file listed in the library index is picked from the bundle, before the gzipped file."""
+    source_dir = tmp_path / "source"
+    shutil.copytree(get_library_path("signify/LCT010"), source_dir / "signify" / "LCT010")
+    (source_dir / "signify" / "LCT010" / "hs.csv").write_text("indexed\n")
+    write_profile_bundle(str(source_dir), str(tmp_path / BUNDLE_FILE_NAME))
+
+    loader = LocalLoader(hass, str(tmp_path))
+    await loader.initialize()
+    profile = await ProfileLibrary(hass, loader).create_power_profile(ModelInfo("signify", "LCT010"))
+
+    with patch.object(
+        type(profile),
+        "lut_files",
+        new_callable=PropertyMock,
+        return_value={"hs": {"file": indexed_file, "rows": 1, "hash": "abc", "ranges": {}}},
+    ):
+        lut_file = LutRegistry(hass).get_lut_file(profile, LookupMode.HS)
+    with lut_file:
+        assert lut_file.readline().strip() == expected_header
+
+
+async def test_load_sub_profiles_from_bundle(hass: HomeAssistant, bundle_dir: str) -> None:
+    loader = LocalLoader(hass, bundle_dir)
+    await loader.initialize()
+    library = ProfileLibrary(hass, loader)
+
+    profile = await library.create_power_profile(ModelInfo("lifx", "LIFX A19 Night Vision"))
+    assert [sub_profile for sub_profile, _ in await profile.get_sub_profiles()] == [
+        "infrared_100",
+        "infrared_25",
+        "infrared_50",
+        "infrared_off",
+    ]
+
+    await profile.select_sub_profile("infrared_25")
+    assert await LutRegistry(hass).get_supported_modes(profile) == {LookupMode.COLOR_TEMP, LookupMode.HS}
+
+
+def test_bundle_is_reopened_when_replaced(bundle_dir: str, tmp_path: Path) -> None:
+    bundles = ProfileBundles()
+    bundle = bundles.open(bundle_dir)
+    assert bundle
+    assert bundles.open(bundle_dir) is bundle
+    assert bundles.find(os.path.join(bundle_dir, "signify", "LCT010")) == (bundle, "signify/LCT010")
+    assert bundles.find(os.path.join(bundle_dir, "signify", "LCA001")) is None
+    assert bundles.find(str(tmp_path / "other")) is None
+
+    write_profile_bundle(get_library_path("signify"), os.path.join(bundle_dir, BUNDLE_FILE_NAME))
+    reopened_bundle = bundles.open(bundle_dir)
+    assert reopened_bundle is not bundle
+    assert reopened_bundle
+    assert "signify" not in reopened_bundle.list_directories("")
+    assert reopened_bundle.is_file("LCT010/model.json")
+
+
+def test_invalid_bundle_is_ignored(tmp_path: Path) -> None:
+    (tmp_path / BUNDLE_FILE_NAME).write_bytes(b"invalid")
+    assert ProfileBundles().open(str(tmp_path)) is None
+
+
+def test_removed_bundle_is_forgotten(bundle_dir: str) -> None:
+    bundles = ProfileBundles()
+    assert bundles.open(bundle_dir)
+
+    os.remove(os.path.join(bundle_dir, BUNDLE_FILE_NAME))
+    assert bundles.open(bundle_dir) is None
+    assert bundles.find(os.path.join(bundle_dir, "signify", "LCT010")) is None
+
+
+async def test_bundles_are_kept_per_instance(hass: HomeAssistant, bundle_dir: str) -> None:
+    bundles = get_profile_bundles(hass)
+    assert get_profile_bundles(hass) is bundles
+    assert bundles.open(bundle_dir)
+    assert ProfileBundles().find(os.path.join(bundle_dir, "signify", "LCT010")) is None
+
+
+def test_bundle_is_updated_when_profiles_change(tmp_path: Path) -> None:
+    bundles = ProfileBundles()
+    shutil.copytree(get_library_path("signify/LCT010"), tmp_path / "signify" / "LCT010")
+    bundle = update_profile_bundle(bundles, str(tmp_path), {"signify/LCT010": "1"})
+    assert bundle
+    assert bundle.is_file("signify/LCT010/model.json")
+
+    # The recorded profile hashes tell the bundle is up to date, the profile files aren't looked at
+    with patch("custom_components.powercalc.power_profile.bundle.write_profile_bundle") as mock_write:
+        assert update_profile_bundle(bundles, str(tmp_path), {"signify/LCT010": "1"}) is bundle
+    assert not mock_write.called
+
+    shutil.copytree(get_library_path("signify/LCA001"), tmp_path / "signify" / "LCA001")
+    updated_bundle = update_profile_bundle(bundles, str(tmp_path), {"signify/LCT010": "1", "signify/LCA001": "1"})
+    assert updated_bundle is not bundle
+    assert updated_bundle
+    assert updated_bundle.list_directories("signify") == ["LCA001", "LCT010"]
+
+    # A profile downloaded again is read from disk until the bundle is updated
+    model_json_path = str(tmp_path / "signify" / "LCT010" / "model.json")
+    (tmp_path / "signify" / "LCT010" / "model.json").write_text("{}")
+    assert bundles.read(model_json_path) != b"{}"
+    bundles.mark_stale(os.path.dirname(model_json_path))
+    assert bundles.find(model_json_path) is None
+    assert bundles.read(model_json_path) == b"{}"
+    assert bundles.find(str(tmp_path / "signify" / "LCA001"))
+
+    updated_bundle = update_profile_bundle(bundles, str(tmp_path), {"signify/LCT010": "2", "signify/LCA001": "1"})
+    assert updated_bundle
+    assert updated_bundle.read("signify/LCT010/model.json") == b"{}"
+
+    assert update_profile_bundle(bundles, str(tmp_path), {}) is None
+    assert not (tmp_path / BUNDLE_FILE_NAME).exists()
+    assert bundles.find(str(tmp_path / "signify" / "LCT010")) is None
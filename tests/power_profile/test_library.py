@@ -74,6 +74,10 @@ async def test_model_listing_sorted(hass: HomeAssistant) -> None:
         (ModelInfo("signify", "LCT010"), ["LCT010"]),
         (ModelInfo("lidl", "HG06106A/HG06104A"), ["HG06104A", "HG06106A"]),
         (ModelInfo("Philips", "LTA009"), ["LTA009"]),
+        # Similar models are only suggested by search_models, never resolved
+        (ModelInfo("signify", "LCT010 (Hue White and Color Ambiance)"), []),
+        (ModelInfo("signify", "LCT010_v2"), []),
+        (ModelInfo("signify", "Some unknown bulb"), []),
     ],
 )
 async def test_find_models(hass: HomeAssistant, model_info: ModelInfo, expected_models: set[str]) -> None:
@@ -82,6 +86,17 @@ async def test_find_models(hass: HomeAssistant, model_info: ModelInfo, expected_
     assert [model.model for model in models] == expected_models
 
 
+async def test_search_models(hass: HomeAssistant) -> None:
+    library = await ProfileLibrary.factory(hass)
+    results = await library.search_models(ModelInfo("signify", "LCT-010"), limit=3)
+    assert len(results) == 3
+    assert results[0] == (ModelInfo("signify", "LCT010"), 1.0)
+    assert results[1][1] < 1.0
+
+    results = await library.search_models(ModelInfo("signify", "LCT010 (Hue White and Color Ambiance)"), limit=1)
+    assert results[0][0] == ModelInfo("signify", "LCT010")
+
+
 async def test_factory_prefers_cached_library(hass: HomeAssistant) -> None:
     """Startup must load the library from local storage, never blocking on the download API."""
     with patch(
@@ -343,3 +358,30 @@ async def test_linked_profile_fixed(
 
     await set_states(hass, [("switch.test", STATE_ON)])
     assert_entity_state(hass, "sensor.test_device_power", "1.01")
+
+
+async def test_profiles_of_same_model_share_json_data(hass: HomeAssistant) -> None:
+    """Only the parts of the profile containing placeholders are copied for each source entity."""
+    library = await ProfileLibrary.factory(hass)
+    model_info = ModelInfo("test", "media_player")
+
+    profile_a = await library.create_power_profile(model_info, SourceEntity("a", "media_player.a", "media_player"))
+    profile_b = await library.create_power_profile(model_info, SourceEntity("b", "media_player.b", "media_player"))
+
+    assert profile_a.calculation_enabled_condition == "{{ is_state('media_player.a', 'playing') }}"
+    assert profile_b.calculation_enabled_condition == "{{ is_state('media_player.b', 'playing') }}"
+    assert profile_a.json_data is not profile_b.json_data
+    assert profile_a.json_data["linear_config"] is profile_b.json_data["linear_config"]
+
+    json_data, _ = await library.get_loader().load_model("test", "media_player")
+    assert json_data["calculation_enabled_condition"] == "{{ is_state('[[entity]]', 'playing') }}"
+
+
+async def test_profile_without_placeholders_is_not_copied(hass: HomeAssistant) -> None:
+    library = await ProfileLibrary.factory(hass)
+    model_info = ModelInfo("signify", "LCT010")
+
+    profile_a = await library.create_power_profile(model_info, SourceEntity("a", "light.a", "light"))
+    profile_b = await library.create_power_profile(model_info, SourceEntity("b", "light.b", "light"))
+
+    assert profile_a.json_data is profile_b.json_data
@@ -0,0 +1,45 @@
+import pytest
+
+from custom_components.powercalc.power_profile.model_search import CONTAINED_SCORE, EXACT_SCORE, ModelSearchIndex
+
+
+@pytest.fixture
+def index() -> ModelSearchIndex:
+    return ModelSearchIndex(
+        [
+            ("LCT015", ["9290012573A", "9290012575"], ["Hue White and Color Ambiance A19 E26/E27 (Gen 4)"]),
+            ("LCT016", [], ["Hue White and Color Ambiance A19 E26/E27 (Gen 5)"]),
+            ("E27", [], ["Generic E27 bulb"]),
+        ],
+    )
+
+
+@pytest.mark.parametrize(
+    "query,expected_model,expected_score",
+    [
+        ("LCT015", "LCT015", EXACT_SCORE),
+        ("lct-015", "LCT015", EXACT_SCORE),
+        ("9290012575", "LCT015", EXACT_SCORE),
+        ("LCT015 (Hue White and Color)", "LCT015", CONTAINED_SCORE),
+        ("Hue bulb 9290012573A", "LCT015", CONTAINED_SCORE),
+        ("Hue White and Color Ambiance A19 E26/E27 (Gen 5)", "LCT016", EXACT_SCORE),
+    ],
+)
+def test_search(index: ModelSearchIndex, query: str, expected_model: str, expected_score: float) -> None:
+    assert index.search(query, limit=1) == [(expected_model, expected_score)]
+
+
+def test_fuzzy_match_scores_below_contained(index: ModelSearchIndex) -> None:
+    model, score = index.search("LCT015v2", limit=1)[0]
+    assert model == "LCT015"
+    assert 0.5 < score < CONTAINED_SCORE
+
+
+def test_short_ids_are_not_matched_by_containment(index: ModelSearchIndex) -> None:
+    assert ("E27", CONTAINED_SCORE) not in index.search("Some bulb E27")
+
+
+def test_search_without_matches(index: ModelSearchIndex) -> None:
+    assert index.search("") == []
+    assert index.search("xyz") == []
+    assert index.search("LCT015 bulb", min_score=0.95) == []
@@ -1,5 +1,9 @@
+from datetime import timedelta
+from decimal import Decimal
 import logging
+from unittest.mock import MagicMock
 
+from freezegun.api import FrozenDateTimeFactory
 from homeassistant.components.sensor import ATTR_LAST_RESET, ATTR_STATE_CLASS, SensorDeviceClass, SensorStateClass
 from homeassistant.components.utility_meter.const import DAILY
 from homeassistant.const import (
@@ -15,6 +19,7 @@ from homeassistant.const import (
     UnitOfEnergy,
 )
 from homeassistant.core import HomeAssistant, State
+from homeassistant.exceptions import ServiceValidationError
 from homeassistant.util import dt as dt_util
 import pytest
 from pytest_homeassistant_custom_component.common import (
@@ -45,14 +50,21 @@ from custom_components.powercalc.const import (
     CONF_POWER,
     CONF_SUBTRACT_ENTITIES,
     CONF_UTILITY_METER_TYPES,
+    DATA_PRICE_TIMELINES,
     DOMAIN,
     DOMAIN_CONFIG,
     SERVICE_CALIBRATE_COST,
+    SERVICE_CORRECT_ENERGY_PRICE,
     SERVICE_RESET_COST,
     CalculationStrategy,
     GroupType,
 )
-from custom_components.powercalc.sensors.cost import CostSensor
+from custom_components.powercalc.sensors.cost import (
+    PRICE_TIMELINE_RETENTION,
+    SETTLED_ENERGY_RESOLUTION,
+    CostSensor,
+    async_get_price_timeline,
+)
 from custom_components.powercalc.sensors.group.tracked_untracked import TrackedPowerSensorFactory
 from tests.common import (
     assert_entity_state,
@@ -377,7 +389,7 @@ async def test_cost_sensor_price_sensor_with_surcharge_and_multiplier(hass: Home
 
 
 async def test_price_change_settles_pending_energy_at_previous_price(hass: HomeAssistant) -> None:
-    """A price change settles the energy consumed so far at the previous price."""
+    """Energy pending at a price change is settled at the previous price on the next energy update."""
     await set_states(hass, [("sensor.energy_price", "0.20")])
     mock_sensors_in_registry(hass, energy_entities=["sensor.existing_energy"])
     # Restore a baseline of 100 kWh and pre-set the energy sensor to 110 kWh so 10 kWh is
@@ -392,15 +404,177 @@ async def test_price_change_settles_pending_energy_at_previous_price(hass: HomeA
     )
     _assert_cost(hass, 0)
 
-    # Changing the price settles the pending 10 kWh at the previous price (0.20), not the new one.
+    # Changing the price is only recorded, the cost sensor settles lazily on its next energy update.
     await set_states(hass, [("sensor.energy_price", "0.40")])
-    _assert_cost(hass, 2.0)
+    _assert_cost(hass, 0)
 
-    # Further consumption uses the new price.
-    await set_states(hass, [("sensor.existing_energy", "120", _KWH)])  # +10 kWh * 0.40
+    # The pending 10 kWh is settled at the previous price (0.20), further consumption uses the new price.
+    await set_states(hass, [("sensor.existing_energy", "120", _KWH)])  # 10 kWh * 0.20 + 10 kWh * 0.40
     _assert_cost(hass, 6.0)
 
 
+async def test_cost_sensors_share_price_timeline(hass: HomeAssistant) -> None:
+    """All cost sensors using the same price sensor share one timeline, price changes don't write their state."""
+    await set_states(hass, [("sensor.energy_price", "0.20")])
+    mock_sensors_in_registry(hass, energy_entities=["sensor.energy_a", "sensor.energy_b"])
+    await run_powercalc_setup(
+        hass,
+        [
+            {CONF_NAME: "A", CONF_COST: {CONF_ENERGY_SENSOR_ID: "sensor.energy_a"}},
+            {CONF_NAME: "B", CONF_COST: {CONF_ENERGY_SENSOR_ID: "sensor.energy_b"}},
+        ],
+        {CONF_ENERGY_PRICE_SENSOR: "sensor.energy_price"},
+    )
+
+    timelines = hass.data[DOMAIN][DATA_PRICE_TIMELINES]
+    assert list(timelines) == ["sensor.energy_price"]
+
+    await set_states(hass, [("sensor.energy_a", "0", _KWH), ("sensor.energy_b", "0", _KWH)])
+    await set_states(hass, [("sensor.energy_a", "10", _KWH), ("sensor.energy_b", "5", _KWH)])
+    _assert_cost(hass, 2.0, "sensor.a_cost")
+    _assert_cost(hass, 1.0, "sensor.b_cost")
+
+    last_updated = hass.states.get("sensor.a_cost").last_updated
+    await set_states(hass, [("sensor.energy_price", "0.40")])
+    assert hass.states.get("sensor.a_cost").last_updated == last_updated
+
+    await set_states(hass, [("sensor.energy_a", "20", _KWH)])  # +10 kWh * 0.40
+    _assert_cost(hass, 6.0, "sensor.a_cost")
+
+
+async def test_price_timeline_removed_when_unused(hass: HomeAssistant) -> None:
+    """The price sensor is only tracked while a cost sensor uses the timeline."""
+    await run_powercalc_setup(hass, {})
+    await set_states(hass, [("sensor.energy_price", "0.20")])
+
+    timeline = async_get_price_timeline(hass, "sensor.energy_price")
+    assert async_get_price_timeline(hass, "sensor.energy_price") is timeline
+    unregister_a = timeline.async_register(MagicMock())
+    unregister_b = timeline.async_register(MagicMock())
+
+    await set_states(hass, [("sensor.energy_price", "0.30")])
+    assert timeline.current.price == Decimal("0.30")
+
+    unregister_a()
+    assert DATA_PRICE_TIMELINES in hass.data[DOMAIN]
+    unregister_b()
+    assert "sensor.energy_price" not in hass.data[DOMAIN][DATA_PRICE_TIMELINES]
+
+    await set_states(hass, [("sensor.energy_price", "0.40")])
+    assert timeline.current.price == Decimal("0.30")
+
+
+async def test_correct_energy_price_reprices_settled_energy(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """Correcting a price re-prices the energy settled in the period, leaving other periods untouched."""
+    midnight = dt_util.start_of_local_day()
+    freezer.move_to(midnight + timedelta(hours=12))
+    await set_states(hass, [("sensor.energy_price", "0.20")])
+    await _setup_cost_sensor(
+        hass,
+        {CONF_CREATE_COST_SENSOR: True},
+        {CONF_ENERGY_PRICE_SENSOR: "sensor.energy_price", CONF_ENERGY_PRICE_SURCHARGE: 0.05},
+    )
+    await set_states(hass, [("sensor.existing_energy", "0", _KWH)])  # baseline
+
+    freezer.move_to(midnight + timedelta(hours=13))
+    await set_states(hass, [("sensor.existing_energy", "10", _KWH)])  # +10 kWh * (0.20 + 0.05)
+    freezer.move_to(midnight + timedelta(hours=14))
+    await set_states(hass, [("sensor.energy_price", "0.40")])
+    freezer.move_to(midnight + timedelta(hours=14, minutes=30))
+    await set_states(hass, [("sensor.existing_energy", "20", _KWH)])  # +10 kWh * (0.40 + 0.05)
+    freezer.move_to(midnight + timedelta(hours=15, minutes=30))
+    await set_states(hass, [("sensor.existing_energy", "30", _KWH)])  # +10 kWh * (0.40 + 0.05)
+    _assert_cost(hass, 11.5)
+
+    async def _correct_price(start_hour: float, end_hour: float, price: float) -> None:
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_CORRECT_ENERGY_PRICE,
+            {
+                ATTR_ENTITY_ID: "sensor.energy_price",
+                "start": (midnight + timedelta(hours=start_hour)).isoformat(),
+                "end": (midnight + timedelta(hours=end_hour)).isoformat(),
+                "price": price,
+            },
+            blocking=True,
+        )
+
+    # The 0.40 price runs past the period, only the energy of 14:30 is re-priced
+    await _correct_price(14, 15, 0.30)
+    _assert_cost(hass, 10.5)
+
+    # The 0.20 price was already in effect at the start of the period
+    await _correct_price(12.5, 13.5, 0.10)
+    _assert_cost(hass, 9.5)
+
+    # After the corrected period the reported price applies again
+    freezer.move_to(midnight + timedelta(hours=16))
+    await set_states(hass, [("sensor.existing_energy", "40", _KWH)])  # +10 kWh * (0.40 + 0.05)
+    _assert_cost(hass, 14.0)
+
+    # The current price gets corrected until now
+    await _correct_price(15.25, 17, 0.30)
+    _assert_cost(hass, 13.0)
+    freezer.move_to(midnight + timedelta(hours=16, minutes=30))
+    await set_states(hass, [("sensor.existing_energy", "50", _KWH)])  # +10 kWh * (0.40 + 0.05)
+    _assert_cost(hass, 17.5)
+
+
+async def test_settled_energy_forgotten_after_retention(hass: HomeAssistant) -> None:
+    """Energy settled late, at an older time, is forgotten along with the other old energy."""
+    cost_sensor = CostSensor(hass, "sensor.existing_energy", "sensor.test_cost", {})
+    resolution = SETTLED_ENERGY_RESOLUTION.total_seconds()
+    now = dt_util.utcnow().timestamp() // resolution * resolution
+    price = Decimal("0.20")
+
+    cost_sensor._record_settled_energy(now, price, Decimal(1))  # noqa: SLF001
+    cost_sensor._record_settled_energy(now - 3600, price, Decimal(1))  # noqa: SLF001
+    cost_sensor._record_settled_energy(now + 3600, price, Decimal(1))  # noqa: SLF001
+    cost_sensor._record_settled_energy(now + PRICE_TIMELINE_RETENTION.total_seconds(), price, Decimal(1))  # noqa: SLF001
+
+    assert [slot for slot, _ in cost_sensor._settled_energy] == [  # noqa: SLF001
+        now,
+        now + 3600,
+        now + PRICE_TIMELINE_RETENTION.total_seconds(),
+    ]
+
+
+async def test_correct_energy_price_unknown_price_sensor(hass: HomeAssistant) -> None:
+    await _setup_cost_sensor(hass, {CONF_CREATE_COST_SENSOR: True}, {CONF_ENERGY_PRICE: 0.25})
+
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_CORRECT_ENERGY_PRICE,
+            {
+                ATTR_ENTITY_ID: "sensor.energy_price",
+                "start": dt_util.utcnow().isoformat(),
+                "end": dt_util.utcnow().isoformat(),
+                "price": 0.30,
+            },
+            blocking=True,
+        )
+
+
+async def test_price_timeline_forgets_old_prices(hass: HomeAssistant, freezer: FrozenDateTimeFactory) -> None:
+    await run_powercalc_setup(hass, {})
+    await set_states(hass, [("sensor.energy_price", "0.20")])
+    timeline = async_get_price_timeline(hass, "sensor.energy_price")
+    timeline.async_register(MagicMock())
+
+    freezer.tick(timedelta(hours=1))
+    await set_states(hass, [("sensor.energy_price", "0.30")])
+    freezer.tick(PRICE_TIMELINE_RETENTION + timedelta(hours=1))
+    await set_states(hass, [("sensor.energy_price", "0.40")])
+    await set_states(hass, [("sensor.energy_price", "0.40", {ATTR_UNIT_OF_MEASUREMENT: "EUR/kWh"})])
+
+    assert [point.price for point in timeline.replaced_points(0, dt_util.utcnow().timestamp())] == [Decimal("0.30")]
+    assert timeline.unit == "EUR/kWh"
+
+
 async def test_price_change_ignored_when_energy_unavailable(hass: HomeAssistant) -> None:
     """A price change with an unavailable energy sensor does not settle anything."""
     await set_states(hass, [("sensor.energy_price", "0.20"), ("sensor.existing_energy", "unavailable")])
@@ -0,0 +1,117 @@
+from homeassistant.const import CONF_ENTITIES, CONF_ENTITY_ID, STATE_OFF, STATE_ON
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+import pytest
+import voluptuous as vol
+
+from custom_components.powercalc.const import (
+    CONF_CREATE_GROUP,
+    CONF_ENABLE_PERFORMANCE_STATS,
+    CONF_FIXED,
+    CONF_POWER,
+    DOMAIN,
+    SERVICE_GET_PERFORMANCE_STATS,
+)
+from custom_components.powercalc.performance import LatencyHistogram
+from tests.common import run_powercalc_setup, set_states
+
+
+async def test_get_performance_stats(hass: HomeAssistant) -> None:
+    await run_powercalc_setup(
+        hass,
+        {
+            CONF_CREATE_GROUP: "Lights",
+            CONF_ENTITIES: [
+                {CONF_ENTITY_ID: "light.a", CONF_FIXED: {CONF_POWER: 20}},
+                {CONF_ENTITY_ID: "light.b", CONF_FIXED: {CONF_POWER: 30}},
+            ],
+        },
+        {CONF_ENABLE_PERFORMANCE_STATS: True},
+    )
+    await set_states(hass, [("light.a", STATE_ON), ("light.b", STATE_OFF)])
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_GET_PERFORMANCE_STATS,
+        {"reset": True},
+        blocking=True,
+        return_response=True,
+    )
+    assert response
+    assert response["strategies"]["fixed"]["count"] >= 1
+    assert response["sensors"]["sensor.a_power"]["calculate_power"]["count"] >= 1
+    assert response["sensors"]["sensor.a_power"]["strategy_calculate"]["count"] >= 1
+    assert "strategy_calculate" not in response["sensors"]["sensor.b_power"]
+    assert response["sensors"]["sensor.lights_power"]["on_state_change"]["count"] >= 1
+    assert response["sensors"]["sensor.lights_power"]["set_new_state"]["count"] >= 1
+    assert response["sensors"]["sensor.a_energy"]["integrate_on_state_change"]["count"] >= 1
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_GET_PERFORMANCE_STATS,
+        {},
+        blocking=True,
+        return_response=True,
+    )
+    assert response == {"strategies": {}, "sensors": {}}
+
+
+async def test_get_performance_stats_limit(hass: HomeAssistant) -> None:
+    await run_powercalc_setup(
+        hass,
+        [
+            {CONF_ENTITY_ID: "light.a", CONF_FIXED: {CONF_POWER: 20}},
+            {CONF_ENTITY_ID: "light.b", CONF_FIXED: {CONF_POWER: 30}},
+        ],
+        {CONF_ENABLE_PERFORMANCE_STATS: True},
+    )
+    await set_states(hass, [("light.a", STATE_ON), ("light.b", STATE_ON)])
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_GET_PERFORMANCE_STATS,
+        {"limit": 1},
+        blocking=True,
+        return_response=True,
+    )
+    assert response
+    assert len(response["sensors"]) == 1
+
+    with pytest.raises(vol.Invalid):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_GET_PERFORMANCE_STATS,
+            {"limit": 0},
+            blocking=True,
+            return_response=True,
+        )
+
+
+async def test_get_performance_stats_disabled(hass: HomeAssistant) -> None:
+    await run_powercalc_setup(hass, {CONF_ENTITY_ID: "light.a", CONF_FIXED: {CONF_POWER: 20}})
+
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_GET_PERFORMANCE_STATS,
+            {},
+            blocking=True,
+            return_response=True,
+        )
+
+
+def test_latency_histogram() -> None:
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) == 0
+
+    for _ in range(90):
+        histogram.add(0.0003)
+    for _ in range(10):
+        histogram.add(0.03)
+    histogram.add(20)
+
+    assert histogram.count == 101
+    assert histogram.percentile(50) == pytest.approx(0.0005)
+    assert histogram.percentile(95) == pytest.approx(0.05)
+    assert histogram.percentile(100) == 20
+    assert histogram.as_dict()["max_ms"] == 20000
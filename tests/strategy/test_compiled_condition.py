@@ -0,0 +1,146 @@
+from typing import Any
+from unittest.mock import patch
+
+from homeassistant.const import STATE_OFF, STATE_ON, STATE_UNAVAILABLE
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConditionError
+from homeassistant.helpers import condition
+import pytest
+
+from custom_components.powercalc.strategy.compiled_condition import (
+    ConditionInputs,
+    StateNode,
+    compile_condition,
+)
+from tests.common import set_states
+
+STATES: list[list[tuple[str, str, dict[str, Any]]]] = [
+    [("fan.test", STATE_ON, {"preset_mode": "eco", "percentage": 40}), ("sensor.temperature", "21", {})],
+    [("fan.test", STATE_ON, {"preset_mode": "boost", "percentage": 100}), ("sensor.temperature", "26", {})],
+    [("fan.test", STATE_OFF, {}), ("sensor.temperature", STATE_UNAVAILABLE, {})],
+    [("fan.test", STATE_ON, {"preset_mode": ["eco"], "percentage": "high"}), ("sensor.temperature", "abc", {})],
+    [("fan.test", STATE_ON, {"preset_mode": None, "percentage": None}), ("sensor.temperature", "30", {})],
+]
+
+
+@pytest.mark.parametrize(
+    "condition_config",
+    [
+        {"condition": "state", "entity_id": "fan.test", "state": STATE_ON},
+        {"condition": "state", "entity_id": "fan.test", "attribute": "preset_mode", "state": ["eco", "sleep"]},
+        {"condition": "state", "entity_id": ["fan.test", "fan.unknown"], "state": STATE_ON, "match": "any"},
+        {"condition": "numeric_state", "entity_id": "sensor.temperature", "above": 17, "below": 25},
+        {"condition": "numeric_state", "entity_id": "fan.test", "attribute": "percentage", "above": 50},
+        {"condition": "numeric_state", "entity_id": "sensor.unknown", "below": 10},
+        {
+            "condition": "or",
+            "conditions": [
+                {"condition": "numeric_state", "entity_id": "sensor.temperature", "above": 25},
+                {"condition": "state", "entity_id": "fan.test", "state": STATE_OFF},
+            ],
+        },
+        {
+            "condition": "not",
+            "conditions": [
+                {"condition": "numeric_state", "entity_id": "sensor.temperature", "below": 22},
+            ],
+        },
+        {
+            "condition": "and",
+            "conditions": [
+                {"condition": "state", "entity_id": "fan.test", "state": STATE_ON},
+                {"condition": "numeric_state", "entity_id": "fan.test", "attribute": "percentage", "below": 50},
+            ],
+        },
+        {
+            "condition": "not",
+            "conditions": [
+                {"condition": "state", "entity_id": "fan.unknown", "state": STATE_ON},
+            ],
+        },
+        {
+            "condition": "not",
+            "conditions": [
+                {"condition": "numeric_state", "entity_id": "sensor.unknown", "below": 10},
+            ],
+        },
+        {
+            "condition": "not",
+            "conditions": [
+                {"condition": "state", "entity_id": "fan.test", "attribute": "preset_mode", "state": "eco"},
+            ],
+        },
+        {
+            "condition": "not",
+            "conditions": [
+                {"condition": "numeric_state", "entity_id": "fan.test", "attribute": "percentage", "above": 50},
+            ],
+        },
+    ],
+)
+async def test_compiled_condition_matches_home_assistant(hass: HomeAssistant, condition_config: dict) -> None:
+    validated = await condition.async_validate_condition_config(hass, condition_config)
+    checker = await condition.async_from_config(hass, validated)
+    inputs = ConditionInputs()
+    compiled = compile_condition(validated, inputs)
+    assert compiled
+
+    for states in STATES:
+        await set_states(hass, states)
+        try:
+            expected = checker(hass, {})
+        except ConditionError:
+            expected = False
+        assert compiled.matches(inputs.read(hass)) is bool(expected), states
+
+
+@pytest.mark.parametrize(
+    "condition_config",
+    [
+        {"condition": "template", "value_template": "{{ true }}"},
+        {"condition": "state", "entity_id": "fan.test", "state": STATE_ON, "for": {"seconds": 5}},
+        {"condition": "state", "entity_id": "fan.test", "state": "input_select.fan_mode"},
+        {"condition": "numeric_state", "entity_id": "sensor.temperature", "above": "input_number.threshold"},
+        {
+            "condition": "and",
+            "conditions": [
+                {"condition": "state", "entity_id": "fan.test", "state": STATE_ON},
+                {"condition": "template", "value_template": "{{ true }}"},
+            ],
+        },
+    ],
+)
+async def test_condition_not_compiled(hass: HomeAssistant, condition_config: dict) -> None:
+    validated = await condition.async_validate_condition_config(hass, condition_config)
+    assert compile_condition(validated, ConditionInputs()) is None
+
+
+async def test_inputs_are_shared_and_results_memoized(hass: HomeAssistant) -> None:
+    inputs = ConditionInputs()
+    eco = compile_condition(
+        {"condition": "state", "entity_id": ["fan.test"], "attribute": "preset_mode", "state": "eco"},
+        inputs,
+    )
+    boost = compile_condition(
+        {"condition": "state", "entity_id": ["fan.test"], "attribute": "preset_mode", "state": "boost"},
+        inputs,
+    )
+    assert eco
+    assert boost
+    assert len(inputs) == 1
+
+    with patch.object(StateNode, "evaluate", autospec=True, side_effect=StateNode.evaluate) as evaluate:
+        await set_states(hass, [("fan.test", STATE_ON, {"preset_mode": "eco"})])
+        values = inputs.read(hass)
+        assert eco.matches(values)
+        assert not boost.matches(values)
+        assert evaluate.call_count == 2
+
+        # Results are reused as long as the values read by the conditions don't change
+        await set_states(hass, [("fan.test", STATE_ON, {"preset_mode": "eco", "percentage": 50})])
+        assert eco.matches(inputs.read(hass))
+        assert evaluate.call_count == 2
+
+        await set_states(hass, [("fan.test", STATE_ON, {"preset_mode": "boost"})])
+        assert boost.matches(inputs.read(hass))
+        assert evaluate.call_count == 3
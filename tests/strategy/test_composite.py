@@ -256,6 +256,10 @@ async def test_playbook(hass: HomeAssistant) -> None:
 
     assert_entity_state(hass, "sensor.dishwasher_power", "20.00")
 
+    # The playbook keeps running while the same sub strategy stays selected
+    await set_states(hass, [(dishwasher_mode_entity, "Cycle Active", {"remaining_time": 10})])
+    assert_entity_state(hass, "sensor.dishwasher_power", "20.00")
+
     await async_advance_time(hass, 5, block=False)
 
     assert_entity_state(hass, "sensor.dishwasher_power", "40.00")
@@ -19,6 +19,7 @@ import pytest
 from custom_components.powercalc.common import SourceEntity, create_source_entity
 from custom_components.powercalc.const import (
     CONF_CALIBRATE,
+    CONF_INTERPOLATION,
     CONF_LINEAR,
     CONF_MAX_POWER,
     CONF_MIN_POWER,
@@ -26,7 +27,7 @@ from custom_components.powercalc.const import (
     SensorType,
 )
 from custom_components.powercalc.errors import StrategyConfigurationError
-from custom_components.powercalc.strategy.linear import LinearStrategy
+from custom_components.powercalc.strategy.linear import Interpolation, LinearStrategy
 from tests.common import (
     assert_entity_state,
     create_mock_config_entry,
@@ -224,6 +225,53 @@ async def test_lower_value_than_calibration_table_defines(hass: HomeAssistant) -
     assert pytest.approx(float(await strategy.calculate(state)), 0.01) == 3.52
 
 
+async def test_monotone_cubic_interpolation(hass: HomeAssistant) -> None:
+    strategy = await _create_strategy_instance(
+        hass,
+        create_source_entity("light.test", hass),
+        {
+            CONF_CALIBRATE: [
+                "1 -> 0.3",
+                "10 -> 1.25",
+                "50 -> 3.50",
+                "100 -> 6.8",
+                "255 -> 15.3",
+            ],
+            CONF_INTERPOLATION: Interpolation.MONOTONE_CUBIC,
+        },
+    )
+
+    assert await strategy.calculate(State("light.test", STATE_ON, {ATTR_BRIGHTNESS: 10})) == 1.25
+    assert (
+        pytest.approx(float(await strategy.calculate(State("light.test", STATE_ON, {ATTR_BRIGHTNESS: 30}))), 0.001)
+        == 2.464
+    )
+
+    powers = strategy.calculate_many(range(1, 256))
+    assert powers == sorted(powers)
+    assert powers[-1] == 15.3
+
+
+async def test_calculate_many(hass: HomeAssistant) -> None:
+    strategy = await _create_strategy_instance(
+        hass,
+        create_source_entity("light.test", hass),
+        {
+            CONF_CALIBRATE: [
+                "50 -> 5",
+                "100 -> 8",
+                "255 -> 15",
+            ],
+        },
+    )
+
+    values = [20, 50, 75, 255]
+    expected = [
+        float(await strategy.calculate(State("light.test", STATE_ON, {ATTR_BRIGHTNESS: value}))) for value in values
+    ]
+    assert strategy.calculate_many(values) == pytest.approx(expected)
+
+
 async def _create_strategy_instance(
     hass: HomeAssistant,
     source_entity: SourceEntity,
@@ -1,5 +1,7 @@
+import contextvars
 from decimal import Decimal
 import logging
+from unittest.mock import AsyncMock, patch
 
 from homeassistant.components.light import (
     ATTR_BRIGHTNESS,
@@ -20,6 +22,8 @@ from custom_components.powercalc.const import CONF_MANUFACTURER, CONF_MODEL, Cal
 from custom_components.powercalc.errors import StrategyConfigurationError
 from custom_components.powercalc.power_profile.library import ModelInfo, ProfileLibrary
 from custom_components.powercalc.strategy.factory import PowerCalculatorStrategyFactory
+from custom_components.powercalc.strategy.light_state import get_light_state, start_light_state_scope
+from custom_components.powercalc.strategy.lut import LutRegistry
 from custom_components.powercalc.strategy.strategy_interface import (
     PowerCalculationStrategyInterface,
 )
@@ -485,6 +489,36 @@ async def test_fallback_to_non_gzipped_file(hass: HomeAssistant) -> None:
     )
 
 
+@pytest.mark.parametrize("file_name", ["brightness.csv.gz", "brightness.csv"])
+async def test_lut_files_from_library_index(hass: HomeAssistant, file_name: str) -> None:
+    """
+    LUT files listed in library.json are used without listing the profile directory.
+    An indexed file which is missing is looked up on disk instead.
+    """
+    lut_metadata = {
+        "": {
+            "brightness": {"file": file_name, "rows": 255, "hash": "abc", "ranges": {"bri": [1, 255]}},
+        },
+    }
+    with (
+        patch(
+            "custom_components.powercalc.power_profile.loader.remote.RemoteLoader.get_lut_metadata",
+            new_callable=AsyncMock,
+            return_value=lut_metadata,
+        ),
+        patch.object(LutRegistry, "_list_model_files") as mock_list_model_files,
+    ):
+        strategy = await _create_lut_strategy(hass, "signify", "LWB010")
+        await strategy.validate_config()
+
+        await _calculate_and_assert_power(
+            strategy,
+            state=_create_light_brightness_state(100),
+            expected_power=2.05,
+        )
+        assert not mock_list_model_files.called
+
+
 async def _create_lut_strategy(
     hass: HomeAssistant,
     manufacturer: str,
@@ -554,3 +588,32 @@ async def _calculate_and_assert_power(
         return
 
     assert round(power, 2) == round(Decimal(expected_power), 2)
+
+
+def test_light_state_is_parsed_once_per_state() -> None:
+    state = State(
+        "light.test",
+        STATE_ON,
+        {ATTR_BRIGHTNESS: 300, ATTR_COLOR_MODE: ColorMode.HS, ATTR_HS_COLOR: (180, 50), ATTR_EFFECT: "None"},
+    )
+    contextvars.copy_context().run(_assert_light_state_parsed_once, state)
+    # Outside of a dispatched event nothing is kept
+    assert get_light_state(state) is not get_light_state(state)
+
+
+def _assert_light_state_parsed_once(state: State) -> None:
+    start_light_state_scope()
+    light_state = get_light_state(state)
+    assert light_state.brightness == 255
+    assert light_state.color_mode == ColorMode.HS
+    assert light_state.hue_saturation == (32767, 127)
+    assert light_state.effect is None
+    assert get_light_state(state) is light_state
+
+    new_state = State("light.test", STATE_ON, {ATTR_COLOR_MODE: "invalid", ATTR_EFFECT: "Rainbow"})
+    new_light_state = get_light_state(new_state)
+    assert new_light_state is not light_state
+    assert new_light_state.brightness is None
+    assert new_light_state.color_mode == ColorMode.UNKNOWN
+    assert new_light_state.hue_saturation is None
+    assert new_light_state.effect == "Rainbow"
@@ -8,17 +8,24 @@ from homeassistant.const import (
     STATE_OFF,
     STATE_ON,
     STATE_OPENING,
+    STATE_UNAVAILABLE,
 )
 from homeassistant.core import HomeAssistant, State
 from homeassistant.helpers.typing import ConfigType
 import pytest
 
 from custom_components.powercalc.common import create_source_entity
-from custom_components.powercalc.const import CONF_MULTI_SWITCH, CONF_POWER, CONF_POWER_OFF, CalculationStrategy
+from custom_components.powercalc.const import (
+    CONF_ENTITY_POWER,
+    CONF_MULTI_SWITCH,
+    CONF_POWER,
+    CONF_POWER_OFF,
+    CalculationStrategy,
+)
 from custom_components.powercalc.errors import StrategyConfigurationError
 from custom_components.powercalc.strategy.factory import PowerCalculatorStrategyFactory
-from custom_components.powercalc.strategy.multi_switch import MultiSwitchStrategy
-from tests.common import run_powercalc_setup, set_states
+from custom_components.powercalc.strategy.multi_switch import MultiSwitchStrategy, SwitchPower
+from tests.common import assert_entity_state, run_powercalc_setup, set_states
 
 
 async def test_calculate_sum(hass: HomeAssistant) -> None:
@@ -72,6 +79,46 @@ async def test_cover_entities(hass: HomeAssistant) -> None:
     assert await strategy.calculate(State(switch3, STATE_ON)) == Decimal("1.00")
 
 
+async def test_entity_power_override(hass: HomeAssistant) -> None:
+    switch1 = "switch.test1"
+    switch2 = "switch.test2"
+    poe_port = "switch.poe_port"
+
+    strategy = MultiSwitchStrategy(
+        hass,
+        [switch1, switch2, poe_port],
+        on_power=Decimal("0.5"),
+        off_power=Decimal("0.25"),
+        entity_power={poe_port: SwitchPower(on_power=Decimal("4.5"), off_power=Decimal("0.1"))},
+    )
+
+    assert await strategy.calculate(State(poe_port, STATE_ON)) == Decimal("4.50")
+    assert await strategy.calculate(State(switch1, STATE_ON)) == Decimal("5.00")
+    assert await strategy.calculate(State(switch2, STATE_OFF)) == Decimal("5.25")
+    assert await strategy.calculate(State(poe_port, STATE_OFF)) == Decimal("0.85")
+    assert await strategy.calculate(State(poe_port, STATE_UNAVAILABLE)) == Decimal("0.75")
+    assert await strategy.calculate(State(switch1, STATE_UNAVAILABLE)) == Decimal("0.25")
+    # Repeated states don't change the counts
+    assert await strategy.calculate(State(switch2, STATE_OFF)) == Decimal("0.25")
+
+
+async def test_initial_states_are_read_once(hass: HomeAssistant) -> None:
+    await set_states(hass, [("switch.test1", STATE_ON), ("switch.test2", STATE_ON)])
+
+    strategy = MultiSwitchStrategy(
+        hass,
+        ["switch.test1", "switch.test2", "switch.test3"],
+        on_power=Decimal("0.5"),
+        off_power=Decimal("0.25"),
+    )
+
+    assert await strategy.calculate(State("switch.test3", STATE_OFF)) == Decimal("1.25")
+
+    # Only the state passed in is used after the first calculation
+    await set_states(hass, [("switch.test1", STATE_OFF)])
+    assert await strategy.calculate(State("switch.test2", STATE_OFF)) == Decimal("1.00")
+
+
 async def test_setup_using_yaml(hass: HomeAssistant) -> None:
     await run_powercalc_setup(
         hass,
@@ -94,6 +141,29 @@ async def test_setup_using_yaml(hass: HomeAssistant) -> None:
     assert power_sensor
 
 
+async def test_entity_power_using_yaml(hass: HomeAssistant) -> None:
+    await run_powercalc_setup(
+        hass,
+        {
+            CONF_NAME: "Outlet self usage",
+            CONF_MULTI_SWITCH: {
+                CONF_POWER: 0.5,
+                CONF_POWER_OFF: 0.25,
+                CONF_ENTITIES: [
+                    "switch.test1",
+                    "switch.test2",
+                ],
+                CONF_ENTITY_POWER: {
+                    "switch.test2": {CONF_POWER: 2},
+                },
+            },
+        },
+    )
+
+    await set_states(hass, [("switch.test1", STATE_OFF), ("switch.test2", STATE_ON)])
+    assert_entity_state(hass, "sensor.outlet_self_usage_power", "2.25")
+
+
 @pytest.mark.parametrize(
     "config",
     [
@@ -1,3 +1,9 @@
+import asyncio
+import os
+from pathlib import Path
+import threading
+from unittest.mock import patch
+
 from homeassistant.const import (
     ATTR_ENTITY_ID,
     CONF_ENTITY_ID,
@@ -16,12 +22,14 @@ from custom_components.powercalc import CONF_IGNORE_UNAVAILABLE_STATE
 from custom_components.powercalc.const import (
     CONF_AUTOSTART,
     CONF_CUSTOM_MODEL_DIRECTORY,
+    CONF_MIN_OUTPUT_INTERVAL,
     CONF_MULTIPLY_FACTOR,
     CONF_PLAYBOOK,
     CONF_PLAYBOOKS,
     CONF_REPEAT,
     CONF_STANDBY_POWER,
     CONF_STATE_TRIGGER,
+    CONF_TIME_WEIGHTED_AVERAGE,
     DOMAIN,
     DUMMY_ENTITY_ID,
     SERVICE_ACTIVATE_PLAYBOOK,
@@ -29,7 +37,14 @@ from custom_components.powercalc.const import (
     SERVICE_STOP_PLAYBOOK,
 )
 from custom_components.powercalc.errors import StrategyConfigurationError
-from custom_components.powercalc.strategy.playbook import PlaybookStrategy
+from custom_components.powercalc.strategy.playbook import (
+    PlaybookCache,
+    PlaybookData,
+    PlaybookStrategy,
+    StreamingPlaybookQueue,
+    _PlaybookReader,
+    get_playbook_cache,
+)
 from tests.common import (
     assert_entity_state,
     async_advance_time,
@@ -66,6 +81,41 @@ async def test_activate_playbook_service(hass: HomeAssistant) -> None:
     await elapse_and_assert_power(hass, 6.5, "20.20")
 
 
+@pytest.mark.parametrize(
+    "time_weighted_average,expected_power",
+    [
+        (False, "60.00"),
+        (True, "36.21"),
+    ],
+)
+async def test_min_output_interval(hass: HomeAssistant, time_weighted_average: bool, expected_power: str) -> None:
+    await run_powercalc_setup(
+        hass,
+        {
+            CONF_ENTITY_ID: DUMMY_ENTITY_ID,
+            CONF_NAME: "Test",
+            CONF_PLAYBOOK: {
+                CONF_PLAYBOOKS: {
+                    "playbook1": "test.csv",
+                },
+                CONF_MIN_OUTPUT_INTERVAL: 5,
+                CONF_TIME_WEIGHTED_AVERAGE: time_weighted_average,
+            },
+        },
+    )
+
+    await _activate_playbook(hass, "playbook1")
+
+    await elapse_and_assert_power(hass, 1.5, "20.50")
+    # The entries at 2 and 4 seconds are held back until 5 seconds after the first update
+    await elapse_and_assert_power(hass, 3, "20.50")
+    await elapse_and_assert_power(hass, 4.5, "20.50")
+    await elapse_and_assert_power(hass, 5.5, expected_power)
+    # The last entry is output right away when the playbook completes
+    await elapse_and_assert_power(hass, 6.5, "20.20")
+    assert await _get_active_playbook(hass) is None
+
+
 async def test_stop_playbook_service(hass: HomeAssistant) -> None:
     await run_powercalc_setup(
         hass,
@@ -259,6 +309,100 @@ async def test_lazy_load_playbook(hass: HomeAssistant) -> None:
     await strategy.activate_playbook("program1")
 
 
+async def test_playbook_data_is_shared_until_file_changes(hass: HomeAssistant, tmp_path: Path) -> None:
+    playbook_file = tmp_path / "playbook.csv"
+    playbook_file.write_text("1,20.5\n2,40\n")
+    path = str(playbook_file)
+    cache = get_playbook_cache(hass)
+
+    data = await cache.async_load(path, os.stat(path))
+    assert list(data.times) == [1, 2]
+    assert list(data.powers) == [20.5, 40]
+    assert await cache.async_load(path, os.stat(path)) is data
+
+    playbook_file.write_text("1,30\n")
+    os.utime(playbook_file, ns=(0, 0))
+    assert list((await cache.async_load(path, os.stat(path))).powers) == [30]
+
+
+async def test_playbook_cache_drops_least_recently_used(hass: HomeAssistant, tmp_path: Path) -> None:
+    cache = PlaybookCache(hass, max_size=2)
+    paths = []
+    for name in ("a", "b", "c"):
+        playbook_file = tmp_path / f"{name}.csv"
+        playbook_file.write_text("1,20\n")
+        paths.append(str(playbook_file))
+    path_a, path_b, path_c = paths
+
+    data_a = await cache.async_load(path_a, os.stat(path_a))
+    data_b = await cache.async_load(path_b, os.stat(path_b))
+    await cache.async_load(path_a, os.stat(path_a))
+    await cache.async_load(path_c, os.stat(path_c))
+
+    assert await cache.async_load(path_a, os.stat(path_a)) is data_a
+    assert await cache.async_load(path_b, os.stat(path_b)) is not data_b
+
+
+async def test_streaming_reader_closed_after_pending_read(hass: HomeAssistant, tmp_path: Path) -> None:
+    playbook_file = tmp_path / "playbook.csv"
+    playbook_file.write_text("1,20\n2,40\n")
+    queue = StreamingPlaybookQueue(hass, str(playbook_file))
+    read_started = threading.Event()
+    release_read = threading.Event()
+    readers: list[_PlaybookReader] = []
+    read = _PlaybookReader.read
+
+    def _slow_read(reader: _PlaybookReader, limit: int | None = None) -> PlaybookData:
+        readers.append(reader)
+        read_started.set()
+        release_read.wait(5)
+        return read(reader, limit)
+
+    with patch.object(_PlaybookReader, "read", _slow_read):
+        load = hass.async_create_task(queue.async_load_more(hass))
+        await hass.async_add_executor_job(read_started.wait, 5)
+        queue.reset()
+        await asyncio.sleep(0)
+        # Closing the file while it is being read in the executor could break the read
+        assert not readers[0]._file.closed  # noqa: SLF001
+
+        release_read.set()
+        assert await load is False
+        await hass.async_block_till_done()
+
+    assert readers[0]._file.closed  # noqa: SLF001
+
+
+async def test_streaming_playbook(hass: HomeAssistant) -> None:
+    with (
+        patch("custom_components.powercalc.strategy.playbook.PLAYBOOK_STREAMING_SIZE", 0),
+        patch("custom_components.powercalc.strategy.playbook.PLAYBOOK_CHUNK_SIZE", 1),
+    ):
+        await run_powercalc_setup(
+            hass,
+            {
+                CONF_ENTITY_ID: DUMMY_ENTITY_ID,
+                CONF_NAME: "Test",
+                CONF_PLAYBOOK: {
+                    CONF_PLAYBOOKS: {
+                        "playbook": "test2.csv",
+                    },
+                    CONF_REPEAT: True,
+                },
+            },
+        )
+
+        await _activate_playbook(hass, "playbook")
+
+        # Block until the next chunk has been read after each step
+        for seconds, expected_power in ((2, "20.00"), (4, "40.00"), (6, "20.00"), (8, "40.00")):
+            await async_advance_time(hass, seconds)
+            assert_entity_state(hass, POWER_SENSOR_ID, expected_power)
+
+        await _stop_playbook(hass)
+        assert await _get_active_playbook(hass) is None
+
+
 async def test_load_csv_from_subdirectory(hass: HomeAssistant) -> None:
     await run_powercalc_setup(
         hass,
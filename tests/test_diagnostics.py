@@ -1,17 +1,19 @@
-from homeassistant.const import CONF_ENABLED, CONF_ENTITY_ID, CONF_NAME
+from homeassistant.const import CONF_ENABLED, CONF_ENTITY_ID, CONF_NAME, STATE_ON
 from homeassistant.core import HomeAssistant
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from custom_components.powercalc import CONF_DISCOVERY, CONF_SENSOR_TYPE, SensorType
 from custom_components.powercalc.const import (
+    CONF_ENABLE_PERFORMANCE_STATS,
     CONF_FIXED,
     CONF_GROUP_MEMBER_SENSORS,
     CONF_MODE,
     CONF_POWER,
+    ENTRY_GLOBAL_CONFIG_UNIQUE_ID,
     CalculationStrategy,
 )
 from custom_components.powercalc.diagnostics import async_get_config_entry_diagnostics
-from tests.common import create_mock_config_entry
+from tests.common import create_mock_config_entry, run_powercalc_setup, set_states
 
 
 async def test_diagnostics(
@@ -87,3 +89,41 @@ async def test_yaml_config_included(
             SensorType.VIRTUAL_POWER: 1,
         },
     }
+
+
+async def test_performance_stats_included(hass: HomeAssistant) -> None:
+    await run_powercalc_setup(hass, {}, {CONF_ENABLE_PERFORMANCE_STATS: True})
+    entry = await create_mock_config_entry(
+        hass,
+        {
+            CONF_SENSOR_TYPE: SensorType.VIRTUAL_POWER,
+            CONF_ENTITY_ID: "light.test",
+            CONF_NAME: "Test",
+            CONF_MODE: CalculationStrategy.FIXED,
+            CONF_FIXED: {CONF_POWER: 50},
+        },
+    )
+    await set_states(hass, [("light.test", STATE_ON)])
+
+    diagnostics_data = await async_get_config_entry_diagnostics(hass, entry)
+    performance_stats = diagnostics_data["performance_stats"]
+    assert performance_stats["strategies"]["fixed"]["count"] >= 1
+    assert performance_stats["sensors"]["sensor.test_power"]["calculate_power"]["count"] >= 1
+
+
+async def test_startup_timings_included_in_global_configuration(hass: HomeAssistant) -> None:
+    await run_powercalc_setup(
+        hass,
+        {CONF_ENTITY_ID: "light.test", CONF_NAME: "Test", CONF_FIXED: {CONF_POWER: 50}},
+        {CONF_ENABLE_PERFORMANCE_STATS: True},
+    )
+    global_entry = await create_mock_config_entry(
+        hass,
+        {CONF_DISCOVERY: {CONF_ENABLED: False}},
+        unique_id=ENTRY_GLOBAL_CONFIG_UNIQUE_ID,
+    )
+
+    diagnostics_data = await async_get_config_entry_diagnostics(hass, global_entry)
+    startup_timings = diagnostics_data["startup_timings"]
+    assert startup_timings["phases"]["async_setup"]["count"] == 1
+    assert startup_timings["sensors"]["Test"]["create_individual_sensors"]["count"] == 1
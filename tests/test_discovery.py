@@ -3,7 +3,7 @@ from dataclasses import replace
 from datetime import timedelta
 import logging
 from typing import Any
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, PropertyMock, patch
 import uuid
 
 from homeassistant.components.light import (
@@ -60,17 +60,20 @@ from custom_components.powercalc.const import (
     DISCOVERY_INTEGRATION_NAME,
     DOMAIN,
     DUMMY_ENTITY_ID,
+    CalculationStrategy,
     SensorType,
 )
 from custom_components.powercalc.discovery import (
     DISCOVERY_DELAY,
+    INCREMENTAL_DISCOVERY_COOLDOWN,
     REDISCOVERY_INTERVAL,
     DiscoveryStatus,
     get_discovery_manager,
     get_power_profile_by_source_device,
     get_power_profile_by_source_entity,
 )
-from custom_components.powercalc.power_profile.library import ModelInfo
+from custom_components.powercalc.discovery_cache import SAVE_DELAY, STORAGE_KEY
+from custom_components.powercalc.power_profile.library import ModelInfo, ProfileLibrary
 
 from .common import (
     assert_entity_state,
@@ -351,6 +354,68 @@ async def test_autodiscover_continues_when_one_entity_fails(
         assert "Error during entity discovery" in caplog.text
 
 
+async def test_autodiscover_continues_when_prefetching_fails(
+    hass: HomeAssistant,
+    mock_flow_init: AsyncMock,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    caplog.set_level(logging.ERROR)
+
+    mock_device_with_entities(hass, "light.test", "signify", "LCT010")
+    with patch(
+        "custom_components.powercalc.power_profile.library.ProfileLibrary.prefetch_models",
+        new_callable=AsyncMock,
+        side_effect=Exception("Test exception"),
+    ):
+        await run_powercalc_setup(hass)
+
+    assert "Error prefetching the profiles of 1 discovery candidates" in caplog.text
+    assert len(mock_flow_init.mock_calls) == 1
+
+
+async def test_skipped_candidates_are_not_prefetched(
+    hass: HomeAssistant,
+    mock_flow_init: AsyncMock,
+) -> None:
+    await create_mock_config_entry(
+        hass,
+        {
+            CONF_SENSOR_TYPE: SensorType.VIRTUAL_POWER,
+            CONF_ENTITY_ID: "light.configured",
+            CONF_MANUFACTURER: "signify",
+            CONF_MODEL: "LCT010",
+        },
+        title="Test",
+        source=SOURCE_INTEGRATION_DISCOVERY,
+        setup=False,
+    )
+    mock_devices(
+        hass,
+        {
+            "configured-device": {"manufacturer": "signify", "model": "LCT010"},
+            "excluded-device": {"manufacturer": "shelly", "model": "SHPLG-S"},
+            "new-device": {"manufacturer": "signify", "model": "LCT015"},
+        },
+    )
+    mock_entities_in_registry(
+        hass,
+        {
+            "light.configured": {"device_id": "configured-device"},
+            "switch.excluded": {"platform": "shelly", "device_id": "excluded-device"},
+            "light.new": {"device_id": "new-device"},
+        },
+    )
+
+    with patch(
+        "custom_components.powercalc.power_profile.library.ProfileLibrary.prefetch_models",
+        new_callable=AsyncMock,
+    ) as mock_prefetch_models:
+        await run_powercalc_setup(hass, {}, {CONF_DISCOVERY: {CONF_EXCLUDE_DEVICE_TYPES: [DeviceType.SMART_SWITCH]}})
+
+    assert {model.model for model in mock_prefetch_models.call_args.args[0]} == {"LCT015"}
+    assert len(mock_flow_init.mock_calls) == 1
+
+
 async def test_exclude_device_types(
     hass: HomeAssistant,
     mock_flow_init: AsyncMock,
@@ -832,10 +897,138 @@ async def test_interval_based_rediscovery(
     await async_advance_time(hass, timedelta(hours=2), block=False)
     await hass.async_block_till_done(True)
 
-    await async_advance_time(hass, timedelta(hours=2), block=False)
-    await hass.async_block_till_done(True)
+    # Only a changed library is rediscovered, other changes are discovered incrementally
+    assert len([record for record in caplog.records if "Start auto discovery" in record.message]) == 1
+    assert "Library did not change, skipping rediscovery" in caplog.text
+
+    library_hash = PropertyMock(return_value="previous")
+
+    async def _initialize(**_: Any) -> None:  # noqa: ANN401
+        library_hash.return_value = "updated"
+
+    with (
+        patch.object(ProfileLibrary, "library_hash", library_hash),
+        patch.object(ProfileLibrary, "initialize", side_effect=_initialize),
+    ):
+        await async_advance_time(hass, timedelta(hours=2), block=False)
+        await hass.async_block_till_done(True)
+
+    assert len([record for record in caplog.records if "Start auto discovery" in record.message]) == 2
+
+
+async def test_new_device_is_discovered_incrementally(hass: HomeAssistant, mock_flow_init: AsyncMock) -> None:
+    await run_powercalc_setup(hass)
+    assert not mock_flow_init.mock_calls
+
+    config_entry = MockConfigEntry(domain="hue")
+    config_entry.add_to_hass(hass)
+    device = dr.async_get(hass).async_get_or_create(
+        config_entry_id=config_entry.entry_id,
+        identifiers={("hue", "bulb")},
+        manufacturer="signify",
+        model="LCT010",
+    )
+    er.async_get(hass).async_get_or_create(
+        "light",
+        "hue",
+        "bulb",
+        suggested_object_id="bulb",
+        device_id=device.id,
+        config_entry=config_entry,
+    )
+    await set_states(hass, [("light.bulb", STATE_ON, LIGHT_ATTRIBUTES)])
+
+    with patch.object(DiscoveryManager, "get_entities") as mock_get_entities:
+        await async_advance_time(hass, timedelta(seconds=INCREMENTAL_DISCOVERY_COOLDOWN))
+
+    mock_get_entities.assert_not_called()
+    assert len(mock_flow_init.mock_calls) == 1
+    assert mock_flow_init.mock_calls[0][2]["data"][CONF_ENTITY_ID] == "light.bulb"
+
+
+async def test_removed_config_entry_no_longer_counts_as_configured(hass: HomeAssistant) -> None:
+    await run_powercalc_setup(hass)
+    entry = await create_mock_config_entry(
+        hass,
+        {
+            CONF_SENSOR_TYPE: SensorType.VIRTUAL_POWER,
+            CONF_ENTITY_ID: "light.bulb",
+            CONF_MODE: CalculationStrategy.FIXED,
+            CONF_FIXED: {CONF_POWER: 20},
+        },
+        unique_id="bulb",
+    )
+    discovery_manager = get_discovery_manager(hass)
+    assert discovery_manager._is_user_configured("light.bulb")  # noqa: SLF001
+    assert "light.bulb" in discovery_manager._configured_discovery_keys  # noqa: SLF001
+
+    await hass.config_entries.async_remove(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert not discovery_manager._is_user_configured("light.bulb")  # noqa: SLF001
+    assert "light.bulb" not in discovery_manager._configured_discovery_keys  # noqa: SLF001
+
+
+async def test_no_profile_match_is_cached(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    caplog.set_level(logging.DEBUG)
+    mock_devices(
+        hass,
+        {
+            "known-device": {"manufacturer": "signify", "model": "LCT010"},
+            "unknown-device": {"manufacturer": "lidl", "model": "NONEXISTING"},
+        },
+    )
+    mock_entities_in_registry(
+        hass,
+        {
+            "light.known": {"device_id": "known-device"},
+            "light.unknown": {"device_id": "unknown-device"},
+        },
+    )
+    await run_powercalc_setup(hass)
+    assert "cache_hits=0" in caplog.text
+
+    library = await ProfileLibrary.factory(hass)
+    with patch.object(library, "find_models", wraps=library.find_models) as mock_find_models:
+        await get_discovery_manager(hass).start_discovery()
 
-    assert len([record for record in caplog.records if "Start auto discovery" in record.message]) == 3
+    searched_models = {call.args[0].model for call in mock_find_models.mock_calls}
+    assert "LCT010" in searched_models
+    assert "NONEXISTING" not in searched_models
+    assert (
+        "Done entity discovery (candidates=2, low_priority_integration=0, no_model_info=0, no_profile_match=1, "
+        "already_configured=1, flows_initiated=0, errors=0, cache_hits=1)"
+    ) in caplog.text
+
+    await async_advance_time(hass, timedelta(seconds=SAVE_DELAY))
+    stored = hass_storage[STORAGE_KEY]["data"]
+    assert stored["fingerprint"].startswith(library.library_hash)
+    assert ["lidl", "NONEXISTING", "", "entity", "light", "light", ""] in stored["no_match"]
+    assert ["lidl", "NONEXISTING", "", "device", "", "", ""] in stored["no_match"]
+
+
+async def test_discovery_cache_is_discarded_when_library_changed(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    mock_flow_init: AsyncMock,
+) -> None:
+    mock_device_with_entities(hass, "light.test", "signify", "LCT010")
+    hass_storage[STORAGE_KEY] = {
+        "version": 1,
+        "key": STORAGE_KEY,
+        "data": {
+            "fingerprint": "previous-library/False",
+            "no_match": [["signify", "LCT010", "", "entity", "light", "light", ""]],
+        },
+    }
+
+    await run_powercalc_setup(hass)
+
+    assert len(mock_flow_init.mock_calls) == 1
 
 
 async def test_update_profile_service(
@@ -1,3 +1,4 @@
+import asyncio
 from collections.abc import Callable
 from decimal import Decimal
 import json
@@ -13,14 +14,19 @@ import pytest
 from custom_components.powercalc.common import SourceEntity
 from custom_components.powercalc.const import DUMMY_ENTITY_ID, PLACEHOLDER_ENTITY_BY_DEVICE_CLASS, CalculationStrategy
 from custom_components.powercalc.helpers import (
+    KeyedLimiter,
+    async_cache,
     build_related_entity_placeholder_not_found_message,
+    clear_async_cache,
     collect_placeholders,
     get_or_create_unique_id,
     get_related_entity_by_device_class,
     get_related_entity_by_translation_key,
     make_hashable,
+    release_limiter_slot,
     replace_placeholders,
     resolve_related_entity_placeholder,
+    substitute_placeholders,
 )
 from custom_components.powercalc.unit import evaluate_to_decimal
 from tests.common import build_device_entry, get_test_profile_dir, mock_entities_in_registry
@@ -91,6 +97,147 @@ def test_make_hashable(value: set | list | dict, output: tuple | frozenset) -> N
     assert make_hashable(value) == output
 
 
+async def test_async_cache_shares_concurrent_calls() -> None:
+    calls = 0
+    release = asyncio.Event()
+
+    @async_cache
+    async def load(manufacturer: str, search: set[str]) -> str:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return f"{manufacturer}/{min(search)}"
+
+    tasks = [asyncio.create_task(load("signify", {"LCT010"})) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    assert await asyncio.gather(*tasks) == ["signify/LCT010"] * 3
+    assert await load("signify", {"LCT010"}) == "signify/LCT010"
+
+    assert calls == 1
+    info = load.cache_info()  # type: ignore[attr-defined]
+    assert (info.hits, info.misses, info.shared) == (1, 1, 2)
+
+    clear_async_cache(load)
+    await load("signify", {"LCT010"})
+    assert calls == 2
+
+
+async def test_async_cache_waiter_runs_call_when_first_caller_is_cancelled() -> None:
+    calls = 0
+    started = asyncio.Event()
+
+    @async_cache
+    async def load(value: int) -> int:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            started.set()
+            await asyncio.Event().wait()
+        return value
+
+    first = asyncio.create_task(load(1))
+    await started.wait()
+    second = asyncio.create_task(load(1))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == 1
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert calls == 2
+    assert await load(1) == 1
+    assert calls == 2
+
+
+async def test_async_cache_max_size_and_ttl() -> None:
+    calls: list[int] = []
+
+    @async_cache(max_size=2, ttl=0.05)
+    async def load(value: int) -> int:
+        calls.append(value)
+        return value
+
+    await load(1)
+    await load(2)
+    await load(1)
+    await load(3)  # evicts 2, the least recently used
+    await load(1)
+    await load(2)
+    assert calls == [1, 2, 3, 2]
+
+    await asyncio.sleep(0.1)
+    await load(2)
+    assert calls == [1, 2, 3, 2, 2]
+
+
+async def test_async_cache_does_not_cache_errors() -> None:
+    calls = 0
+
+    @async_cache
+    async def load() -> None:
+        nonlocal calls
+        calls += 1
+        raise ValueError("load failed")
+
+    for _ in range(2):
+        with pytest.raises(ValueError, match="load failed"):
+            await load()
+    assert calls == 2
+
+
+async def test_keyed_limiter() -> None:
+    limiter = KeyedLimiter(2)
+    running: list[str] = []
+    max_running = 0
+    order: list[str] = []
+
+    async def job(name: str, key: str | None) -> None:
+        nonlocal max_running
+        async with limiter.acquire(key):
+            running.append(name)
+            max_running = max(max_running, len(running))
+            await asyncio.sleep(0.01)
+            order.append(name)
+            running.remove(name)
+
+    await asyncio.gather(job("a1", "a"), job("a2", "a"), job("b", "b"), job("c", None), job("d", None))
+
+    assert max_running == 2
+    assert order.index("a1") < order.index("a2")
+    assert not limiter._locks  # noqa: SLF001
+
+
+async def test_keyed_limiter_slot_released_during_network_io() -> None:
+    limiter = KeyedLimiter(1)
+    download_started = asyncio.Event()
+    download_done = asyncio.Event()
+    order: list[str] = []
+
+    async def downloading_job() -> None:
+        async with limiter.acquire():
+            async with release_limiter_slot():
+                download_started.set()
+                await download_done.wait()
+            order.append("download")
+
+    async def other_job() -> None:
+        await download_started.wait()
+        async with limiter.acquire():
+            order.append("other")
+            download_done.set()
+
+    await asyncio.wait_for(asyncio.gather(downloading_job(), other_job()), 1)
+
+    assert order == ["other", "download"]
+    assert not limiter._semaphore.locked()  # noqa: SLF001
+
+
+async def test_release_limiter_slot_without_slot() -> None:
+    async with release_limiter_slot():
+        pass
+
+
 def test_get_related_entity_by_device_class_no_device_id(hass: HomeAssistant, caplog: pytest.LogCaptureFixture) -> None:
     """Test get_related_entity_by_device_class when entity has no device_id."""
     entity = SourceEntity("test", "light.test", "light")
@@ -146,6 +293,25 @@ def test_replace_placeholder() -> None:
     assert json_data["name"] == "Test sensor.test"
 
 
+def test_substitute_placeholders_copies_only_changed_parts() -> None:
+    json_data = {
+        "name": "Test",
+        "calculation_enabled_condition": "{{ is_state('[[ entity ]]', 'on') }}",
+        "fixed_config": {"states_power": {"playing": 5}},
+        "composite_config": [{"condition": "{{ is_state('[[entity]]', 'on') }}"}, {"fixed": {"power": 2}}],
+    }
+
+    result = substitute_placeholders(json_data, {"entity": "light.test"})
+
+    assert result["calculation_enabled_condition"] == "{{ is_state('light.test', 'on') }}"
+    assert result["composite_config"][0]["condition"] == "{{ is_state('light.test', 'on') }}"
+    assert result["fixed_config"] is json_data["fixed_config"]
+    assert result["composite_config"][1] is json_data["composite_config"][1]
+    assert json_data["calculation_enabled_condition"] == "{{ is_state('[[ entity ]]', 'on') }}"
+    assert json_data["composite_config"][0]["condition"] == "{{ is_state('[[entity]]', 'on') }}"
+    assert substitute_placeholders(json_data, {"other": "light.test"}) is json_data
+
+
 def test_resolve_related_entity_placeholder_no_source_entity(hass: HomeAssistant) -> None:
     assert not resolve_related_entity_placeholder(
         hass,
@@ -1,5 +1,7 @@
+import asyncio
 from datetime import timedelta
 import logging
+from typing import Any
 from unittest.mock import MagicMock, patch
 
 from homeassistant.components import light, sensor
@@ -38,6 +40,7 @@ from custom_components.powercalc.const import (
     ATTR_ENTITIES,
     ATTR_SOURCE_ENTITY,
     CONF_CREATE_ENERGY_SENSOR,
+    CONF_CREATE_ENERGY_SENSORS,
     CONF_CREATE_GROUP,
     CONF_CREATE_UTILITY_METERS,
     CONF_ENERGY_INTEGRATION_METHOD,
@@ -71,6 +74,8 @@ from custom_components.powercalc.const import (
     SensorType,
 )
 from custom_components.powercalc.errors import SensorConfigurationError
+from custom_components.powercalc.sensor import SENSOR_SETUP_CONCURRENCY
+from custom_components.powercalc.sensors.power import PowerSensor, create_power_sensor
 from tests.common import mock_device_with_entities, mock_entities_in_registry, set_states
 
 from .common import (
@@ -217,6 +222,38 @@ async def test_create_nested_group_sensor(hass: HomeAssistant) -> None:
     assert_entity_state(hass, "sensor.testgroup2_power", "0.00")
 
 
+async def test_group_members_are_set_up_concurrently(hass: HomeAssistant) -> None:
+    """Synthetic configuration with 2,000 sensors, their setup overlaps up to the concurrency limit."""
+    running = 0
+    max_running = 0
+
+    async def _create_power_sensor(*args: Any, **kwargs: Any) -> PowerSensor:  # noqa: ANN401
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        try:
+            # Stands in for the profile and LUT loads, which wait on the executor
+            await asyncio.sleep(0.001)
+            return await create_power_sensor(*args, **kwargs)
+        finally:
+            running -= 1
+
+    with patch("custom_components.powercalc.sensor.create_power_sensor", side_effect=_create_power_sensor):
+        await run_powercalc_setup(
+            hass,
+            {
+                CONF_CREATE_GROUP: "Synthetic",
+                CONF_ENTITIES: [get_simple_fixed_config(f"input_boolean.test{i}", 1) for i in range(2000)],
+            },
+            {CONF_CREATE_ENERGY_SENSORS: False},
+        )
+
+    assert max_running == SENSOR_SETUP_CONCURRENCY
+    group_state = hass.states.get("sensor.synthetic_power")
+    assert group_state
+    assert len(group_state.attributes[ATTR_ENTITIES]) == 2000
+
+
 async def test_create_nested_without_group(hass: HomeAssistant) -> None:
     await run_powercalc_setup(
         hass,
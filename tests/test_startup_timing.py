@@ -0,0 +1,109 @@
+import asyncio
+import logging
+
+from homeassistant.const import CONF_ENTITY_ID, CONF_NAME
+from homeassistant.core import HomeAssistant
+import pytest
+
+from custom_components.powercalc.const import (
+    CONF_ENABLE_PERFORMANCE_STATS,
+    CONF_FIXED,
+    CONF_MODE,
+    CONF_POWER,
+    CONF_SENSOR_TYPE,
+    CalculationStrategy,
+    SensorType,
+)
+from custom_components.powercalc.startup_timing import (
+    STARTUP_REPORT_DELAY,
+    async_time_phase,
+    get_startup_timings,
+)
+from tests.common import async_advance_time, create_mock_config_entry, run_powercalc_setup
+
+
+async def test_startup_phases_are_recorded(hass: HomeAssistant) -> None:
+    await run_powercalc_setup(
+        hass,
+        [
+            {CONF_ENTITY_ID: "light.a", CONF_NAME: "A", CONF_FIXED: {CONF_POWER: 20}},
+            {CONF_ENTITY_ID: "light.b", CONF_FIXED: {CONF_POWER: 30}},
+        ],
+        {CONF_ENABLE_PERFORMANCE_STATS: True},
+    )
+    await create_mock_config_entry(
+        hass,
+        {
+            CONF_SENSOR_TYPE: SensorType.VIRTUAL_POWER,
+            CONF_ENTITY_ID: "light.c",
+            CONF_NAME: "C",
+            CONF_MODE: CalculationStrategy.FIXED,
+            CONF_FIXED: {CONF_POWER: 50},
+        },
+        title="Title of C",
+    )
+
+    timings = get_startup_timings(hass)
+    assert timings
+    timings_dict = timings.as_dict()
+    assert {"async_setup", "setup_yaml_sensors.primary", "create_individual_sensors"} <= set(timings_dict["phases"])
+    assert timings_dict["phases"]["create_individual_sensors"]["count"] == 3
+    # YAML and config entry sensors are labelled the same way, by name or source entity
+    assert set(timings_dict["sensors"]) == {"A", "light.b", "C"}
+    assert set(timings_dict["sensors"]["C"]) == {"async_setup_entry", "create_individual_sensors"}
+
+
+async def test_startup_phases_not_recorded_by_default(hass: HomeAssistant, caplog: pytest.LogCaptureFixture) -> None:
+    caplog.set_level(logging.INFO)
+    await run_powercalc_setup(hass, {CONF_ENTITY_ID: "light.a", CONF_NAME: "A", CONF_FIXED: {CONF_POWER: 20}})
+    assert get_startup_timings(hass) is None
+
+    await async_advance_time(hass, STARTUP_REPORT_DELAY)
+    assert "Startup timings" not in caplog.text
+
+
+async def test_wall_time_is_recorded(hass: HomeAssistant) -> None:
+    await run_powercalc_setup(hass, {}, {CONF_ENABLE_PERFORMANCE_STATS: True})
+
+    async def _sleep() -> str:
+        await asyncio.sleep(0.05)
+        return "done"
+
+    assert await async_time_phase(hass, "sleep", _sleep(), sensor="sensor.test") == "done"
+
+    timings = get_startup_timings(hass)
+    assert timings
+    timing = timings.phases["sleep"]
+    assert timing.count == 1
+    assert timing.wall >= 0.05
+    assert timings.sensors["sensor.test"]["sleep"] is not timing
+
+
+async def test_failing_phase_is_recorded(hass: HomeAssistant) -> None:
+    await run_powercalc_setup(hass, {}, {CONF_ENABLE_PERFORMANCE_STATS: True})
+
+    async def _fail() -> None:
+        await asyncio.sleep(0)
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        await async_time_phase(hass, "fail", _fail())
+
+    timings = get_startup_timings(hass)
+    assert timings
+    assert timings.phases["fail"].count == 1
+
+
+async def test_startup_report_is_logged(hass: HomeAssistant, caplog: pytest.LogCaptureFixture) -> None:
+    caplog.set_level(logging.INFO)
+    await run_powercalc_setup(
+        hass,
+        {CONF_ENTITY_ID: "light.a", CONF_NAME: "A", CONF_FIXED: {CONF_POWER: 20}},
+        {CONF_ENABLE_PERFORMANCE_STATS: True},
+    )
+    assert "Startup timings" not in caplog.text
+
+    await async_advance_time(hass, STARTUP_REPORT_DELAY)
+
+    assert "Startup timings, slowest phases: [" in caplog.text
+    assert "A=" in caplog.text
@@ -0,0 +1,100 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+from homeassistant.const import CONF_ENTITIES, CONF_ENTITY_ID, CONF_NAME, STATE_OFF, STATE_ON
+from homeassistant.core import Event, EventStateChangedData, HomeAssistant
+import pytest
+
+from custom_components.powercalc.const import CONF_FIXED, CONF_POWER, CONF_STANDBY_POWER
+from custom_components.powercalc.state_dispatcher import async_get_state_dispatcher, async_track_source_state_change
+from custom_components.powercalc.strategy.light_state import LightState, get_light_state
+from tests.common import assert_entity_state, run_powercalc_setup, set_states
+
+
+async def test_listeners_share_one_subscription(hass: HomeAssistant) -> None:
+    listener_a = AsyncMock()
+    listener_b = AsyncMock()
+    remove_a = async_track_source_state_change(hass, ["switch.test", "switch.other"], listener_a)
+    remove_b = async_track_source_state_change(hass, ["Switch.Test"], listener_b)
+
+    dispatcher = async_get_state_dispatcher(hass)
+    assert dispatcher.tracked_entities == {"switch.test", "switch.other"}
+
+    await set_states(hass, [("switch.test", STATE_ON)])
+    assert listener_a.call_count == 1
+    assert listener_b.call_count == 1
+
+    remove_a()
+    assert dispatcher.tracked_entities == {"switch.test"}
+    remove_b()
+    assert dispatcher.tracked_entities == set()
+
+    await set_states(hass, [("switch.test", STATE_OFF)])
+    assert listener_a.call_count == 1
+
+
+async def test_failing_listener_does_not_block_others(hass: HomeAssistant, caplog: pytest.LogCaptureFixture) -> None:
+    failing_listener = AsyncMock(side_effect=ValueError("boom"))
+    listener = AsyncMock()
+    async_track_source_state_change(hass, ["switch.test"], failing_listener)
+    async_track_source_state_change(hass, ["switch.test"], listener)
+
+    await set_states(hass, [("switch.test", STATE_ON)])
+
+    assert listener.call_count == 1
+    assert "Error handling state change of switch.test" in caplog.text
+
+
+async def test_slow_listener_does_not_delay_others(hass: HomeAssistant) -> None:
+    release = asyncio.Event()
+
+    async def slow_listener(_: Event[EventStateChangedData]) -> None:
+        await release.wait()
+
+    listener = AsyncMock()
+    async_track_source_state_change(hass, ["switch.test"], slow_listener)
+    async_track_source_state_change(hass, ["switch.test"], listener)
+
+    hass.states.async_set("switch.test", STATE_ON)
+    await asyncio.sleep(0)
+    assert listener.call_count == 1
+
+    release.set()
+    await hass.async_block_till_done()
+
+
+async def test_listeners_share_light_state_per_event(hass: HomeAssistant) -> None:
+    light_states: list[LightState] = []
+
+    async def listener(event: Event[EventStateChangedData]) -> None:
+        light_states.append(get_light_state(event.data["new_state"]))
+
+    async_track_source_state_change(hass, ["light.test"], listener)
+    async_track_source_state_change(hass, ["light.test"], listener)
+
+    await set_states(hass, [("light.test", STATE_ON)])
+    assert len(light_states) == 2
+    assert light_states[0] is light_states[1]
+    # Nothing is kept around once the event is handled
+    assert get_light_state(hass.states.get("light.test")) is not light_states[0]
+
+
+async def test_sensors_sharing_source_entity(hass: HomeAssistant) -> None:
+    await run_powercalc_setup(
+        hass,
+        {
+            CONF_ENTITIES: [
+                {CONF_ENTITY_ID: "light.test", CONF_FIXED: {CONF_POWER: 20}, CONF_NAME: "A"},
+                {CONF_ENTITY_ID: "light.test", CONF_FIXED: {CONF_POWER: 30}, CONF_STANDBY_POWER: 1, CONF_NAME: "B"},
+            ],
+        },
+    )
+    assert "light.test" in async_get_state_dispatcher(hass).tracked_entities
+
+    await set_states(hass, [("light.test", STATE_ON)])
+    assert_entity_state(hass, "sensor.a_power", "20.00")
+    assert_entity_state(hass, "sensor.b_power", "30.00")
+
+    await set_states(hass, [("light.test", STATE_OFF)])
+    assert_entity_state(hass, "sensor.a_power", "0.00")
+    assert_entity_state(hass, "sensor.b_power", "1.00")
@@ -0,0 +1,174 @@
+from unittest.mock import patch
+
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import TemplateError
+from homeassistant.helpers.template import Template
+import pytest
+
+from custom_components.powercalc.template_cache import (
+    FALLBACK,
+    CachedTemplate,
+    cache_template,
+    compile_predicate,
+    is_tracked_by_render_info,
+)
+from tests.common import set_states
+
+
+@pytest.mark.parametrize(
+    "template,states,expected",
+    [
+        ("{{ is_state('switch.test', 'on') }}", [("switch.test", STATE_ON)], True),
+        ("{{ is_state('switch.test', 'on') }}", [("switch.test", STATE_OFF)], False),
+        ("{{ is_state('switch.test', 'on') }}", [], False),
+        ("{{ not is_state('switch.test', 'on') }}", [("switch.test", STATE_OFF)], True),
+        ("{{ is_state('media_player.test', ['playing', 'paused']) }}", [("media_player.test", "paused")], True),
+        (
+            "{{ is_state_attr('light.test', 'color_mode', 'hs') }}",
+            [("light.test", STATE_ON, {"color_mode": "hs"})],
+            True,
+        ),
+        ("{{ is_state_attr('light.test', 'color_mode', 'hs') }}", [("light.test", STATE_ON)], False),
+        ("{{ states('sensor.test') == 'heat' }}", [("sensor.test", "heat")], True),
+        ("{{ states('sensor.test') != 'unknown' }}", [], False),
+        ("{{ states('sensor.test') | float(0) > 10 }}", [("sensor.test", "12.5")], True),
+        ("{{ states('sensor.test') | float(0) > 10 }}", [("sensor.test", "foo")], False),
+        ("{{ states('sensor.test') | float <= 10 }}", [("sensor.test", "10")], True),
+    ],
+)
+async def test_compiled_predicate_matches_jinja(
+    hass: HomeAssistant,
+    template: str,
+    states: list[tuple],
+    expected: bool,
+) -> None:
+    await set_states(hass, states)
+
+    predicate = compile_predicate(template)
+    assert predicate is not None
+    assert predicate(hass) == expected
+    assert Template(template, hass).async_render() == expected
+
+
+@pytest.mark.parametrize(
+    "template",
+    [
+        "{{ is_state('switch.test', 'on') and is_state('switch.test2', 'on') }}",
+        "{{ states('sensor.test') > 10 }}",
+        "{{ states('sensor.test') | float(0) > states('sensor.other') | float(0) }}",
+        "{{ is_state(entity, 'on') }}",
+        "{{ states('sensor.test') | int(0) > 10 }}",
+        "{{ states('sensor.test') == true }}",
+        "{{ is_state('switch.test') }}",
+        "{{ is_state('switch.test', 1) }}",
+        "{{ is_state_attr('light.test', 'color_mode') }}",
+        "{{ states('sensor.test') | float(0) > 'abc' }}",
+        "{{ states('sensor.test') | float('x') > 10 }}",
+    ],
+)
+async def test_unsupported_templates_are_not_compiled(template: str) -> None:
+    assert compile_predicate(template) is None
+
+
+async def test_numeric_predicate_without_default_falls_back_to_jinja(hass: HomeAssistant) -> None:
+    await set_states(hass, [("sensor.test", "foo")])
+    predicate = compile_predicate("{{ states('sensor.test') | float > 10 }}")
+    assert predicate is not None
+    assert predicate(hass) is FALLBACK
+
+    template = CachedTemplate(Template("{{ states('sensor.test') | float > 10 }}", hass))
+    with pytest.raises(TemplateError):
+        template.async_render()
+
+
+async def test_template_is_only_rendered_when_referenced_entity_changes(hass: HomeAssistant) -> None:
+    await set_states(hass, [("input_number.test", "20"), ("input_number.other", "5")])
+    template = CachedTemplate(Template("{{ states('input_number.test') | float * 2 }}", hass))
+
+    with patch.object(Template, "async_render_to_info", wraps=template.template.async_render_to_info) as render:
+        assert template.async_render() == 40
+        assert template.async_render() == 40
+        await set_states(hass, [("input_number.other", "6")])
+        assert template.async_render() == 40
+        assert render.call_count == 1
+
+        await set_states(hass, [("input_number.test", "30")])
+        assert template.async_render() == 60
+        assert render.call_count == 2
+
+
+async def test_template_without_entities_is_rendered_once(hass: HomeAssistant) -> None:
+    template = CachedTemplate(Template("{{ 10 * 2 }}", hass))
+
+    with patch.object(Template, "async_render_to_info", wraps=template.template.async_render_to_info) as render:
+        assert template.async_render() == 20
+        assert template.async_render() == 20
+        assert render.call_count == 1
+
+
+@pytest.mark.parametrize(
+    "template",
+    [
+        "{{ device_attr('abc', 'name') }}",
+        "{{ area_entities('kitchen') | count }}",
+        "{{ label_entities('lights') | count }}",
+        "{{ [1, 2, 3] | random > 0 }}",
+        "{{ states('input_number.test') | float + (area_devices('kitchen') | count) }}",
+        "{{ ['light.test'] | map('area_name') | list | count }}",
+        "{{ some_future_helper('abc') }}",
+    ],
+)
+async def test_template_using_untracked_helpers_is_not_cached(hass: HomeAssistant, template: str) -> None:
+    await set_states(hass, [("input_number.test", "20")])
+    cached_template = CachedTemplate(Template(template, hass))
+
+    with (
+        patch.object(Template, "async_render", autospec=True, return_value=1) as render,
+        patch.object(Template, "async_render_to_info") as render_to_info,
+    ):
+        cached_template.async_render()
+        cached_template.async_render()
+        assert render.call_count == 2
+        render_to_info.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "template,expected",
+    [
+        ("{{ states('sensor.test') | float * 2 }}", True),
+        ("{% for i in range(3) %}{{ is_state('light.test', 'on') and loop.index > i }}{% endfor %}", True),
+        ("{{ states.light | selectattr('state', 'eq', 'on') | list | count }}", True),
+        ("{{ now().hour > 7 }}", True),
+        ("{{ device_attr('abc', 'name') }}", False),
+        ("{{ ['light.test'] | select('is_device_attr', 'name', 'x') | list }}", False),
+        ("{{ [1, 2] | shuffle }}", False),
+        ("{% if %}", False),
+    ],
+)
+def test_is_tracked_by_render_info(template: str, expected: bool) -> None:
+    assert is_tracked_by_render_info(template) is expected
+
+
+async def test_static_template_is_rendered_once(hass: HomeAssistant) -> None:
+    template = CachedTemplate(Template("on", hass))
+
+    with patch.object(Template, "async_render_to_info", wraps=template.template.async_render_to_info) as render:
+        assert template.async_render() == "on"
+        assert template.async_render() == "on"
+        assert render.call_count == 1
+
+
+async def test_time_dependent_template_is_not_cached(hass: HomeAssistant) -> None:
+    template = CachedTemplate(Template("{{ now().year > 2000 }}", hass))
+
+    with patch.object(Template, "async_render_to_info", wraps=template.template.async_render_to_info) as render:
+        assert template.async_render() is True
+        assert template.async_render() is True
+        assert render.call_count == 2
+
+
+async def test_cache_template_leaves_other_values_untouched(hass: HomeAssistant) -> None:
+    assert cache_template(20) == 20
+    assert cache_template(None) is None
+    assert isinstance(cache_template(Template("{{ 20 }}", hass)), CachedTemplate)
@@ -1,15 +1,25 @@
 from collections.abc import Callable, Mapping
+from pathlib import Path
 from typing import Any
 
 import pytablewriter
 
-from utils.library.common import find_model_json_files
+from utils.library.common import PROFILE_DIRECTORY
+from utils.library.library_store import LibraryStore, load_library_store
 
 
-def build_list(filter_callback: Callable[[dict[str, Any]], bool] | None, fields: list[str]) -> list[Mapping[str, str]]:
+def build_list(
+    filter_callback: Callable[[dict[str, Any]], bool] | None,
+    fields: list[str],
+    store: LibraryStore | None = None,
+) -> list[Mapping[str, str]]:
     """Count occurrences of each measure_device in all model.json files."""
+    if store is None:
+        with load_library_store(Path(PROFILE_DIRECTORY), luts=False) as store:
+            return build_list(filter_callback, fields, store)
+
     listing: list[Mapping[str, str]] = []
-    for model_data in find_model_json_files():
+    for model_data in store.models():
         json_data = model_data["data"]
         if filter_callback and not filter_callback(json_data):
             continue
@@ -1,9 +1,12 @@
-from collections.abc import Generator
+from collections.abc import Sequence
+import csv
 import gzip
-import json
+import io
 import os
 from pathlib import Path
-from typing import Any, TextIO
+from typing import TextIO
+
+import numpy as np
 
 PROFILE_DIRECTORY = os.path.join(os.path.dirname(__file__), "../../profile_library")
 
@@ -20,34 +23,34 @@ def open_lut_file(path: Path) -> TextIO:
     return path.open(encoding="utf-8-sig")
 
 
-def _path_part(path_parts: list[str], index: int) -> str | None:
-    """Return the path part at the given index, when available."""
-    return path_parts[index] if len(path_parts) > index else None
-
-
-def _read_model_json(directory: str, root: str, file_name: str) -> dict[str, Any]:
-    """Read a single model.json file and enrich it with the profile identifiers from its path."""
-    full_path = os.path.join(root, file_name)
-    path_parts = os.path.relpath(root, directory).split(os.sep)
-
-    with open(full_path) as f:
-        data = json.load(f)
+def read_lut_columns(path: Path, columns: Sequence[str]) -> np.ndarray:
+    """Read columns of a LUT CSV into a float array, with a row per measurement and a column per name.
 
-    return {
-        "full_path": full_path,
-        "data": data,
-        "manufacturer": _path_part(path_parts, 0),
-        "model": _path_part(path_parts, 1),
-        "sub_profile": _path_part(path_parts, 2),
-    }
-
-
-def find_model_json_files(directory: str | None = None) -> Generator[dict[str, Any]]:
-    """Recursively find all model.json files in a directory."""
-    if directory is None:
-        directory = PROFILE_DIRECTORY
-
-    for root, _, files in os.walk(directory):
-        for file in files:
-            if file == "model.json":
-                yield _read_model_json(directory, root, file)
+    The values are parsed by NumPy in one go, which is many times faster than going through the
+    csv module row by row. Blank lines are skipped like csv.DictReader does, so row `i` is the
+    `i`-th record after the header.
+    """
+    with open_lut_file(path) as lut_file:
+        header = next(csv.reader(lut_file), [])
+        body = lut_file.read()
+
+    return parse_lut_columns(path, header, body, columns)
+
+
+def parse_lut_columns(path: Path, header: Sequence[str], body: str, columns: Sequence[str]) -> np.ndarray:
+    """Parse columns of a LUT CSV already split into its header and body, see `read_lut_columns`."""
+    missing_columns = set(columns) - set(header)
+    if missing_columns:
+        missing = ", ".join(sorted(missing_columns))
+        raise ValueError(f"{path}: missing required columns: {missing}")
+
+    if not body.strip():
+        return np.empty((0, len(columns)))
+
+    return np.loadtxt(
+        io.StringIO(body),
+        delimiter=",",
+        comments=None,
+        usecols=[header.index(column) for column in columns],
+        ndmin=2,
+    )
@@ -1,15 +1,12 @@
 from __future__ import annotations
 
 import argparse
-import csv
 from dataclasses import dataclass
-import gzip
 from pathlib import Path
-from typing import TextIO
 
 from utils.library.common import PROFILE_DIRECTORY
+from utils.library.library_store import LibraryStore, load_library_store
 
-CSV_PATTERNS = ("*.csv", "*.csv.gz")
 SORT_MODES = ("path", "rows")
 
 
@@ -19,33 +16,18 @@ class CsvRowCount:
     rows: int
 
 
-def scan_library(root: Path) -> list[CsvRowCount]:
-    """Count the data rows of every CSV file below root."""
-    return [count_csv_rows(path, root=root) for path in find_csv_files(root)]
+def scan_library(root: Path, store: LibraryStore | None = None) -> list[CsvRowCount]:
+    """Count the data rows (excluding the header) of every plain and gzipped CSV file below root."""
+    if store is None:
+        with load_library_store(root) as store:
+            return scan_library(root, store)
 
-
-def find_csv_files(root: Path) -> list[Path]:
-    """Return all plain and gzipped CSV files below root."""
-    paths = [path for pattern in CSV_PATTERNS for path in root.rglob(pattern)]
-    return sorted(paths, key=lambda path: path.as_posix())
-
-
-def count_csv_rows(path: Path, *, root: Path | None = None) -> CsvRowCount:
-    """Count the data rows (excluding the header) in a plain or gzipped CSV file."""
-    with open_csv_file(path) as csv_file:
-        reader = csv.reader(csv_file)
-        next(reader, None)  # header
-        rows = sum(1 for _ in reader)
-
-    display_path = path.relative_to(root).as_posix() if root and path.is_relative_to(root) else path.as_posix()
-    return CsvRowCount(path=display_path, rows=rows)
-
-
-def open_csv_file(path: Path) -> TextIO:
-    if path.suffix == ".gz":
-        return gzip.open(path, "rt")
-
-    return path.open()
+    results = []
+    for lut in store.luts():
+        if lut.rows is None:
+            raise ValueError(f"{lut.path}: {lut.error}")
+        results.append(CsvRowCount(path=lut.path, rows=lut.rows))
+    return results
 
 
 def sort_results(results: list[CsvRowCount], sort: str) -> list[CsvRowCount]:
@@ -80,12 +62,18 @@ def parse_args() -> argparse.Namespace:
         default="path",
         help="Sort the report by file path or by row count (descending).",
     )
+    parser.add_argument(
+        "--store",
+        type=Path,
+        help="SQLite library store to keep between runs, only the CSV files changed since are read again.",
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    results = sort_results(scan_library(Path(args.path)), args.sort)
+    with load_library_store(Path(args.path), args.store) as store:
+        results = sort_results(scan_library(Path(args.path), store), args.sort)
     print(format_report(results))  # noqa: T201
 
 
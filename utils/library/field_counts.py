@@ -1,17 +1,21 @@
 import argparse
 from collections import Counter
+from pathlib import Path
 
-from utils.library.common import find_model_json_files
+from utils.library.common import PROFILE_DIRECTORY
+from utils.library.library_store import LibraryStore, load_library_store
 
 
-def count_field(field_name: str) -> Counter[str]:
+def count_field(field_name: str, store: LibraryStore | None = None) -> Counter[str]:
     """Count occurrences of each value for the given field in all model.json files."""
-    counter: Counter[str] = Counter()
+    if store is None:
+        with load_library_store(Path(PROFILE_DIRECTORY), luts=False) as store:
+            return count_field(field_name, store)
 
-    for model_data in find_model_json_files():
-        value = model_data["data"].get(field_name)
+    counter: Counter[str] = Counter()
+    for value, count in store.count_field_values(field_name):
         if value:
-            counter[value] += 1
+            counter[value] += count
 
     return counter
 
@@ -24,9 +28,15 @@ def main() -> None:
         default="measure_device",
         help="The profile field to count (default: measure_device)",
     )
+    parser.add_argument(
+        "--store",
+        type=Path,
+        help="SQLite library store to keep between runs, only the files changed since are read again.",
+    )
     args = parser.parse_args()
 
-    counts = count_field(args.field)
+    with load_library_store(Path(PROFILE_DIRECTORY), args.store, luts=False) as store:
+        counts = count_field(args.field, store)
 
     # Display sorted results
     print("\nCounts:")  # noqa: T201
@@ -0,0 +1,188 @@
+"""Columnar store of the facts the library utilities report on, kept in SQLite.
+
+The reports, and the library.json generation, used to walk the profile library and parse every
+model.json and LUT file on their own. The store reads each file once, into a table of models and a
+table of LUT files, and the scripts query these instead. Files are tracked by the hash of their
+content, so updating a store kept on disk only reads the files added or changed since.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from dataclasses import fields
+from functools import lru_cache
+import hashlib
+import json
+from pathlib import Path
+import sqlite3
+from typing import Any, Self
+
+from utils.library.lut_facts import LutFacts, find_csv_files, read_luts
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS models (
+    path TEXT PRIMARY KEY,
+    manufacturer TEXT,
+    model TEXT,
+    sub_profile TEXT,
+    content_hash TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS luts (
+    path TEXT PRIMARY KEY,
+    color_mode TEXT,
+    content_hash TEXT NOT NULL,
+    rows INTEGER,
+    min_watt REAL,
+    max_watt REAL,
+    quality_score REAL,
+    error TEXT,
+    key_ranges TEXT
+);
+"""
+
+
+class LibraryStore:
+    """Facts of the model.json and LUT files below root, stored in a SQLite database.
+
+    The database is kept in memory unless a path is given. It is emptied when it was built for another
+    root or by another version of the scripts reading the files.
+    """
+
+    def __init__(self, root: Path, path: Path | str = ":memory:") -> None:
+        self.root = root
+        if isinstance(path, Path):
+            path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(SCHEMA)
+        self._reset_outdated()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def update(self, *, jobs: int | None = None, luts: bool = True) -> int:
+        """Read the files added or changed since the last update, and forget the removed ones.
+
+        Returns the number of files read. LUT files are read in worker processes unless jobs is 1,
+        and skipped altogether without luts, for reports on the model.json files only.
+        """
+        with self._connection:
+            changed = self._update_models()
+            if luts:
+                changed += self._update_luts(jobs)
+        return changed
+
+    def models(self) -> Iterator[dict[str, Any]]:
+        """Yield the model.json files with the profile identifiers from their path, ordered by path."""
+        query = "SELECT path, manufacturer, model, sub_profile, data FROM models ORDER BY path"
+        for path, manufacturer, model, sub_profile, data in self._connection.execute(query):
+            yield {
+                "full_path": str(self.root / path),
+                "data": json.loads(data),
+                "manufacturer": manufacturer,
+                "model": model,
+                "sub_profile": sub_profile,
+            }
+
+    def count_field_values(self, field_name: str) -> list[tuple[Any, int]]:
+        """Count the models per value of a top level model.json field, missing fields count as None."""
+        json_path = '$."' + field_name.replace('"', '\\"') + '"'
+        query = "SELECT json_extract(data, ?) AS value, COUNT(*) FROM models GROUP BY value ORDER BY value"
+        return self._connection.execute(query, (json_path,)).fetchall()
+
+    def luts(self, directory: str = "") -> list[LutFacts]:
+        """Return the LUT files below a directory relative to the root, ordered by path."""
+        columns = ", ".join(field.name for field in fields(LutFacts))
+        query = f"""
+            SELECT {columns} FROM luts
+            WHERE :directory = '' OR substr(path, 1, length(:directory) + 1) = :directory || '/'
+            ORDER BY path
+        """  # noqa: S608
+        return [LutFacts.from_row(row) for row in self._connection.execute(query, {"directory": directory})]
+
+    def _reset_outdated(self) -> None:
+        fingerprint = hashlib.sha256(get_source_digest() + str(self.root.resolve()).encode()).hexdigest()
+        row = self._connection.execute("SELECT value FROM metadata WHERE key = 'fingerprint'").fetchone()
+        if row and row[0] == fingerprint:
+            return
+
+        # Recreated rather than emptied, the tables may have been created with other columns
+        self._connection.executescript("DROP TABLE models; DROP TABLE luts;" + SCHEMA)
+        with self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO metadata VALUES ('fingerprint', ?)", (fingerprint,))
+
+    def _update_models(self) -> int:
+        known = dict(self._connection.execute("SELECT path, content_hash FROM models"))
+        found = set()
+        changed = 0
+        for model_path in sorted(self.root.rglob("model.json")):
+            path = model_path.relative_to(self.root).as_posix()
+            found.add(path)
+            content = model_path.read_bytes()
+            content_hash = hashlib.sha256(content).hexdigest()
+            if known.get(path) == content_hash:
+                continue
+
+            # manufacturer, model and sub profile, from the directories the model.json is in
+            parts = [*path.split("/")[:-1], None, None, None][:3]
+            self._connection.execute(
+                "INSERT OR REPLACE INTO models VALUES (?, ?, ?, ?, ?, ?)",
+                (path, *parts, content_hash, json.dumps(json.loads(content))),
+            )
+            changed += 1
+
+        self._forget("models", known.keys() - found)
+        return changed
+
+    def _update_luts(self, jobs: int | None) -> int:
+        known = dict(self._connection.execute("SELECT path, content_hash FROM luts"))
+        found = set()
+        pending: list[tuple[Path, str, str]] = []
+        for lut_path in find_csv_files(self.root):
+            path = lut_path.relative_to(self.root).as_posix()
+            found.add(path)
+            content_hash = hashlib.sha256(lut_path.read_bytes()).hexdigest()
+            if known.get(path) != content_hash:
+                pending.append((lut_path, path, content_hash))
+
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO luts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (facts.to_row() for facts in read_luts(pending, jobs)),
+        )
+        self._forget("luts", known.keys() - found)
+        return len(pending)
+
+    def _forget(self, table: str, removed: set[str]) -> None:
+        """Delete the rows of the files which were removed."""
+        self._connection.executemany(f"DELETE FROM {table} WHERE path = ?", ((path,) for path in removed))  # noqa: S608
+
+
+def load_library_store(
+    root: Path,
+    path: Path | None = None,
+    *,
+    jobs: int | None = None,
+    luts: bool = True,
+) -> LibraryStore:
+    """Open the store of root, in memory unless a path is given, and bring it up to date."""
+    store = LibraryStore(root, path or ":memory:")
+    store.update(jobs=jobs, luts=luts)
+    return store
+
+
+@lru_cache(maxsize=1)
+def get_source_digest() -> bytes:
+    digest = hashlib.sha256()
+    for module in ("common.py", "library_store.py", "lut_facts.py", "scan_lut_quality.py", "validate_lut_files.py"):
+        digest.update((Path(__file__).parent / module).read_bytes())
+    return digest.digest()
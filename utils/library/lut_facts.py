@@ -0,0 +1,138 @@
+"""Facts of the LUT files the library utilities report on, read with a single pass over each file.
+
+A LUT file used to be opened once for its max power, once for its color mode and once more for its
+quality score. `read_lut_facts` parses it once for all of these, `read_luts` does so for many files
+in worker processes.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+import csv
+from dataclasses import astuple, dataclass
+import io
+import json
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from utils.library.common import open_lut_file, parse_lut_columns
+from utils.library.scan_lut_quality import SUPPORTED_LUT_FILES, analyze_lut_values, get_lut_columns, get_lut_mode
+from utils.library.validate_lut_files import get_color_mode
+
+CSV_PATTERNS = ("*.csv", "*.csv.gz")
+# LUT files read by a single worker process at a time
+LUTS_PER_TASK = 16
+READ_ERRORS = (OSError, EOFError, UnicodeDecodeError, csv.Error)
+PARSE_ERRORS = (ValueError, *READ_ERRORS)
+# Numeric key columns of the LUT files per color mode, the watt column is read along
+KEY_COLUMNS = {
+    "brightness": ("bri",),
+    "color_temp": ("bri", "mired"),
+    "hs": ("bri", "hue", "sat"),
+    "effect": ("bri",),
+}
+
+
+@dataclass(frozen=True)
+class LutFacts:
+    """Facts of a single LUT file, with its path relative to the library root."""
+
+    path: str
+    color_mode: str | None
+    content_hash: str
+    # Records after the header, None when the file can't be read at all
+    rows: int | None
+    min_watt: float | None
+    max_watt: float | None
+    # Only for the LUT files scored by scan_lut_quality
+    quality_score: float | None
+    # Why the file isn't a well formed LUT, the watt range then comes from the rows which could be parsed
+    error: str | None
+    # Lowest and highest value of each key column, None when the key columns can't be parsed
+    key_ranges: dict[str, list[float]] | None
+
+    @classmethod
+    def from_row(cls, row: Sequence[Any]) -> LutFacts:
+        *values, key_ranges = row
+        return cls(*values, json.loads(key_ranges) if key_ranges is not None else None)
+
+    def to_row(self) -> tuple[Any, ...]:
+        """Values of the luts table columns, the key ranges are stored as JSON."""
+        key_ranges = json.dumps(self.key_ranges) if self.key_ranges is not None else None
+        return *astuple(self)[:-1], key_ranges
+
+
+def find_csv_files(root: Path) -> list[Path]:
+    """Return all plain and gzipped CSV files below root."""
+    paths = [path for pattern in CSV_PATTERNS for path in root.rglob(pattern)]
+    return sorted(paths, key=lambda path: path.as_posix())
+
+
+def read_luts(pending: Sequence[tuple[Path, str, str]], jobs: int | None) -> Iterator[LutFacts]:
+    """Read the facts of (LUT file, relative path, content hash) triples, in worker processes unless jobs is 1."""
+    if jobs == 1 or len(pending) <= 1:
+        yield from (read_lut_facts(*args) for args in pending)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(read_lut_facts, *zip(*pending, strict=True), chunksize=LUTS_PER_TASK)
+
+
+def read_lut_facts(lut_path: Path, path: str, content_hash: str) -> LutFacts:
+    """Read a LUT file once, for its row count, watt and key ranges and, for the scored modes, quality score."""
+    color_mode = get_color_mode(lut_path)
+    try:
+        with open_lut_file(lut_path) as lut_file:
+            header = next(csv.reader(lut_file), [])
+            body = lut_file.read()
+    except READ_ERRORS as error:
+        return LutFacts(path, color_mode, content_hash, None, None, None, None, str(error), None)
+
+    # A record per line like csv.reader yields, blank ones included, LUT values are never quoted multiline strings
+    rows = body.count("\n") + (bool(body) and not body.endswith("\n"))
+    key_columns = KEY_COLUMNS.get(color_mode or "", ())
+    quality_score = None
+    error = None
+    key_ranges = None
+    try:
+        if lut_path.name in SUPPORTED_LUT_FILES:
+            mode = get_lut_mode(lut_path)
+            values = parse_lut_columns(lut_path, header, body, get_lut_columns(mode))
+            quality_score = analyze_lut_values(values, mode, path=lut_path.as_posix()).score
+        else:
+            values = parse_lut_columns(lut_path, header, body, (*key_columns, "watt"))
+        watts = values[:, -1]
+        if len(values):
+            key_ranges = {column: get_key_range(values[:, position]) for position, column in enumerate(key_columns)}
+        else:
+            key_ranges = {}
+    except PARSE_ERRORS as parse_error:
+        error = str(parse_error)
+        watts = parse_watts_leniently(body)
+
+    # fmin and fmax skip NaN
+    min_watt = float(np.fmin.reduce(watts)) if len(watts) else None
+    max_watt = float(np.fmax.reduce(watts)) if len(watts) else None
+    return LutFacts(path, color_mode, content_hash, rows, min_watt, max_watt, quality_score, error, key_ranges)
+
+
+def get_key_range(values: np.ndarray) -> list[float]:
+    """Lowest and highest value of a key column, whole numbers as int like the integration reads the keys."""
+    bounds = (float(np.fmin.reduce(values)), float(np.fmax.reduce(values)))
+    return [int(bound) if bound.is_integer() else bound for bound in bounds]
+
+
+def parse_watts_leniently(body: str) -> np.ndarray:
+    """Parse the last column of every row which has a number there, skipping all others."""
+    watts = []
+    for row in csv.reader(io.StringIO(body)):
+        if not row:
+            continue
+        try:
+            watts.append(float(row[-1]))
+        except ValueError:
+            continue
+    return np.array(watts)
@@ -3,15 +3,20 @@ from __future__ import annotations
 import argparse
 from collections import defaultdict
 from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
 import csv
 from dataclasses import asdict, dataclass, replace
+from functools import lru_cache, partial
 import gzip
+import hashlib
 import json
 from pathlib import Path
 import sys
-from typing import TextIO
+from typing import Any, TextIO
 
-from utils.library.common import PROFILE_DIRECTORY, open_lut_file
+import numpy as np
+
+from utils.library.common import PROFILE_DIRECTORY, open_lut_file, read_lut_columns
 
 DEFAULT_MIN_SCORE = 80.0
 DEFAULT_MAX_ABSOLUTE_DEVIATION = 0.75
@@ -75,6 +80,25 @@ class LutPoint:
     line: int = 0
 
 
+@dataclass(frozen=True)
+class LutCurve:
+    """A single brightness curve of a LUT, sorted by brightness."""
+
+    mired: int | None
+    bri: np.ndarray
+    watt: np.ndarray
+    # 1 based line number of every point, see LutPoint.
+    lines: np.ndarray
+
+    def point(self, index: int) -> LutPoint:
+        return LutPoint(
+            bri=int(self.bri[index]),
+            mired=self.mired,
+            watt=float(self.watt[index]),
+            line=int(self.lines[index]),
+        )
+
+
 @dataclass(frozen=True)
 class LutQualityIssue:
     severity: str
@@ -110,15 +134,6 @@ class LutFixResult:
     fixed_points: int
 
 
-@dataclass(frozen=True)
-class CurveDeviation:
-    index: int
-    point: LutPoint
-    expected_watt: float
-    deviation: float
-    is_endpoint: bool = False
-
-
 def scan_library(
     root: Path,
     *,
@@ -126,18 +141,109 @@ def scan_library(
     max_absolute_deviation: float = DEFAULT_MAX_ABSOLUTE_DEVIATION,
     max_relative_deviation: float = DEFAULT_MAX_RELATIVE_DEVIATION,
     z_score: float = DEFAULT_Z_SCORE,
+    jobs: int | None = 1,
+    cache: LutQualityCache | None = None,
 ) -> list[LutQualityResult]:
-    """Scan all supported LUT files below root."""
-    return [
-        analyze_lut(
-            path,
-            root=root,
-            max_absolute_deviation=max_absolute_deviation,
-            max_relative_deviation=max_relative_deviation,
-            z_score=z_score,
+    """Scan all supported LUT files below root.
+
+    LUT files with a cached result are not analyzed again. The others are analyzed per profile
+    directory, spread over `jobs` worker processes, or one per CPU when None.
+    """
+    settings = {
+        "max_absolute_deviation": max_absolute_deviation,
+        "max_relative_deviation": max_relative_deviation,
+        "z_score": z_score,
+    }
+    paths = find_lut_files(root, mode=mode)
+    results: dict[Path, LutQualityResult] = {}
+    cache_keys: dict[Path, str] = {}
+    if cache is not None:
+        for path in paths:
+            cache_keys[path] = cache.create_key(path, settings)
+            cached = cache.get(cache_keys[path], get_display_path(path, root))
+            if cached is not None:
+                results[path] = cached
+
+    groups = group_by_profile_directory([path for path in paths if path not in results], root)
+    analyze = partial(analyze_luts, root=root, **settings)
+    if jobs == 1 or len(groups) < 2:
+        analyzed = list(map(analyze, groups))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            analyzed = list(executor.map(analyze, groups))
+
+    for group, group_results in zip(groups, analyzed, strict=True):
+        for path, result in zip(group, group_results, strict=True):
+            results[path] = result
+            if cache is not None:
+                cache.set(cache_keys[path], result)
+
+    return [results[path] for path in paths]
+
+
+def analyze_luts(paths: Sequence[Path], *, root: Path, **settings: float) -> list[LutQualityResult]:
+    """Analyze a batch of LUT files, the unit of work of a worker process."""
+    return [analyze_lut(path, root=root, **settings) for path in paths]
+
+
+def group_by_profile_directory(paths: Sequence[Path], root: Path) -> list[list[Path]]:
+    """Group LUT files per profile, including its sub profiles, keeping their order."""
+    groups: dict[tuple[str, ...], list[Path]] = defaultdict(list)
+    for path in paths:
+        parts = path.parent.relative_to(root).parts if path.is_relative_to(root) else path.parent.parts
+        groups[parts[:2]].append(path)
+    return list(groups.values())
+
+
+@lru_cache(maxsize=1)
+def get_script_digest() -> bytes:
+    return hashlib.sha256(Path(__file__).read_bytes()).digest()
+
+
+class LutQualityCache:
+    """Scan results stored on disk, keyed by the content hash of the LUT file.
+
+    The key also covers the scan settings and the source of this script, so results are never
+    reused after changing the thresholds or the analysis. Only the results of the LUT files seen
+    during the last scan are written back, which keeps the file from growing with stale entries.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.hits = 0
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._seen: dict[str, dict[str, Any]] = {}
+        if path.exists():
+            with path.open() as cache_file:
+                self._entries = json.load(cache_file)
+
+    @staticmethod
+    def create_key(path: Path, settings: dict[str, float]) -> str:
+        digest = hashlib.sha256(get_script_digest())
+        digest.update(json.dumps(settings, sort_keys=True).encode())
+        digest.update(path.read_bytes())
+        return digest.hexdigest()
+
+    def get(self, key: str, display_path: str) -> LutQualityResult | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        self.hits += 1
+        self._seen[key] = entry
+        return LutQualityResult(
+            **{**entry, "path": display_path, "issues": [LutQualityIssue(**issue) for issue in entry["issues"]]},
         )
-        for path in find_lut_files(root, mode=mode)
-    ]
+
+    def set(self, key: str, result: LutQualityResult) -> None:
+        entry = asdict(result)
+        del entry["path"]
+        self._seen[key] = entry
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("w") as cache_file:
+            json.dump(self._seen, cache_file, sort_keys=True)
 
 
 def score_profile_directory(model_directory: Path) -> dict[str, float]:
@@ -151,10 +257,18 @@ def score_profile_directory(model_directory: Path) -> dict[str, float]:
     exists to keep CI green on LUTs that were reviewed by hand, several of which are annotated
     as needing a remeasure. Those are exactly the profiles the published score should expose.
     """
+    return summarize_scores(
+        (get_lut_mode(path), analyze_lut(path).score)
+        for file_name in SUPPORTED_LUT_FILES
+        for path in sorted(model_directory.rglob(file_name))
+    )
+
+
+def summarize_scores(lut_scores: Iterable[tuple[str, float]]) -> dict[str, float]:
+    """Combine the scores of the LUT files of a profile, see `score_profile_directory`."""
     scores: dict[str, list[float]] = defaultdict(list)
-    for file_name in SUPPORTED_LUT_FILES:
-        for path in sorted(model_directory.rglob(file_name)):
-            scores[get_lut_mode(path)].append(analyze_lut(path).score)
+    for mode, score in lut_scores:
+        scores[mode].append(score)
 
     if not scores:
         return {}
@@ -224,15 +338,33 @@ def analyze_lut(
 ) -> LutQualityResult:
     """Score a LUT file by looking for non-smooth points."""
     mode = get_lut_mode(path)
-    points = read_lut(path, mode)
-    curves = group_points(points, mode)
+    return analyze_lut_values(
+        read_lut_columns(path, get_lut_columns(mode)),
+        mode,
+        path=get_display_path(path, root),
+        max_absolute_deviation=max_absolute_deviation,
+        max_relative_deviation=max_relative_deviation,
+        z_score=z_score,
+    )
+
+
+def analyze_lut_values(
+    values: np.ndarray,
+    mode: str,
+    *,
+    path: str,
+    max_absolute_deviation: float = DEFAULT_MAX_ABSOLUTE_DEVIATION,
+    max_relative_deviation: float = DEFAULT_MAX_RELATIVE_DEVIATION,
+    z_score: float = DEFAULT_Z_SCORE,
+) -> LutQualityResult:
+    """Score LUT values already read with the columns of `get_lut_columns`."""
+    curves = group_curves(values, mode)
     issues: list[LutQualityIssue] = []
     deviations: list[float] = []
 
-    for curve_key, curve in curves.items():
+    for curve in curves:
         curve_issues, curve_deviations = analyze_brightness_curve(
             mode,
-            curve_key,
             curve,
             max_absolute_deviation=max_absolute_deviation,
             max_relative_deviation=max_relative_deviation,
@@ -243,13 +375,12 @@ def analyze_lut(
 
     max_deviation = max(deviations, default=0.0)
     mean_deviation = sum(deviations) / len(deviations) if deviations else 0.0
-    score = calculate_score(issues, max_deviation, mean_deviation, points)
-    display_path = path.relative_to(root).as_posix() if root and path.is_relative_to(root) else path.as_posix()
+    score = calculate_score(issues, max_deviation, mean_deviation, values[:, -1])
 
     return LutQualityResult(
-        path=display_path,
+        path=path,
         score=score,
-        rows=len(points),
+        rows=len(values),
         brightness_curves=len(curves),
         max_deviation=round(max_deviation, 3),
         mean_deviation=round(mean_deviation, 3),
@@ -270,25 +401,27 @@ def validate_lut_mode(mode: str) -> None:
         raise ValueError(f"Unsupported LUT mode: {mode}. Expected one of: {supported_modes}")
 
 
+def get_display_path(path: Path, root: Path | None) -> str:
+    return path.relative_to(root).as_posix() if root and path.is_relative_to(root) else path.as_posix()
+
+
+def get_lut_columns(mode: str) -> tuple[str, ...]:
+    """Columns read for a color mode, watt always comes last."""
+    return ("bri", "watt") if mode == "brightness" else ("bri", "mired", "watt")
+
+
 def read_lut(path: Path, mode: str) -> list[LutPoint]:
     """Read a LUT from plain or gzipped CSV."""
-    with open_lut_file(path) as lut_file:
-        reader = csv.DictReader(lut_file)
-        required_headers = {"bri", "watt"} if mode == "brightness" else {"bri", "mired", "watt"}
-        missing_headers = required_headers - set(reader.fieldnames or [])
-        if missing_headers:
-            missing = ", ".join(sorted(missing_headers))
-            raise ValueError(f"{path}: missing required columns: {missing}")
-
-        return [
-            LutPoint(
-                bri=int(row["bri"]),
-                mired=int(row["mired"]) if mode == "color_temp" else None,
-                watt=float(row["watt"]),
-                line=line_number,
-            )
-            for line_number, row in enumerate(reader, start=2)
-        ]
+    values = read_lut_columns(path, get_lut_columns(mode))
+    return [
+        LutPoint(
+            bri=int(row[0]),
+            mired=int(row[1]) if mode == "color_temp" else None,
+            watt=row[-1],
+            line=line_number,
+        )
+        for line_number, row in enumerate(values.tolist(), start=2)
+    ]
 
 
 def write_lut(path: Path, fieldnames: Sequence[str], rows: Sequence[dict[str, str]]) -> None:
@@ -349,137 +482,120 @@ def format_fixed_watt(value: float) -> str:
     return f"{value:.3f}".rstrip("0").rstrip(".")
 
 
-def group_points(points: Iterable[LutPoint], mode: str) -> dict[int, list[LutPoint]]:
-    if mode == "brightness":
-        return {0: sorted(points, key=lambda point: point.bri)}
+def group_curves(values: np.ndarray, mode: str) -> list[LutCurve]:
+    """Split the values read by `read_lut_columns` into brightness curves, one per mired for color_temp.
 
-    curves: dict[int, list[LutPoint]] = defaultdict(list)
-    for point in points:
-        if point.mired is None:
-            raise ValueError("Cannot group color_temp curve without mired values")
-        curves[point.mired].append(point)
+    Curves are sorted by brightness, keeping the file order of duplicate brightness levels.
+    """
+    lines = np.arange(2, len(values) + 2)
+    if mode == "brightness":
+        order = np.argsort(values[:, 0], kind="stable")
+        return [LutCurve(mired=None, bri=values[order, 0], watt=values[order, 1], lines=lines[order])]
 
-    return {mired: sorted(curve, key=lambda point: point.bri) for mired, curve in sorted(curves.items())}
+    order = np.lexsort((values[:, 0], values[:, 1]))
+    values = values[order]
+    lines = lines[order]
+    starts = np.flatnonzero(np.diff(values[:, 1])) + 1
+    return [
+        LutCurve(mired=int(curve[0, 1]), bri=curve[:, 0], watt=curve[:, 2], lines=curve_lines)
+        for curve, curve_lines in zip(np.split(values, starts), np.split(lines, starts), strict=True)
+        if len(curve)
+    ]
 
 
 def analyze_brightness_curve(
     mode: str,
-    curve_key: int,
-    curve: Sequence[LutPoint],
+    curve: LutCurve,
     *,
     max_absolute_deviation: float,
     max_relative_deviation: float,
     z_score: float,
 ) -> tuple[list[LutQualityIssue], list[float]]:
     """Find points that deviate from a robust local smooth curve."""
-    if len(curve) < 3:
+    if len(curve.bri) < 3:
         return [], []
 
-    candidate_deviations = calculate_detection_curve_deviations(mode, curve)
-    deviations = [candidate.deviation for candidate in candidate_deviations]
-    curve_range = max(point.watt for point in curve) - min(point.watt for point in curve)
+    expected_watt = calculate_expected_watts(mode, curve.bri, curve.watt)
+    deviations = np.abs(curve.watt - expected_watt)
+    curve_range = float(curve.watt.max() - curve.watt.min())
     # Endpoints are extrapolated instead of interpolated, so their deviations are noisier by
     # nature. Feeding them into the median/MAD would inflate the threshold and hide real
     # outliers, so the noise level of a curve is estimated from its interior points only.
     threshold = calculate_curve_threshold(
-        [candidate.deviation for candidate in candidate_deviations if not candidate.is_endpoint],
+        deviations[1:-1],
         curve_range=curve_range,
         max_absolute_deviation=max_absolute_deviation,
         max_relative_deviation=max_relative_deviation,
         z_score=z_score,
     )
 
-    issues = detect_curve_issues(mode, curve_key, curve, candidate_deviations, threshold)
-    return issues, deviations
+    issues = detect_curve_issues(mode, curve, expected_watt, threshold)
+    return issues, deviations.tolist()
 
 
 def detect_curve_issues(
     mode: str,
-    curve_key: int,
-    curve: Sequence[LutPoint],
-    candidate_deviations: Sequence[CurveDeviation],
+    curve: LutCurve,
+    expected_watt: np.ndarray,
     threshold: float,
 ) -> list[LutQualityIssue]:
-    candidates = [
-        candidate
-        for candidate in candidate_deviations
-        if candidate.deviation > get_candidate_threshold(candidate, threshold)
-    ]
-    clusters = group_adjacent_deviations(candidates)
-    selected_candidates = [
-        max(
-            cluster,
-            key=lambda candidate: (
-                calculate_correction_improvement(mode, curve, candidate, threshold),
-                candidate.deviation,
+    """Report the point of each run of adjacent outliers whose correction smooths the curve the most."""
+    bri, watt = curve.bri, curve.watt
+    deviations = np.abs(watt - expected_watt)
+    thresholds = get_candidate_thresholds(len(watt), threshold)
+    candidates = np.flatnonzero(deviations > thresholds)
+    if not candidates.size:
+        return []
+
+    clusters = np.split(candidates, np.flatnonzero(np.diff(candidates) != 1) + 1)
+    before = calculate_total_excess_deviation(mode, bri, watt, thresholds)
+    issues: list[LutQualityIssue] = []
+    for cluster in clusters:
+        selected = int(cluster[0])
+        if len(cluster) > 1:
+            selected = max(
+                cluster.tolist(),
+                key=lambda index: (
+                    before - calculate_corrected_excess_deviation(mode, bri, watt, expected_watt, thresholds, index),
+                    deviations[index],
+                ),
+            )
+        issues.append(
+            create_issue(
+                mode,
+                curve.point(selected),
+                float(expected_watt[selected]),
+                float(deviations[selected]),
+                float(thresholds[selected]),
             ),
         )
-        for cluster in clusters
-    ]
-
-    return [
-        create_issue(
-            mode,
-            curve_key,
-            curve[selected.index],
-            selected.expected_watt,
-            selected.deviation,
-            get_candidate_threshold(selected, threshold),
-        )
-        for selected in selected_candidates
-    ]
 
-
-def group_adjacent_deviations(candidates: Sequence[CurveDeviation]) -> list[list[CurveDeviation]]:
-    clusters: list[list[CurveDeviation]] = []
-    for candidate in candidates:
-        if not clusters or candidate.index != clusters[-1][-1].index + 1:
-            clusters.append([candidate])
-            continue
-
-        clusters[-1].append(candidate)
-
-    return clusters
+    return issues
 
 
-def calculate_detection_curve_deviations(mode: str, curve: Sequence[LutPoint]) -> list[CurveDeviation]:
-    return [calculate_curve_deviation(mode, curve, index) for index in range(len(curve))]
-
-
-def calculate_curve_deviation(mode: str, curve: Sequence[LutPoint], index: int) -> CurveDeviation:
-    point = curve[index]
-    endpoint = is_endpoint(curve, index)
-    expected_watt = (
-        calculate_endpoint_expected_watt(curve, index)
-        if endpoint
-        else calculate_interior_expected_watt(mode, curve, index)
-    )
-    return CurveDeviation(
-        index=index,
-        point=point,
-        expected_watt=expected_watt,
-        deviation=abs(point.watt - expected_watt),
-        is_endpoint=endpoint,
-    )
-
-
-def is_endpoint(curve: Sequence[LutPoint], index: int) -> bool:
-    return index in (0, len(curve) - 1)
-
-
-def get_candidate_threshold(candidate: CurveDeviation, threshold: float) -> float:
+def get_candidate_thresholds(size: int, threshold: float) -> np.ndarray:
     """Endpoints are extrapolated, so they get more headroom before counting as an outlier."""
-    return threshold * ENDPOINT_THRESHOLD_FACTOR if candidate.is_endpoint else threshold
-
-
-def calculate_interior_expected_watt(mode: str, curve: Sequence[LutPoint], index: int) -> float:
-    if mode == "color_temp" or len(curve) < SMOOTHING_MIN_POINTS:
-        return calculate_interpolated_expected_watt(curve, index)
+    thresholds = np.full(size, threshold)
+    thresholds[[0, -1]] *= ENDPOINT_THRESHOLD_FACTOR
+    return thresholds
+
+
+def calculate_expected_watts(mode: str, bri: np.ndarray, watt: np.ndarray) -> np.ndarray:
+    """Calculate the expected watt value of every point of a curve from its neighbors."""
+    expected_watt = np.empty_like(watt)
+    if mode == "color_temp" or len(watt) < SMOOTHING_MIN_POINTS:
+        expected_watt[1:-1] = interpolate_watts(bri[:-2], watt[:-2], bri[2:], watt[2:], bri[1:-1])
+        if len(watt) >= SMOOTHING_MIN_POINTS:
+            expected_watt[1:2] = interpolate_watts(bri[2:3], watt[2:3], bri[3:4], watt[3:4], bri[1:2])
+    else:
+        expected_watt[1:-1] = calculate_smoothed_watts(watt)
 
-    return calculate_smoothed_expected_watt(curve, index)
+    expected_watt[0] = calculate_endpoint_expected_watt(bri, watt, 0)
+    expected_watt[-1] = calculate_endpoint_expected_watt(bri, watt, -1)
+    return expected_watt
 
 
-def calculate_endpoint_expected_watt(curve: Sequence[LutPoint], index: int) -> float:
+def calculate_endpoint_expected_watt(bri: np.ndarray, watt: np.ndarray, index: int) -> float:
     """Extrapolate the first or last point of a curve from the neighbors next to it.
 
     Endpoints have no neighbor on one side, so they cannot be interpolated. Without this a
@@ -487,90 +603,103 @@ def calculate_endpoint_expected_watt(curve: Sequence[LutPoint], index: int) -> f
     A least squares fit over a few neighbors is used rather than the line through the two
     nearest ones, so a single bad neighbor cannot drag the prediction along with it.
     """
-    neighbors = curve[1 : 1 + ENDPOINT_FIT_POINTS] if index == 0 else curve[-1 - ENDPOINT_FIT_POINTS : -1]
-    return extrapolate_watt(neighbors, curve[index].bri)
+    neighbors = slice(1, 1 + ENDPOINT_FIT_POINTS) if index == 0 else slice(-1 - ENDPOINT_FIT_POINTS, -1)
+    return extrapolate_watt(bri[neighbors].tolist(), watt[neighbors].tolist(), float(bri[index]))
 
 
-def extrapolate_watt(neighbors: Sequence[LutPoint], bri: int) -> float:
-    """Predict the watt value at a brightness level from a least squares fit of neighbors."""
-    if len(neighbors) < 2:
-        return neighbors[0].watt
+def extrapolate_watt(bri: Sequence[float], watt: Sequence[float], target_bri: float) -> float:
+    """Predict the watt value at a brightness level from a least squares fit of neighbors.
 
-    mean_bri = sum(point.bri for point in neighbors) / len(neighbors)
-    mean_watt = sum(point.watt for point in neighbors) / len(neighbors)
-    variance = sum((point.bri - mean_bri) ** 2 for point in neighbors)
+    Fits only a handful of points, for which plain floats are faster than NumPy.
+    """
+    if len(bri) < 2:
+        return watt[0]
+
+    mean_bri = sum(bri) / len(bri)
+    mean_watt = sum(watt) / len(watt)
+    variance = sum((point_bri - mean_bri) ** 2 for point_bri in bri)
     if not variance:
         return mean_watt
 
-    covariance = sum((point.bri - mean_bri) * (point.watt - mean_watt) for point in neighbors)
-    return mean_watt + ((covariance / variance) * (bri - mean_bri))
-
+    covariance = sum(
+        (point_bri - mean_bri) * (point_watt - mean_watt) for point_bri, point_watt in zip(bri, watt, strict=True)
+    )
+    return mean_watt + ((covariance / variance) * (target_bri - mean_bri))
 
-def calculate_correction_improvement(
-    mode: str,
-    curve: Sequence[LutPoint],
-    candidate: CurveDeviation,
-    threshold: float,
-) -> float:
-    before = calculate_total_excess_deviation(mode, curve, threshold)
-    corrected_curve = list(curve)
-    corrected_curve[candidate.index] = replace(candidate.point, watt=candidate.expected_watt)
-    after = calculate_total_excess_deviation(mode, corrected_curve, threshold)
-    return before - after
 
+def calculate_smoothed_watts(watt: np.ndarray) -> np.ndarray:
+    """Calculate the median of the neighbors within the smoothing window of every interior point.
 
-def calculate_total_excess_deviation(mode: str, curve: Sequence[LutPoint], threshold: float) -> float:
-    return sum(
-        max(candidate.deviation - get_candidate_threshold(candidate, threshold), 0.0)
-        for candidate in calculate_detection_curve_deviations(mode, curve)
-    )
+    Only used for curves of at least SMOOTHING_MIN_POINTS points. Points at least a window
+    radius away from both ends have a complete window, their medians are calculated in one go.
+    The few points near the ends have a truncated window.
+    """
+    size = len(watt)
+    smoothed = np.empty(size - 2)
+    windows = np.lib.stride_tricks.sliding_window_view(watt, 2 * SMOOTHING_WINDOW_RADIUS + 1)
+    neighbors = np.delete(windows, SMOOTHING_WINDOW_RADIUS, axis=1)
+    smoothed[SMOOTHING_WINDOW_RADIUS - 1 : size - SMOOTHING_WINDOW_RADIUS - 1] = np.median(neighbors, axis=1)
 
+    for index in (*range(1, SMOOTHING_WINDOW_RADIUS), *range(size - SMOOTHING_WINDOW_RADIUS, size - 1)):
+        start = max(0, index - SMOOTHING_WINDOW_RADIUS)
+        end = min(size, index + SMOOTHING_WINDOW_RADIUS + 1)
+        smoothed[index - 1] = median(np.delete(watt[start:end], index - start))
 
-def calculate_interpolated_expected_watt(curve: Sequence[LutPoint], index: int) -> float:
-    if index == 1 and len(curve) >= SMOOTHING_MIN_POINTS:
-        return interpolate_watt(curve[2], curve[3], curve[index].bri)
+    return smoothed
 
-    return interpolate_watt(curve[index - 1], curve[index + 1], curve[index].bri)
 
+def calculate_total_excess_deviation(mode: str, bri: np.ndarray, watt: np.ndarray, thresholds: np.ndarray) -> float:
+    """Sum how far all points of a curve exceed their threshold."""
+    deviations = np.abs(watt - calculate_expected_watts(mode, bri, watt))
+    return float(np.maximum(deviations - thresholds, 0.0).sum())
 
-def calculate_smoothed_expected_watt(curve: Sequence[LutPoint], index: int) -> float:
-    start = max(0, index - SMOOTHING_WINDOW_RADIUS)
-    end = min(len(curve), index + SMOOTHING_WINDOW_RADIUS + 1)
-    neighbor_watts = [
-        point.watt for neighbor_index, point in enumerate(curve[start:end], start=start) if neighbor_index != index
-    ]
-    if len(neighbor_watts) < 2:
-        return interpolate_watt(curve[index - 1], curve[index + 1], curve[index].bri)
 
-    return median(neighbor_watts)
+def calculate_corrected_excess_deviation(
+    mode: str,
+    bri: np.ndarray,
+    watt: np.ndarray,
+    expected_watt: np.ndarray,
+    thresholds: np.ndarray,
+    index: int,
+) -> float:
+    """Total excess deviation of the curve after setting a point to its expected watt value."""
+    corrected_watt = watt.copy()
+    corrected_watt[index] = expected_watt[index]
+    return calculate_total_excess_deviation(mode, bri, corrected_watt, thresholds)
 
 
-def interpolate_watt(left: LutPoint, right: LutPoint, bri: int) -> float:
-    """Estimate the watt value at a brightness level on the line through two points.
+def interpolate_watts(
+    left_bri: np.ndarray,
+    left_watt: np.ndarray,
+    right_bri: np.ndarray,
+    right_watt: np.ndarray,
+    bri: np.ndarray,
+) -> np.ndarray:
+    """Estimate watt values at brightness levels on the lines through pairs of points.
 
     Curves are always grouped per mired and sorted by brightness, so brightness is the axis
-    for both color modes. Using it keeps uneven brightness steps correctly weighted.
+    for both color modes. Using it keeps uneven brightness steps correctly weighted. Points
+    sharing a brightness level get the average of both watt values.
     """
-    if left.bri == right.bri:
-        return (left.watt + right.watt) / 2
-
-    ratio = (bri - left.bri) / (right.bri - left.bri)
-    return left.watt + ((right.watt - left.watt) * ratio)
+    bri_range = right_bri - left_bri
+    same_bri = bri_range == 0
+    ratio = np.divide(bri - left_bri, bri_range, out=np.zeros_like(bri_range), where=~same_bri)
+    return np.where(same_bri, (left_watt + right_watt) / 2, left_watt + ((right_watt - left_watt) * ratio))
 
 
 def calculate_curve_threshold(
-    deviations: Sequence[float],
+    deviations: np.ndarray,
     *,
     curve_range: float,
     max_absolute_deviation: float,
     max_relative_deviation: float,
     z_score: float,
 ) -> float:
-    if not deviations:
+    if not deviations.size:
         return max_absolute_deviation
 
     median_deviation = median(deviations)
-    mad = median([abs(deviation - median_deviation) for deviation in deviations])
+    mad = median(np.abs(deviations - median_deviation))
     robust_threshold = median_deviation + (z_score * 1.4826 * mad)
     relative_threshold = curve_range * max_relative_deviation
     return max(max_absolute_deviation, relative_threshold, robust_threshold)
@@ -578,7 +707,6 @@ def calculate_curve_threshold(
 
 def create_issue(
     mode: str,
-    _curve_key: int,
     point: LutPoint,
     expected_watt: float,
     deviation: float,
@@ -601,17 +729,27 @@ def create_issue(
     )
 
 
+def median(values: np.ndarray) -> float:
+    """Median of a non empty array, cheaper than np.median for the short arrays of a single curve."""
+    sorted_values = np.sort(values)
+    midpoint = len(sorted_values) // 2
+    if len(sorted_values) % 2:
+        return float(sorted_values[midpoint])
+
+    return float((sorted_values[midpoint - 1] + sorted_values[midpoint]) / 2)
+
+
 def calculate_score(
     issues: Sequence[LutQualityIssue],
     max_deviation: float,
     mean_deviation: float,
-    points: Sequence[LutPoint],
+    watts: np.ndarray,
 ) -> float:
     """Calculate a 0-100 score where 100 is a perfectly smooth LUT."""
-    if not points:
+    if not watts.size:
         return 0.0
 
-    watt_range = max(point.watt for point in points) - min(point.watt for point in points)
+    watt_range = float(watts.max() - watts.min())
     normalized_max = max_deviation / max(watt_range, 1.0)
     normalized_mean = mean_deviation / max(watt_range, 1.0)
     issue_penalty = min(60.0, len(issues) * 8.0)
@@ -620,18 +758,6 @@ def calculate_score(
     return round(max(0.0, 100.0 - issue_penalty - deviation_penalty - roughness_penalty), 1)
 
 
-def median(values: Sequence[float]) -> float:
-    if not values:
-        return 0.0
-
-    sorted_values = sorted(values)
-    midpoint = len(sorted_values) // 2
-    if len(sorted_values) % 2:
-        return sorted_values[midpoint]
-
-    return (sorted_values[midpoint - 1] + sorted_values[midpoint]) / 2
-
-
 def format_text_report(results: Sequence[LutQualityResult], *, show_ok: bool, min_score: float) -> str:
     lines: list[str] = []
     for result in results:
@@ -718,6 +844,16 @@ def parse_args() -> argparse.Namespace:
         choices=FIX_MODES,
         help="Automatically fix detected points by removing them or setting watt to the expected value.",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Number of worker processes used to scan the library, defaults to the number of CPUs.",
+    )
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        help="JSON file caching the results per LUT content hash, so unchanged LUT files are not scanned again.",
+    )
     parser.add_argument(
         "--max-absolute-deviation",
         type=float,
@@ -742,6 +878,7 @@ def parse_args() -> argparse.Namespace:
 def main() -> None:
     args = parse_args()
     target = Path(args.path)
+    result_cache = LutQualityCache(args.cache) if args.cache else None
     if target.is_file():
         root = target.parent
         results = [
@@ -761,6 +898,8 @@ def main() -> None:
             max_absolute_deviation=args.max_absolute_deviation,
             max_relative_deviation=args.max_relative_deviation,
             z_score=args.z_score,
+            jobs=args.jobs,
+            cache=result_cache,
         )
 
     if args.fix:
@@ -789,8 +928,14 @@ def main() -> None:
                     max_absolute_deviation=args.max_absolute_deviation,
                     max_relative_deviation=args.max_relative_deviation,
                     z_score=args.z_score,
+                    jobs=args.jobs,
+                    cache=result_cache,
                 )
 
+    if result_cache is not None:
+        result_cache.save()
+        print(f"Reused {result_cache.hits} cached LUT result(s).", file=sys.stderr)  # noqa: T201
+
     report_results = filter_results_by_severity(results, args.severity)
     report_min_score = 0.0 if args.severity != "all" else args.min_score
     report = (
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import csv
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+
+from utils.library.csv_row_counts import scan_library
+from utils.library.field_counts import count_field
+from utils.library.library_store import LibraryStore, load_library_store
+from utils.library.scan_lut_quality import analyze_lut
+
+
+def test_store_reads_lut_facts(tmp_path: Path) -> None:
+    write_lut(tmp_path / "signify" / "LCT012" / "brightness.csv.gz", [[bri, bri / 2] for bri in range(1, 21)])
+    write_lut(tmp_path / "signify" / "LCT012" / "tapering.csv.gz", [[1, 0.5], [2, 3.0]])
+
+    with load_library_store(tmp_path, jobs=1) as store:
+        brightness, tapering = store.luts()
+
+    assert brightness.path == "signify/LCT012/brightness.csv.gz"
+    assert brightness.color_mode == "brightness"
+    assert (brightness.rows, brightness.min_watt, brightness.max_watt) == (20, 0.5, 10.0)
+    assert brightness.quality_score == analyze_lut(tmp_path / brightness.path).score
+    assert brightness.error is None
+    assert brightness.key_ranges == {"bri": [1, 20]}
+    assert tapering.color_mode is None
+    assert tapering.key_ranges == {}
+    assert (tapering.rows, tapering.max_watt, tapering.quality_score) == (2, 3.0, None)
+
+
+def test_store_reads_watts_of_malformed_lut_leniently(tmp_path: Path) -> None:
+    write_lut(tmp_path / "brightness.csv.gz", [[1, 0.5], [2, "n/a"], [3, 4.0]])
+    (tmp_path / "color_temp.csv.gz").write_bytes(b"not gzip")
+
+    with load_library_store(tmp_path, jobs=1) as store:
+        brightness, color_temp = store.luts()
+
+    assert (brightness.rows, brightness.max_watt, brightness.quality_score) == (3, 4.0, None)
+    assert brightness.error
+    assert brightness.key_ranges is None
+    assert color_temp.rows is None
+    assert color_temp.error
+
+
+def test_store_only_reads_changed_files(tmp_path: Path) -> None:
+    store_path = tmp_path / "store.sqlite"
+    root = tmp_path / "profile_library"
+    write_model(root / "signify" / "LCT012" / "model.json", {"measure_device": "Shelly Plug S"})
+    write_model(root / "signify" / "LCT015" / "model.json", {"measure_device": "Shelly Plug S"})
+    write_lut(root / "signify" / "LCT012" / "brightness.csv.gz", [[1, 0.5], [255, 9.0]])
+    write_lut(root / "signify" / "LCT015" / "brightness.csv.gz", [[1, 0.5], [255, 9.0]])
+
+    with LibraryStore(root, store_path) as store:
+        assert store.update(jobs=1) == 4
+
+    write_model(root / "signify" / "LCT015" / "model.json", {"measure_device": "Zhurui PR10"})
+    (root / "signify" / "LCT012" / "brightness.csv.gz").unlink()
+    with LibraryStore(root, store_path) as store:
+        assert store.update(jobs=1) == 1
+        assert [lut.path for lut in store.luts()] == ["signify/LCT015/brightness.csv.gz"]
+        assert count_field("measure_device", store) == {"Shelly Plug S": 1, "Zhurui PR10": 1}
+        assert [model["model"] for model in store.models()] == ["LCT012", "LCT015"]
+
+
+def test_store_filters_luts_by_directory(tmp_path: Path) -> None:
+    for directory in ("LCT012", "LCT012/sub", "LCT0120"):
+        write_lut(tmp_path / directory / "brightness.csv.gz", [[1, 0.5]])
+
+    with load_library_store(tmp_path, jobs=1) as store:
+        assert [lut.path for lut in store.luts("LCT012")] == [
+            "LCT012/brightness.csv.gz",
+            "LCT012/sub/brightness.csv.gz",
+        ]
+
+
+def test_csv_row_counts_fails_on_unreadable_csv(tmp_path: Path) -> None:
+    (tmp_path / "brightness.csv.gz").write_bytes(b"not gzip")
+
+    with pytest.raises(ValueError, match=r"brightness\.csv\.gz"):
+        scan_library(tmp_path)
+
+
+def write_model(path: Path, data: dict[str, str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data))
+
+
+def write_lut(path: Path, rows: list[list[float | str]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "wt", newline="") as lut_file:
+        writer = csv.writer(lut_file)
+        writer.writerow(["bri", "watt"])
+        writer.writerows(rows)
@@ -7,6 +7,7 @@ from pathlib import Path
 import pytest
 
 from utils.library.scan_lut_quality import (
+    LutQualityCache,
     LutQualityIssue,
     LutQualityResult,
     analyze_color_temp_lut,
@@ -346,6 +347,44 @@ def test_scan_library_skips_manually_verified_models(tmp_path: Path) -> None:
     ]
 
 
+def test_scan_library_in_worker_processes_matches_serial_scan(tmp_path: Path) -> None:
+    for model, rows in (("rough", rough_brightness_rows()), ("smooth", smooth_brightness_rows())):
+        model_directory = tmp_path / "manufacturer" / model
+        model_directory.mkdir(parents=True)
+        write_lut(model_directory / "brightness.csv.gz", rows, gzipped=True)
+    write_lut(tmp_path / "manufacturer" / "rough" / "color_temp.csv.gz", rough_color_temp_rows(), gzipped=True)
+
+    assert scan_library(tmp_path, jobs=2) == scan_library(tmp_path)
+
+
+def test_scan_library_reuses_cached_results_of_unchanged_luts(tmp_path: Path) -> None:
+    library = tmp_path / "library"
+    unchanged_path = library / "manufacturer" / "unchanged" / "brightness.csv.gz"
+    changed_path = library / "manufacturer" / "changed" / "brightness.csv.gz"
+    for path in (unchanged_path, changed_path):
+        path.parent.mkdir(parents=True)
+        write_lut(path, rough_brightness_rows(), gzipped=True)
+    cache_path = tmp_path / "cache" / "lut_quality.json"
+
+    cache = LutQualityCache(cache_path)
+    results = scan_library(library, cache=cache)
+    cache.save()
+    assert cache.hits == 0
+
+    write_lut(changed_path, smooth_brightness_rows(), gzipped=True)
+    cache = LutQualityCache(cache_path)
+    cached_results = scan_library(library, cache=cache)
+    assert cache.hits == 1
+    assert cached_results[0].has_issues is False
+    assert cached_results[1] == results[1]
+    assert cached_results == scan_library(library)
+
+    # Other thresholds give other results, so they don't share cache entries
+    cache = LutQualityCache(cache_path)
+    scan_library(library, cache=cache, z_score=3.0)
+    assert cache.hits == 0
+
+
 def test_text_report_hides_clean_results_by_default(tmp_path: Path) -> None:
     lut_path = tmp_path / "color_temp.csv"
     write_lut(
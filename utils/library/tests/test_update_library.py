@@ -3,6 +3,7 @@ from __future__ import annotations
 import asyncio
 import csv
 import gzip
+import hashlib
 import json
 from pathlib import Path
 from typing import Any
@@ -11,20 +12,13 @@ import pytest
 
 from utils.library import update_library
 from utils.library.update_library import (
+    GitHistory,
     generate_library_json,
-    get_color_modes,
     process_author_update,
     process_model_file,
 )
 
 
-def test_get_color_modes_only_includes_known_lut_color_modes(tmp_path: Path) -> None:
-    for filename in ("brightness.csv.gz", "color_temp.csv", "effect.csv.gz", "tapering.csv.gz"):
-        (tmp_path / filename).touch()
-
-    assert asyncio.run(get_color_modes(str(tmp_path))) == {"brightness", "color_temp", "effect"}
-
-
 def test_process_model_file_adds_lut_quality(tmp_path: Path) -> None:
     model_directory = create_model_directory(tmp_path)
     write_brightness_lut(model_directory / "brightness.csv.gz", rough=True)
@@ -52,6 +46,67 @@ def test_process_model_file_omits_lut_quality_without_lut_files(tmp_path: Path)
     assert "lut_quality" not in model
 
 
+def test_process_model_file_reads_max_power_and_color_modes_from_luts(tmp_path: Path) -> None:
+    model_directory = create_model_directory(tmp_path)
+    write_brightness_lut(model_directory / "brightness.csv.gz", rough=False)
+    (model_directory / "sub").mkdir()
+    write_brightness_lut(model_directory / "sub" / "effect.csv.gz", rough=True)
+
+    model = asyncio.run(process_model_file(str(model_directory / "model.json")))
+
+    assert model["max_power"] == 25.0
+    assert model["color_modes"] == ["brightness", "effect"]
+    assert model["sub_profile_count"] == 1
+
+
+def test_process_model_file_describes_lut_files_per_sub_profile(tmp_path: Path) -> None:
+    model_directory = create_model_directory(tmp_path)
+    (model_directory / "brightness.csv").write_text("bri,watt\n1,0.5\n")
+    write_brightness_lut(model_directory / "brightness.csv.gz", rough=False)
+    (model_directory / "sub").mkdir()
+    write_brightness_lut(model_directory / "sub" / "effect.csv.gz", rough=True)
+    (model_directory / "sub" / "tapering.csv").write_text("bri,watt\n1,0.5\n")
+
+    model = asyncio.run(process_model_file(str(model_directory / "model.json")))
+
+    assert model["luts"] == {
+        "": {
+            "brightness": {
+                "file": "brightness.csv.gz",
+                "rows": 20,
+                "hash": hashlib.sha256((model_directory / "brightness.csv.gz").read_bytes()).hexdigest(),
+                "ranges": {"bri": [1, 20]},
+            },
+        },
+        "sub": {
+            "effect": {
+                "file": "effect.csv.gz",
+                "rows": 20,
+                "hash": hashlib.sha256((model_directory / "sub" / "effect.csv.gz").read_bytes()).hexdigest(),
+                "ranges": {"bri": [1, 20]},
+            },
+        },
+    }
+
+
+def test_git_history_indexes_log() -> None:
+    history = GitHistory()
+    history.read_log(
+        "\x01newest 200\n\0profile_library/signify/LCT012/brightness.csv.gz\0\0"
+        "\n\x01older 100\n\0profile_library/signify/LCT012/model.json\0profile_library/signify/LCT015/model.json\0\0"
+        "\n\x01oldest 50\n\0data/signify/LCT012/model.json\0",
+    )
+
+    assert history.last_commit_times["profile_library/signify/LCT012"] == 200
+    assert history.last_commit_times["profile_library/signify/LCT015"] == 100
+    assert history.last_commit_times["profile_library"] == 200
+    assert history.first_commit(["profile_library/signify/LCT012/model.json"]) == "older"
+    assert history.first_commit(["profile_library/signify/LCT012/model.json", "data/signify/LCT012/model.json"]) == (
+        "oldest"
+    )
+    assert history.first_commit(["profile_library/signify/LCT999/model.json"]) is None
+
+
 def test_library_json_hash_ignores_lut_quality(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
     """The hash drives profile re-downloads, so a score change must not invalidate every install."""
     monkeypatch.setattr(update_library, "DATA_DIR", str(tmp_path))
@@ -4,6 +4,7 @@ from collections.abc import Callable
 import csv
 import gzip
 from pathlib import Path
+import subprocess
 from typing import TextIO
 
 import pytest
@@ -12,10 +13,13 @@ from utils.library.validate_lut_files import (
     BRI_RULE,
     EFFECT_RULE,
     MAX_ERRORS_PER_FILE,
+    PROFILES_PER_TASK,
     WATT_RULE,
     ColumnRule,
     LutValidationError,
+    ValidationCache,
     ValidationReport,
+    find_changed_profile_directories,
     find_lut_files,
     find_profile_directories,
     format_report,
@@ -28,6 +32,7 @@ from utils.library.validate_lut_files import (
     validate_max_brightness,
     validate_profile,
     validate_row,
+    validate_rows,
 )
 
 BRIGHTNESS_ROWS = [(1, 0.4), (128, 5.2), (255, 9.8)]
@@ -40,6 +45,10 @@ def write_lut(path: Path, header: list[str], rows: list[tuple[object, ...]]) ->
         writer.writerows(rows)
 
 
+def git(directory: Path, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=directory, check=True)  # noqa: S603, S607
+
+
 def open_for_write(path: Path) -> TextIO:
     if path.suffix == ".gz":
         return gzip.open(path, "wt", newline="")
@@ -305,6 +314,89 @@ def test_validate_library_ignores_files_that_are_not_luts(tmp_path: Path) -> Non
     )
 
 
+@pytest.mark.parametrize(
+    "rows",
+    [
+        [("1.0", 0.4), (255, 9.8)],
+        [(" 1", 0.4), ("1_0", 9.8)],
+        [(1, "nan"), (255, "1e1")],
+        [('"1"', 0.4), (255, 9.8, "extra")],
+    ],
+)
+def test_unusual_values_are_validated_like_row_by_row(tmp_path: Path, rows: list[tuple[object, ...]]) -> None:
+    path = tmp_path / "brightness.csv"
+    write_lut(path, ["bri", "watt"], rows)
+    with path.open() as lut_file:
+        expected = validate_rows(csv.DictReader(lut_file), (BRI_RULE, WATT_RULE))
+
+    assert validate_lut_file(path, "brightness") == expected
+
+
+def test_validate_library_in_worker_processes(tmp_path: Path) -> None:
+    for index in range(PROFILES_PER_TASK + 2):
+        model = tmp_path / "signify" / f"LCT{index:03}"
+        model.mkdir(parents=True)
+        write_brightness_lut(model / "brightness.csv.gz", [(1, 0.4)] if index % 5 == 0 else None)
+
+    assert validate_library(tmp_path, jobs=2) == validate_library(tmp_path)
+
+
+def test_validate_library_stops_at_the_first_invalid_profile_with_fail_fast(tmp_path: Path) -> None:
+    for model in ("LCT001", "LCT002", "LCT003"):
+        (tmp_path / "signify" / model).mkdir(parents=True)
+        write_brightness_lut(tmp_path / "signify" / model / "brightness.csv.gz", [(1, 0.4)])
+
+    report = validate_library(tmp_path, fail_fast=True)
+
+    assert report.profiles == 1
+    assert [error.profile for error in report.errors] == ["signify/LCT001"]
+
+
+def test_validate_library_skips_cached_valid_profiles(tmp_path: Path) -> None:
+    library = tmp_path / "library"
+    valid = library / "signify" / "LCT001"
+    invalid = library / "signify" / "LCT002"
+    for model in (valid, invalid):
+        model.mkdir(parents=True)
+        write_brightness_lut(model / "brightness.csv.gz")
+    cache_path = tmp_path / "cache.json"
+
+    cache = ValidationCache(cache_path)
+    assert validate_library(library, cache=cache) == ValidationReport(profiles=2, files=2)
+    cache.save()
+
+    write_brightness_lut(invalid / "brightness.csv.gz", [(1, 0.4)])
+    cache = ValidationCache(cache_path)
+    report = validate_library(library, cache=cache)
+    cache.save()
+    assert report.profiles == 1
+    assert report.skipped == 1
+    assert [error.profile for error in report.errors] == ["signify/LCT002"]
+
+    # Invalid profiles are not cached, so they keep getting reported
+    assert validate_library(library, cache=ValidationCache(cache_path)).errors == report.errors
+
+
+def test_find_changed_profile_directories(tmp_path: Path) -> None:
+    unchanged = tmp_path / "signify" / "LCT001"
+    changed = tmp_path / "signify" / "LCT002"
+    for model in (unchanged, changed):
+        model.mkdir(parents=True)
+        write_brightness_lut(model / "brightness.csv.gz")
+    (changed / "model.json").write_text("{}")
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-qm", "Add profiles")
+
+    write_color_temp_lut(changed / "color_temp.csv.gz")
+    (unchanged / "model.json").write_text("{}")
+    git(tmp_path, "add", ".")
+
+    assert find_changed_profile_directories(tmp_path, "HEAD") == [changed]
+    with pytest.raises(SystemExit, match="Could not list the files changed since unknown"):
+        find_changed_profile_directories(tmp_path, "unknown")
+
+
 def test_validate_profile_reports_an_unsupported_color_mode_combination(
     tmp_path: Path,
     monkeypatch: pytest.MonkeyPatch,
@@ -2,16 +2,16 @@ from __future__ import annotations
 
 import argparse
 import asyncio
-from collections.abc import Mapping
-import csv
-from dataclasses import dataclass
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass, field
 from datetime import datetime
 import glob
 import hashlib
 import json
 import math
 import os
-from pathlib import Path
+from pathlib import Path, PurePosixPath
+import posixpath
 import subprocess
 from typing import Any
 
@@ -19,14 +19,18 @@ import aiofiles
 import git
 import httpx
 
-from utils.library.common import PROFILE_DIRECTORY, open_lut_file
-from utils.library.scan_lut_quality import score_profile_directory
+from utils.library.common import PROFILE_DIRECTORY
+from utils.library.library_store import load_library_store
+from utils.library.lut_facts import LutFacts
+from utils.library.scan_lut_quality import SUPPORTED_LUT_FILES, summarize_scores
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 DATA_DIR = str(Path(PROFILE_DIRECTORY).resolve())  # resolve, PROFILE_DIRECTORY contains ../.. segments
 REPO_OWNER = "bramstroker"
 REPO_NAME = "homeassistant-powercalc"
 MAX_CONCURRENT_FILE_TASKS = 50
+# Locations the profile library lived at before, searched for the first commit of a profile
+LEGACY_DATA_DIRECTORIES = ("custom_components/powercalc/data", "data")
 VOLTAGE_RANGE = "voltage_range"
 LEGACY_MIN_VOLTAGE = "min_voltage"
 LEGACY_MAX_VOLTAGE = "max_voltage"
@@ -48,6 +52,67 @@ class Author:
     github_username: str
 
 
+@dataclass
+class GitHistory:
+    """Commit history of the profile library, indexed for all profiles at once.
+
+    Built from a single `git log --name-only` pass, instead of running git several times for
+    every profile. Paths are relative to the repository root.
+    """
+
+    # Commit time of the latest commit touching anything below a directory
+    last_commit_times: dict[str, int] = field(default_factory=dict)
+    # Oldest commit touching a file, with its position in the log, counting from the newest commit
+    first_commits: dict[str, tuple[int, str]] = field(default_factory=dict)
+
+    def read_log(self, output: str) -> None:
+        """Index the output of `git log -z --name-only --format=%x01%H %ct`, newest commit first."""
+        commit = ""
+        commit_time = 0
+        position = 0
+        for token in output.split("\0"):
+            token = token.lstrip("\n")
+            if token.startswith("\x01"):
+                commit, _, timestamp = token[1:].partition(" ")
+                commit_time = int(timestamp)
+                position += 1
+            elif token:
+                self.first_commits[token] = (position, commit)
+                parent = posixpath.dirname(token)
+                # Ancestors of a directory which is already indexed are indexed as well
+                while parent and parent not in self.last_commit_times:
+                    self.last_commit_times[parent] = commit_time
+                    parent = posixpath.dirname(parent)
+
+    def last_commit_time(self, directory: str) -> datetime:
+        timestamp = self.last_commit_times.get(get_repository_path(directory) or "", 0)
+        return datetime.fromtimestamp(timestamp)
+
+    def first_commit(self, paths: Iterable[str]) -> str | None:
+        """Oldest commit touching any of the paths, relative to the repository root."""
+        commits = [self.first_commits[path] for path in paths if path in self.first_commits]
+        return max(commits)[1] if commits else None
+
+
+@dataclass(frozen=True)
+class ProfileLutStats:
+    """Everything the library index needs from the LUT files of a profile directory and its sub profiles."""
+
+    color_modes: list[str]
+    sub_profile_count: int
+    # Highest watt value over the gzipped LUT files, None when none has a positive one
+    max_power: float | None
+    lut_quality: dict[str, float]
+    # LUT file per color mode, per sub profile directory, "" being the profile directory itself
+    luts: dict[str, dict[str, dict[str, Any]]]
+
+
+def get_repository_path(path: str) -> str | None:
+    """Path relative to the repository root, None when it lies outside the repository."""
+    resolved = Path(path).resolve()
+    return resolved.relative_to(PROJECT_ROOT).as_posix() if resolved.is_relative_to(PROJECT_ROOT) else None
+
+
 def migrate_voltage_range(model: dict[str, Any]) -> None:
     """Fold the deprecated min_voltage/max_voltage fields into voltage_range.
 
@@ -112,7 +177,7 @@ async def generate_library_json(model_listing: list[dict[str, Any]]) -> None:
         # Derived metadata only, not profile content. The hash decides whether a Home Assistant
         # install re-downloads a profile, so folding these in would make every install re-fetch
         # every profile it uses whenever the scoring changes.
-        unhashed_fields = ("sub_profile_count", "lut_quality")
+        unhashed_fields = ("sub_profile_count", "lut_quality", "luts")
         hash_dict = {key: value for key, value in mapped_dict.items() if key not in unhashed_fields}
         mapped_dict["hash"] = create_model_hash(hash_dict)
         manufacturer["models"].append(mapped_dict)
@@ -131,16 +196,16 @@ async def generate_library_json(model_listing: list[dict[str, Any]]) -> None:
     print("Generated library.json")
 
 
-async def update_authors(_model_listing: list[dict[str, Any]]) -> None:
+async def update_authors(_model_listing: list[dict[str, Any]], history: GitHistory) -> None:
     model_json_paths = sorted(
         glob.glob(f"{DATA_DIR}/**/model.json", recursive=True),
         key=lambda model_json_path: (len(Path(model_json_path).parts), model_json_path),
     )
     for model_json_path in model_json_paths:
-        await process_author_update(model_json_path)
+        await process_author_update(model_json_path, history)
 
 
-async def process_author_update(model_json_path: str) -> None:
+async def process_author_update(model_json_path: str, history: GitHistory | None = None) -> None:
     """Process a single author update asynchronously"""
     async with aiofiles.open(model_json_path) as file:
         content = await file.read()
@@ -154,7 +219,7 @@ async def process_author_update(model_json_path: str) -> None:
         changed = True
 
     if is_main_model_json(model_json_path) and not has_authors(json_data):
-        author = await find_first_commit_author(model_json_path)
+        author = await find_first_commit_author(model_json_path, history or await load_git_history())
         if author is None:
             print(f"Skipping {model_json_path}, author not found")
         else:
@@ -270,116 +335,181 @@ async def get_manufacturer_json(manufacturer: str) -> dict[str, Any]:
     }
 
 
-async def get_model_list() -> list[dict[str, Any]]:
+async def get_model_list(
+    history: GitHistory | None = None,
+    *,
+    jobs: int | None = None,
+    store_path: Path | None = None,
+) -> list[dict[str, Any]]:
     """Get a listing of all available powercalc models"""
     json_paths = glob.glob(
         f"{DATA_DIR}/*/*/model.json",
         recursive=True,
     )
+    if history is None:
+        history = await load_git_history()
 
     semaphore = asyncio.Semaphore(MAX_CONCURRENT_FILE_TASKS)
 
-    async def process_with_limit(json_path: str) -> dict[str, Any]:
+    async def read_with_limit(json_path: str) -> dict[str, Any]:
         async with semaphore:
-            return await process_model_file(json_path)
-
-    models = await asyncio.gather(*(process_with_limit(json_path) for json_path in json_paths))
+            return await read_model_file(json_path)
+
+    models = await asyncio.gather(*(read_with_limit(json_path) for json_path in json_paths))
+    model_directories = [
+        get_model_directory(json_path, model_data) for json_path, model_data in zip(json_paths, models, strict=True)
+    ]
+    stats = await asyncio.to_thread(
+        read_profile_stats,
+        Path(DATA_DIR),
+        set(model_directories),
+        store_path,
+        jobs=jobs,
+    )
 
-    # Filter out None values (if any)
-    return [model for model in models if model]
+    return [
+        build_model(json_path, model_data, model_directory, stats[model_directory], history)
+        for json_path, model_data, model_directory in zip(json_paths, models, model_directories, strict=True)
+    ]
 
 
-async def process_model_file(json_path: str) -> dict[str, Any]:
+async def process_model_file(json_path: str, history: GitHistory | None = None) -> dict[str, Any]:
     """Process a single model file asynchronously"""
-    async with aiofiles.open(json_path) as json_file:
-        content = await json_file.read()
-        model_data: dict[str, Any] = json.loads(content)
-        model_data.pop("author", None)
-        model_directory = os.path.dirname(json_path)
-        model_data["id"] = os.path.basename(model_directory)
-        if "linked_profile" in model_data:
-            model_directory = os.path.join(DATA_DIR, model_data["linked_profile"])
-
-        # Get these values concurrently
-        updated_at, max_power, sub_profile_count, color_modes, lut_quality = await asyncio.gather(
-            get_last_commit_time(model_directory),
-            get_max_power(model_directory, model_data),
-            asyncio.to_thread(get_sub_profile_count, model_directory),
-            get_color_modes(model_directory),
-            asyncio.to_thread(get_lut_quality, model_directory),
-        )
-
-        model_data.update(
-            {
-                "manufacturer": os.path.basename(os.path.dirname(model_directory)),
-                "directory": model_directory,
-                "updated_at": updated_at.isoformat(timespec="seconds").replace("+00:00", "Z"),
-                "full_path": json_path,
-                "max_power": max_power,
-                "sub_profile_count": sub_profile_count,
-            },
-        )
-        if "device_type" not in model_data:
-            model_data["device_type"] = "light"
-
-        if color_modes:
-            model_data["color_modes"] = list(color_modes)
+    model_data = await read_model_file(json_path)
+    model_directory = get_model_directory(json_path, model_data)
+    stats = await asyncio.to_thread(read_profile_stats, Path(model_directory), [model_directory], jobs=1)
+    return build_model(json_path, model_data, model_directory, stats[model_directory], history or GitHistory())
 
-        if lut_quality:
-            model_data["lut_quality"] = lut_quality
 
-        return model_data
+async def read_model_file(json_path: str) -> dict[str, Any]:
+    async with aiofiles.open(json_path) as json_file:
+        content = await json_file.read()
+    model_data: dict[str, Any] = json.loads(content)
+    model_data.pop("author", None)
+    model_data["id"] = os.path.basename(os.path.dirname(json_path))
+    return model_data
+
+
+def get_model_directory(json_path: str, model_data: dict[str, Any]) -> str:
+    """Directory holding the LUT files of a model, which is another profile for linked profiles."""
+    if "linked_profile" in model_data:
+        return os.path.join(DATA_DIR, model_data["linked_profile"])
+    return os.path.dirname(json_path)
+
+
+def build_model(
+    json_path: str,
+    model_data: dict[str, Any],
+    model_directory: str,
+    stats: ProfileLutStats,
+    history: GitHistory,
+) -> dict[str, Any]:
+    model_data.update(
+        {
+            "manufacturer": os.path.basename(os.path.dirname(model_directory)),
+            "directory": model_directory,
+            "updated_at": history.last_commit_time(model_directory)
+            .isoformat(timespec="seconds")
+            .replace("+00:00", "Z"),
+            "full_path": json_path,
+            "max_power": get_max_power(model_data, stats.max_power),
+            "sub_profile_count": stats.sub_profile_count,
+        },
+    )
+    if "device_type" not in model_data:
+        model_data["device_type"] = "light"
+
+    if stats.color_modes:
+        model_data["color_modes"] = stats.color_modes
+
+    if stats.lut_quality:
+        model_data["lut_quality"] = stats.lut_quality
+
+    if stats.luts:
+        model_data["luts"] = stats.luts
+
+    return model_data
+
+
+def read_profile_stats(
+    root: Path,
+    model_directories: Iterable[str],
+    store_path: Path | None = None,
+    *,
+    jobs: int | None = None,
+) -> dict[str, ProfileLutStats]:
+    """Summarize the LUT files of the profile directories below root, from the library store."""
+    with load_library_store(root, store_path, jobs=jobs) as store:
+        stats = {}
+        for model_directory in model_directories:
+            relative_directory = get_relative_directory(root, model_directory)
+            stats[model_directory] = get_profile_stats(
+                store.luts(relative_directory),
+                model_directory,
+                relative_directory,
+            )
+        return stats
+
+
+def get_relative_directory(root: Path, model_directory: str) -> str:
+    """Directory relative to root like the LUT paths are, "" for root itself."""
+    relative_directory = Path(model_directory).resolve().relative_to(root.resolve()).as_posix()
+    return "" if relative_directory == "." else relative_directory
+
+
+def get_profile_stats(luts: Sequence[LutFacts], model_directory: str, relative_directory: str) -> ProfileLutStats:
+    """Summarize the LUT files below a profile directory."""
+    for lut in luts:
+        if lut.rows is None:
+            print(f"Error processing {lut.path}: {lut.error}")
+    quality_errors = [lut.error for lut in luts if lut.error and PurePosixPath(lut.path).name in SUPPORTED_LUT_FILES]
+    if quality_errors:
+        # A malformed CSV is already caught by the validate-lut-files workflow. Should one slip
+        # through anyway, only that profile loses its score rather than the whole library index
+        # failing to regenerate over a cosmetic field.
+        print(f"Error scoring LUT quality for {model_directory}: {quality_errors[0]}")
+
+    # Only gzipped LUT files count for the max power, like the integration only loads those
+    max_powers = [
+        lut.max_watt for lut in luts if lut.path.endswith(".csv.gz") and lut.max_watt is not None and lut.max_watt > 0
+    ]
+    lut_scores = [
+        (lut.color_mode, lut.quality_score) for lut in luts if lut.color_mode and lut.quality_score is not None
+    ]
+    return ProfileLutStats(
+        color_modes=sorted({lut.color_mode for lut in luts if lut.color_mode}),
+        sub_profile_count=sum(1 for path in Path(model_directory).iterdir() if path.is_dir()),
+        max_power=max(max_powers, default=None),
+        lut_quality={} if quality_errors else summarize_scores(lut_scores),
+        luts=get_lut_metadata(luts, relative_directory),
+    )
 
 
-def get_lut_quality(model_directory: str) -> dict[str, float]:
-    """Score the LUT files of a profile, leaving the score off when they cannot be read.
+def get_lut_metadata(luts: Iterable[LutFacts], relative_directory: str) -> dict[str, dict[str, dict[str, Any]]]:
+    """Describe the LUT files the integration loads, so it doesn't have to look for them on disk.
 
-    A malformed CSV is already caught by the validate-lut-files workflow. Should one slip
-    through anyway, only that profile loses its score rather than the whole library index
-    failing to regenerate over a cosmetic field.
+    Files are grouped by the sub profile directory they are in, "" for the profile directory itself.
     """
-    try:
-        return score_profile_directory(Path(model_directory))
-    except (ValueError, OSError, EOFError, UnicodeDecodeError, csv.Error) as error:
-        print(f"Error scoring LUT quality for {model_directory}: {error}")
-        return {}
-
-
-async def get_color_modes(model_directory: str) -> set[str]:
-    """Return the supported light color modes from known LUT file names only."""
-    return await asyncio.to_thread(_get_color_modes, model_directory)
-
-
-def _get_color_modes(model_directory: str) -> set[str]:
-    """Find known light color modes without blocking the event loop."""
-    from utils.library.validate_lut_files import get_color_mode
-
-    return {
-        color_mode for path in Path(model_directory).rglob("*.csv*") if (color_mode := get_color_mode(path)) is not None
-    }
-
-
-def get_sub_profile_count(model_directory: str) -> int:
-    path = Path(model_directory)
-    return sum(1 for p in path.iterdir() if p.is_dir())
+    metadata: dict[str, dict[str, dict[str, Any]]] = {}
+    for lut in luts:
+        if lut.color_mode is None or lut.rows is None:
+            continue
+        path = PurePosixPath(lut.path)
+        sub_profile = path.parent.relative_to(relative_directory).as_posix()
+        # Ordered by path, a gzipped file overrides a plain one like the integration prefers it
+        metadata.setdefault("" if sub_profile == "." else sub_profile, {})[lut.color_mode] = {
+            "file": path.name,
+            "rows": lut.rows,
+            "hash": lut.content_hash,
+            "ranges": lut.key_ranges or {},
+        }
+    return metadata
 
 
-async def get_max_power(model_directory: str, model_data: dict[str, Any]) -> float | None:
+def get_max_power(model_data: dict[str, Any], lut_max_power: float | None) -> float | None:
     calculation_strategy = model_data.get("calculation_strategy", "lut")
     if calculation_strategy == "lut":
-        max_power = 0
-        paths = glob.glob(f"{model_directory}/**/*.csv.gz", recursive=True)
-
-        # Process CSV files concurrently
-        if paths:
-            tasks = [process_csv_file(path) for path in paths]
-            csv_powers = await asyncio.gather(*tasks)
-            # Filter out None values and find max
-            valid_powers = [p for p in csv_powers if p is not None]
-            if valid_powers:
-                return max(valid_powers)
-            return max_power
-        return max_power
+        return lut_max_power if lut_max_power is not None else 0
 
     if calculation_strategy == "linear":
         linear_config = model_data.get("linear_config", {})
@@ -404,75 +534,50 @@ async def get_max_power(model_directory: str, model_data: dict[str, Any]) -> flo
     return None
 
 
-async def process_csv_file(path: str) -> float | None:
-    """Process a single CSV file to find the maximum power value"""
-    try:
-        with open_lut_file(Path(path)) as f:
-            reader = csv.reader(f)
-            next(reader, None)  # skip header row
-            max_power = 0.0
-            for row in reader:
-                if not row:
-                    continue
-                try:
-                    watt = float(row[-1])
-                    if watt > max_power:
-                        max_power = watt
-                except ValueError, IndexError:
-                    continue
-            return max_power if max_power > 0 else None
-    except (OSError, EOFError, UnicodeDecodeError, csv.Error) as e:
-        print(f"Error processing {path}: {e}")
-        return None
-
+async def load_git_history() -> GitHistory:
+    """Read the commit history of the profile library with a single git command.
 
-async def get_last_commit_time(directory: str) -> datetime:
+    Without git history, for example outside a git checkout, all profiles get the epoch as
+    update time and no author.
+    """
+    history = GitHistory()
+    profile_library = Path(DATA_DIR).relative_to(PROJECT_ROOT).as_posix()
     try:
-        # Use asyncio to run the git command
-        proc = await asyncio.create_subprocess_exec(
-            "git",
+        log = await run_git_command(
             "log",
-            "-1",
-            "--format=%ct",
+            "-z",
+            "--no-renames",
+            "--name-only",
+            "--format=%x01%H %ct",
             "--",
-            directory,
-            cwd=directory,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
+            profile_library,
+            *LEGACY_DATA_DIRECTORIES,
         )
-        stdout, _stderr = await proc.communicate()
-
-        if proc.returncode != 0:
-            return datetime.fromtimestamp(0)
-
-        out = stdout.decode().strip()
-        if not out:
-            return datetime.fromtimestamp(0)
-        timestamp = int(out)
-        return datetime.fromtimestamp(timestamp)
-    except subprocess.SubprocessError, ValueError:
-        # Handle case where there are no commits or Git command fails
-        return datetime.fromtimestamp(0)
-
-
-async def run_git_command(command: str) -> str:
-    """Run a git command asynchronously and return the output."""
-    proc = await asyncio.create_subprocess_shell(
-        command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    except (OSError, subprocess.SubprocessError) as error:
+        print(f"Could not read the git history: {error}")
+        return history
+
+    history.read_log(log)
+    return history
+
+
+async def run_git_command(*args: str) -> str:
+    """Run a git command in the repository asynchronously and return the output."""
+    proc = await asyncio.create_subprocess_exec(
+        "git",
+        "-c",
+        "core.quotepath=off",
+        *args,
+        cwd=PROJECT_ROOT,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
     )
     stdout, stderr = await proc.communicate()
 
     if proc.returncode != 0:
-        raise subprocess.SubprocessError(f"Command failed: {command}, error: {stderr.decode()}")
-
-    return stdout.decode().strip()
+        raise subprocess.SubprocessError(f"Command failed: git {' '.join(args)}, error: {stderr.decode()}")
 
-
-async def get_commits_affected_directory(directory: str) -> list[str]:
-    """Get a list of commits that affected the given directory, including renames."""
-    command = f"git log --follow --format='%H' -- '{directory}'"
-    commits = await run_git_command(command)
-    return commits.splitlines()
+    return stdout.decode()
 
 
 async def get_commit_author(commit_hash: str) -> Author | None:
@@ -528,24 +633,18 @@ async def get_pull_request_author(client: httpx.AsyncClient, commit_hash: str, h
     return user.get("login") if user else None
 
 
-async def find_first_commit_author(file: str, check_paths: bool = True) -> Author | None:
-    """Find the first commit that affected the directory and return the author's name."""
-    commits = await get_commits_affected_directory(file)
-    relative_file = str(Path(file).relative_to(PROJECT_ROOT))
-    for commit in reversed(commits):  # Process commits from the oldest to newest
-        command = f"git diff-tree --no-commit-id --name-only -r {commit}"
-        if not check_paths:
-            return await get_commit_author(commit)
-
-        affected_files = await run_git_command(command)
-        paths = [
-            relative_file.replace("profile_library", "custom_components/powercalc/data"),
-            relative_file.replace("profile_library", "data"),
-            relative_file,
-        ]
-        if any(path in affected_files.splitlines() for path in paths):
-            return await get_commit_author(commit)
-    return None
+async def find_first_commit_author(file: str, history: GitHistory) -> Author | None:
+    """Find the first commit that added the file, also where the profile library lived before, and return its author."""
+    relative_file = get_repository_path(file)
+    if relative_file is None:
+        return None
+    profile_library = Path(DATA_DIR).relative_to(PROJECT_ROOT).as_posix()
+    paths = [
+        relative_file,
+        *(relative_file.replace(profile_library, directory, 1) for directory in LEGACY_DATA_DIRECTORIES),
+    ]
+    commit = history.first_commit(paths)
+    return await get_commit_author(commit) if commit else None
 
 
 async def main_async() -> None:
@@ -554,6 +653,17 @@ async def main_async() -> None:
     parser.add_argument("--library-json", action="store_true", help="Generate library.json")
     parser.add_argument("--translations", action="store_true", help="Update translations")
     parser.add_argument("--all", action="store_true", help="Run all operations (default if no arguments)")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes reading the LUT files, defaults to the number of CPUs",
+    )
+    parser.add_argument(
+        "--store",
+        type=Path,
+        help="SQLite library store to keep between runs, only the LUT files changed since are read again",
+    )
 
     args = parser.parse_args()
 
@@ -562,7 +672,8 @@ async def main_async() -> None:
 
     print("Start reading profiles JSON files..")
     start_time = datetime.now()
-    model_list = await get_model_list()
+    history = await load_git_history()
+    model_list = await get_model_list(history, jobs=args.jobs, store_path=args.store)
     print(f"Found {len(model_list)} profiles in {(datetime.now() - start_time).total_seconds():.2f} seconds")
 
     tasks = []
@@ -573,7 +684,7 @@ async def main_async() -> None:
 
     if run_all or args.authors:
         print("Updating authors..")
-        tasks.append(update_authors(model_list))
+        tasks.append(update_authors(model_list, history))
 
     if run_all or args.translations:
         print("Updating translations..")
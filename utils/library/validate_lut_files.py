@@ -3,15 +3,28 @@
 Checks every column of every LUT row against the rules for its color mode, verifies the
 measurements reach the top of the brightness range and verifies each profile exposes a
 color mode combination Home Assistant can actually report.
+
+All rows of a LUT file are parsed and checked at once with NumPy. Only when that finds a
+problem the file is validated again row by row, to report which rows are wrong and why.
+Profiles are validated in parallel, and can be limited to the ones changed since a git
+revision or skipped when a cache holds them as valid with the same contents.
 """
 
 from __future__ import annotations
 
 import argparse
-from collections.abc import Iterable, Mapping, Sequence
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
 import csv
 from dataclasses import dataclass, field
+from functools import lru_cache, partial
+import hashlib
+import io
+import json
 from pathlib import Path
+import subprocess
+
+import numpy as np
 
 from utils.library.common import PROFILE_DIRECTORY, open_lut_file
 
@@ -20,6 +33,8 @@ MIN_MAX_BRIGHTNESS = 250
 # Cap the row errors reported per file, a broken LUT would otherwise flood the output.
 MAX_ERRORS_PER_FILE = 5
 LUT_SUFFIXES = (".csv.gz", ".csv")
+# Profiles validated by a single worker process at a time, most profiles only hold one or two small files.
+PROFILES_PER_TASK = 16
 
 VALID_COLOR_MODE_COMBINATIONS: tuple[frozenset[str], ...] = (
     frozenset({"brightness"}),
@@ -72,6 +87,7 @@ MIRED_RULE = ColumnRule("mired", "integer", minimum=0, maximum=1000)
 HUE_RULE = ColumnRule("hue", "integer", minimum=0, maximum=65535)
 SAT_RULE = ColumnRule("sat", "integer", minimum=0, maximum=255)
 EFFECT_RULE = ColumnRule("effect", "string")
+COLUMN_DTYPES = {"integer": np.int64, "number": np.float64, "string": object}
 
 COLOR_MODE_RULES: dict[str, tuple[ColumnRule, ...]] = {
     "brightness": (BRI_RULE, WATT_RULE),
@@ -103,12 +119,57 @@ class ValidationReport:
     profiles: int = 0
     files: int = 0
     errors: list[LutValidationError] = field(default_factory=list)
+    # Profiles not validated again, because the cache holds them as valid with the same contents.
+    skipped: int = 0
 
     @property
     def has_errors(self) -> bool:
         return bool(self.errors)
 
 
+class ValidationCache:
+    """Profiles found valid before, stored on disk by a hash of the names and contents of their LUT files.
+
+    The hash also covers the source of this script, so profiles are validated again after changing
+    the rules. Only the profiles found valid during the last run are written back.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._valid: set[str] = set()
+        self._seen: set[str] = set()
+        if path.exists():
+            with path.open() as cache_file:
+                self._valid = set(json.load(cache_file))
+
+    @staticmethod
+    def create_key(directory: Path) -> str:
+        digest = hashlib.sha256(get_script_digest())
+        for path, _ in find_lut_files(directory):
+            digest.update(path.name.encode())
+            digest.update(hashlib.sha256(path.read_bytes()).digest())
+        return digest.hexdigest()
+
+    def __contains__(self, key: str) -> bool:
+        if key in self._valid:
+            self._seen.add(key)
+            return True
+        return False
+
+    def add(self, key: str) -> None:
+        self._seen.add(key)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("w") as cache_file:
+            json.dump(sorted(self._seen), cache_file)
+
+
+@lru_cache(maxsize=1)
+def get_script_digest() -> bytes:
+    return hashlib.sha256(Path(__file__).read_bytes()).digest()
+
+
 def get_color_mode(path: Path) -> str | None:
     """Return the color mode a LUT file holds, or None when it is not a known LUT file."""
     for suffix in LUT_SUFFIXES:
@@ -126,6 +187,25 @@ def find_profile_directories(root: Path) -> list[Path]:
     )
 
 
+def find_changed_profile_directories(root: Path, revision: str) -> list[Path]:
+    """Return the profile directories below root with LUT files changed since a git revision.
+
+    Profiles which lost a LUT file are included as well, their color mode combination changed.
+    """
+    process = subprocess.run(  # noqa: S603
+        ["git", "diff", "--name-only", "--relative", revision, "--", "."],  # noqa: S607
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if process.returncode != 0:
+        raise SystemExit(f"Could not list the files changed since {revision}: {process.stderr.strip()}")
+
+    changed = {(root / name).parent for name in process.stdout.splitlines() if get_color_mode(Path(name))}
+    return sorted(directory for directory in changed if directory.is_dir() and find_lut_files(directory))
+
+
 def find_lut_files(directory: Path) -> list[tuple[Path, str]]:
     """Return the LUT files directly inside a directory, paired with their color mode."""
     lut_files = []
@@ -137,17 +217,64 @@ def find_lut_files(directory: Path) -> list[tuple[Path, str]]:
     return sorted(lut_files, key=lambda entry: entry[1])
 
 
-def validate_library(root: Path) -> ValidationReport:
-    """Validate every profile below root."""
-    profiles = find_profile_directories(root)
+def validate_library(
+    root: Path,
+    *,
+    profiles: Sequence[Path] | None = None,
+    jobs: int | None = 1,
+    fail_fast: bool = False,
+    cache: ValidationCache | None = None,
+) -> ValidationReport:
+    """Validate every profile below root, or only the given profile directories.
+
+    Profiles are spread over `jobs` worker processes, or one per CPU when None. With `fail_fast`
+    validation stops at the first profile with errors, in the order of the profile directories.
+    """
+    directories = find_profile_directories(root) if profiles is None else sorted(profiles)
+    cache_keys: dict[Path, str] = {}
+    if cache is not None:
+        cache_keys = {directory: cache.create_key(directory) for directory in directories}
+        pending = [directory for directory in directories if cache_keys[directory] not in cache]
+    else:
+        pending = directories
+
     files = 0
+    validated = 0
     errors: list[LutValidationError] = []
-    for directory in profiles:
-        profile_files, profile_errors = validate_profile(directory, root)
+    for directory, (profile_files, profile_errors) in iterate_profile_results(pending, root, jobs):
         files += profile_files
+        validated += 1
         errors.extend(profile_errors)
+        if cache is not None and not profile_errors:
+            cache.add(cache_keys[directory])
+        if fail_fast and profile_errors:
+            break
+
+    return ValidationReport(
+        profiles=validated,
+        files=files,
+        errors=errors,
+        skipped=len(directories) - len(pending),
+    )
+
+
+def iterate_profile_results(
+    directories: Sequence[Path],
+    root: Path,
+    jobs: int | None,
+) -> Iterator[tuple[Path, tuple[int, list[LutValidationError]]]]:
+    """Validate profiles in worker processes, yielding the results in the order of the directories."""
+    validate = partial(validate_profile, root=root)
+    if jobs == 1 or len(directories) <= PROFILES_PER_TASK:
+        yield from zip(directories, map(validate, directories), strict=True)
+        return
 
-    return ValidationReport(profiles=len(profiles), files=files, errors=errors)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        try:
+            yield from zip(directories, executor.map(validate, directories, chunksize=PROFILES_PER_TASK), strict=True)
+        finally:
+            # Stopping early, like with fail fast, shouldn't wait for the remaining profiles.
+            executor.shutdown(cancel_futures=True)
 
 
 def validate_profile(directory: Path, root: Path) -> tuple[int, list[LutValidationError]]:
@@ -171,24 +298,74 @@ def validate_lut_file(path: Path, color_mode: str) -> list[str]:
     """Validate a single LUT file and return the problems found."""
     rules = COLOR_MODE_RULES[color_mode]
     with open_lut_file(path) as lut_file:
-        reader = csv.DictReader(lut_file)
-        missing_columns = [rule.name for rule in rules if rule.name not in (reader.fieldnames or [])]
+        header = next(csv.reader(lut_file), [])
+        # Like csv.DictReader the last column wins when a name is repeated.
+        columns = {name: index for index, name in enumerate(header)}
+        missing_columns = [rule.name for rule in rules if rule.name not in columns]
         if missing_columns:
             return [f"missing required columns: {', '.join(missing_columns)}"]
 
-        errors: list[str] = []
-        suppressed = 0
-        brightness_values: list[int] = []
-        for line_number, row in enumerate(reader, start=2):
-            for message in validate_row(row, rules):
-                if len(errors) < MAX_ERRORS_PER_FILE:
-                    errors.append(f"row {line_number}: {message}")
-                else:
-                    suppressed += 1
+        body = lut_file.read()
+
+    values = parse_valid_rows(body, rules, columns)
+    if values is not None:
+        return validate_max_brightness(values["bri"].tolist())
+
+    return validate_rows(csv.DictReader(io.StringIO(body), fieldnames=header), rules)
 
-            brightness = parse_int(row.get("bri"))
-            if brightness is not None:
-                brightness_values.append(brightness)
+
+def parse_valid_rows(body: str, rules: Sequence[ColumnRule], columns: Mapping[str, int]) -> np.ndarray | None:
+    """Parse all rows of a LUT at once, None when any row might violate the rules.
+
+    Everything accepted here is accepted by the rules as well, anything unusual, like
+    unparsable or out of range values and short rows, is left to validate_rows.
+    """
+    if not body.strip():
+        return None
+
+    try:
+        values = np.loadtxt(
+            io.StringIO(body),
+            dtype=np.dtype([(rule.name, COLUMN_DTYPES[rule.kind]) for rule in rules]),
+            delimiter=",",
+            comments=None,
+            quotechar='"',
+            usecols=[columns[rule.name] for rule in rules],
+            ndmin=1,
+        )
+    except ValueError:
+        return None
+
+    for rule in rules:
+        column = values[rule.name]
+        if rule.kind == "string":
+            if (column == "").any():
+                return None
+            continue
+
+        if rule.minimum is not None and (column < rule.minimum).any():
+            return None
+        if rule.maximum is not None and (column > rule.maximum).any():
+            return None
+
+    return values
+
+
+def validate_rows(reader: Iterable[Mapping[str, str | None]], rules: Sequence[ColumnRule]) -> list[str]:
+    """Validate the data rows of a LUT one by one, reporting the offending rows."""
+    errors: list[str] = []
+    suppressed = 0
+    brightness_values: list[int] = []
+    for line_number, row in enumerate(reader, start=2):
+        for message in validate_row(row, rules):
+            if len(errors) < MAX_ERRORS_PER_FILE:
+                errors.append(f"row {line_number}: {message}")
+            else:
+                suppressed += 1
+
+        brightness = parse_int(row.get("bri"))
+        if brightness is not None:
+            brightness_values.append(brightness)
 
     if suppressed:
         errors.append(f"... and {suppressed} more row errors")
@@ -253,6 +430,8 @@ def parse_int(value: str | None) -> int | None:
 def format_report(report: ValidationReport) -> str:
     """Render the validation outcome as human readable text."""
     lines = [f"Validated {report.files} LUT files in {report.profiles} profiles."]
+    if report.skipped:
+        lines.append(f"Skipped {report.skipped} unchanged profiles found valid before.")
     if not report.has_errors:
         lines.append("No errors found.")
         return "\n".join(lines)
@@ -271,12 +450,38 @@ def parse_args() -> argparse.Namespace:
         default=PROFILE_DIRECTORY,
         help="Profile library directory to validate.",
     )
+    parser.add_argument(
+        "--changed-since",
+        metavar="REVISION",
+        help="Only validate the profiles with LUT files changed since this git revision, like origin/master.",
+    )
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        help="JSON file remembering the valid profiles, so they are skipped as long as their LUT files don't change.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Number of worker processes, defaults to the number of CPUs.",
+    )
+    parser.add_argument("--fail-fast", action="store_true", help="Stop at the first profile with errors.")
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    report = validate_library(Path(args.path))
+    root = Path(args.path)
+    cache = ValidationCache(args.cache) if args.cache else None
+    report = validate_library(
+        root,
+        profiles=find_changed_profile_directories(root, args.changed_since) if args.changed_since else None,
+        jobs=args.jobs,
+        fail_fast=args.fail_fast,
+        cache=cache,
+    )
+    if cache is not None:
+        cache.save()
     print(format_report(report))  # noqa: T201
     if report.has_errors:
         raise SystemExit(1)